@@ -1 +1,5 @@
-from .utils import get_samples, check_numeric
\ No newline at end of file
+from .utils import get_samples, check_numeric
+from .schema import DatasetSchema, numeric_column
+from .encoding import EncodedData, MappedEncodedData, precision_types
+from .distance import DistanceEngine
+from .steps_history import StepsHistory
@@ -0,0 +1,10 @@
+from .transactions import TransactionEncoder
+from .bitsets import ItemBitsets
+from .itemsets import FrequentItemsets
+from .levels import LevelRecord, Levels
+from .miner import ItemsetsMiner
+from .apriori import Apriori
+from .apriori_tid import AprioriTID
+from .fp_tree import FPTree
+from .fp_growth import FPGrowth
+from .rules import ItemsetIndex, AssociationRules
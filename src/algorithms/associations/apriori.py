@@ -0,0 +1,160 @@
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import DatasetSchema
+from algorithms.config import MAX_ITEMSETS_BLOCK_BYTES
+from .bitsets import ItemBitsets
+from .itemsets import FrequentItemsets
+from .miner import ItemsetsMiner
+from .transactions import chunks_of, item_types
+
+
+def itemset_keys(itemsets: np.ndarray) -> np.ndarray:
+    """ rows of a matrix of itemsets as single values, which can be compared and searched """
+    itemsets = np.ascontiguousarray(itemsets)
+    return itemsets.view(np.dtype((np.void, itemsets.dtype.itemsize * itemsets.shape[1])))[:, 0]
+
+
+def prefix_groups(itemsets: np.ndarray) -> np.ndarray:
+    """ for sorted itemsets - which of them starts a group with a new prefix (all items but the last one) """
+    new_group = np.ones(itemsets.shape[0], dtype=bool)
+    new_group[1:] = np.any(itemsets[1:, :-1] != itemsets[:-1, :-1], axis=1)
+    return new_group
+
+
+def pairs_in_groups(new_group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ positions of all pairs of elements of the same group (first < second), groups are adjacent """
+    size = new_group.size
+    group_ends = np.append(np.flatnonzero(new_group)[1:], size)
+    ends = group_ends[np.cumsum(new_group) - 1]
+    # every element is paired with the next elements of its group
+    partners = ends - np.arange(size) - 1
+    first = np.repeat(np.arange(size), partners)
+    first_partner = np.cumsum(partners) - partners
+    second = first + 1 + np.arange(first.size) - np.repeat(first_partner, partners)
+    return first, second
+
+
+def join(frequent: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+        Candidates of length k + 1 from frequent itemsets of length k (rows of sorted items, sorted
+        lexicographically) - every two itemsets with the same prefix of k - 1 items give the prefix and their
+        last items. Itemsets with the same prefix are adjacent, so pairs are generated for all groups at once
+        and the candidates are sorted as well. Returns candidates and positions of the two joined itemsets.
+    """
+    if frequent.shape[0] < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros((0, frequent.shape[1] + 1), dtype=frequent.dtype), empty, empty
+    left, right = pairs_in_groups(prefix_groups(frequent))
+    return np.hstack([frequent[left], frequent[right, -1:]]), left, right
+
+
+def frequent_subsets(candidates: np.ndarray, frequent: np.ndarray) -> np.ndarray:
+    """ which candidates have all subsets of length k frequent (the two joined ones are) """
+    keys = itemset_keys(frequent)
+    kept = np.ones(candidates.shape[0], dtype=bool)
+    for removed in range(candidates.shape[1] - 2):
+        subsets = np.delete(candidates[kept], removed, axis=1)
+        kept[kept] = np.isin(itemset_keys(subsets), keys)
+    return kept
+
+
+def prune(candidates: np.ndarray, frequent: np.ndarray) -> np.ndarray:
+    return candidates[frequent_subsets(candidates, frequent)]
+
+
+class Apriori(ItemsetsMiner):
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], min_support: float = 0.1,
+                 max_length: Optional[int] = None, item_type: item_types = 'pairs',
+                 max_bytes: int = MAX_ITEMSETS_BLOCK_BYTES, schema: Optional[DatasetSchema] = None):
+        """
+            Frequent itemsets (contained in at least min_support of the transactions) found level by level,
+            candidates of length k + 1 are joined from frequent itemsets of length k with a common prefix
+            and pruned when any of their subsets is not frequent.
+            Support is counted on the vertical representation (see ItemBitsets) of the frequent items -
+            AND of the bit arrays of items of a candidate and the count of set bits, for blocks of candidates.
+            Rows of a data frame are encoded as transactions once (see TransactionEncoder) and their bit arrays
+            are kept for all levels. Chunked data is counted chunk by chunk - every level is one pass
+            over the chunks, which holds the bit arrays of one chunk at a time.
+        """
+        super().__init__(data, min_support, max_length, item_type, max_bytes, schema)
+        self.bitsets: Optional[ItemBitsets] = None
+
+    def prepare(self, counts: np.ndarray, offsets: Optional[np.ndarray], values: Optional[np.ndarray]):
+        """ bit arrays of the transactions of a data frame (offsets and values of items), kept for all levels """
+        if offsets is not None:
+            self.bitsets = ItemBitsets(offsets, values, self.ranks, self.frequent_items.size)
+
+    def nbytes(self) -> int:
+        """ memory of the representation of transactions kept for all levels """
+        return self.bitsets.nbytes() if self.bitsets is not None else 0
+
+    def segments(self) -> Iterator[ItemBitsets]:
+        """ bit arrays of all transactions of a data frame, or of every chunk """
+        if self.bitsets is not None:
+            yield self.bitsets
+            return
+        for chunk in chunks_of(self.data):
+            offsets, values = self.encoder.encode(chunk)
+            yield ItemBitsets(offsets, values, self.ranks, self.frequent_items.size)
+
+    def count(self, frequent: np.ndarray, candidates: np.ndarray, left: np.ndarray,
+              right: np.ndarray) -> Tuple[np.ndarray, int]:
+        """
+            supports of candidates (rows of ranks of items) joined from frequent itemsets at positions left
+            and right, and the largest memory of bit arrays
+        """
+        counts = np.zeros(candidates.shape[0], dtype=np.int64)
+        nbytes = 0
+        for segment in self.segments():
+            counts += segment.supports(candidates, self.max_bytes)
+            nbytes = max(nbytes, segment.nbytes())
+        return counts, nbytes
+
+    def run(self, with_steps: bool) -> Tuple[FrequentItemsets, pd.DataFrame]:
+        """ frequent itemsets and telemetry of the levels, there are no steps to visualize """
+        self.levels.start()
+        self.bitsets = None
+        counts = self.count_items()
+        self.levels.record(1, counts.size, self.frequent_items.size, self.nbytes(), self.transactions)
+        frequent = np.arange(self.frequent_items.size)[:, np.newaxis]
+        found = [(frequent, counts[self.frequent_items])]
+        while frequent.shape[0] > 1 and (self.max_length is None or frequent.shape[1] < self.max_length):
+            candidates, left, right = join(frequent)
+            pruned = frequent_subsets(candidates, frequent)
+            candidates, left, right = candidates[pruned], left[pruned], right[pruned]
+            if not candidates.shape[0]:
+                break
+            counted = self.counted_transactions()
+            candidates_counts, nbytes = self.count(frequent, candidates, left, right)
+            kept = candidates_counts >= self.min_count
+            frequent = candidates[kept]
+            self.levels.record(candidates.shape[1], candidates.shape[0], frequent.shape[0],
+                               nbytes + candidates.nbytes, counted)
+            self.keep(kept)
+            if frequent.shape[0]:
+                found.append((frequent, candidates_counts[kept]))
+        levels = [(self.frequent_items[itemsets], itemset_counts) for itemsets, itemset_counts in found]
+        self.itemsets = FrequentItemsets.from_levels(levels, self.encoder.names, self.transactions)
+        return self.itemsets, self.levels.to_frame()
+
+    def counted_transactions(self) -> int:
+        """ number of transactions searched for candidates on the next level """
+        return self.transactions
+
+    def keep(self, kept: np.ndarray):
+        """ called with the frequent candidates of a level, after counting them """
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: transactions of a data frame (or of a chunk) with all items
+            and their bit arrays, and a block of bit arrays of candidates
+        """
+        rows, columns, items = self.get_data_size()
+        return {
+            'transactions': 2 * rows * columns * np.dtype(np.int64).itemsize,
+            'bitsets': ItemBitsets.estimate_bytes(rows, items),
+            'candidates': self.max_bytes
+        }
@@ -0,0 +1,132 @@
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import DatasetSchema
+from algorithms.config import MAX_ITEMSETS_BLOCK_BYTES
+from .apriori import Apriori, prefix_groups, pairs_in_groups
+from .transactions import chunks_of, item_types
+
+
+def sorted_lists(transactions: np.ndarray, values: np.ndarray, num_transactions: int,
+                 min_length: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Flat lists (offsets and values) of transactions with at least min_length values, from values
+        and their transactions in any order. Values of a transaction are sorted.
+    """
+    lengths = np.bincount(transactions, minlength=num_transactions)
+    kept = lengths >= min_length
+    kept_values = kept[transactions]
+    transactions, values = transactions[kept_values], values[kept_values]
+    order = np.lexsort((values, transactions))
+    offsets = np.zeros(np.count_nonzero(kept) + 1, dtype=np.int64)
+    np.cumsum(lengths[kept], out=offsets[1:])
+    return offsets, values[order]
+
+
+class AprioriTID(Apriori):
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], min_support: float = 0.1,
+                 max_length: Optional[int] = None, item_type: item_types = 'pairs',
+                 max_bytes: int = MAX_ITEMSETS_BLOCK_BYTES, schema: Optional[DatasetSchema] = None):
+        """
+            Apriori which counts candidates of length k + 1 in lists of frequent itemsets of length k contained
+            in every transaction, instead of in the items of transactions. A transaction contains a candidate
+            when it contains both itemsets joined into it, so the lists of the next level are built
+            from pairs of itemsets with a common prefix in the current lists. The lists of all transactions
+            are kept in flat arrays - offsets of the transactions and positions of the frequent itemsets
+            (sorted within a transaction). A transaction with fewer than two itemsets in its list contains
+            no candidate, so it is dropped. Pairs are generated for blocks of transactions of at most
+            max_bytes.
+            The lists shrink from level to level when frequent itemsets are rare, then AprioriTID needs
+            less memory than the bit arrays of Apriori - the memory of every level is in its telemetry.
+            Chunked data is read twice, to count items and to build the lists of frequent items.
+        """
+        super().__init__(data, min_support, max_length, item_type, max_bytes, schema)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.values = np.zeros(0, dtype=np.int64)
+        # positions of the lists with candidates of the last counted level, and in which transactions they are
+        self.found_transactions = np.zeros(0, dtype=np.int64)
+        self.found_candidates = np.zeros(0, dtype=np.int64)
+
+    def prepare(self, counts: np.ndarray, offsets: Optional[np.ndarray], values: Optional[np.ndarray]):
+        """ lists of frequent items of transactions """
+        parts = [(offsets, values)] if offsets is not None else map(self.encoder.encode, chunks_of(self.data))
+        transactions, ranks, start = [], [], 0
+        for chunk_offsets, chunk_values in parts:
+            chunk_ranks = self.ranks[chunk_values]
+            frequent = chunk_ranks >= 0
+            rows = np.repeat(np.arange(start, start + chunk_offsets.size - 1), np.diff(chunk_offsets))
+            transactions.append(rows[frequent])
+            ranks.append(chunk_ranks[frequent])
+            start += chunk_offsets.size - 1
+        self.offsets, self.values = sorted_lists(np.concatenate(transactions + [np.zeros(0, dtype=np.int64)]),
+                                                 np.concatenate(ranks + [np.zeros(0, dtype=np.int64)]), start)
+
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.values.nbytes
+
+    def counted_transactions(self) -> int:
+        return self.offsets.size - 1
+
+    def blocks(self, partners: np.ndarray):
+        """ ranges of transactions with at most max_bytes of pairs (at least one transaction) """
+        ends = np.cumsum(partners)[self.offsets[1:] - 1] if partners.size else np.zeros(0, dtype=np.int64)
+        # position of a pair: the itemsets of both positions, the transaction and the candidate
+        pairs = max(1, self.max_bytes // (4 * np.dtype(np.int64).itemsize))
+        start, size = 0, self.offsets.size - 1
+        while start < size:
+            before = ends[start - 1] if start > 0 else 0
+            stop = max(start + 1, int(np.searchsorted(ends, before + pairs, side='right')))
+            yield start, stop
+            start = stop
+
+    def count(self, frequent: np.ndarray, candidates: np.ndarray, left: np.ndarray,
+              right: np.ndarray) -> Tuple[np.ndarray, int]:
+        """ supports of candidates found in the lists of pairs of their joined itemsets, and memory of the lists """
+        size = frequent.shape[0]
+        keys = left * size + right
+        group = np.cumsum(prefix_groups(frequent)) - 1
+        transactions = np.repeat(np.arange(self.offsets.size - 1), np.diff(self.offsets))
+        # itemsets of the same transaction with the same prefix are adjacent, as the lists are sorted
+        new_group = np.ones(self.values.size, dtype=bool)
+        new_group[1:] = (transactions[1:] != transactions[:-1]) | (group[self.values[1:]] != group[self.values[:-1]])
+        group_ends = np.append(np.flatnonzero(new_group)[1:], self.values.size)
+        partners = group_ends[np.cumsum(new_group) - 1] - np.arange(self.values.size) - 1
+        counts = np.zeros(candidates.shape[0], dtype=np.int64)
+        found_transactions, found_candidates = [], []
+        for start, stop in self.blocks(partners):
+            first_value, last_value = self.offsets[start], self.offsets[stop]
+            first, second = pairs_in_groups(new_group[first_value:last_value])
+            first, second = first + first_value, second + first_value
+            pair_keys = self.values[first] * size + self.values[second]
+            positions = np.minimum(np.searchsorted(keys, pair_keys), keys.size - 1)
+            # pairs with an infrequent subset were pruned from candidates
+            matched = keys[positions] == pair_keys
+            positions = positions[matched]
+            counts += np.bincount(positions, minlength=candidates.shape[0])
+            found_transactions.append(transactions[first[matched]])
+            found_candidates.append(positions)
+        self.found_transactions = np.concatenate(found_transactions + [np.zeros(0, dtype=np.int64)])
+        self.found_candidates = np.concatenate(found_candidates + [np.zeros(0, dtype=np.int64)])
+        return counts, self.nbytes()
+
+    def keep(self, kept: np.ndarray):
+        """ lists of the frequent candidates, without transactions which have fewer than two of them """
+        positions = np.cumsum(kept) - 1
+        frequent = kept[self.found_candidates]
+        self.offsets, self.values = sorted_lists(self.found_transactions[frequent],
+                                                 positions[self.found_candidates[frequent]], self.offsets.size - 1)
+        self.found_transactions = self.found_candidates = np.zeros(0, dtype=np.int64)
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: transactions with all items and the lists of their frequent items
+            (at most as large), and a block of pairs of itemsets
+        """
+        working_set = super().get_working_set()
+        return {
+            'transactions': working_set['transactions'],
+            'lists': working_set['transactions'] // 2,
+            'pairs': self.max_bytes
+        }
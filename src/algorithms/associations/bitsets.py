@@ -0,0 +1,73 @@
+import numpy as np
+
+from algorithms.config import MAX_ITEMSETS_BLOCK_BYTES
+
+# number of set bits of every byte, for NumPy without bitwise_count
+BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """ number of set bits of uint64 words, summed along the last axis """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return BYTE_COUNTS[np.ascontiguousarray(words).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+class ItemBitsets:
+    def __init__(self, offsets: np.ndarray, values: np.ndarray, ranks: np.ndarray, num_items: int):
+        """
+            Vertical representation of transactions - for every item a bit array over the transactions
+            (packed into uint64 words, bit t of the array is set when transaction t contains the item).
+            Transactions are given as offsets and values (see TransactionEncoder), ranks maps items
+            of the values to rows of the bit arrays (-1 for items which are not kept, e.g. infrequent ones).
+            Support of an itemset is the number of set bits of the AND of the arrays of its items.
+        """
+        self.transactions = offsets.size - 1
+        self.words = (self.transactions + 63) // 64
+        self.bits = np.zeros((num_items, self.words), dtype=np.uint64)
+        rows = ranks[values] if values.size else values
+        columns = np.repeat(np.arange(self.transactions), np.diff(offsets))
+        kept = rows >= 0
+        rows, columns = rows[kept], columns[kept]
+        # an item occurs once in a transaction, so bits of a word are summed without carries
+        keys = rows * self.words + (columns >> 6)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        bits = np.left_shift(np.uint64(1), (columns[order] & 63).astype(np.uint64))
+        if keys.size:
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            self.bits.ravel()[keys[starts]] = np.add.reduceat(bits, starts)
+
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def supports(self, candidates: np.ndarray, max_bytes: int = MAX_ITEMSETS_BLOCK_BYTES) -> np.ndarray:
+        """
+            number of transactions containing every candidate itemset (rows of candidates - ranks of items),
+            candidates are processed in blocks of at most max_bytes of bit arrays.
+            Adjacent candidates with the same items but the last one (as joined by Apriori) share the AND
+            of the arrays of these items, so it is computed once for all of them.
+        """
+        counts = np.zeros(candidates.shape[0], dtype=np.int64)
+        if not self.words or not candidates.shape[0]:
+            return counts
+        block = max(1, max_bytes // (16 * self.words))
+        for start in range(0, candidates.shape[0], block):
+            rows = candidates[start:start + block]
+            if rows.shape[1] == 1:
+                counts[start:start + block] = popcount(self.bits[rows[:, 0]])
+                continue
+            new_prefix = np.ones(rows.shape[0], dtype=bool)
+            new_prefix[1:] = np.any(rows[1:, :-1] != rows[:-1, :-1], axis=1)
+            prefixes = rows[new_prefix, :-1]
+            common = self.bits[prefixes[:, 0]]
+            for j in range(1, prefixes.shape[1]):
+                np.bitwise_and(common, self.bits[prefixes[:, j]], out=common)
+            common = common[np.cumsum(new_prefix) - 1]
+            np.bitwise_and(common, self.bits[rows[:, -1]], out=common)
+            counts[start:start + block] = popcount(common)
+        return counts
+
+    @staticmethod
+    def estimate_bytes(transactions: int, num_items: int) -> int:
+        return num_items * ((transactions + 63) // 64) * np.dtype(np.uint64).itemsize
@@ -0,0 +1,226 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import DatasetSchema
+from algorithms.config import MAX_ITEMSETS_BLOCK_BYTES
+from .apriori import itemset_keys
+from .fp_tree import FPTree
+from .itemsets import FrequentItemsets
+from .miner import ItemsetsMiner
+from .transactions import chunks_of, item_types
+
+
+class Projections:
+    def __init__(self, min_count: int, max_length: Optional[int]):
+        """
+            Mining of conditional FP-trees - itemsets found by length (lists of blocks of rows of ranks
+            and their counts) and telemetry of every length: number of counted items (candidates), number of rows
+            of conditional pattern bases and the largest memory of a conditional tree.
+        """
+        self.min_count = min_count
+        self.max_length = max_length
+        self.found: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self.stats: Dict[int, List[int]] = {}
+
+    def add(self, itemsets: np.ndarray, counts: np.ndarray):
+        if itemsets.shape[0]:
+            self.found.setdefault(itemsets.shape[1], []).append((itemsets, counts))
+
+    def record(self, length: int, candidates: int, rows: int, nbytes: int):
+        stats = self.stats.setdefault(length, [0, 0, 0])
+        stats[0] += candidates
+        stats[1] += rows
+        stats[2] = max(stats[2], nbytes)
+
+    def merge(self, other: 'Projections'):
+        for length, blocks in other.found.items():
+            self.found.setdefault(length, []).extend(blocks)
+        for length, (candidates, rows, nbytes) in other.stats.items():
+            self.record(length, candidates, rows, nbytes)
+
+    def can_extend(self, suffix: Tuple[int, ...]) -> bool:
+        return self.max_length is None or len(suffix) < self.max_length
+
+    def mine(self, tree: FPTree, suffix: Tuple[int, ...]):
+        """
+            itemsets of a conditional tree of the suffix (itemsets of the suffix and single items of the tree
+            are already found) - all combinations of a single path at once, otherwise the projection of every item
+        """
+        if not self.can_extend(suffix + (0,)):
+            return
+        if tree.is_single_path():
+            self.mine_path(tree, suffix)
+            return
+        for item in tree.items():
+            self.mine_item(tree, suffix, int(item))
+
+    def mine_path(self, tree: FPTree, suffix: Tuple[int, ...]):
+        """ itemsets of at least two items of a single path, a combination has the count of its deepest node """
+        size = len(tree)
+        longest = size if self.max_length is None else min(size, self.max_length - len(suffix))
+        if longest < 2:
+            return
+        for length in range(2, longest + 1):
+            nodes = np.array(list(combinations(range(size), length)), dtype=np.int64)
+            itemsets = np.hstack([tree.item[nodes], np.tile(np.array(suffix, dtype=np.int64), (nodes.shape[0], 1))])
+            self.record(length + len(suffix), nodes.shape[0], 0, 0)
+            self.add(itemsets, tree.count[nodes[:, -1]])
+
+    def mine_item(self, tree: FPTree, suffix: Tuple[int, ...], item: int):
+        """
+            frequent items of the conditional pattern base of the item (found with the item and the suffix)
+            and the itemsets of its conditional tree of these items
+        """
+        rows, weights = tree.prefix_paths(item)
+        if not rows.shape[0]:
+            return
+        suffix = (item,) + suffix
+        padding = tree.num_items
+        supports = np.bincount(rows.ravel(), weights=np.repeat(weights, rows.shape[1]),
+                               minlength=padding + 1)[:padding].astype(np.int64)
+        frequent = supports >= self.min_count
+        counted = np.count_nonzero(supports)
+        items = np.flatnonzero(frequent)
+        found = np.hstack([items[:, np.newaxis], np.tile(np.array(suffix, dtype=np.int64), (items.size, 1))])
+        self.add(found, supports[items])
+        if not items.size:
+            self.record(len(suffix) + 1, counted, rows.shape[0], 0)
+            return
+        # infrequent items are moved to the padding, the rest keeps its order
+        rows[~np.append(frequent, True)[rows]] = padding
+        rows.sort(axis=1)
+        conditional = FPTree.from_rows(rows, weights, padding)
+        self.record(len(suffix) + 1, counted, rows.shape[0], conditional.nbytes())
+        self.mine(conditional, suffix)
+
+
+def init_fp_worker(tree: FPTree, min_count: int, max_length: Optional[int]):
+    global worker_tree, worker_min_count, worker_max_length
+    worker_tree, worker_min_count, worker_max_length = tree, min_count, max_length
+
+
+def mine_header_item(item: int) -> Projections:
+    projections = Projections(worker_min_count, worker_max_length)
+    projections.mine_item(worker_tree, (), item)
+    return projections
+
+
+class FPGrowth(ItemsetsMiner):
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], min_support: float = 0.1,
+                 max_length: Optional[int] = None, item_type: item_types = 'pairs', processes: int = 1,
+                 max_bytes: int = MAX_ITEMSETS_BLOCK_BYTES, schema: Optional[DatasetSchema] = None):
+        """
+            Frequent itemsets without candidates - transactions of frequent items (sorted by decreasing support)
+            are stored in an FP-tree (see FPTree), then for every item its conditional pattern base (paths
+            to its nodes) is projected into a conditional tree of the items frequent in the base, which is mined
+            recursively. A tree of a single path gives all combinations of its items at once.
+            Items of the whole tree are independent, with processes > 1 they are mined in worker processes
+            (each gets a copy of the tree).
+            The second pass over the data encodes blocks of at most max_bytes of transactions as rows
+            of frequent items and merges equal rows before building the tree.
+            Itemsets are ordered as in Apriori, by length and then items. The levels telemetry has one record
+            per length of itemsets, made after mining.
+        """
+        super().__init__(data, min_support, max_length, item_type, max_bytes, schema)
+        if processes < 1:
+            raise TypeError(f"{processes} is invalid value of processes parameter")
+        self.processes = processes
+        # frequent items in the order of the tree (decreasing support) and positions of the frequent items in it
+        self.order = np.zeros(0, dtype=np.int64)
+        self.tree: Optional[FPTree] = None
+
+    def prepare(self, counts: np.ndarray, offsets: Optional[np.ndarray], values: Optional[np.ndarray]):
+        """ the FP-tree of all transactions, the second pass over chunked data """
+        self.order = np.argsort(-counts[self.frequent_items], kind='stable')
+        tree_ranks = np.full(self.encoder.num_items, -1, dtype=np.int64)
+        tree_ranks[self.frequent_items[self.order]] = np.arange(self.order.size)
+        parts = [(offsets, values)] if offsets is not None else map(self.encoder.encode, chunks_of(self.data))
+        size = self.order.size
+        blocks = [block for chunk_offsets, chunk_values in parts
+                  for block in self.rows_of(chunk_offsets, tree_ranks[chunk_values], size)]
+        width = max([rows.shape[1] for rows, _ in blocks] + [0])
+        rows = np.full((sum(rows.shape[0] for rows, _ in blocks), width), size, dtype=np.int32)
+        start = 0
+        for block, _ in blocks:
+            rows[start:start + block.shape[0], :block.shape[1]] = block
+            start += block.shape[0]
+        weights = np.concatenate([weights for _, weights in blocks] + [np.zeros(0, dtype=np.int64)])
+        self.tree = FPTree.from_rows(rows, weights, size)
+
+    def rows_of(self, offsets: np.ndarray, ranks: np.ndarray, padding: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+            transactions (offsets and ranks of items, -1 for infrequent ones) as rows of increasing ranks
+            padded with padding, in blocks of at most max_bytes - distinct rows of a block and their counts
+        """
+        transactions = np.repeat(np.arange(offsets.size - 1), np.diff(offsets))
+        frequent = ranks >= 0
+        transactions, ranks = transactions[frequent], ranks[frequent]
+        if not ranks.size:
+            return
+        order = np.lexsort((ranks, transactions))
+        transactions, ranks = transactions[order], ranks[order]
+        lengths = np.bincount(transactions, minlength=offsets.size - 1)
+        starts = np.cumsum(lengths) - lengths
+        columns = np.arange(ranks.size) - starts[transactions]
+        width = int(lengths.max())
+        block_rows = max(1, self.max_bytes // (width * np.dtype(np.int32).itemsize))
+        for start in range(0, offsets.size - 1, block_rows):
+            stop = min(start + block_rows, offsets.size - 1)
+            block = np.full((stop - start, width), padding, dtype=np.int32)
+            values = slice(starts[start], starts[stop - 1] + lengths[stop - 1])
+            block[transactions[values] - start, columns[values]] = ranks[values]
+            keys, counts = np.unique(itemset_keys(block), return_counts=True)
+            yield keys.view(np.int32).reshape(keys.size, width), counts
+
+    def run(self, with_steps: bool) -> Tuple[FrequentItemsets, pd.DataFrame]:
+        """ frequent itemsets and telemetry of the lengths of itemsets, there are no steps to visualize """
+        self.levels.start()
+        self.tree = None
+        counts = self.count_items()
+        self.levels.record(1, counts.size, self.frequent_items.size, self.tree.nbytes(), self.transactions)
+        projections = Projections(self.min_count, self.max_length)
+        projections.add(np.arange(self.order.size)[:, np.newaxis], counts[self.frequent_items[self.order]])
+        items = self.tree.items()
+        if self.processes == 1 or items.size < 2 or self.tree.is_single_path():
+            projections.mine(self.tree, ())
+        elif projections.can_extend((0,)):
+            with ProcessPoolExecutor(max_workers=min(self.processes, items.size), initializer=init_fp_worker,
+                                     initargs=(self.tree, self.min_count, self.max_length)) as executor:
+                for item_projections in executor.map(mine_header_item, items.tolist()):
+                    projections.merge(item_projections)
+        self.itemsets = FrequentItemsets.from_levels(self.sorted_levels(projections), self.encoder.names,
+                                                     self.transactions)
+        return self.itemsets, self.levels.to_frame()
+
+    def sorted_levels(self, projections: Projections) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """ itemsets of every length as sorted items, in lexicographic order, and records of the lengths """
+        levels = []
+        for length in sorted(set(projections.found) | set(projections.stats)):
+            blocks = projections.found.get(length, [])
+            itemsets = np.concatenate([ranks for ranks, _ in blocks] + [np.zeros((0, length), dtype=np.int64)])
+            itemsets = np.sort(self.frequent_items[self.order[itemsets]], axis=1)
+            counts = np.concatenate([counts for _, counts in blocks] + [np.zeros(0, dtype=np.int64)])
+            order = np.lexsort(itemsets.T[::-1])
+            if length > 1:
+                candidates, rows, nbytes = projections.stats.get(length, [0, 0, 0])
+                self.levels.record(length, candidates, itemsets.shape[0], nbytes, rows)
+            if itemsets.shape[0]:
+                levels.append((itemsets[order], counts[order]))
+        return levels
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: transactions of a data frame (or of a chunk) with all items, a block
+            of rows of transactions and the tree (at most a node per item of every transaction)
+        """
+        rows, columns, _ = self.get_data_size()
+        node = 4 * np.dtype(np.int64).itemsize
+        return {
+            'transactions': 2 * rows * columns * np.dtype(np.int64).itemsize,
+            'rows': self.max_bytes,
+            'tree': rows * columns * node
+        }
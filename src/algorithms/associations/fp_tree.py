@@ -0,0 +1,105 @@
+from typing import Tuple
+
+import numpy as np
+
+from .apriori import itemset_keys
+
+
+class FPTree:
+    def __init__(self, item: np.ndarray, count: np.ndarray, parent: np.ndarray, depth: np.ndarray,
+                 num_items: int):
+        """
+            FP-tree stored as parallel arrays of its nodes instead of node objects: item (rank) of the node,
+            count of transactions through the node, parent (-1 for children of the root) and depth (0 for them).
+            Nodes are numbered in preorder, so a parent goes before its children.
+            Node links of every item are kept as one array of nodes sorted by items (links), where nodes
+            of item i are links[header[i]:header[i + 1]] - in the order of the tree.
+            Items are ranks 0 ... num_items - 1, paths from the root have increasing ranks.
+        """
+        self.item = item
+        self.count = count
+        self.parent = parent
+        self.depth = depth
+        self.num_items = num_items
+        self.links = np.argsort(item, kind='stable')
+        self.header = np.zeros(num_items + 1, dtype=np.int64)
+        np.cumsum(np.bincount(item, minlength=num_items), out=self.header[1:])
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, weights: np.ndarray, num_items: int) -> 'FPTree':
+        """
+            Tree of weighted transactions - rows of increasing ranks, padded with num_items at the end.
+            Equal rows are merged first, then sorted rows share the nodes of their common prefix with the previous
+            row, so new nodes start at the length of the prefix. A node shared by some rows was created
+            by the first of them, which is found for all rows at once, column by column.
+        """
+        lengths = np.count_nonzero(rows < num_items, axis=1)
+        rows, weights, lengths = rows[lengths > 0], weights[lengths > 0], lengths[lengths > 0]
+        if not rows.shape[0]:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, empty, empty, num_items)
+        rows = np.ascontiguousarray(rows[:, :lengths.max()])
+        keys, inverse = np.unique(itemset_keys(rows), return_inverse=True)
+        weights = np.bincount(inverse.ravel(), weights=weights, minlength=keys.size).astype(np.int64)
+        rows = keys.view(rows.dtype).reshape(keys.size, rows.shape[1])
+        lengths = np.count_nonzero(rows < num_items, axis=1)
+        width = rows.shape[1]
+        # length of the common prefix with the previous row
+        prefix = np.zeros(rows.shape[0], dtype=np.int64)
+        if rows.shape[0] > 1:
+            differs = rows[1:] != rows[:-1]
+            prefix[1:] = np.where(differs.any(axis=1), differs.argmax(axis=1), width)
+        columns = np.arange(width)
+        new = (columns >= prefix[:, np.newaxis]) & (columns < lengths[:, np.newaxis])
+        ids = np.cumsum(new).reshape(new.shape) - 1
+        nodes = np.full(rows.shape, -1, dtype=np.int64)
+        positions = np.arange(rows.shape[0])
+        for column in range(width):
+            creator = np.maximum.accumulate(np.where(new[:, column], positions, 0))
+            nodes[:, column] = np.where(column < lengths, ids[creator, column], -1)
+        size = int(new.sum())
+        item = rows[new].astype(np.int64)
+        depth = np.nonzero(new)[1].astype(np.int64)
+        parent = np.full(size, -1, dtype=np.int64)
+        inner = new[:, 1:]
+        parent[ids[:, 1:][inner]] = nodes[:, :-1][inner]
+        valid = nodes >= 0
+        count = np.bincount(nodes[valid], weights=np.broadcast_to(weights[:, np.newaxis], rows.shape)[valid],
+                            minlength=size).astype(np.int64)
+        return cls(item, count, parent, depth, num_items)
+
+    def __len__(self) -> int:
+        return self.item.size
+
+    def nbytes(self) -> int:
+        return self.item.nbytes + self.count.nbytes + self.parent.nbytes + self.depth.nbytes + \
+            self.links.nbytes + self.header.nbytes
+
+    def items(self) -> np.ndarray:
+        """ ranks of the items which have nodes, decreasing - the order of mining """
+        return np.flatnonzero(np.diff(self.header))[::-1]
+
+    def supports(self) -> np.ndarray:
+        """ counts of transactions containing every item """
+        return np.bincount(self.item, weights=self.count, minlength=self.num_items).astype(np.int64)
+
+    def is_single_path(self) -> bool:
+        return bool(np.all(self.parent == np.arange(-1, len(self) - 1)))
+
+    def prefix_paths(self, item: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            conditional pattern base of an item - paths from the root to the parents of its nodes
+            (padded rows of ranks) weighted by the counts of the nodes
+        """
+        nodes = self.links[self.header[item]:self.header[item + 1]]
+        nodes = nodes[self.depth[nodes] > 0]
+        width = int(self.depth[nodes].max()) if nodes.size else 0
+        rows = np.full((nodes.size, width), self.num_items, dtype=np.int32)
+        current = self.parent[nodes]
+        active = np.arange(nodes.size)
+        while active.size:
+            rows[active, self.depth[current]] = self.item[current]
+            current = self.parent[current]
+            climbing = current >= 0
+            active, current = active[climbing], current[climbing]
+        return rows, self.count[nodes]
@@ -0,0 +1,60 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class FrequentItemsets:
+    def __init__(self, offsets: np.ndarray, items: np.ndarray, counts: np.ndarray, names: List[str],
+                 transactions: int):
+        """
+            Columnar table of frequent itemsets - items of all itemsets one after another (items, numbers
+            of names), offsets - start of every itemset in items (and the end of the last one), counts -
+            number of transactions containing every itemset, out of all transactions.
+            Items of an itemset are sorted by their numbers.
+        """
+        self.offsets = offsets
+        self.items = items
+        self.counts = counts
+        self.names = names
+        self.transactions = transactions
+
+    @classmethod
+    def from_levels(cls, levels: List[Tuple[np.ndarray, np.ndarray]], names: List[str],
+                    transactions: int) -> 'FrequentItemsets':
+        """ itemsets of levels - (itemsets x length) matrices of sorted items and their counts """
+        lengths = [np.full(itemsets.shape[0], itemsets.shape[1], dtype=np.int64) for itemsets, _ in levels]
+        offsets = np.zeros(sum(length.size for length in lengths) + 1, dtype=np.int64)
+        if lengths:
+            np.cumsum(np.concatenate(lengths), out=offsets[1:])
+        items = np.concatenate([itemsets.ravel() for itemsets, _ in levels] + [np.zeros(0, dtype=np.int64)])
+        counts = np.concatenate([level_counts for _, level_counts in levels] + [np.zeros(0, dtype=np.int64)])
+        return cls(offsets, items.astype(np.int64), counts.astype(np.int64), names, transactions)
+
+    def __len__(self) -> int:
+        return self.counts.size
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def itemset(self, i: int) -> Tuple[int, ...]:
+        return tuple(self.items[self.offsets[i]:self.offsets[i + 1]].tolist())
+
+    def support(self) -> np.ndarray:
+        return self.counts / self.transactions if self.transactions else np.zeros(self.counts.size)
+
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.items.nbytes + self.counts.nbytes
+
+    def to_frame(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """ itemsets start ... stop - 1 as a table of names of their items, lengths, counts and supports """
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = min(start, stop)
+        names = np.array(self.names + [''], dtype=object)
+        itemsets = [', '.join(names[self.items[self.offsets[i]:self.offsets[i + 1]]]) for i in range(start, stop)]
+        return pd.DataFrame({
+            'itemset': itemsets,
+            'length': self.lengths()[start:stop],
+            'count': self.counts[start:stop],
+            'support': self.support()[start:stop]
+        }, index=pd.RangeIndex(start, stop))
@@ -0,0 +1,44 @@
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+class LevelRecord:
+    def __init__(self, level: int, wall_time: float, candidates: int, frequent: int, nbytes: int,
+                 transactions: int):
+        """
+            telemetry of one level of a frequent itemsets miner - itemsets of length level: number of candidates,
+            number of frequent ones, memory (in bytes) of the representation of transactions used
+            on the level, number of transactions searched and the time since the start of the run
+        """
+        self.level = level
+        self.wall_time = wall_time
+        self.candidates = candidates
+        self.frequent = frequent
+        self.nbytes = nbytes
+        self.transactions = transactions
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class Levels:
+    def __init__(self):
+        self.records: List[LevelRecord] = []
+        self.start_time: Optional[float] = None
+
+    def start(self):
+        self.records = []
+        self.start_time = time.perf_counter()
+
+    def record(self, level: int, candidates: int, frequent: int, nbytes: int, transactions: int):
+        self.records.append(LevelRecord(level, time.perf_counter() - self.start_time, candidates, frequent, nbytes,
+                                        transactions))
+
+    def get_records(self) -> List[LevelRecord]:
+        return self.records
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = ['level', 'wall_time', 'candidates', 'frequent', 'nbytes', 'transactions']
+        return pd.DataFrame([record.to_dict() for record in self.records], columns=columns)
@@ -0,0 +1,89 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import DatasetSchema
+from algorithms.config import MAX_ITEMSETS_BLOCK_BYTES, PREVIEW_ROWS
+from .itemsets import FrequentItemsets
+from .levels import LevelRecord, Levels
+from .transactions import TransactionEncoder, item_types
+
+
+class ItemsetsMiner:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], min_support: float = 0.1,
+                 max_length: Optional[int] = None, item_type: item_types = 'pairs',
+                 max_bytes: int = MAX_ITEMSETS_BLOCK_BYTES, schema: Optional[DatasetSchema] = None):
+        """
+            Common part of the miners of frequent itemsets (contained in at least min_support of the transactions,
+            of at most max_length items) - the first pass which counts items and the getters of the results.
+            Intermediate blocks of arrays are bounded by max_bytes.
+        """
+        if not 0 < min_support <= 1:
+            raise TypeError(f"{min_support} is invalid value of min_support parameter")
+        if max_length is not None and max_length < 1:
+            raise TypeError(f"{max_length} is invalid value of max_length parameter")
+        self.data = data
+        self.min_support = min_support
+        self.max_length = max_length
+        self.max_bytes = max_bytes
+        self.schema = schema
+        self.encoder = TransactionEncoder(item_type)
+        self.levels = Levels()
+        self.transactions = 0
+        self.min_count = 0
+        # numbers of the frequent items, an item has the rank of its position
+        self.frequent_items = np.zeros(0, dtype=np.int64)
+        self.ranks = np.zeros(0, dtype=np.int64)
+        self.itemsets: Optional[FrequentItemsets] = None
+
+    def count_items(self) -> np.ndarray:
+        """ the first pass - numbers of transactions containing every item, frequent items and their ranks """
+        offsets, values = None, None
+        if isinstance(self.data, pd.DataFrame):
+            offsets, values = self.encoder.encode(self.data)
+            counts = np.bincount(values, minlength=self.encoder.num_items)
+            self.transactions = self.data.shape[0]
+        else:
+            counts, self.transactions = self.encoder.count(self.data)
+        self.min_count = max(1, int(np.ceil(self.min_support * self.transactions - 1e-9)))
+        self.frequent_items = np.flatnonzero(counts >= self.min_count)
+        self.ranks = np.full(self.encoder.num_items, -1, dtype=np.int64)
+        self.ranks[self.frequent_items] = np.arange(self.frequent_items.size)
+        self.prepare(counts, offsets, values)
+        return counts
+
+    def prepare(self, counts: np.ndarray, offsets: Optional[np.ndarray], values: Optional[np.ndarray]):
+        """ called after the first pass with counts of items and transactions of a data frame (None for chunks) """
+
+    def get_itemsets(self) -> Optional[FrequentItemsets]:
+        return self.itemsets
+
+    def get_steps(self) -> None:
+        return None
+
+    def get_preview(self) -> pd.DataFrame:
+        """ rows shown with the results - all rows of a data frame, the first rows of chunked data """
+        if isinstance(self.data, pd.DataFrame):
+            return self.data
+        return next(iter(self.data)).iloc[:PREVIEW_ROWS]
+
+    def get_telemetry(self) -> List[LevelRecord]:
+        """ one record per level, the first one counts single items """
+        return self.levels.get_records()
+
+    def get_data_size(self) -> Tuple[int, int, int]:
+        """ numbers of rows, columns and (estimated) items of the data, zeros when unknown """
+        if isinstance(self.data, pd.DataFrame):
+            rows, columns = self.data.shape
+        elif self.schema is not None:
+            rows, columns = self.schema.size, len(self.schema.columns)
+        else:
+            rows, columns = 0, 0
+        if self.encoder.item_type == 'columns':
+            items = columns
+        elif self.schema is not None:
+            items = sum(self.schema.cardinality)
+        else:
+            items = int(self.data.nunique().sum()) if isinstance(self.data, pd.DataFrame) else 0
+        return rows, columns, items
@@ -0,0 +1,136 @@
+import heapq
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .itemsets import FrequentItemsets
+
+metric_types = ['confidence', 'lift', 'leverage', 'conviction']
+
+# antecedent, consequent (sorted items), counts of the whole itemset, of the antecedent and of the consequent
+Rule = Tuple[Tuple[int, ...], Tuple[int, ...], int, int, int]
+
+
+class ItemsetIndex:
+    def __init__(self, itemsets: FrequentItemsets):
+        """ counts of frequent itemsets in a hash map keyed by tuples of their sorted items """
+        self.counts: Dict[Tuple[int, ...], int] = {}
+        lengths = itemsets.lengths()
+        for length in np.unique(lengths):
+            positions = np.flatnonzero(lengths == length)
+            items = itemsets.items[itemsets.offsets[positions][:, np.newaxis] + np.arange(length)]
+            self.counts.update(zip(map(tuple, items.tolist()), itemsets.counts[positions].tolist()))
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, itemset: Tuple[int, ...]) -> bool:
+        return itemset in self.counts
+
+    def count(self, itemset: Tuple[int, ...]) -> int:
+        return self.counts[itemset]
+
+
+def join_consequents(consequents: List[Tuple[int, ...]]) -> List[Tuple[int, ...]]:
+    """
+        consequents of m + 1 items from sorted consequents of m items with a common prefix of m - 1 items,
+        without those with a subset of m items which is not among them
+    """
+    kept = set(consequents)
+    joined = []
+    for i, first in enumerate(consequents):
+        for second in consequents[i + 1:]:
+            if first[:-1] != second[:-1]:
+                break
+            candidate = first + second[-1:]
+            if all(candidate[:j] + candidate[j + 1:] in kept for j in range(len(candidate) - 2)):
+                joined.append(candidate)
+    return joined
+
+
+class AssociationRules:
+    def __init__(self, itemsets: FrequentItemsets, min_confidence: float = 0.5):
+        """
+            Rules antecedent => consequent of frequent itemsets with confidence (count of the itemset / count
+            of the antecedent) of at least min_confidence. Counts of antecedents and consequents (subsets
+            of a frequent itemset, so frequent as well) are looked up in an ItemsetIndex.
+            Consequents of an itemset are generated level-wise like itemsets in Apriori - moving an item
+            from the antecedent to the consequent can only lower the confidence, so consequents of m + 1 items
+            are joined only from consequents of m items which gave confident rules.
+            Rules are streamed itemset by itemset, top returns the best n of them and keeps only these in memory.
+        """
+        if not 0 <= min_confidence <= 1:
+            raise TypeError(f"{min_confidence} is invalid value of min_confidence parameter")
+        self.itemsets = itemsets
+        self.min_confidence = min_confidence
+        self.index = ItemsetIndex(itemsets)
+        # confidence below which rules are pruned, raised while the best rules by confidence are collected
+        self.threshold = min_confidence
+
+    def rules_of(self, itemset: Tuple[int, ...], count: int) -> Iterator[Rule]:
+        """ confident rules of one itemset, by the number of items of consequents """
+        consequents = [(item,) for item in itemset]
+        while consequents and len(consequents[0]) < len(itemset):
+            confident = []
+            for consequent in consequents:
+                antecedent = tuple(item for item in itemset if item not in consequent)
+                antecedent_count = self.index.count(antecedent)
+                if count / antecedent_count >= self.threshold:
+                    confident.append(consequent)
+                    yield antecedent, consequent, count, antecedent_count, self.index.count(consequent)
+            consequents = join_consequents(confident)
+
+    def rules(self) -> Iterator[Rule]:
+        """ confident rules of all itemsets of at least two items """
+        lengths = self.itemsets.lengths()
+        for i in np.flatnonzero(lengths > 1):
+            yield from self.rules_of(self.itemsets.itemset(i), int(self.itemsets.counts[i]))
+
+    def metrics(self, rule: Rule) -> Dict[str, float]:
+        """ support of the rule (its itemset), confidence, lift, leverage and conviction """
+        _, _, count, antecedent_count, consequent_count = rule
+        transactions = self.itemsets.transactions
+        support = count / transactions
+        confidence = count / antecedent_count
+        consequent_support = consequent_count / transactions
+        return {
+            'support': support,
+            'confidence': confidence,
+            'lift': confidence / consequent_support,
+            'leverage': support - antecedent_count / transactions * consequent_support,
+            'conviction': (1 - consequent_support) / (1 - confidence) if confidence < 1 else np.inf
+        }
+
+    def top(self, n: int, metric: metric_types = 'confidence') -> pd.DataFrame:
+        """
+            n best rules by the metric (ties in the order of generation), found with a heap of n rules.
+            When rules are ranked by confidence, the worst one of a full heap raises the pruning threshold.
+        """
+        if metric not in metric_types:
+            raise TypeError(f"{metric} is invalid value of metric parameter")
+        if n < 1:
+            raise TypeError(f"{n} is invalid value of n parameter")
+        heap: List[Tuple[float, int, Rule]] = []
+        self.threshold = self.min_confidence
+        for order, rule in enumerate(self.rules()):
+            entry = (self.metrics(rule)[metric], -order, rule)
+            if len(heap) < n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+            if metric == 'confidence' and len(heap) == n:
+                self.threshold = max(self.min_confidence, heap[0][0])
+        self.threshold = self.min_confidence
+        heap.sort(key=lambda entry: entry[:2], reverse=True)
+        return self.to_frame([rule for _, _, rule in heap])
+
+    def to_frame(self, rules: List[Rule]) -> pd.DataFrame:
+        """ rules as a table of names of items of antecedents and consequents and their metrics """
+        names = self.itemsets.names
+        columns = ['antecedent', 'consequent', 'support', 'confidence', 'lift', 'leverage', 'conviction']
+        return pd.DataFrame([{
+            'antecedent': ', '.join(names[item] for item in rule[0]),
+            'consequent': ', '.join(names[item] for item in rule[1]),
+            **self.metrics(rule)
+        } for rule in rules], columns=columns)
@@ -0,0 +1,81 @@
+from typing import Dict, Iterator, List, Tuple, Union, Iterable
+
+import numpy as np
+import pandas as pd
+
+item_types = ['pairs', 'values', 'columns']
+
+
+class TransactionEncoder:
+    def __init__(self, item_type: item_types = 'pairs'):
+        """
+            Rows of a table as transactions - sets of items numbered in the order of their first occurrence.
+            'pairs' - every non-missing value is the item "column=value" (a table of attributes),
+            'values' - every non-missing value is an item, whatever its column (rows of baskets),
+            'columns' - every column is an item, present in rows where it is not missing, zero or False
+            (a one-hot table).
+            A chunk of rows is encoded as flat arrays: values - items of all transactions one after another,
+            offsets - start of every transaction in values (and the end of the last one).
+        """
+        if item_type not in item_types:
+            raise TypeError(f"{item_type} is invalid value of item_type parameter")
+        self.item_type = item_type
+        self.names: List[str] = []
+        self.lookup: Dict[Tuple, int] = {}
+
+    @property
+    def num_items(self) -> int:
+        return len(self.names)
+
+    def item(self, column: str, value: any) -> int:
+        key = (column, value) if self.item_type == 'pairs' else (value,)
+        if key not in self.lookup:
+            self.lookup[key] = len(self.names)
+            self.names.append(f'{column}={value}' if self.item_type == 'pairs' else str(value))
+        return self.lookup[key]
+
+    def items(self, data: pd.DataFrame) -> np.ndarray:
+        """ (rows x columns) matrix of items of every value, -1 for values which are not items """
+        matrix = np.full(data.shape, -1, dtype=np.int64)
+        for j, (column, values) in enumerate(data.items()):
+            if self.item_type == 'columns':
+                # False equals 0
+                present = (values.notna() & (values != 0)).to_numpy()
+                matrix[present, j] = self.item(column, column)
+                continue
+            codes, uniques = pd.factorize(values)
+            ids = np.array([self.item(column, value) for value in uniques] + [-1], dtype=np.int64)
+            matrix[:, j] = ids[codes]
+        if self.item_type == 'values' and matrix.shape[1] > 1:
+            # the same value in two columns of a row is one item
+            matrix.sort(axis=1)
+            matrix[:, 1:][matrix[:, 1:] == matrix[:, :-1]] = -1
+        return matrix
+
+    def encode(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """ offsets and values of the transactions of the rows """
+        matrix = self.items(data)
+        present = matrix >= 0
+        offsets = np.zeros(data.shape[0] + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=offsets[1:])
+        return offsets, matrix[present]
+
+    def count(self, chunks: Iterable[pd.DataFrame]) -> Tuple[np.ndarray, int]:
+        """ number of transactions containing every item and the number of all transactions, in one pass """
+        counts = np.zeros(0, dtype=np.int64)
+        transactions = 0
+        for chunk in chunks:
+            _, values = self.encode(chunk)
+            chunk_counts = np.bincount(values, minlength=self.num_items)
+            counts = np.concatenate([counts, np.zeros(chunk_counts.size - counts.size, dtype=np.int64)])
+            counts += chunk_counts
+            transactions += chunk.shape[0]
+        return counts, transactions
+
+
+def chunks_of(data: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+    """ a data frame as one chunk, chunked data as its chunks """
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
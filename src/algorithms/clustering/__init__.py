@@ -1 +1,12 @@
 from .k_means import KMeans
+from .mini_batch_k_means import MiniBatchKMeans
+from .out_of_core_k_means import OutOfCoreKMeans
+from .k_sweep import KMeansSweep
+from .warm_start import WarmStart
+from .coreset import CoresetBuilder, CoresetKMeans
+from .dbscan import DBSCAN
+from .pam import PAM
+from .gmm import GaussianMixture
+from .dendrogram import Dendrogram
+from .agglomerative import AgglomerativeClustering
+from .bisecting_k_means import BisectingKMeans
@@ -0,0 +1,222 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import MAX_DISSIMILARITY_BYTES
+from .centroids import cluster_sums, category_counts, means, modes
+from .dendrogram import Dendrogram
+from .dissimilarity import Dissimilarities
+from .telemetry import IterationRecord, Telemetry
+
+linkage_types = ['ward', 'complete', 'average', 'single']
+
+# number of clusters before the last merges shown as steps
+STEPS_CLUSTERS = 10
+
+
+def linkage_update(linkage: linkage_types, first: np.ndarray, second: np.ndarray, between: float,
+                   first_size: int, second_size: int, sizes: np.ndarray) -> np.ndarray:
+    """ Lance-Williams formula - distances of the merge of two clusters to other clusters (of the given sizes) """
+    if linkage == 'single':
+        return np.minimum(first, second)
+    if linkage == 'complete':
+        return np.maximum(first, second)
+    if linkage == 'average':
+        return (first_size * first + second_size * second) / (first_size + second_size)
+    total = first_size + second_size + sizes
+    return np.sqrt(np.maximum(((first_size + sizes) * first**2 + (second_size + sizes) * second**2
+                               - sizes * between**2) / total, 0))
+
+
+class AgglomerativeClustering:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int,
+                 linkage: linkage_types = 'ward', metrics: int = 2, max_bytes: int = MAX_DISSIMILARITY_BYTES,
+                 precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None):
+        """
+            Hierarchical clustering which merges the two closest clusters until one is left. The result is
+            a Dendrogram, cut into num_clusters clusters (or into any other number of them, without recomputation).
+            Ward, complete and average linkage use the nearest-neighbour chain - a chain of clusters in which
+            every next one is the nearest to the previous one, until two clusters are nearest to each other and
+            are merged - in O(n^2) time, with distances in a condensed float32 matrix updated in place by
+            the Lance-Williams formula, which has to fit in max_bytes. Single linkage merges along the minimum
+            spanning tree of rows (Prim's algorithm), which needs only one column of distances at a time,
+            so its distances are cached only when they fit.
+            Distances are the same as in K-Means for mixed numeric and categorical columns.
+            Rows with missing numeric values are not clustered, they are assigned to the first cluster.
+        """
+        if linkage not in linkage_types:
+            raise TypeError(f"{linkage} is invalid value of linkage parameter")
+        if num_clusters < 1:
+            raise TypeError(f"{num_clusters} is invalid value of num_clusters parameter")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.linkage = linkage
+        self.metrics = metrics
+        self.max_bytes = max_bytes
+        self.schema = schema
+        self.preview = data if isinstance(data, pd.DataFrame) else None
+        if isinstance(data, pd.DataFrame):
+            is_numeric = schema.is_numeric_for(data.columns) if schema is not None else None
+            self.encoded = EncodedData(data, is_numeric, precision)
+        else:
+            self.encoded, self.preview = EncodedData.from_chunks(data, schema, precision)
+        self.distances = DistanceEngine(self.encoded.is_numeric, metrics, dtype=self.encoded.precision)
+        # rows without missing numeric values, the clustered ones
+        self.valid = np.flatnonzero(~np.isnan(self.encoded.numeric).any(axis=1))
+        if num_clusters > self.valid.size:
+            raise TypeError(f"{num_clusters} clusters for {self.valid.size} rows without missing values")
+        if linkage != 'single' and Dissimilarities.condensed_bytes(self.valid.size) > max_bytes:
+            raise TypeError(f"distances of {self.valid.size} rows do not fit in {max_bytes} bytes, "
+                            f"only single linkage is available")
+        self.telemetry = Telemetry()
+        self.saved_steps = None
+        self.dendrogram = None
+        self.labels = np.zeros(self.encoded.size, dtype=int)
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, Dendrogram, np.ndarray]:
+        """
+            labels of rows in num_clusters clusters, the dendrogram of the clustered rows and indices
+            of the clustered rows (leaves of the dendrogram)
+        """
+        self.telemetry.start()
+        dissimilarities = Dissimilarities(self.encoded.numeric[self.valid], self.encoded.codes[self.valid],
+                                          self.distances, self.max_bytes)
+        self.telemetry.record(None, np.nan)
+        if self.linkage == 'single':
+            first, second, heights = self.spanning_tree(dissimilarities)
+        else:
+            first, second, heights = self.nearest_neighbour_chain(dissimilarities)
+        self.dendrogram = Dendrogram(first, second, heights)
+        self.labels = self.cut(self.num_clusters)
+        self.telemetry.record(None, float(self.dendrogram.heights[-1]) if heights.size else 0.0)
+        self.telemetry.stop()
+        if with_steps:
+            self.saved_steps = self.record_steps()
+        return self.labels, self.dendrogram, self.valid
+
+    def cut(self, num_clusters: int) -> np.ndarray:
+        """ labels of all rows in num_clusters clusters of the dendrogram """
+        labels = np.zeros(self.encoded.size, dtype=int)
+        labels[self.valid] = self.dendrogram.cut(num_clusters)
+        return labels
+
+    def nearest_neighbour_chain(self, dissimilarities: Dissimilarities) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            merges (a row of each cluster and the distance) of ward, complete or average linkage, in the order
+            in which they are found. A merged cluster takes the place of the one with the larger row.
+        """
+        size = dissimilarities.size
+        # rows of the clusters which are not merged yet, the distances are read only for them
+        active = np.arange(size)
+        sizes = np.ones(size)
+        first, second, heights = [], [], []
+        chain = []
+        for _ in range(size - 1):
+            if not chain:
+                chain.append(int(active[0]))
+            while True:
+                current = chain[-1]
+                row = dissimilarities.row(current, active)
+                row[np.searchsorted(active, current)] = np.inf
+                nearest = int(active[np.argmin(row)])
+                distance = row.min()
+                # ties are resolved in favour of the previous cluster of the chain, so the chain cannot cycle
+                if len(chain) > 1 and dissimilarities.pair(current, chain[-2]) <= distance:
+                    break
+                chain.append(nearest)
+            nearest = chain[-2]
+            chain = chain[:-2]
+            low, high = min(current, nearest), max(current, nearest)
+            between = dissimilarities.pair(low, high)
+            others = active[(active != low) & (active != high)]
+            merged = linkage_update(self.linkage, dissimilarities.row(low, others), dissimilarities.row(high, others),
+                                    between, sizes[low], sizes[high], sizes[others])
+            dissimilarities.update(high, others, merged)
+            active = np.delete(active, np.searchsorted(active, low))
+            sizes[high] += sizes[low]
+            first.append(low)
+            second.append(high)
+            heights.append(between)
+        return np.array(first, dtype=np.int64), np.array(second, dtype=np.int64), np.array(heights)
+
+    @staticmethod
+    def spanning_tree(dissimilarities: Dissimilarities) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            edges of the minimum spanning tree of rows (Prim's algorithm), which are the merges of single linkage
+        """
+        size = dissimilarities.size
+        outside = np.ones(size, dtype=bool)
+        nearest = np.full(size, np.inf)
+        parent = np.zeros(size, dtype=np.int64)
+        first, second, heights = [], [], []
+        current = 0
+        for _ in range(size - 1):
+            outside[current] = False
+            row = dissimilarities.columns([current])[:, 0]
+            closer = outside & (row < nearest)
+            nearest[closer] = row[closer]
+            parent[closer] = current
+            candidates = np.where(outside, nearest, np.inf)
+            current = int(np.argmin(candidates))
+            first.append(parent[current])
+            second.append(current)
+            heights.append(candidates[current])
+        return np.array(first, dtype=np.int64), np.array(second, dtype=np.int64), np.array(heights)
+
+    def centers(self, labels: np.ndarray, num_clusters: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ means and modes of the clusters of labels (encoded) """
+        sums, counts = cluster_sums(self.encoded.numeric, labels, num_clusters)
+        centers_numeric = means(sums, counts, np.full_like(sums, np.nan))
+        centers_codes = np.full((num_clusters, self.encoded.codes.shape[1]), -1)
+        for j in range(self.encoded.codes.shape[1]):
+            histogram, last_positions = category_counts(self.encoded.codes[:, j], labels, num_clusters,
+                                                        len(self.encoded.categories[j]))
+            centers_codes[:, j] = modes(histogram, last_positions, centers_codes[:, j])
+        return centers_numeric, centers_codes
+
+    def record_steps(self) -> StepsHistory:
+        """
+            The last merges as steps on the preview rows - from num_clusters + STEPS_CLUSTERS clusters down to
+            num_clusters. A cluster keeps its label after a merge with a cluster of later rows, centroids are
+            means and modes of clusters (missing for labels of clusters merged before).
+        """
+        size = self.preview.shape[0]
+        first_clusters = min(self.valid.size, self.num_clusters + STEPS_CLUSTERS)
+        first_roots = self.dendrogram.roots(first_clusters)
+        steps = StepsHistory(self.encoded, first_clusters, first_clusters - self.num_clusters + 1)
+        for num_clusters in range(first_clusters, self.num_clusters - 1, -1):
+            labels = np.zeros(self.encoded.size, dtype=int)
+            roots = self.dendrogram.roots(num_clusters)
+            labels[self.valid] = np.searchsorted(np.unique(first_roots), roots)
+            steps.append(labels[:size], self.centers(labels, first_clusters))
+        return steps
+
+    def get_dendrogram(self) -> Dendrogram:
+        return self.dendrogram
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        """ the distances and the merges, inertia is the height of the last merge """
+        return self.telemetry.get_records()
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ rows which the saved steps refer to - all rows of a data frame, the first rows of chunked data """
+        return self.preview
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: encoded data, the condensed distances (when cached), a few columns
+            of distances and the arrays of clusters and merges
+        """
+        size = self.valid.size
+        cached = Dissimilarities.condensed_bytes(size)
+        return {
+            'data': self.encoded.nbytes(),
+            'distances': cached if cached <= self.max_bytes else 0,
+            'columns': 3 * size * np.dtype(float).itemsize,
+            'merges': 8 * size * np.dtype(float).itemsize
+        }
@@ -0,0 +1,287 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from algorithms import EncodedData, DistanceEngine
+
+algorithm_types = ['lloyd', 'hamerly', 'elkan']
+
+# relative margin of the bound tests, covers rounding errors of the distances and of the updated bounds
+BOUND_MARGIN = 1e-10
+
+# margin of the bound tests in units of the machine epsilon of the distances, used when it is larger than BOUND_MARGIN
+BOUND_MARGIN_EPSILONS = 64
+
+
+class LloydAssignment:
+    def __init__(self, encoded: EncodedData, distances: DistanceEngine):
+        """
+            Assignment of rows to the nearest centroids. Lloyd's version computes all distances,
+            the accelerated subclasses keep bounds between calls and skip distances which can not change a label.
+            assign returns labels and the number of skipped distance computations - negative when tightening
+            the bounds cost more distances than it saved.
+            bounds returns the state of the last assignment as per-row bounds (labels, distance to the assigned
+            centroid, distance to the second nearest one or lower bounds of both), which the accelerated
+            subclasses can restore to start from another solution.
+        """
+        self.encoded = encoded
+        self.distances = distances
+        self.margin = max(BOUND_MARGIN, BOUND_MARGIN_EPSILONS * float(np.finfo(distances.dtype).eps))
+        self.last = None
+
+    def reset(self):
+        self.last = None
+
+    def assign(self, centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> Tuple[np.ndarray, int]:
+        size = self.encoded.size
+        labels = np.empty(size, dtype=int)
+        min_distances = np.empty(size)
+        second = np.empty(size)
+        for start, stop, sums in self.distances.blocks(self.encoded.numeric, self.encoded.codes,
+                                                       centroids_numeric, centroids_codes):
+            labels[start:stop], min_distances[start:stop] = self.distances.nearest(sums)
+            second[start:stop] = self.distances.second_nearest(sums, labels[start:stop])
+        self.last = (labels, centroids_numeric, centroids_codes, min_distances, second)
+        return labels, 0
+
+    def bounds(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]]:
+        """ labels, upper and lower bounds of the last assignment and its centroids, None before any """
+        if self.last is None:
+            return None
+        labels, centroids_numeric, centroids_codes, min_distances, second = self.last
+        upper = np.nan_to_num(min_distances, nan=np.inf)
+        return labels.copy(), upper, second.copy(), (centroids_numeric.copy(), centroids_codes.copy())
+
+    def assigned_distances(self, labels: np.ndarray, centroids_numeric: np.ndarray,
+                           centroids_codes: np.ndarray) -> np.ndarray:
+        """ distance of every row to its centroid, reused from the last assignment when it is the same one """
+        if self.last is not None:
+            last_labels, last_numeric, last_codes, min_distances, _ = self.last
+            if np.array_equal(last_labels, labels) and np.array_equal(last_numeric, centroids_numeric, equal_nan=True) \
+                    and np.array_equal(last_codes, centroids_codes):
+                return min_distances
+        distances = self.distances.root(self.distances.paired(self.encoded.numeric, self.encoded.codes,
+                                                              centroids_numeric[labels], centroids_codes[labels]))
+        return np.nan_to_num(distances, nan=np.inf)
+
+    def centroid_distances(self, centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        """ distances between centroids, undefined ones (empty clusters) are infinite """
+        distances = self.distances.distances(centroids_numeric, centroids_codes, centroids_numeric, centroids_codes)
+        return np.nan_to_num(distances, nan=np.inf)
+
+    def shifts(self, old_numeric: np.ndarray, old_codes: np.ndarray,
+               centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        """ distance each centroid moved since the previous call """
+        shifts = self.distances.root(self.distances.paired(old_numeric, old_codes, centroids_numeric, centroids_codes))
+        return np.nan_to_num(shifts, nan=np.inf)
+
+    def exact(self, rows: np.ndarray, centroids: np.ndarray,
+              centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        """ sums of powered differences for pairs (rows[i], centroids[i]) """
+        return self.distances.paired(self.encoded.numeric[rows], self.encoded.codes[rows],
+                                     centroids_numeric[centroids], centroids_codes[centroids])
+
+    def safe_below(self, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+        """ upper < lower with a margin (wider in float32 precision), False for undefined values """
+        return upper * (1 + self.margin) < lower * (1 - self.margin)
+
+    @staticmethod
+    def state_bytes(size: int, num_clusters: int) -> int:
+        """ memory kept between calls: labels and distances of the last assignment """
+        return size * (np.dtype(int).itemsize + np.dtype(float).itemsize)
+
+
+class HamerlyAssignment(LloydAssignment):
+    def __init__(self, encoded: EncodedData, distances: DistanceEngine):
+        """
+            Hamerly's algorithm - one upper bound on the distance to the assigned centroid
+            and one lower bound on the distance to all other centroids per row.
+        """
+        super().__init__(encoded, distances)
+        self.labels = None
+        self.upper = None
+        self.lower = None
+        self.previous = None
+
+    def reset(self):
+        super().reset()
+        self.labels = None
+        self.previous = None
+
+    @staticmethod
+    def state_bytes(size: int, num_clusters: int) -> int:
+        """ memory kept between calls: labels, upper and lower bounds """
+        return size * (np.dtype(int).itemsize + 2 * np.dtype(float).itemsize)
+
+    def bounds(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]]:
+        if self.previous is None:
+            return None
+        return self.labels.copy(), self.upper.copy(), self.lower.copy(), self.previous
+
+    def restore(self, labels: np.ndarray, upper: np.ndarray, lower: np.ndarray,
+                centroids_numeric: np.ndarray, centroids_codes: np.ndarray):
+        """
+            Continue from bounds of another run with given centroids, e.g. on a changed dataset.
+            Rows without valid bounds need an infinite upper and a zero lower bound.
+        """
+        self.labels = labels.copy()
+        self.upper = upper.astype(float)
+        self.lower = lower.astype(float)
+        self.previous = (centroids_numeric.copy(), centroids_codes.copy())
+
+    def assign(self, centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> Tuple[np.ndarray, int]:
+        size = self.encoded.size
+        k = centroids_numeric.shape[0]
+        if self.previous is None:
+            self.labels = np.zeros(size, dtype=int)
+            self.upper = np.full(size, np.inf)
+            self.lower = np.zeros(size)
+            self.recompute(np.arange(size), centroids_numeric, centroids_codes)
+            self.previous = (centroids_numeric.copy(), centroids_codes.copy())
+            return self.labels.copy(), 0
+
+        shifts = self.shifts(*self.previous, centroids_numeric, centroids_codes)
+        self.previous = (centroids_numeric.copy(), centroids_codes.copy())
+        self.upper += shifts[self.labels]
+        # the largest shift of a centroid other than the assigned one
+        order = np.argsort(shifts)[::-1]
+        largest = np.where(self.labels == order[0], shifts[order[1]] if k > 1 else 0, shifts[order[0]])
+        self.lower -= largest
+
+        between = self.centroid_distances(centroids_numeric, centroids_codes)
+        np.fill_diagonal(between, np.inf)
+        half_nearest = 0.5 * between.min(axis=1)
+        bound = np.maximum(self.lower, half_nearest[self.labels])
+
+        rows = np.flatnonzero(~self.safe_below(self.upper, bound))
+        # rows without a known bound (e.g. new rows of a warm start) are recomputed without tightening it first
+        unknown = rows[~np.isfinite(self.upper[rows])]
+        rows = rows[np.isfinite(self.upper[rows])]
+        if rows.size:
+            self.upper[rows] = np.nan_to_num(self.distances.root(
+                self.exact(rows, self.labels[rows], centroids_numeric, centroids_codes)), nan=np.inf)
+        recomputed = ~self.safe_below(self.upper[rows], bound[rows])
+        # a tightened row which is recomputed anyway costs k + 1 distances
+        computed = rows.size
+        rows = np.concatenate([unknown, rows[recomputed]])
+        self.recompute(rows, centroids_numeric, centroids_codes)
+        computed += rows.size * k
+        return self.labels.copy(), size * k - computed
+
+    def recompute(self, rows: np.ndarray, centroids_numeric: np.ndarray, centroids_codes: np.ndarray):
+        """ full assignment of given rows, resets their bounds to the exact distances """
+        blocks = self.distances.blocks(self.encoded.numeric[rows], self.encoded.codes[rows],
+                                       centroids_numeric, centroids_codes)
+        for start, stop, sums in blocks:
+            block_rows = rows[start:stop]
+            labels, _ = self.distances.nearest(sums)
+            distances = np.nan_to_num(self.distances.root(sums), nan=np.inf)
+            self.labels[block_rows] = labels
+            self.upper[block_rows] = distances[np.arange(block_rows.size), labels]
+            distances[np.arange(block_rows.size), labels] = np.inf
+            self.lower[block_rows] = distances.min(axis=1)
+
+
+class ElkanAssignment(LloydAssignment):
+    def __init__(self, encoded: EncodedData, distances: DistanceEngine):
+        """
+            Elkan's algorithm - an upper bound on the distance to the assigned centroid
+            and a lower bound on the distance to every centroid per row (memory of rows x centroids floats).
+        """
+        super().__init__(encoded, distances)
+        self.labels = None
+        self.upper = None
+        self.lower = None
+        self.previous = None
+
+    def reset(self):
+        super().reset()
+        self.labels = None
+        self.previous = None
+
+    @staticmethod
+    def state_bytes(size: int, num_clusters: int) -> int:
+        """ memory kept between calls: labels, upper bounds and lower bounds to every centroid """
+        return size * (np.dtype(int).itemsize + (1 + num_clusters) * np.dtype(float).itemsize)
+
+    def bounds(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]]:
+        """ as in Hamerly's algorithm, the lower bound is the smallest of the bounds to other centroids """
+        if self.previous is None:
+            return None
+        others = self.lower.copy()
+        others[np.arange(others.shape[0]), self.labels] = np.inf
+        return self.labels.copy(), self.upper.copy(), others.min(axis=1, initial=np.inf), self.previous
+
+    def restore(self, labels: np.ndarray, upper: np.ndarray, lower: np.ndarray,
+                centroids_numeric: np.ndarray, centroids_codes: np.ndarray):
+        """ Continue from bounds of another run, one lower bound per row becomes the bound to every centroid """
+        size = labels.shape[0]
+        self.labels = labels.copy()
+        self.upper = upper.astype(float)
+        self.lower = np.repeat(lower.astype(float)[:, np.newaxis], centroids_numeric.shape[0], axis=1)
+        self.lower[np.arange(size), self.labels] = self.upper
+        self.previous = (centroids_numeric.copy(), centroids_codes.copy())
+
+    def assign(self, centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> Tuple[np.ndarray, int]:
+        size = self.encoded.size
+        k = centroids_numeric.shape[0]
+        if self.previous is None:
+            sums = self.distances.distances_sums(self.encoded.numeric, self.encoded.codes,
+                                                 centroids_numeric, centroids_codes)
+            self.labels, _ = self.distances.nearest(sums)
+            self.lower = np.nan_to_num(self.distances.root(sums), nan=np.inf)
+            self.upper = self.lower[np.arange(size), self.labels].copy()
+            self.previous = (centroids_numeric.copy(), centroids_codes.copy())
+            return self.labels.copy(), 0
+
+        shifts = self.shifts(*self.previous, centroids_numeric, centroids_codes)
+        self.previous = (centroids_numeric.copy(), centroids_codes.copy())
+        self.upper += shifts[self.labels]
+        self.lower = np.maximum(self.lower - shifts[np.newaxis, :], 0)
+
+        between = self.centroid_distances(centroids_numeric, centroids_codes)
+        between_diagonal = between.copy()
+        np.fill_diagonal(between_diagonal, np.inf)
+        half_nearest = 0.5 * between_diagonal.min(axis=1)
+
+        computed = 0
+        rows = np.flatnonzero(~self.safe_below(self.upper, half_nearest[self.labels]))
+        if rows.size:
+            # tighten the upper bound of rows which have any centroid possibly closer
+            candidates = self.candidates(rows, between)
+            rows = rows[candidates.any(axis=1)]
+            if rows.size:
+                assigned = self.exact(rows, self.labels[rows], centroids_numeric, centroids_codes)
+                computed += rows.size
+                self.upper[rows] = np.nan_to_num(self.distances.root(assigned), nan=np.inf)
+                self.lower[rows, self.labels[rows]] = self.upper[rows]
+                candidates = self.candidates(rows, between)
+
+                sums = np.full((rows.size, k), np.inf)
+                sums[np.arange(rows.size), self.labels[rows]] = assigned
+                pair_rows, pair_centroids = np.nonzero(candidates)
+                if pair_rows.size:
+                    sums[pair_rows, pair_centroids] = self.exact(rows[pair_rows], pair_centroids,
+                                                                 centroids_numeric, centroids_codes)
+                    computed += pair_rows.size
+                    self.lower[rows[pair_rows], pair_centroids] = np.nan_to_num(
+                        self.distances.root(sums[pair_rows, pair_centroids]), nan=np.inf)
+                labels, _ = self.distances.nearest(sums)
+                self.labels[rows] = labels
+                self.upper[rows] = self.lower[rows, labels]
+        return self.labels.copy(), size * k - computed
+
+    def candidates(self, rows: np.ndarray, between: np.ndarray) -> np.ndarray:
+        """ (rows, centroids) mask of centroids which may be closer than the assigned one """
+        labels = self.labels[rows]
+        upper = self.upper[rows, np.newaxis]
+        candidates = ~self.safe_below(upper, self.lower[rows]) & ~self.safe_below(upper, 0.5 * between[labels])
+        candidates[np.arange(rows.size), labels] = False
+        return candidates
+
+
+assignment_types = {
+    'lloyd': LloydAssignment,
+    'hamerly': HamerlyAssignment,
+    'elkan': ElkanAssignment
+}
@@ -0,0 +1,256 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from .k_means import KMeans, init_types
+from .assignment import algorithm_types
+from .centroids import cluster_sums, category_counts, means, modes
+from .dendrogram import Dendrogram
+from .seeding import KMeansSeeding
+from .telemetry import IterationRecord, Telemetry
+
+
+class Split:
+    def __init__(self, labels: np.ndarray, numeric: np.ndarray, codes: np.ndarray, sse: np.ndarray):
+        """ 2-means of the rows of a cluster - labels (0 or 1), encoded centroids and SSE of both halves """
+        self.labels = labels
+        self.numeric = numeric
+        self.codes = codes
+        self.sse = sse
+
+    def is_empty(self) -> bool:
+        """ all rows in one half, e.g. when all rows of the cluster are equal """
+        return not 0 < np.count_nonzero(self.labels) < self.labels.size
+
+
+class BisectingKMeans:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int, metrics: int = 1,
+                 iterations: Optional[int] = None, repeats: int = 1, init_type: init_types = 'kmeans++',
+                 algorithm: algorithm_types = 'lloyd', threads: int = 1, precision: precision_types = 'float64',
+                 schema: Optional[DatasetSchema] = None):
+        """
+            Divisive clustering - starting from one cluster of all rows, the cluster with the highest SSE
+            (sum of squared distances to its centroid) is split in two by KMeans until there are num_clusters
+            clusters. Every split runs repeats times from different initial centroids and the one with
+            the lowest SSE is kept.
+            Encoded rows are reordered so that rows of every cluster are contiguous, so a split runs on views
+            of the rows of its cluster, without copying the data. With more threads the splits of the next
+            clusters with the highest SSE are computed concurrently, in case they are split next
+            (threads share the rows, NumPy releases the GIL in the distance computations).
+            Initial centroids are chosen in the main thread, so the same seed and number of threads give
+            the same hierarchy. Splits form a hierarchy which is cut into any number of clusters up to
+            num_clusters by cut, the one of num_clusters is the result of run. A cluster keeps its label
+            when it is split, the second half gets the next label.
+        """
+        if num_clusters < 1:
+            raise TypeError(f"{num_clusters} is invalid value of num_clusters parameter")
+        if repeats < 1:
+            raise TypeError(f"{repeats} is invalid value of repeats parameter")
+        if threads < 1:
+            raise TypeError(f"{threads} is invalid value of threads parameter")
+        if init_type not in init_types:
+            raise TypeError(f"{init_type} is invalid value of init_type parameter")
+        if algorithm not in algorithm_types:
+            raise TypeError(f"{algorithm} is invalid value of algorithm parameter")
+        self.num_clusters = num_clusters
+        self.metrics = metrics
+        self.iterations = iterations
+        self.repeats = repeats
+        self.init_type = init_type
+        self.algorithm = algorithm
+        self.threads = threads
+        if isinstance(data, pd.DataFrame):
+            is_numeric = schema.is_numeric_for(data.columns) if schema is not None else None
+            self.encoded = EncodedData(data, is_numeric, precision)
+            self.preview = data
+        else:
+            self.encoded, self.preview = EncodedData.from_chunks(data, schema, precision)
+        self.columns = self.encoded.columns
+        self.distances = DistanceEngine(self.encoded.is_numeric, metrics, dtype=self.encoded.precision)
+        self.telemetry = Telemetry()
+        # encoded rows in the order of clusters and positions of the reordered rows in the data
+        self.numeric = None
+        self.codes = None
+        self.order = None
+        # splits in the order of the run - the split label, its SSE before the split and centroids of both halves
+        self.split_labels = []
+        self.split_sse = []
+        self.split_centroids = []
+        self.root_centroid = None
+        self.root_sse = 0.0
+        self.labels = np.zeros(self.encoded.size, dtype=int)
+        self.saved_steps = None
+
+    def subset(self, start: int, stop: int) -> EncodedData:
+        """ encoded rows of one cluster - views of the reordered rows """
+        return EncodedData.from_arrays(self.columns, self.encoded.is_numeric, self.numeric[start:stop],
+                                       self.codes[start:stop], self.encoded.categories)
+
+    def initial_centroids(self, start: int, stop: int) -> List[List[Tuple]]:
+        """ initial centroids of the repeats of a split, chosen with the global random state """
+        encoded = self.subset(start, stop)
+        seeding = KMeansSeeding(encoded, self.distances).get_method(self.init_type)
+        centroids = []
+        for _ in range(self.repeats):
+            rows = seeding(2)
+            centroids.append(encoded.decode_rows(encoded.numeric[rows], encoded.codes[rows]))
+        return centroids
+
+    def split(self, start: int, stop: int, initial: List[List[Tuple]]) -> Split:
+        """ the best of 2-means of the rows start ... stop - 1 from the given initial centroids """
+        encoded = self.subset(start, stop)
+        best = None
+        for centroids in initial:
+            model = KMeans(pd.DataFrame(columns=self.columns), 2, metrics=self.metrics, iterations=self.iterations,
+                           algorithm=self.algorithm, centroids=centroids, encoded=encoded)
+            labels, _ = model.run(False)
+            numeric, codes = encoded.encode_rows(model.centroids)
+            distances = model.assignment.assigned_distances(labels, numeric, codes)
+            distances = np.where(np.isfinite(distances), distances, 0)
+            sse = np.bincount(labels, weights=distances**2, minlength=2)
+            if best is None or sse.sum() < best.sse.sum():
+                best = Split(labels.copy(), numeric, codes, sse)
+        return best
+
+    def center(self) -> Tuple[np.ndarray, np.ndarray, float]:
+        """ centroid (means and modes) of all rows and their SSE """
+        labels = np.zeros(self.encoded.size, dtype=int)
+        sums, counts = cluster_sums(self.encoded.numeric, labels, 1)
+        numeric = means(sums, counts, np.full_like(sums, np.nan))
+        codes = np.full((1, self.encoded.codes.shape[1]), -1)
+        for j in range(self.encoded.codes.shape[1]):
+            histogram, last_positions = category_counts(self.encoded.codes[:, j], labels, 1,
+                                                        len(self.encoded.categories[j]))
+            codes[:, j] = modes(histogram, last_positions, codes[:, j])
+        distances = self.distances.distances(self.encoded.numeric, self.encoded.codes, numeric, codes)[:, 0]
+        return numeric, codes, float(np.sum(distances[np.isfinite(distances)]**2))
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame]:
+        self.telemetry.start()
+        self.numeric = self.encoded.numeric.copy()
+        self.codes = self.encoded.codes.copy()
+        self.order = np.arange(self.encoded.size)
+        self.split_labels, self.split_sse, self.split_centroids = [], [], []
+        numeric, codes, self.root_sse = self.center()
+        self.root_centroid = (numeric[0], codes[0])
+        self.telemetry.record(None, self.root_sse)
+        # rows, SSE and the pending split of the current clusters, by label
+        starts, stops, sse = [0], [self.encoded.size], [self.root_sse]
+        final = set()
+        pending: Dict[int, Future] = {}
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            while len(starts) < self.num_clusters:
+                candidates = [int(label) for label in np.argsort(-np.array(sse), kind='stable')
+                              if label not in final and stops[label] - starts[label] > 1 and sse[label] > 0]
+                if not candidates:
+                    break
+                for label in candidates[:self.threads]:
+                    if label not in pending:
+                        initial = self.initial_centroids(starts[label], stops[label])
+                        pending[label] = executor.submit(self.split, starts[label], stops[label], initial)
+                label = candidates[0]
+                split = pending.pop(label).result()
+                if split.is_empty():
+                    final.add(label)
+                    continue
+                start, stop = starts[label], stops[label]
+                middle = start + int(np.count_nonzero(split.labels == 0))
+                # the first half keeps the rows from start, no other split reads these rows any more
+                order = np.argsort(split.labels, kind='stable')
+                self.numeric[start:stop] = self.numeric[start:stop][order]
+                self.codes[start:stop] = self.codes[start:stop][order]
+                self.order[start:stop] = self.order[start:stop][order]
+                self.split_labels.append(label)
+                self.split_sse.append(sse[label])
+                self.split_centroids.append((split.numeric, split.codes))
+                stops[label] = middle
+                starts.append(middle)
+                stops.append(stop)
+                sse[label] = split.sse[0]
+                sse.append(split.sse[1])
+                self.telemetry.record(stop - middle, float(np.sum(sse)))
+            for future in pending.values():
+                future.cancel()
+        for label, (start, stop) in enumerate(zip(starts, stops)):
+            self.labels[self.order[start:stop]] = label
+        self.telemetry.stop()
+        if with_steps:
+            self.saved_steps = self.record_steps()
+        return self.labels, self.cut(len(starts))[1]
+
+    def mapping(self, num_clusters: int) -> np.ndarray:
+        """ label of every final cluster in num_clusters clusters - of its ancestor split later """
+        if not 1 <= num_clusters <= len(self.split_labels) + 1:
+            raise TypeError(f"{num_clusters} is invalid number of clusters of {len(self.split_labels) + 1} clusters")
+        mapping = np.arange(len(self.split_labels) + 1)
+        for label in range(num_clusters, mapping.size):
+            mapping[label] = mapping[self.split_labels[label - 1]]
+        return mapping
+
+    def encoded_centroids(self, num_clusters: int) -> Tuple[np.ndarray, np.ndarray]:
+        numeric = np.empty((num_clusters, self.root_centroid[0].size))
+        codes = np.empty((num_clusters, self.root_centroid[1].size), dtype=int)
+        numeric[0], codes[0] = self.root_centroid
+        for label in range(1, num_clusters):
+            split = self.split_labels[label - 1]
+            halves_numeric, halves_codes = self.split_centroids[label - 1]
+            numeric[[split, label]] = halves_numeric
+            codes[[split, label]] = halves_codes
+        return numeric, codes
+
+    def cut(self, num_clusters: int) -> Tuple[np.ndarray, pd.DataFrame]:
+        """ labels and centroids of num_clusters clusters of the hierarchy, without running the splits again """
+        labels = self.mapping(num_clusters)[self.labels]
+        centroids = self.encoded.decode_rows(*self.encoded_centroids(num_clusters))
+        return labels, pd.DataFrame(centroids, columns=self.columns)
+
+    def record_steps(self) -> StepsHistory:
+        """ clusters of the preview rows after every split, centroids of clusters not split off yet are missing """
+        num_clusters = len(self.split_labels) + 1
+        preview_labels = self.labels[:self.preview.shape[0]]
+        steps = StepsHistory(self.encoded, num_clusters, num_clusters)
+        for clusters in range(1, num_clusters + 1):
+            numeric = np.full((num_clusters, self.root_centroid[0].size), np.nan)
+            codes = np.full((num_clusters, self.root_centroid[1].size), -1)
+            numeric[:clusters], codes[:clusters] = self.encoded_centroids(clusters)
+            steps.append(self.mapping(clusters)[preview_labels], (numeric, codes))
+        return steps
+
+    def get_dendrogram(self) -> Dendrogram:
+        """
+            hierarchy of the final clusters (leaves labeled as in the result) - a split is a merge at the height
+            of the SSE of the split cluster, which never increases from split to split
+        """
+        # later splits first, so a tie of SSE undoes the later split first
+        labels = np.arange(len(self.split_labels), 0, -1)
+        return Dendrogram(np.array(self.split_labels)[labels - 1], labels, np.array(self.split_sse)[labels - 1])
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        """ the initial cluster and one record per split, with the rows moved to the new cluster and the total SSE """
+        return self.telemetry.get_records()
+
+    def get_preview(self) -> pd.DataFrame:
+        """ rows which the saved steps refer to - all rows of a data frame, the first rows of chunked data """
+        return self.preview
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: encoded data and its reordered copy, labels and the state
+            of the concurrent splits (labels of their rows and blocks of distances)
+        """
+        size = self.encoded.size
+        return {
+            'data': 2 * self.encoded.nbytes() + self.order_bytes(size),
+            'labels': self.labels.nbytes,
+            'splits': self.threads * (self.order_bytes(size) + self.distances.block_bytes(size, 2))
+        }
+
+    @staticmethod
+    def order_bytes(size: int) -> int:
+        return size * np.dtype(np.int64).itemsize
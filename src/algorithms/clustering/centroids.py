@@ -0,0 +1,79 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def cluster_sums(numeric: np.ndarray, labels: np.ndarray, num_clusters: int,
+                 weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Per-cluster sums and counts of non-missing values of every numeric column, in one pass over labels.
+        Values are accumulated row by row (the same order as np.add.at over the rows).
+        With weights of rows the sums and counts are weighted.
+    """
+    sums = np.zeros((num_clusters, numeric.shape[1]))
+    counts = np.zeros((num_clusters, numeric.shape[1]), dtype=int if weights is None else float)
+    for j in range(numeric.shape[1]):
+        valid = ~np.isnan(numeric[:, j])
+        if weights is None:
+            sums[:, j] = np.bincount(labels[valid], weights=numeric[valid, j], minlength=num_clusters)
+            counts[:, j] = np.bincount(labels[valid], minlength=num_clusters)
+        else:
+            sums[:, j] = np.bincount(labels[valid], weights=numeric[valid, j] * weights[valid], minlength=num_clusters)
+            counts[:, j] = np.bincount(labels[valid], weights=weights[valid], minlength=num_clusters)
+    return sums, counts
+
+
+def category_counts(codes: np.ndarray, labels: np.ndarray, num_clusters: int, num_categories: int,
+                    start: int = 0, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        (clusters x categories) count matrix of one categorical column (weighted with weights of rows)
+        and the position of the last occurrence of each pair (-1 if none), positions of rows are counted from start.
+        Missing values (code -1) are not counted.
+    """
+    valid = codes >= 0
+    keys = labels[valid] * num_categories + codes[valid]
+    counted = weights[valid] if weights is not None else None
+    histogram = np.bincount(keys, weights=counted, minlength=num_clusters * num_categories)
+    histogram = histogram.reshape(num_clusters, num_categories)
+    last_positions = np.full(num_clusters * num_categories, -1)
+    # the first occurrence in reversed order is the last one
+    reversed_keys, reversed_index = np.unique(keys[::-1], return_index=True)
+    last_positions[reversed_keys] = start + np.flatnonzero(valid)[keys.size - 1 - reversed_index]
+    return histogram, last_positions.reshape(num_clusters, num_categories)
+
+
+def means(sums: np.ndarray, counts: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """ mean values of clusters, a cluster without any value of a column keeps its previous value """
+    return np.where(counts > 0, sums / np.where(counts > 0, counts, 1), previous)
+
+
+def modes(histogram: np.ndarray, last_positions: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """
+        The most frequent category in each cluster, a cluster without any value of the column keeps
+        its previous category. From the categories with the same count the one which reached this count
+        first wins, i.e. the one with the earliest last occurrence (the same result as counting row by row).
+    """
+    if histogram.shape[1] == 0:
+        return previous.copy()
+    most = histogram.max(axis=1)
+    candidates = np.where(histogram == most[:, np.newaxis], last_positions, np.iinfo(int).max)
+    return np.where(most > 0, np.argmin(candidates, axis=1), previous)
+
+
+def update_centroids(numeric: np.ndarray, codes: np.ndarray, labels: np.ndarray, categories: List[List],
+                     previous_numeric: np.ndarray, previous_codes: np.ndarray,
+                     weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Centroids of clusters given by labels, computed in one pass: means of numeric columns
+        and modes of categorical ones (weighted means and modes when rows have weights).
+        An empty cluster keeps its previous centroid.
+    """
+    num_clusters = previous_numeric.shape[0]
+    sums, counts = cluster_sums(numeric, labels, num_clusters, weights)
+    new_numeric = means(sums, counts, previous_numeric)
+    new_codes = np.empty_like(previous_codes)
+    for j in range(codes.shape[1]):
+        histogram, last_positions = category_counts(codes[:, j], labels, num_clusters, len(categories[j]),
+                                                    weights=weights)
+        new_codes[:, j] = modes(histogram, last_positions, previous_codes[:, j])
+    return new_numeric, new_codes
@@ -0,0 +1,224 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import CORESET_SIZE, PREVIEW_ROWS
+from .k_means import KMeans, init_types
+from .assignment import algorithm_types
+from .centroids import cluster_sums, means, modes
+from .telemetry import IterationRecord
+
+
+class CoresetBuilder:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], size: int = CORESET_SIZE,
+                 metrics: int = 2, precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None):
+        """
+            Lightweight coreset of the data built by sensitivity sampling in two passes over the chunks.
+            The first pass finds the centroid of all rows (means and modes), the second one samples size rows
+            with replacement, half of them uniformly and half proportionally to the squared distance
+            to that centroid, i.e. from q(x) = 1 / 2n + d(x)² / 2Σd². A row gets the weight 1 / (size * q(x))
+            for every time it was sampled, so weighted costs of the coreset estimate costs of the data
+            for any set of centroids.
+            Both kinds of samples are kept by reservoirs updated chunk by chunk, so only the current chunk
+            and at most size sampled rows are held in memory.
+            data is a DataFrame or chunks of the data (e.g. data_import.ChunkedData read from a file or a database).
+        """
+        if size < 2:
+            raise TypeError(f"{size} is invalid value of size parameter")
+        self.data = data
+        self.size = size
+        self.metrics = metrics
+        self.precision = precision
+        self.schema = schema
+        self.encoded = None
+        self.distances = None
+        self.preview = None
+        self.rows = 0
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        if isinstance(self.data, pd.DataFrame):
+            yield self.data
+        else:
+            yield from self.data
+
+    def encode(self, chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        if self.encoded is None:
+            is_numeric = self.schema.is_numeric_for(chunk.columns) if self.schema is not None else None
+            self.encoded = EncodedData(chunk, is_numeric, self.precision)
+            self.distances = DistanceEngine(self.encoded.is_numeric, self.metrics, dtype=self.encoded.precision)
+            self.preview = chunk.iloc[:PREVIEW_ROWS]
+            return self.encoded.numeric, self.encoded.codes
+        return self.encoded.encode_frame(chunk)
+
+    def center(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ first pass - the encoded centroid of all rows """
+        sums, counts, histograms = None, None, []
+        self.rows = 0
+        for chunk in self.chunks():
+            numeric, codes = self.encode(chunk)
+            labels = np.zeros(chunk.shape[0], dtype=int)
+            chunk_sums, chunk_counts = cluster_sums(numeric, labels, 1)
+            sums = chunk_sums if sums is None else sums + chunk_sums
+            counts = chunk_counts if counts is None else counts + chunk_counts
+            for j in range(codes.shape[1]):
+                categories = len(self.encoded.categories[j])
+                if j == len(histograms):
+                    histograms.append(np.zeros(categories, dtype=int))
+                elif histograms[j].size < categories:
+                    histograms[j] = np.pad(histograms[j], (0, categories - histograms[j].size))
+                valid = codes[:, j] >= 0
+                histograms[j] += np.bincount(codes[valid, j], minlength=categories)
+            self.rows += chunk.shape[0]
+        center_numeric = means(sums, counts, np.full_like(sums, np.nan))
+        center_codes = np.full((1, len(histograms)), -1)
+        for j, histogram in enumerate(histograms):
+            # the earliest category wins a tie, the order of first occurrences does not matter for the coreset
+            center_codes[:, j] = modes(histogram[np.newaxis, :], np.zeros((1, histogram.size), dtype=int),
+                                       center_codes[:, j])
+        return center_numeric, center_codes
+
+    def build(self) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """ rows of the coreset, their weights and their positions in the data """
+        center = self.center()
+        uniform = self.size // 2
+        # reservoirs: position of the sampled row in the data, its squared distance and its row in kept
+        positions = np.full(self.size, -1)
+        squared = np.zeros(self.size)
+        slots = np.full(self.size, -1)
+        kept = None
+        seen = np.zeros(2)
+        start = 0
+        for chunk in self.chunks():
+            numeric, codes = self.encode(chunk)
+            chunk_squared = self.distances.distances(numeric, codes, *center)[:, 0]**2
+            chunk_squared = np.where(np.isfinite(chunk_squared), chunk_squared, 0)
+            replaced, rows = [], []
+            for reservoir, (first, last), masses in [(0, (0, uniform), None), (1, (uniform, self.size), chunk_squared)]:
+                mass = chunk.shape[0] if masses is None else float(masses.sum())
+                seen[reservoir] += mass
+                if mass <= 0:
+                    continue
+                # every slot independently takes a row of this chunk with probability mass / mass seen so far
+                slots_replaced = first + np.flatnonzero(np.random.random(last - first) < mass / seen[reservoir])
+                p = masses / mass if masses is not None else None
+                replaced.append(slots_replaced)
+                rows.append(np.random.choice(chunk.shape[0], slots_replaced.size, p=p))
+            if replaced:
+                replaced, rows = np.concatenate(replaced), np.concatenate(rows)
+                positions[replaced] = start + rows
+                squared[replaced] = chunk_squared[rows]
+                offset = kept.shape[0] if kept is not None else 0
+                picked = chunk.iloc[rows].reset_index(drop=True)
+                kept = picked if kept is None else pd.concat([kept, picked], ignore_index=True)
+                slots[replaced] = offset + np.arange(rows.size)
+                # only rows held by some slot are kept
+                used, slots[slots >= 0] = np.unique(slots[slots >= 0], return_inverse=True)
+                kept = kept.iloc[used].reset_index(drop=True)
+            start += chunk.shape[0]
+        return self.weighted(kept, positions, squared, slots, seen[1])
+
+    def weighted(self, kept: pd.DataFrame, positions: np.ndarray, squared: np.ndarray, slots: np.ndarray,
+                 total: float) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """ merges slots which sampled the same row, summing their weights """
+        filled = positions >= 0
+        if total > 0:
+            q = 0.5 / self.rows + 0.5 * squared[filled] / total
+            slot_weights = 1 / (self.size * q)
+        else:
+            # all rows are equal to the centroid, only the uniform reservoir is filled
+            slot_weights = np.full(np.count_nonzero(filled), self.rows / np.count_nonzero(filled))
+        unique, first, inverse = np.unique(positions[filled], return_index=True, return_inverse=True)
+        weights = np.bincount(inverse, weights=slot_weights)
+        rows = kept.iloc[slots[filled][first]].reset_index(drop=True)
+        return rows, weights, unique
+
+
+class CoresetKMeans:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int, metrics: int = 1,
+                 iterations: Optional[int] = None, repeats: int = 1, init_type: init_types = 'kmeans++ sampling',
+                 algorithm: algorithm_types = 'lloyd', processes: int = 1, coreset_size: int = CORESET_SIZE,
+                 label_all: bool = True, precision: precision_types = 'float64',
+                 schema: Optional[DatasetSchema] = None):
+        """
+            K-Means of a coreset (see CoresetBuilder) instead of all rows, for exploring very large tables.
+            The coreset is clustered by KMeans with weights of its rows. With label_all a last pass over the chunks
+            assigns all rows to the centroids, otherwise only the first rows of chunked data are labeled
+            (a DataFrame is in memory anyway, so all its rows are labeled).
+            Saved steps show the first rows of the data labeled by the centroids of each step.
+        """
+        if isinstance(data, Iterator):
+            raise TypeError("data can be iterated only once")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.label_all = label_all
+        self.builder = CoresetBuilder(data, coreset_size, metrics, precision, schema)
+        self.parameters = {
+            'metrics': metrics,
+            'iterations': iterations,
+            'repeats': repeats,
+            'init_type': init_type,
+            'algorithm': algorithm,
+            'processes': processes
+        }
+        self.coreset = None
+        self.weights = None
+        self.model = None
+        self.saved_steps = None
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame]:
+        self.coreset, self.weights, _ = self.builder.build()
+        num_clusters = min(self.num_clusters, self.coreset.shape[0])
+        # kinds of columns of the whole data, not inferred again from the few rows of the coreset
+        encoded = EncodedData(self.coreset, self.builder.encoded.is_numeric, self.builder.precision)
+        self.model = KMeans(self.coreset, num_clusters, weights=self.weights, encoded=encoded, **self.parameters)
+        _, centroids = self.model.run(with_steps)
+        self.saved_steps = self.preview_steps() if with_steps else None
+        encoded = self.builder.encoded
+        centroids_numeric, centroids_codes = encoded.encode_rows(list(centroids.itertuples(index=False)))
+        labeled_all = self.label_all or isinstance(self.data, pd.DataFrame)
+        frames = self.builder.chunks() if labeled_all else [self.builder.preview]
+        labels = [self.builder.distances.assign(*encoded.encode_frame(frame), centroids_numeric, centroids_codes)[0]
+                  for frame in frames]
+        return np.concatenate(labels), centroids
+
+    def preview_steps(self) -> StepsHistory:
+        """ steps of the coreset run shown on the first rows of the data """
+        encoded = self.builder.encoded
+        preview = encoded.encode_frame(self.builder.preview)
+        model_steps = self.model.get_steps()
+        steps = StepsHistory(encoded, self.model.num_clusters, len(model_steps))
+        for step in range(len(model_steps)):
+            centroids = encoded.encode_rows(list(model_steps.centroids(step).itertuples(index=False)))
+            steps.append(self.builder.distances.assign(*preview, *centroids)[0], centroids)
+        return steps
+
+    def get_coreset(self) -> Tuple[Optional[pd.DataFrame], Optional[np.ndarray]]:
+        """ rows of the coreset of the last run and their weights """
+        return self.coreset, self.weights
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        return self.model.get_telemetry()
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ first rows of the data, which labels of the saved steps (and without label_all the labels) refer to """
+        return self.builder.preview
+
+    def get_working_set(self) -> Dict[str, int]:
+        """ estimated memory of a run: a chunk of the data, the sampled rows and the clustering of the coreset """
+        schema = self.builder.schema if self.builder.schema is not None else DatasetSchema(self.data)
+        size = self.data.shape[0] if isinstance(self.data, pd.DataFrame) else schema.size
+        coreset = min(size, self.builder.size)
+        distances = DistanceEngine(schema.is_numeric, self.builder.metrics, dtype=np.dtype(self.builder.precision))
+        encoded_bytes = EncodedData.estimate_bytes(coreset, schema.is_numeric, schema.cardinality,
+                                                   self.builder.precision)
+        return {
+            'data': EncodedData.estimate_bytes(size, schema.is_numeric, schema.cardinality, self.builder.precision),
+            'coreset': encoded_bytes + coreset * 2 * np.dtype(float).itemsize,
+            'distances': distances.block_bytes(coreset, self.num_clusters),
+            'labels': (size if self.label_all else min(size, PREVIEW_ROWS)) * np.dtype(int).itemsize
+        }
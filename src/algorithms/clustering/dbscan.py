@@ -0,0 +1,283 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import GRID_MAX_DIMENSIONS, LEAF_SIZE, MAX_BLOCK_BYTES, QUERY_BATCH_ROWS
+from algorithms.spatial import SpatialIndex, UniformGrid, KDTree, BallTree
+from .centroids import cluster_sums, category_counts, means, modes
+from .telemetry import IterationRecord, Telemetry
+
+index_types = ['auto', 'grid', 'kd tree', 'ball tree']
+
+# labels of rows in saved steps, clusters are numbered from CLUSTER_STEP_LABEL
+NOISE_STEP_LABEL = 0
+CORE_STEP_LABEL = 1
+CLUSTER_STEP_LABEL = 2
+
+
+def find_roots(parent: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """ roots of the trees of a union-find forest which contain nodes """
+    roots = parent[nodes]
+    while True:
+        next_roots = parent[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def union(parent: np.ndarray, first: np.ndarray, second: np.ndarray):
+    """
+        Joins the trees of all pairs (first[i], second[i]) at once. Roots are hooked to the smallest root
+        they are joined with, so a parent is never larger than its node (no cycles) and the root of a tree
+        is its smallest node. Hooking is repeated until both nodes of every pair have the same root,
+        then all paths are compressed.
+    """
+    while first.size:
+        first_roots, second_roots = find_roots(parent, first), find_roots(parent, second)
+        separate = first_roots != second_roots
+        first, second = first[separate], second[separate]
+        first_roots, second_roots = first_roots[separate], second_roots[separate]
+        np.minimum.at(parent, np.maximum(first_roots, second_roots), np.minimum(first_roots, second_roots))
+    parent[:] = find_roots(parent, np.arange(parent.size))
+
+
+class DBSCAN:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], eps: float = 0.5, min_samples: int = 5,
+                 metrics: int = 2, index_type: index_types = 'auto', leaf_size: int = LEAF_SIZE,
+                 precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None):
+        """
+            Density-based clustering. A row with at least min_samples rows (itself included) within eps is a core row,
+            core rows within eps of each other are in one cluster and other rows within eps of a core row (border rows)
+            join the cluster of the nearest one. The remaining rows are noise with label -1.
+            Neighbours are found by a spatial index: a uniform grid of numeric data with at most
+            GRID_MAX_DIMENSIONS columns, a k-d tree or a ball tree ('auto' chooses the grid when it fits,
+            the k-d tree otherwise). Neighbours of all rows are counted in batches, then clusters are joined
+            by a union-find over edges between core rows, batch by batch, instead of expanding clusters row by row.
+            Rows with missing numeric values are noise. Chunked data is encoded chunk by chunk and kept encoded.
+            Clusters are numbered in the order of their first core rows.
+        """
+        if eps <= 0:
+            raise TypeError(f"{eps} is invalid value of eps parameter")
+        if min_samples < 1:
+            raise TypeError(f"{min_samples} is invalid value of min_samples parameter")
+        if index_type not in index_types:
+            raise TypeError(f"{index_type} is invalid value of index_type parameter")
+        self.data = data
+        self.eps = eps
+        self.min_samples = min_samples
+        self.metrics = metrics
+        self.index_type = index_type
+        self.leaf_size = leaf_size
+        self.precision = precision
+        self.schema = schema
+        self.telemetry = Telemetry()
+        self.encoded = None
+        self.preview = data if isinstance(data, pd.DataFrame) else None
+        self.index = None
+        self.labels = None
+        self.core = None
+        self.saved_steps = None
+
+    def encode(self) -> EncodedData:
+        if isinstance(self.data, pd.DataFrame):
+            is_numeric = self.schema.is_numeric_for(self.data.columns) if self.schema is not None else None
+            return EncodedData(self.data, is_numeric, self.precision)
+        encoded, self.preview = EncodedData.from_chunks(self.data, self.schema, self.precision)
+        return encoded
+
+    def build_index(self, numeric: np.ndarray, codes: np.ndarray, is_numeric: List[bool]) -> SpatialIndex:
+        grid_fits = codes.shape[1] == 0 and numeric.shape[1] <= GRID_MAX_DIMENSIONS \
+            and UniformGrid.fits(numeric, self.eps, self.metrics)
+        if self.index_type == 'grid' and not grid_fits:
+            raise TypeError(f"grid index needs at most {GRID_MAX_DIMENSIONS} numeric columns and larger eps")
+        if self.index_type == 'grid' or (self.index_type == 'auto' and grid_fits):
+            return UniformGrid(numeric, self.eps, self.metrics)
+        tree_type = BallTree if self.index_type == 'ball tree' else KDTree
+        return tree_type(numeric, codes, self.metrics, self.leaf_size, is_numeric)
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+        """ labels of rows (-1 for noise), whether rows are core rows and a summary of clusters """
+        self.telemetry.start()
+        self.encoded = self.encode()
+        valid = np.flatnonzero(~np.isnan(self.encoded.numeric).any(axis=1))
+        numeric, codes = self.encoded.numeric[valid], self.encoded.codes[valid]
+        self.index = self.build_index(numeric, codes, self.encoded.is_numeric)
+        if isinstance(self.index, UniformGrid):
+            counts = self.count_sparse_cells(numeric, codes)
+        else:
+            counts = self.index.count_radius(numeric, codes, self.eps)
+        core_rows = np.flatnonzero(counts >= self.min_samples)
+        self.telemetry.record(None, float('nan'))
+
+        # union-find over core rows, numbered by their position in core_rows
+        core_position = np.full(valid.size, -1)
+        core_position[core_rows] = np.arange(core_rows.size)
+        if isinstance(self.index, UniformGrid):
+            core_index = UniformGrid(numeric[core_rows], self.eps, self.metrics)
+            parent = self.join_cells(core_index)
+            # the grid of core rows answers queries of border rows with positions of core rows
+            border_index, border_position = core_index, np.arange(core_rows.size)
+        else:
+            parent = self.join_rows(numeric, codes, core_rows, core_position)
+            border_index, border_position = self.index, core_position
+        _, core_clusters = np.unique(parent, return_inverse=True)
+
+        labels = np.full(self.encoded.size, -1)
+        labels[valid[core_rows]] = core_clusters
+        border_rows = np.flatnonzero((counts < self.min_samples) & (counts > 1))
+        labels[valid[border_rows]] = self.border_clusters(border_index, numeric[border_rows], codes[border_rows],
+                                                          border_position, core_clusters)
+        self.telemetry.record(int(np.count_nonzero(labels[valid[border_rows]] >= 0)), float('nan'))
+        self.telemetry.stop()
+
+        self.labels = labels
+        self.core = np.zeros(self.encoded.size, dtype=bool)
+        self.core[valid[core_rows]] = True
+        num_clusters = int(core_clusters.max(initial=-1)) + 1
+        clusters = self.summary(num_clusters)
+        self.saved_steps = self.record_steps(clusters) if with_steps else None
+        return labels, self.core, clusters
+
+    def count_sparse_cells(self, numeric: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+            Numbers of neighbours of rows, counted only for rows of cells with fewer than min_samples rows.
+            Rows of a cell are within eps of each other, so rows of the other cells are core rows
+            (their count is min_samples).
+        """
+        counts = np.full(numeric.shape[0], self.min_samples)
+        sparse = np.flatnonzero(self.index.cell_size[self.index.row_cells] < self.min_samples)
+        counts[sparse] = self.index.count_radius(numeric[sparse], codes[sparse], self.eps)
+        return counts
+
+    def join_rows(self, numeric: np.ndarray, codes: np.ndarray, core_rows: np.ndarray,
+                  core_position: np.ndarray) -> np.ndarray:
+        """ union-find of core rows joined by all edges between them, found by queries of batches of core rows """
+        parent = np.arange(core_rows.size)
+        for start in range(0, core_rows.size, QUERY_BATCH_ROWS):
+            stop = min(core_rows.size, start + QUERY_BATCH_ROWS)
+            batch = core_rows[start:stop]
+            offsets, neighbours, _ = self.index.query_radius(numeric[batch], codes[batch], self.eps)
+            sources = np.repeat(np.arange(start, stop), np.diff(offsets))
+            targets = core_position[neighbours]
+            # every edge between core rows is seen from both ends, it is joined once
+            joined = targets > sources
+            union(parent, sources[joined], targets[joined])
+            self.telemetry.record(int(np.count_nonzero(joined)), float('nan'))
+        return parent
+
+    def join_cells(self, grid: UniformGrid) -> np.ndarray:
+        """
+            Union-find of core rows indexed by a grid. Rows of one cell are within eps of each other,
+            so they are joined without any distance. Then for every offset of neighbouring cells
+            (each pair of cells once) only the pairs of cells which are not in one cluster yet
+            are compared row by row, QUERY_BATCH_ROWS pairs of cells at once.
+        """
+        parent = np.arange(grid.size)
+        first_rows = grid.order[grid.cell_start]
+        union(parent, np.arange(grid.size), first_rows[grid.row_cells])
+        self.telemetry.record(grid.size, float('nan'))
+        for neighbour_key in grid.neighbour_keys[grid.neighbour_keys > 0]:
+            targets = grid.find_cells(grid.cells + neighbour_key)
+            sources = np.flatnonzero(targets >= 0)
+            targets = targets[sources]
+            joined = 0
+            for start in range(0, sources.size, QUERY_BATCH_ROWS):
+                cells, other_cells = sources[start:start + QUERY_BATCH_ROWS], targets[start:start + QUERY_BATCH_ROWS]
+                separate = parent[first_rows[cells]] != parent[first_rows[other_cells]]
+                cells, other_cells = cells[separate], other_cells[separate]
+                # every row of a cell is a query of the rows of the other cell
+                sizes = grid.cell_size[cells]
+                offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+                queries = grid.order[np.repeat(grid.cell_start[cells], sizes) + offsets]
+                for pair_queries, rows, distances in grid.cell_pairs(grid.numeric, grid.codes, queries,
+                                                                     np.repeat(other_cells, sizes)):
+                    close = distances <= self.eps
+                    union(parent, pair_queries[close], rows[close])
+                    joined += int(np.count_nonzero(close))
+            self.telemetry.record(joined, float('nan'))
+        return parent
+
+    def border_clusters(self, index: SpatialIndex, numeric: np.ndarray, codes: np.ndarray, core_position: np.ndarray,
+                        core_clusters: np.ndarray) -> np.ndarray:
+        """
+            cluster of the nearest core row within eps of every border candidate (equal distances by index),
+            core_position maps rows of the index to positions of core rows (-1 for other rows)
+        """
+        clusters = np.full(numeric.shape[0], -1)
+        for start in range(0, numeric.shape[0], QUERY_BATCH_ROWS):
+            stop = min(numeric.shape[0], start + QUERY_BATCH_ROWS)
+            offsets, neighbours, distances = index.query_radius(numeric[start:stop], codes[start:stop], self.eps)
+            queries = np.repeat(np.arange(stop - start), np.diff(offsets))
+            is_core = core_position[neighbours] >= 0
+            queries, neighbours, distances = queries[is_core], neighbours[is_core], distances[is_core]
+            order = np.lexsort((neighbours, distances, queries))
+            queries, neighbours = queries[order], neighbours[order]
+            first = np.flatnonzero(np.diff(queries, prepend=-1) != 0)
+            clusters[start + queries[first]] = core_clusters[core_position[neighbours[first]]]
+        return clusters
+
+    def summary(self, num_clusters: int) -> pd.DataFrame:
+        """ size, number of core rows and center (means and modes) of every cluster """
+        clustered = self.labels >= 0
+        labels = self.labels[clustered]
+        numeric, codes = self.encoded.numeric[clustered], self.encoded.codes[clustered]
+        sums, counts = cluster_sums(numeric, labels, num_clusters)
+        centers_numeric = means(sums, counts, np.full_like(sums, np.nan))
+        centers_codes = np.full((num_clusters, codes.shape[1]), -1)
+        for j in range(codes.shape[1]):
+            histogram, last_positions = category_counts(codes[:, j], labels, num_clusters,
+                                                        len(self.encoded.categories[j]))
+            centers_codes[:, j] = modes(histogram, last_positions, centers_codes[:, j])
+        centers = pd.DataFrame(self.encoded.decode_rows(centers_numeric, centers_codes), columns=self.encoded.columns)
+        centers.insert(0, 'core rows', np.bincount(labels[self.core[clustered]], minlength=num_clusters))
+        centers.insert(0, 'rows', np.bincount(labels, minlength=num_clusters))
+        return centers
+
+    def record_steps(self, clusters: pd.DataFrame) -> StepsHistory:
+        """
+            Steps shown on the preview rows: no labels, core rows, then core rows of one more cluster in every step
+            and at last the border rows (labels NOISE_STEP_LABEL, CORE_STEP_LABEL and CLUSTER_STEP_LABEL + cluster).
+            Centroids of the steps are centers of the clusters (missing for noise and unassigned core rows).
+        """
+        size = self.preview.shape[0]
+        labels, core = self.labels[:size], self.core[:size]
+        num_clusters = clusters.shape[0]
+        centers = [(np.nan,) * len(self.encoded.columns)] * CLUSTER_STEP_LABEL \
+            + list(clusters[self.encoded.columns].itertuples(index=False))
+        centers = self.encoded.encode_rows(centers)
+        steps = StepsHistory(self.encoded, num_clusters + CLUSTER_STEP_LABEL, num_clusters + 3)
+        step_labels = np.full(size, NOISE_STEP_LABEL)
+        steps.append(step_labels, centers)
+        step_labels[core] = CORE_STEP_LABEL
+        steps.append(step_labels, centers)
+        for cluster in range(num_clusters):
+            step_labels[core & (labels == cluster)] = CLUSTER_STEP_LABEL + cluster
+            steps.append(step_labels, centers)
+        step_labels[~core & (labels >= 0)] = CLUSTER_STEP_LABEL + labels[~core & (labels >= 0)]
+        steps.append(step_labels, centers)
+        return steps
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        """ counting of neighbours, every batch of core rows (joined edges) and the border rows (labeled rows) """
+        return self.telemetry.get_records()
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ rows which the saved steps refer to - all rows of a data frame, the first rows of chunked data """
+        return self.preview
+
+    def get_working_set(self) -> Dict[str, int]:
+        """ estimated memory of a run: encoded data, the index, labels and flags of rows and a batch of neighbours """
+        schema = self.schema if self.schema is not None else DatasetSchema(self.data)
+        size = self.data.shape[0] if isinstance(self.data, pd.DataFrame) else schema.size
+        int_bytes = np.dtype(int).itemsize
+        return {
+            'data': EncodedData.estimate_bytes(size, schema.is_numeric, schema.cardinality, self.precision),
+            'index': 2 * size * int_bytes,
+            'rows': size * (4 * int_bytes + 1),
+            'neighbours': MAX_BLOCK_BYTES
+        }
@@ -0,0 +1,105 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dbscan import union
+
+
+class Dendrogram:
+    def __init__(self, first: np.ndarray, second: np.ndarray, heights: np.ndarray):
+        """
+            Hierarchy of merges of size rows, given as pairs of rows (any row of each merged cluster) and heights
+            of merges, in any order. Merges are sorted by height and numbered like in a linkage matrix:
+            rows are clusters 0 ... size - 1 and i-th merge creates cluster size + i (self.merges has columns
+            first cluster, second cluster, height and size of the merged cluster).
+            The hierarchy is cut into any number of clusters by joining the rows of the lowest merges,
+            so a different number of clusters needs no recomputation of distances.
+        """
+        order = np.argsort(heights, kind='stable')
+        self.first = np.asarray(first, dtype=np.int64)[order]
+        self.second = np.asarray(second, dtype=np.int64)[order]
+        self.heights = np.asarray(heights, dtype=float)[order]
+        self.size = self.heights.size + 1
+        self.merges = self.label()
+
+    def label(self) -> np.ndarray:
+        """ linkage matrix of the sorted merges, clusters of rows found by a union-find """
+        parent = list(range(self.size))
+        cluster = list(range(self.size))
+        sizes = [1] * self.size
+        merges = np.empty((self.size - 1, 4))
+        for i, (first, second) in enumerate(zip(self.first.tolist(), self.second.tolist())):
+            first, second = self.find(parent, first), self.find(parent, second)
+            low, high = min(cluster[first], cluster[second]), max(cluster[first], cluster[second])
+            parent[second] = first
+            sizes[first] += sizes[second]
+            cluster[first] = self.size + i
+            merges[i] = low, high, self.heights[i], sizes[first]
+        return merges
+
+    @staticmethod
+    def find(parent: List[int], node: int) -> int:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def cut(self, num_clusters: int) -> np.ndarray:
+        """ labels of rows in num_clusters clusters, numbered by their first rows """
+        return np.unique(self.roots(num_clusters), return_inverse=True)[1]
+
+    def cut_height(self, height: float) -> np.ndarray:
+        """ labels of rows in the clusters of merges not higher than height """
+        return self.cut(self.size - int(np.searchsorted(self.heights, height, side='right')))
+
+    def roots(self, num_clusters: int) -> np.ndarray:
+        """ the first row of the cluster of every row, for num_clusters clusters """
+        if not 1 <= num_clusters <= self.size:
+            raise TypeError(f"{num_clusters} is invalid number of clusters of {self.size} rows")
+        parent = np.arange(self.size)
+        joined = self.size - num_clusters
+        union(parent, self.first[:joined], self.second[:joined])
+        return parent
+
+    def truncated(self, num_leaves: int) -> Tuple[List[Tuple[List[float], List[float]]], List[int]]:
+        """
+            Lines of the last merges which join num_leaves clusters into one, as in a drawn dendrogram - every merge
+            is a bracket (x and y coordinates of four points) over its two clusters at the height of the merge.
+            Leaves are at x = 0, 1, ... and height 0, the second list holds the sizes of the leaf clusters.
+        """
+        num_leaves = max(1, min(num_leaves, self.size))
+        first_shown = self.size - num_leaves
+        positions, heights = {}, {}
+        leaf_sizes = []
+        # leaves are placed from left to right in the order of a depth-first walk from the root
+        stack = [2 * self.size - 2 if self.size > 1 else 0]
+        while stack:
+            node = stack[-1]
+            merge = node - self.size
+            if merge < first_shown:
+                positions[node], heights[node] = len(leaf_sizes), 0.0
+                leaf_sizes.append(int(self.merges[merge, 3]) if merge >= 0 else 1)
+                stack.pop()
+                continue
+            children = [int(self.merges[merge, 0]), int(self.merges[merge, 1])]
+            waiting = [child for child in children if child not in positions]
+            if waiting:
+                stack.extend(reversed(waiting))
+                continue
+            positions[node] = (positions[children[0]] + positions[children[1]]) / 2
+            heights[node] = self.merges[merge, 2]
+            stack.pop()
+        lines = []
+        for merge in range(first_shown, self.size - 1):
+            left, right = int(self.merges[merge, 0]), int(self.merges[merge, 1])
+            height = self.merges[merge, 2]
+            lines.append(([positions[left], positions[left], positions[right], positions[right]],
+                          [heights[left], height, height, heights[right]]))
+        return lines, leaf_sizes
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame(self.merges, columns=['first', 'second', 'height', 'size'])
+        return frame.astype({'first': int, 'second': int, 'size': int})
@@ -0,0 +1,111 @@
+from typing import Generator, Tuple
+
+import numpy as np
+
+from algorithms import DistanceEngine
+from algorithms.config import MAX_DISSIMILARITY_BYTES
+
+
+class Dissimilarities:
+    def __init__(self, numeric: np.ndarray, codes: np.ndarray, distances: DistanceEngine,
+                 max_bytes: int = MAX_DISSIMILARITY_BYTES):
+        """
+            Distances between all pairs of encoded rows (the same as DistanceEngine gives for mixed columns).
+            When the condensed matrix (upper triangle without the diagonal, n * (n - 1) / 2 float32 values)
+            fits in max_bytes, it is computed once block by block and cached, otherwise columns are computed
+            on demand. Values are rounded to float32 in both cases, so the results do not depend on caching.
+        """
+        self.numeric = numeric
+        self.codes = codes
+        self.distances = distances
+        self.size = numeric.shape[0]
+        self.condensed = None
+        if self.condensed_bytes(self.size) <= max_bytes:
+            self.condensed = self.build()
+            rows = np.arange(self.size, dtype=np.int64)
+            # position of the pair (row, column) of a row before the column is lower[row] + column
+            self.lower = self.offset(rows) - rows - 1
+
+    @staticmethod
+    def condensed_bytes(size: int) -> int:
+        return size * (size - 1) // 2 * np.dtype(np.float32).itemsize
+
+    def offset(self, rows: np.ndarray) -> np.ndarray:
+        """ position of the pair (row, row + 1) in the condensed matrix """
+        return rows * self.size - rows * (rows + 1) // 2
+
+    def build(self) -> np.ndarray:
+        condensed = np.empty(self.size * (self.size - 1) // 2, dtype=np.float32)
+        step = self.distances.block_rows(self.size)
+        for start in range(0, self.size, step):
+            stop = min(self.size, start + step)
+            # distances of the block to the rows from its first one, pairs above the diagonal in row-major order
+            block = self.distances.distances(self.numeric[start:stop], self.codes[start:stop],
+                                             self.numeric[start:], self.codes[start:])
+            above = np.arange(start, self.size)[np.newaxis, :] > np.arange(start, stop)[:, np.newaxis]
+            first, last = self.offset(np.array([start, stop]))
+            condensed[first:last] = block[above]
+        return condensed
+
+    def nbytes(self) -> int:
+        return self.condensed.nbytes if self.condensed is not None else 0
+
+    def columns(self, indices: np.ndarray) -> np.ndarray:
+        """ distances of all rows to the rows of indices, with shape (rows, indices) """
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.condensed is None:
+            block = self.distances.distances(self.numeric, self.codes, self.numeric[indices], self.codes[indices])
+            return block.astype(np.float32).astype(float)
+        # a column is a gather of the pairs (row, column) of earlier rows and a slice of the pairs of later rows
+        result = np.empty((indices.size, self.size))
+        for i, column in enumerate(indices):
+            result[i, :column] = self.condensed[self.lower[:column] + column]
+            result[i, column] = 0
+            start = self.offset(column)
+            result[i, column + 1:] = self.condensed[start:start + self.size - column - 1]
+        return result.T
+
+    def positions(self, index: int, rows: np.ndarray) -> np.ndarray:
+        """ positions of the pairs of a row with other (sorted) rows in the cache """
+        split = int(np.searchsorted(rows, index))
+        before, after = rows[:split], rows[split:]
+        return np.concatenate([self.lower[before] + index, after + (self.offset(index) - index - 1)])
+
+    def pair(self, first: int, second: int) -> float:
+        """ cached distance of two different rows """
+        low, high = min(first, second), max(first, second)
+        return float(self.condensed[self.offset(low) + high - low - 1])
+
+    def row(self, index: int, rows: np.ndarray) -> np.ndarray:
+        """ cached distances of a row to other rows """
+        return self.condensed[self.positions(index, rows)].astype(float)
+
+    def update(self, index: int, rows: np.ndarray, values: np.ndarray):
+        """ replaces cached distances of a row to other rows (e.g. of a merged cluster) """
+        self.condensed[self.positions(index, rows)] = values
+
+    def column_range(self, start: int, stop: int) -> np.ndarray:
+        """ distances of all rows to the rows from start to stop, read from the cache in contiguous runs """
+        if self.condensed is None or not self.condensed.size:
+            return self.columns(np.arange(start, stop))
+        columns = np.arange(start, stop, dtype=np.int64)
+        result = np.empty((self.size, columns.size))
+        # rows before the range - a run of the range in every row of the upper triangle
+        result[:start] = self.condensed[self.lower[:start, np.newaxis] + columns]
+        # rows within the range
+        low = np.minimum(columns[:, np.newaxis], columns)
+        high = np.maximum(columns[:, np.newaxis], columns)
+        result[start:stop] = self.condensed[np.maximum(self.lower[low] + high, 0)]
+        result[columns, columns - start] = 0
+        # rows after the range - a slice of the row of every column
+        for column in columns:
+            first = self.offset(column) + stop - column - 1
+            result[stop:, column - start] = self.condensed[first:first + self.size - stop]
+        return result
+
+    def column_blocks(self) -> Generator[Tuple[int, int, np.ndarray], None, None]:
+        """ consecutive ranges of columns of the full matrix, each with at most a block of values """
+        step = self.distances.block_rows(self.size)
+        for start in range(0, self.size, step):
+            stop = min(self.size, start + step)
+            yield start, stop, self.column_range(start, stop)
@@ -0,0 +1,397 @@
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import MAX_BLOCK_BYTES, PREVIEW_ROWS, SEEDING_SAMPLE_ROWS
+from .k_means import KMeans
+from .telemetry import IterationRecord, Telemetry
+
+covariance_types = ['full', 'diag', 'spherical']
+init_types = ['kmeans', 'random']
+mode_types = ['batch', 'online']
+
+# number of (rows, components + columns) arrays alive at once in the E-step of a tile of rows
+TILE_ARRAYS = 6
+
+# lower bound of the weight of a component (sum of responsibilities), keeps the mean of an empty component defined
+MIN_COMPONENT_WEIGHT = 10 * np.finfo(float).eps
+
+
+def log_sum_exp(values: np.ndarray) -> np.ndarray:
+    """ log of the sum of exponents of every row, shifted by the maximum of the row so that exp does not overflow """
+    largest = values.max(axis=1)
+    return largest + np.log(np.exp(values - largest[:, np.newaxis]).sum(axis=1))
+
+
+class Statistics:
+    def __init__(self, counts: np.ndarray, sums: np.ndarray, squares: np.ndarray):
+        """
+            Sufficient statistics of the components: sums of responsibilities (counts), sums of rows weighted
+            by responsibilities and sums of products of columns weighted by responsibilities - a matrix
+            per component for full covariances, only squares of columns for diagonal and spherical ones.
+        """
+        self.counts = counts
+        self.sums = sums
+        self.squares = squares
+
+    @classmethod
+    def of(cls, rows: np.ndarray, responsibilities: np.ndarray, covariance_type: covariance_types) -> 'Statistics':
+        """ statistics of a tile of rows, all computed by matrix products """
+        sums = responsibilities.T @ rows
+        if covariance_type == 'full':
+            squares = np.stack([(rows * responsibilities[:, [j]]).T @ rows for j in range(responsibilities.shape[1])])
+        else:
+            squares = responsibilities.T @ (rows * rows)
+        return cls(responsibilities.sum(axis=0), sums, squares)
+
+    def add(self, other: 'Statistics'):
+        self.counts += other.counts
+        self.sums += other.sums
+        self.squares += other.squares
+
+    def scale(self, factor: float):
+        self.counts *= factor
+        self.sums *= factor
+        self.squares *= factor
+
+    def blend(self, other: 'Statistics', rate: float):
+        """ moves the statistics towards other by rate (a step of online EM) """
+        self.scale(1 - rate)
+        other.scale(rate)
+        self.add(other)
+
+
+class Gaussians:
+    def __init__(self, weights: np.ndarray, means: np.ndarray, covariances: np.ndarray,
+                 covariance_type: covariance_types):
+        """
+            Weighted Gaussian components. Covariances have shape (components, columns, columns) when full,
+            (components, columns) when diagonal and (components,) when spherical. Full covariances are kept
+            with whitening matrices (inverses of their Cholesky factors), so that log densities of rows
+            are computed by one matrix product per component.
+        """
+        self.weights = weights
+        self.means = means
+        self.covariances = covariances
+        self.covariance_type = covariance_type
+        if covariance_type == 'full':
+            factors = np.linalg.cholesky(covariances)
+            self.whitening = np.linalg.inv(factors).transpose(0, 2, 1)
+            # half of the log of the determinant of precision
+            self.log_determinants = -np.log(np.diagonal(factors, axis1=1, axis2=2)).sum(axis=1)
+        else:
+            self.precisions = 1 / covariances
+            log_determinants = -0.5 * np.log(covariances)
+            if covariance_type == 'diag':
+                self.log_determinants = log_determinants.sum(axis=1)
+            else:
+                self.log_determinants = log_determinants * means.shape[1]
+
+    @classmethod
+    def from_statistics(cls, statistics: Statistics, covariance_type: covariance_types,
+                        reg_covariance: float) -> 'Gaussians':
+        """ M-step - weights, means and covariances (with reg_covariance added to variances) of the statistics """
+        counts = np.maximum(statistics.counts, MIN_COMPONENT_WEIGHT)
+        weights = counts / counts.sum()
+        means = statistics.sums / counts[:, np.newaxis]
+        if covariance_type == 'full':
+            covariances = statistics.squares / counts[:, np.newaxis, np.newaxis] \
+                - means[:, :, np.newaxis] * means[:, np.newaxis, :]
+            covariances += reg_covariance * np.eye(means.shape[1])
+        else:
+            variances = np.maximum(statistics.squares / counts[:, np.newaxis] - means**2, 0) + reg_covariance
+            covariances = variances if covariance_type == 'diag' else variances.mean(axis=1)
+        return cls(weights, means, covariances, covariance_type)
+
+    def log_densities(self, rows: np.ndarray) -> np.ndarray:
+        """ log of the weighted density of every component at every row, with shape (rows, components) """
+        if self.covariance_type == 'full':
+            distances = np.empty((rows.shape[0], self.weights.size))
+            for j in range(self.weights.size):
+                whitened = rows @ self.whitening[j] - self.means[j] @ self.whitening[j]
+                distances[:, j] = np.einsum('ij,ij->i', whitened, whitened)
+        elif self.covariance_type == 'diag':
+            distances = (rows * rows) @ self.precisions.T - 2 * rows @ (self.means * self.precisions).T \
+                + (self.means**2 * self.precisions).sum(axis=1)
+        else:
+            distances = ((rows * rows).sum(axis=1)[:, np.newaxis] - 2 * rows @ self.means.T
+                         + (self.means**2).sum(axis=1)) * self.precisions
+        distances = np.maximum(distances, 0)
+        return -0.5 * (rows.shape[1] * np.log(2 * np.pi) + distances) + self.log_determinants + np.log(self.weights)
+
+    def expectation(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ E-step - responsibilities of components for rows and log-likelihood of every row """
+        densities = self.log_densities(rows)
+        likelihood = log_sum_exp(densities)
+        return np.exp(densities - likelihood[:, np.newaxis]), likelihood
+
+
+class GaussianMixture:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int,
+                 covariance_type: covariance_types = 'full', init_type: init_types = 'kmeans',
+                 mode: mode_types = 'batch', iterations: Optional[int] = 100, tolerance: float = 1e-3,
+                 reg_covariance: float = 1e-6, batch_size: int = 1024, decay: float = 0.7,
+                 precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None):
+        """
+            Gaussian Mixture Model of numeric columns (categorical columns are not modeled) fitted by EM.
+            E-steps run over tiles of rows, which bound memory to about MAX_BLOCK_BYTES, in log-space
+            (log-sum-exp over components), and accumulate sufficient statistics by matrix products,
+            from which the M-step computes weights, means and covariances of the components.
+            'batch' is exact EM - one pass over all rows (or chunks) per iteration, until the mean
+            log-likelihood of a row improves by less than tolerance. 'online' is stepwise EM - statistics of every
+            batch of batch_size rows move the running ones by (steps + 2)^-decay, followed by an M-step,
+            so a pass over chunks improves the model many times, and iterations is the number of passes
+            (the last batches weigh the most, so rows should not be ordered by clusters).
+            Initial components are the clusters of K-Means ('kmeans') or of random rows ('random')
+            on a uniform sample of rows. Rows are centered by the mean of the data, which keeps covariances
+            computed from sums of squares accurate. Rows with missing values are assigned to the first component.
+        """
+        if covariance_type not in covariance_types:
+            raise TypeError(f"{covariance_type} is invalid value of covariance_type parameter")
+        if init_type not in init_types:
+            raise TypeError(f"{init_type} is invalid value of init_type parameter")
+        if mode not in mode_types:
+            raise TypeError(f"{mode} is invalid value of mode parameter")
+        if not 0.5 < decay <= 1:
+            raise TypeError(f"{decay} is invalid value of decay parameter")
+        for name, value in [('num_clusters', num_clusters), ('batch_size', batch_size)]:
+            if value < 1:
+                raise TypeError(f"{value} is invalid value of {name} parameter")
+        # a constant column needs a positive variance, otherwise its densities are undefined
+        if reg_covariance <= 0:
+            raise TypeError(f"{reg_covariance} is invalid value of reg_covariance parameter")
+        if isinstance(data, Iterator):
+            raise TypeError("data can be iterated only once")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.covariance_type = covariance_type
+        self.init_type = init_type
+        self.mode = mode
+        self.max_iterations = iterations
+        self.tolerance = tolerance
+        self.reg_covariance = reg_covariance
+        self.batch_size = batch_size
+        self.decay = decay
+        self.precision = precision
+        self.schema = schema
+        self.telemetry = Telemetry()
+        self.saved_steps = None
+        self.gaussians = None
+        self.log_likelihood = None
+
+        self.size = 0
+        self.valid_size = 0
+        self.encoded = None
+        self.preview = None
+        self.sample = None
+        self.center = None
+        self.scan()
+        self.labels = np.zeros(self.size, dtype=np.int32)
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        if isinstance(self.data, pd.DataFrame):
+            yield self.data
+        else:
+            yield from self.data
+
+    def scan(self):
+        """ first pass - encoding of columns, number of rows, mean of rows and a uniform sample of rows """
+        sums = None
+        sample_keys = np.empty(0)
+        for chunk in self.chunks():
+            if self.encoded is None:
+                is_numeric = self.schema.is_numeric_for(chunk.columns) if self.schema is not None else None
+                self.encoded = EncodedData(chunk, is_numeric, self.precision)
+                if not self.encoded.numeric_index:
+                    raise TypeError("Gaussian mixture needs numeric columns")
+                numeric = self.encoded.numeric
+                self.preview = chunk if isinstance(self.data, pd.DataFrame) else chunk.iloc[:PREVIEW_ROWS]
+                sums = np.zeros(numeric.shape[1])
+                self.sample = np.empty((0, numeric.shape[1]))
+            else:
+                numeric, _ = self.encoded.encode_frame(chunk)
+            self.size += numeric.shape[0]
+            numeric = numeric[~np.isnan(numeric).any(axis=1)].astype(float)
+            self.valid_size += numeric.shape[0]
+            sums += numeric.sum(axis=0)
+            # reservoir sampling - rows with the smallest random keys are kept
+            keys = np.concatenate([sample_keys, np.random.random(numeric.shape[0])])
+            rows = np.concatenate([self.sample, numeric])
+            kept = np.sort(np.argsort(keys, kind='stable')[:SEEDING_SAMPLE_ROWS])
+            self.sample, sample_keys = rows[kept], keys[kept]
+        if self.valid_size < self.num_clusters:
+            raise TypeError(f"{self.num_clusters} clusters for {self.valid_size} rows without missing values")
+        self.center = sums / self.valid_size
+        self.sample -= self.center
+
+    def tile_rows(self) -> int:
+        """ number of rows of a tile of the E-step, so that its arrays fit in MAX_BLOCK_BYTES """
+        row_bytes = TILE_ARRAYS * (self.num_clusters + self.sample.shape[1]) * np.dtype(float).itemsize
+        return max(1, MAX_BLOCK_BYTES // row_bytes)
+
+    def tiles(self, rows: int) -> Generator[Tuple[int, np.ndarray, np.ndarray], None, None]:
+        """ position of the first row, rows without missing values (centered) and the mask of them, of every tile """
+        start = 0
+        for chunk in self.chunks():
+            if isinstance(self.data, pd.DataFrame):
+                numeric = self.encoded.numeric
+            else:
+                numeric, _ = self.encoded.encode_frame(chunk)
+            for first in range(0, numeric.shape[0], rows):
+                tile = numeric[first:first + rows]
+                valid = ~np.isnan(tile).any(axis=1)
+                yield start + first, tile[valid].astype(float) - self.center, valid
+            start += numeric.shape[0]
+
+    def update_labels(self, start: int, valid: np.ndarray, responsibilities: np.ndarray) -> int:
+        """ labels of a tile (the most responsible components), returns the number of changed ones """
+        labels = np.zeros(valid.size, dtype=np.int32)
+        labels[valid] = np.argmax(responsibilities, axis=1)
+        changed = int(np.count_nonzero(self.labels[start:start + valid.size] != labels))
+        self.labels[start:start + valid.size] = labels
+        return changed
+
+    def initial_gaussians(self) -> Tuple[Gaussians, Statistics]:
+        """ components of clusters of the sample (K-Means or nearest random rows) and their statistics per row """
+        if self.init_type == 'kmeans':
+            columns = [self.encoded.columns[i] for i in self.encoded.numeric_index]
+            k_means = KMeans(pd.DataFrame(self.sample, columns=columns), self.num_clusters, metrics=2,
+                             init_type='greedy kmeans++')
+            labels, _ = k_means.run(False)
+        else:
+            means = self.sample[np.random.choice(self.sample.shape[0], self.num_clusters, replace=False)]
+            distances = (self.sample**2).sum(axis=1)[:, np.newaxis] - 2 * self.sample @ means.T + (means**2).sum(axis=1)
+            labels = np.argmin(distances, axis=1)
+        responsibilities = np.zeros((self.sample.shape[0], self.num_clusters))
+        responsibilities[np.arange(labels.size), labels] = 1
+        statistics = Statistics.of(self.sample, responsibilities, self.covariance_type)
+        statistics.scale(1 / self.sample.shape[0])
+        return Gaussians.from_statistics(statistics, self.covariance_type, self.reg_covariance), statistics
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame]:
+        """ labels of rows (the most responsible components) and means of the components """
+        self.telemetry.start()
+        self.saved_steps = StepsHistory(self.encoded, self.num_clusters) if with_steps else None
+        self.gaussians, statistics = self.initial_gaussians()
+        self.save_step()
+        if self.mode == 'batch':
+            self.run_batch()
+        else:
+            self.run_online(statistics)
+        for start, rows, valid in self.tiles(self.tile_rows()):
+            self.update_labels(start, valid, self.gaussians.expectation(rows)[0])
+        self.telemetry.stop()
+        return self.labels, self.means_frame()
+
+    def run_batch(self):
+        previous = -np.inf
+        iteration = 0
+        while self.max_iterations is None or iteration < self.max_iterations:
+            iteration += 1
+            statistics = None
+            likelihood, changed = 0.0, 0
+            for start, rows, valid in self.tiles(self.tile_rows()):
+                responsibilities, row_likelihood = self.gaussians.expectation(rows)
+                tile_statistics = Statistics.of(rows, responsibilities, self.covariance_type)
+                if statistics is None:
+                    statistics = tile_statistics
+                else:
+                    statistics.add(tile_statistics)
+                likelihood += row_likelihood.sum()
+                changed += self.update_labels(start, valid, responsibilities)
+            self.log_likelihood = likelihood / self.valid_size
+            self.update(Gaussians.from_statistics(statistics, self.covariance_type, self.reg_covariance), changed)
+            if abs(self.log_likelihood - previous) < self.tolerance:
+                break
+            previous = self.log_likelihood
+
+    def run_online(self, statistics: Statistics):
+        previous = -np.inf
+        steps = 0
+        iteration = 0
+        while self.max_iterations is None or iteration < self.max_iterations:
+            iteration += 1
+            likelihood, changed = 0.0, 0
+            gaussians = self.gaussians
+            for start, rows, valid in self.tiles(self.batch_size):
+                if not rows.shape[0]:
+                    continue
+                responsibilities, row_likelihood = gaussians.expectation(rows)
+                batch_statistics = Statistics.of(rows, responsibilities, self.covariance_type)
+                batch_statistics.scale(1 / rows.shape[0])
+                statistics.blend(batch_statistics, (steps + 2)**-self.decay)
+                gaussians = Gaussians.from_statistics(statistics, self.covariance_type, self.reg_covariance)
+                steps += 1
+                likelihood += row_likelihood.sum()
+                changed += self.update_labels(start, valid, responsibilities)
+            # log-likelihood of the pass, every batch scored by the model before its step
+            self.log_likelihood = likelihood / self.valid_size
+            self.update(gaussians, changed)
+            if abs(self.log_likelihood - previous) < self.tolerance:
+                break
+            previous = self.log_likelihood
+
+    def update(self, gaussians: Gaussians, changed: int):
+        """ replaces the components after an iteration, records its telemetry and step """
+        shift = float(np.max(np.linalg.norm(gaussians.means - self.gaussians.means, axis=1)))
+        self.gaussians = gaussians
+        self.telemetry.record(changed, -self.log_likelihood, 0, shift)
+        self.save_step()
+
+    def predict(self, numeric: np.ndarray) -> np.ndarray:
+        """ the most responsible component of every encoded row, the first one for rows with missing values """
+        valid = ~np.isnan(numeric).any(axis=1)
+        labels = np.zeros(numeric.shape[0], dtype=int)
+        if valid.any():
+            labels[valid] = np.argmax(self.gaussians.log_densities(numeric[valid].astype(float) - self.center), axis=1)
+        return labels
+
+    def encoded_means(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ means of components as encoded rows, without categories """
+        codes = np.full((self.num_clusters, len(self.encoded.categorical_index)), -1)
+        return self.gaussians.means + self.center, codes
+
+    def means_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.encoded.decode_rows(*self.encoded_means()), columns=self.encoded.columns)
+
+    def save_step(self):
+        """ labels of the preview rows and means of the components as a step """
+        if self.saved_steps is None:
+            return
+        self.saved_steps.append(self.predict(self.encoded.numeric[:self.preview.shape[0]]), self.encoded_means())
+
+    def get_weights(self) -> np.ndarray:
+        return self.gaussians.weights
+
+    def get_covariances(self) -> np.ndarray:
+        return self.gaussians.covariances
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        """ every iteration (a pass over the data), inertia is the negative mean log-likelihood of a row """
+        return self.telemetry.get_records()
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ rows which the saved steps refer to - all rows of a data frame, the first rows of chunked data """
+        return self.preview
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: encoded data (the first chunk of chunked data), labels, the sample
+            for initial components, the arrays of a tile of the E-step and statistics of the components
+        """
+        columns = self.sample.shape[1]
+        tile = min(self.size, self.tile_rows() if self.mode == 'batch' else self.batch_size)
+        squares = columns**2 if self.covariance_type == 'full' else columns
+        float_bytes = np.dtype(float).itemsize
+        return {
+            'data': self.encoded.nbytes(),
+            'labels': self.labels.nbytes,
+            'sample': self.sample.nbytes,
+            'tile': tile * TILE_ARRAYS * (self.num_clusters + columns) * float_bytes,
+            'statistics': 3 * self.num_clusters * (1 + columns + squares) * float_bytes
+        }
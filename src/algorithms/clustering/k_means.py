@@ -1,25 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from typing import List, Tuple, Union, Optional
+from typing import Dict, List, Tuple, Union, Optional
+
+from algorithms import EncodedData, MappedEncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from .seeding import KMeansSeeding
+from .assignment import algorithm_types, assignment_types
+from .centroids import update_centroids
+from .telemetry import Convergence, IterationRecord, Telemetry
+from .warm_start import WarmStart
+from .metrics import criterion_types, higher_is_better, inertia, dunn_index, davies_bouldin_index, silhouette_score
+from algorithms.config import SILHOUETTE_SAMPLES
 
-init_types = ['random', 'kmeans++']
+init_types = ['random', 'kmeans++', 'kmeans++ sampling', 'greedy kmeans++']
 
 
 class KMeans:
-    def __init__(self, data: pd.DataFrame, num_clusters: int, metrics: int = 1, iterations: Optional[int] = None, repeats: int = 1, init_type: init_types = 'random'):
+    def __init__(self, data: pd.DataFrame, num_clusters: int, metrics: int = 1, iterations: Optional[int] = None, repeats: int = 1, init_type: init_types = 'random',
+                 algorithm: algorithm_types = 'lloyd', processes: int = 1, criterion: criterion_types = 'inertia',
+                 silhouette_samples: int = SILHOUETTE_SAMPLES, tolerance: float = 0.0, max_shift: float = 0.0,
+                 min_reassigned: float = 0.0, precision: precision_types = 'float64',
+                 centroids: Optional[List[Tuple]] = None, schema: Optional[DatasetSchema] = None,
+                 encoded: Optional[EncodedData] = None, warm_start: Optional[WarmStart] = None,
+                 weights: Optional[np.ndarray] = None):
+        """
+            weights of rows (e.g. of a coreset) make means, modes, inertia and the choice of initial centroids
+            weighted, a row of weight w counts as w rows. Criteria other than inertia ignore them.
+            warm_start is the solution of a previous run on an earlier version of the data (see WarmStart),
+            its centroids are the initial ones and its bounds skip rows which keep their labels.
+            Lloyd's algorithm keeps no bounds, so a warm start uses Hamerly's one (with the same labels).
+            Given encoded rows (e.g. of one cluster, see BisectingKMeans) are clustered instead of encoding data,
+            which is then used only for its columns and may have no rows (e.g. in worker processes) - rows chosen
+            as initial centroids are then decoded from the encoded ones.
+            Given initial centroids (or a warm start) make every repeat the same run, so it runs once.
+        """
         self.num_clusters = num_clusters
         self.metrics = metrics
         self.max_iterations = iterations
         self.repeats = repeats
+        self.processes = processes
+        self.init_type = init_type
+        self.algorithm = algorithm
+        self.criterion = criterion
+        self.silhouette_samples = silhouette_samples
+        self.score = None
+        self.convergence = Convergence(tolerance, max_shift, min_reassigned)
+        self.telemetry = Telemetry()
+        self.inertia = None
         if init_type not in init_types:
             raise TypeError(f"{init_type} is invalid value of init_type parameter")
+        if algorithm not in algorithm_types:
+            raise TypeError(f"{algorithm} is invalid value of algorithm parameter")
+        if criterion not in criterion_types:
+            raise TypeError(f"{criterion} is invalid value of criterion parameter")
+        if warm_start is not None and centroids is None:
+            centroids = warm_start.centroids_for(list(data.columns))
+        else:
+            warm_start = None
+        if centroids is not None and len(centroids) != num_clusters:
+            raise TypeError(f"{len(centroids)} initial centroids given for {num_clusters} clusters")
         self.step_counter = 0
         self.data = data
-        self.is_numeric = [self.check_numeric(column) for _, column in self.data.items()]
+        if encoded is None:
+            is_numeric = schema.is_numeric_for(self.data.columns) if schema is not None else None
+            encoded = EncodedData(self.data, is_numeric, precision)
+        self.is_numeric = encoded.is_numeric
+        self.encoded = encoded
+        self.distances = DistanceEngine(self.is_numeric, self.metrics, dtype=encoded.precision)
+        self.weights = np.asarray(weights, dtype=float) if weights is not None else None
+        self.seeding = KMeansSeeding(self.encoded, self.distances, self.weights)
+        self.warm_start = warm_start
+        if warm_start is not None and algorithm == 'lloyd':
+            algorithm = 'hamerly'
+        self.assignment = assignment_types[algorithm](self.encoded, self.distances)
+        self.skipped_distances = []
         self.centroids = []
-        self.labels = np.zeros(self.data.shape[0], dtype=int)
+        self.labels = np.zeros(self.encoded.size, dtype=int)
         self.saved_steps = []
-        self.get_centroids = {'random': self.random_centroids, 'kmeans++': self.kmeanspp_centroids}[init_type]
+        # given initial centroids, after a run the initial centroids of that run
+        self.initial_centroids = centroids
+        # with given initial centroids every repeat is the same run
+        self.fixed_centroids = centroids is not None
+        self.get_centroids = {
+            'random': self.random_centroids,
+            'kmeans++': self.kmeanspp_centroids,
+            'kmeans++ sampling': self.sampled_kmeanspp_centroids,
+            'greedy kmeans++': self.greedy_kmeanspp_centroids
+        }[init_type]
+        if centroids is not None:
+            # given initial centroids (e.g. a warm start from another solution) replace init_type
+            self.get_centroids = self.given_centroids
 
     def distance(self, vector_x: Union[Tuple, List], vector_y: Union[Tuple, List]) -> float:
         diff = np.zeros_like(vector_x, dtype=float)
@@ -34,135 +105,221 @@ class KMeans:
         return (np.sum(diff**self.metrics))**(1/self.metrics)
 
     def random_centroids(self) -> List[Tuple]:
-        return list(self.data.sample(self.num_clusters, replace=False).itertuples(index=False))
+        if self.data.shape[0] == self.encoded.size:
+            return list(self.data.sample(self.num_clusters, replace=False, weights=self.weights)
+                        .itertuples(index=False))
+        probabilities = self.weights / self.weights.sum() if self.weights is not None else None
+        return self.rows(np.random.choice(self.encoded.size, self.num_clusters, replace=False, p=probabilities))
+
+    def given_centroids(self) -> List[Tuple]:
+        return list(self.initial_centroids)
+
+    def rows(self, indices: List[int]) -> List[Tuple]:
+        if self.data.shape[0] == self.encoded.size:
+            return list(self.data.iloc[indices].itertuples(index=False))
+        return self.encoded.decode_rows(self.encoded.numeric[indices], self.encoded.codes[indices])
 
     def kmeanspp_centroids(self) -> List[Tuple]:
-        centroids = list(self.data.sample(1, replace=False).itertuples(index=False))
-        for _ in range(self.num_clusters - 1):
-            centroid = None
-            max_dis = 0
-            for row in self.data.itertuples(index=False):
-                min_dis = np.inf
-                for cent in centroids:
-                    dis = self.distance(row, cent)
-                    if dis < min_dis:
-                        min_dis = dis
-                if min_dis > max_dis:
-                    max_dis = min_dis
-                    centroid = row
-            centroids.append(centroid)
-        return centroids
+        return self.rows(self.seeding.farthest_first(self.num_clusters))
+
+    def sampled_kmeanspp_centroids(self) -> List[Tuple]:
+        return self.rows(self.seeding.d2_sampling(self.num_clusters))
+
+    def greedy_kmeanspp_centroids(self) -> List[Tuple]:
+        return self.rows(self.seeding.greedy(self.num_clusters))
+
+    def restore_warm_start(self):
+        """ labels and bounds of rows which did not change since the warm start, for the first assignment """
+        if self.warm_start is None:
+            return
+        labels, upper, lower = self.warm_start.bounds_for(self.data.index, self.encoded)
+        self.labels[:] = labels
+        self.assignment.restore(labels, upper, lower, *self.encoded.encode_rows(self.centroids))
 
     def mark_labels(self) -> int:
-        count = 0
-        for i, row in enumerate(self.data.itertuples(index=False)):
-            min_dis = np.inf
-            m = 0
-            for j, centroid in enumerate(self.centroids):
-                dis = self.distance(row, centroid)
-                if dis < min_dis:
-                    min_dis = dis
-                    m = j
-            if self.labels[i] != m:
-                count += 1
-            self.labels[i] = m
+        labels, skipped = self.assignment.assign(*self.encoded.encode_rows(self.centroids))
+        self.skipped_distances.append(skipped)
+        count = int(np.count_nonzero(labels != self.labels))
+        self.labels[:] = labels
         return count
 
-    def check_numeric(self, element: any) -> bool:
-        try:
-            pd.to_numeric(element)
-            return True
-        except ValueError:
-            return False
-
-    def mean(self, group: pd.DataFrame) -> Tuple:
-        result = []
-        for i, (_, column) in enumerate(group.items()):
-            if self.is_numeric[i]:
-                result.append(column.mean())
-            else:
-                counter = {}
-                most_frequent = None
-                count = 0
-                for element in column:
-                    counter[element] = counter.get(element, 0) + 1
-                    if counter[element] > count:
-                        count = counter[element]
-                        most_frequent = element
-                result.append(most_frequent)
-        return tuple(result)
-
     def update_centroids(self):
-        for i, centroid in enumerate(self.centroids):
-            group = self.data[self.labels == i]
-            self.centroids[i] = self.mean(group)
+        """
+            New centroids computed in one pass over the labels - means of numeric columns and modes
+            of categorical ones. A cluster which lost all its rows keeps its centroid
+            (so a centroid never becomes undefined), as does a column without any value in the cluster.
+        """
+        centroids_numeric, centroids_codes = self.encoded.encode_rows(self.centroids)
+        new_numeric, new_codes = update_centroids(self.encoded.numeric, self.encoded.codes, self.labels,
+                                                  self.encoded.categories, centroids_numeric, centroids_codes,
+                                                  self.weights)
+        self.centroids = self.encoded.decode_rows(new_numeric, new_codes)
 
     def step(self) -> bool:
+        previous_inertia = self.inertia
+        previous_centroids = self.encoded.encode_rows(self.centroids)
         self.update_centroids()
         count = self.mark_labels()
-        if count == 0:
-            return False
-        return True
-
-    def check_solution(self, labels, centroids):
-        """ dunn index """
-        max_distance_intra = 0
-        min_distance_inter = np.inf
-        for i, first in enumerate(centroids):
-            for second in centroids[i+1:]:
-                dis = self.distance(first, second)
-                if dis > max_distance_intra:
-                    max_distance_intra = dis
-        for i, row in enumerate(self.data.itertuples(index=False)):
-            dis = self.distance(row, centroids[labels[i]])
-            if dis < min_distance_inter:
-                min_distance_inter = dis
-        return min_distance_inter / max_distance_intra
+        shift = self.record_iteration(count, previous_centroids)
+        return not self.convergence.reached(count, self.encoded.size, shift, self.inertia, previous_inertia)
+
+    def record_iteration(self, count: int,
+                         previous_centroids: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> float:
+        """ saves telemetry of the last assignment and its inertia, returns the largest shift of a centroid """
+        centroids_numeric, centroids_codes = self.encoded.encode_rows(self.centroids)
+        shift = np.nan
+        if previous_centroids is not None:
+            shift = float(np.max(self.assignment.shifts(*previous_centroids, centroids_numeric, centroids_codes)))
+        self.inertia = inertia(self.assignment.assigned_distances(self.labels, centroids_numeric, centroids_codes),
+                               self.weights)
+        self.telemetry.record(count, self.inertia, self.skipped_distances[-1], shift)
+        return shift
+
+    def check_solution(self, labels: np.ndarray, centroids: List[Tuple]) -> float:
+        """ value of the chosen criterion, distances of rows to centroids are reused from the last assignment """
+        centroids_numeric, centroids_codes = self.encoded.encode_rows(centroids)
+        if self.criterion == 'silhouette':
+            return silhouette_score(self.distances, self.encoded.numeric, self.encoded.codes, labels,
+                                    self.silhouette_samples)
+        min_distances = self.assignment.assigned_distances(labels, centroids_numeric, centroids_codes)
+        if self.criterion == 'inertia':
+            return inertia(min_distances, self.weights)
+        centroid_distances = self.assignment.centroid_distances(centroids_numeric, centroids_codes)
+        if self.criterion == 'dunn':
+            return dunn_index(labels, min_distances, centroid_distances)
+        return davies_bouldin_index(labels, min_distances, centroid_distances)
 
     def run(self, with_steps) -> Tuple[np.ndarray, pd.DataFrame]:
         runner = self.run_with_saving_steps if with_steps else self.run_without_saving_steps
-        if self.repeats == 1:
+        if self.repeats == 1 or self.fixed_centroids:
             solution = runner()
             return solution[0], pd.DataFrame(solution[1], columns=self.data.columns)
-        best_value = np.inf
-        solution = None
-        steps = None
-        for _ in range(self.repeats):
-            result = runner()
-            value = self.check_solution(*result)
-            if value < best_value:
-                solution = result
-                steps = [(step[0].copy(), step[1].copy()) for step in self.saved_steps]
-                best_value = value
-        self.saved_steps = steps
-        return solution[0], pd.DataFrame(solution[1], columns=self.data.columns)
+        seeds = [int(seed) for seed in np.random.randint(np.iinfo(np.int32).max, size=self.repeats)]
+        if self.processes > 1:
+            results = self.run_repeats_in_pool(seeds)
+        else:
+            results = [self.run_seed(seed) for seed in seeds]
+        scores = np.array([result[2] for result in results])
+        best = int(np.argmax(scores) if higher_is_better[self.criterion] else np.argmin(scores))
+        self.score = scores[best]
+        if with_steps:
+            # only the best repeat is run again to record its steps, the same seed gives the same run
+            np.random.seed(seeds[best])
+            self.run_with_saving_steps()
+        else:
+            labels, self.centroids, _, self.step_counter, self.telemetry.records = results[best]
+            self.labels[:] = labels
+        return self.labels, pd.DataFrame(self.centroids, columns=self.data.columns)
+
+    def run_seed(self, seed: int) -> Tuple[np.ndarray, List[Tuple], float, int, List[IterationRecord]]:
+        """
+            one repeat without steps, returns labels, centroids, value of check_solution,
+            number of steps and telemetry of the iterations
+        """
+        np.random.seed(seed)
+        labels, centroids = self.run_without_saving_steps()
+        score = self.check_solution(labels, centroids)
+        return labels.astype(np.int32), list(centroids), score, self.step_counter, self.telemetry.get_records()
+
+    def run_repeats_in_pool(self, seeds: List[int]) -> List[Tuple[np.ndarray, List[Tuple], float, int, List]]:
+        """ repeats run in worker processes which share the encoded data through memory-mapped files """
+        mapped = MappedEncodedData(self.encoded)
+        parameters = {
+            'num_clusters': self.num_clusters,
+            'metrics': self.metrics,
+            'iterations': self.max_iterations,
+            'init_type': self.init_type,
+            'algorithm': self.algorithm,
+            'criterion': self.criterion,
+            'silhouette_samples': self.silhouette_samples,
+            'tolerance': self.convergence.tolerance,
+            'max_shift': self.convergence.max_shift,
+            'min_reassigned': self.convergence.min_reassigned,
+            'weights': self.weights,
+            'centroids': self.initial_centroids if self.fixed_centroids else None
+        }
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.processes, len(seeds)), initializer=init_repeat_worker,
+                                     initargs=(mapped, parameters)) as executor:
+                return list(executor.map(run_repeat, seeds))
+        finally:
+            mapped.remove()
 
     def run_with_saving_steps(self) -> Tuple[np.ndarray, List[Tuple]]:
         steps = 0
-        self.saved_steps = []
+        max_steps = self.max_iterations + 3 if self.max_iterations else None
+        self.saved_steps = StepsHistory(self.encoded, self.num_clusters, max_steps)
+        self.skipped_distances = []
+        self.assignment.reset()
+        self.telemetry.start()
         self.centroids = self.get_centroids()
-        self.mark_labels()
-        self.saved_steps.append((self.labels, pd.DataFrame(self.centroids, columns=self.data.columns)))
+        self.initial_centroids = [tuple(centroid) for centroid in self.centroids]
+        self.restore_warm_start()
+        self.record_iteration(self.mark_labels())
+        self.saved_steps.append(self.labels, self.centroids)
         while self.step():
             steps += 1
-            self.saved_steps.append((self.labels, pd.DataFrame(self.centroids, columns=self.data.columns)))
+            self.saved_steps.append(self.labels, self.centroids)
             if self.max_iterations and steps > self.max_iterations:
                 break
+        self.telemetry.stop()
         self.step_counter = steps
-        self.saved_steps.append((self.labels, pd.DataFrame(self.centroids, columns=self.data.columns)))
+        self.saved_steps.append(self.labels, self.centroids)
         return self.labels, self.centroids
 
     def run_without_saving_steps(self) -> Tuple[np.ndarray, List[Tuple]]:
         steps = 0
         self.saved_steps = []
+        self.skipped_distances = []
+        self.assignment.reset()
+        self.telemetry.start()
         self.centroids = self.get_centroids()
-        self.mark_labels()
+        self.initial_centroids = [tuple(centroid) for centroid in self.centroids]
+        self.restore_warm_start()
+        self.record_iteration(self.mark_labels())
         while self.step():
             steps += 1
             if self.max_iterations is not None and steps > self.max_iterations:
                 break
+        self.telemetry.stop()
         self.step_counter = steps
         return self.labels, self.centroids
 
-    def get_steps(self) -> List[Tuple[np.ndarray, pd.DataFrame]]:
+    def get_skipped_distances(self) -> List[int]:
+        """ number of distance computations skipped thanks to bounds in each assignment of the last run """
+        return self.skipped_distances
+
+    def get_steps(self) -> StepsHistory:
         return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        """ one record per assignment of the last run (or of the best repeat), the initial one first """
+        return self.telemetry.get_records()
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            Estimated memory (in bytes) used by a run, known before it starts: the encoded data,
+            labels, the largest block of distances and the state kept by the assignment algorithm.
+            Worker processes of repeats map the same data, but each has its own labels, block and state.
+        """
+        size = self.encoded.size
+        return {
+            'data': self.encoded.nbytes() + (self.weights.nbytes if self.weights is not None else 0),
+            'labels': self.labels.nbytes,
+            'distances': self.distances.block_bytes(size, self.num_clusters),
+            'assignment': type(self.assignment).state_bytes(size, self.num_clusters)
+        }
+
+
+# K-Means of the worker process, created once per process by init_repeat_worker
+worker_k_means: Optional[KMeans] = None
+
+
+def init_repeat_worker(mapped: MappedEncodedData, parameters: dict):
+    global worker_k_means
+    encoded = mapped.load()
+    worker_k_means = KMeans(pd.DataFrame(columns=encoded.columns), encoded=encoded, **parameters)
+
+
+def run_repeat(seed: int) -> Tuple[np.ndarray, List[Tuple], float, int, List[IterationRecord]]:
+    return worker_k_means.run_seed(seed)
@@ -0,0 +1,185 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, MappedEncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import SILHOUETTE_SAMPLES, SWEEP_TOLERANCE
+from .k_means import KMeans, init_types
+from .assignment import algorithm_types
+from .metrics import criterion_types, higher_is_better, elbow, sample_distances, sampled_silhouette, silhouette_sample
+from .telemetry import IterationRecord
+
+# result of one number of clusters: k, initial centroids, final centroids, inertia, silhouette,
+# value of the criterion, number of steps and telemetry of the run
+SweepResult = Tuple[int, List[Tuple], List[Tuple], float, float, float, int, List[IterationRecord]]
+
+
+class KMeansSweep:
+    def __init__(self, data: pd.DataFrame, num_clusters: int, min_clusters: int = 2, metrics: int = 1,
+                 iterations: Optional[int] = None, repeats: int = 1, init_type: init_types = 'random',
+                 algorithm: algorithm_types = 'lloyd', processes: int = 1, criterion: criterion_types = 'silhouette',
+                 silhouette_samples: int = SILHOUETTE_SAMPLES, tolerance: float = 0.0, max_shift: float = 0.0,
+                 min_reassigned: float = 0.0, precision: precision_types = 'float64',
+                 schema: Optional[DatasetSchema] = None):
+        """
+            K-Means for every number of clusters from min_clusters to num_clusters, choosing the best one.
+            The range is split into consecutive blocks run in parallel over one encoded dataset
+            shared through memory-mapped files. In a block only the first k starts from init_type,
+            every next k starts from the centroids of k - 1 plus one row sampled by D² sampling (a warm start),
+            so it usually needs only a few iterations.
+            Runs of the sweep stop at the relative inertia tolerance SWEEP_TOLERANCE (unless tolerance is larger),
+            only the chosen k is then continued with the given stop conditions.
+            Every k is scored by inertia and by silhouette of one sample of rows shared by all k.
+            The chosen k has the best value of criterion, for 'inertia' it is the elbow of the inertia curve.
+            repeats is accepted for compatibility with KMeans, each k is run once.
+        """
+        if criterion not in criterion_types:
+            raise TypeError(f"{criterion} is invalid value of criterion parameter")
+        if not 1 <= min_clusters <= num_clusters:
+            raise TypeError(f"{min_clusters} is invalid value of min_clusters parameter")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.min_clusters = min_clusters
+        self.processes = processes
+        self.criterion = criterion
+        self.silhouette_samples = silhouette_samples
+        self.parameters = {
+            'metrics': metrics,
+            'iterations': iterations,
+            'init_type': init_type,
+            'algorithm': algorithm,
+            'criterion': criterion,
+            'silhouette_samples': silhouette_samples,
+            'tolerance': tolerance,
+            'max_shift': max_shift,
+            'min_reassigned': min_reassigned
+        }
+        self.sweep_parameters = dict(self.parameters, tolerance=max(tolerance, SWEEP_TOLERANCE))
+        is_numeric = schema.is_numeric_for(data.columns) if schema is not None else None
+        self.encoded = EncodedData(data, is_numeric, precision)
+        self.results: List[SweepResult] = []
+        self.curve = None
+        self.model = None
+
+    def blocks(self) -> List[List[int]]:
+        ks = np.arange(self.min_clusters, self.num_clusters + 1)
+        return [list(map(int, block)) for block in np.array_split(ks, min(self.processes, ks.size))]
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame, pd.DataFrame]:
+        """ returns labels and centroids of the chosen k and the curve of scores of all k """
+        blocks = self.blocks()
+        seeds = [int(seed) for seed in np.random.randint(np.iinfo(np.int32).max, size=len(blocks))]
+        rows = silhouette_sample(self.encoded.size, self.silhouette_samples)
+        if len(blocks) > 1:
+            mapped = MappedEncodedData(self.encoded)
+            try:
+                with ProcessPoolExecutor(max_workers=len(blocks), initializer=init_sweep_worker,
+                                         initargs=(mapped, self.sweep_parameters, rows)) as executor:
+                    results = list(executor.map(run_sweep_block, blocks, seeds))
+            finally:
+                mapped.remove()
+        else:
+            sweep = WarmStartSweep(self.data, self.encoded, self.sweep_parameters, rows)
+            results = [sweep.run(blocks[0], seeds[0])]
+        self.results = [result for block in results for result in block]
+
+        self.curve = pd.DataFrame({
+            'clusters': [result[0] for result in self.results],
+            'inertia': [result[3] for result in self.results],
+            'silhouette': [result[4] for result in self.results],
+            self.criterion: [result[5] for result in self.results],
+            'steps': [result[6] for result in self.results],
+            'wall_time': [sum(record.wall_time for record in result[7]) for result in self.results]
+        })
+        return self.build_model(self.choose(), with_steps)
+
+    def choose(self) -> int:
+        """ index of the chosen number of clusters in self.results """
+        if self.criterion == 'inertia':
+            return elbow(self.curve['clusters'].to_numpy(dtype=float), self.curve['inertia'].to_numpy())
+        scores = self.curve[self.criterion].to_numpy()
+        return int(np.nanargmax(scores) if higher_is_better[self.criterion] else np.nanargmin(scores))
+
+    def build_model(self, chosen: int, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame, pd.DataFrame]:
+        k, initial_centroids, centroids, _, _, _, _, _ = self.results[chosen]
+        if with_steps:
+            # the chosen k is run again from the same initial centroids to record all its steps
+            self.model = KMeans(self.data, k, centroids=initial_centroids, encoded=self.encoded, **self.parameters)
+            self.model.run_with_saving_steps()
+        else:
+            # the run of the sweep is continued until the given stop conditions
+            self.model = KMeans(self.data, k, centroids=centroids, encoded=self.encoded, **self.parameters)
+            self.model.run_without_saving_steps()
+        return self.model.labels, pd.DataFrame(self.model.centroids, columns=self.data.columns), self.curve
+
+    def get_curve(self) -> Optional[pd.DataFrame]:
+        """ scores of all numbers of clusters of the last run """
+        return self.curve
+
+    def get_steps(self) -> StepsHistory:
+        return self.model.get_steps()
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        return self.model.get_telemetry()
+
+    def get_working_set(self) -> Dict[str, int]:
+        """ estimated memory of the sweep, as in KMeans.get_working_set, with a run of the largest k per block """
+        working_set = KMeans(self.data, self.num_clusters, encoded=self.encoded, **self.parameters).get_working_set()
+        blocks = len(self.blocks())
+        for part in ['labels', 'distances', 'assignment']:
+            working_set[part] *= blocks
+        sample = min(self.encoded.size, self.silhouette_samples)
+        working_set['silhouette'] = blocks * sample**2 * np.dtype(float).itemsize
+        return working_set
+
+
+class WarmStartSweep:
+    def __init__(self, data: pd.DataFrame, encoded: EncodedData, parameters: dict, rows: np.ndarray):
+        """
+            runs of consecutive numbers of clusters, each started from the solution of the previous one,
+            data is used only for its columns (see KMeans)
+        """
+        self.data = data
+        self.encoded = encoded
+        self.parameters = parameters
+        self.rows = rows
+        distances = DistanceEngine(encoded.is_numeric, parameters['metrics'], dtype=encoded.precision)
+        self.pairwise = sample_distances(distances, encoded.numeric, encoded.codes, rows)
+
+    def run(self, ks: List[int], seed: int) -> List[SweepResult]:
+        np.random.seed(seed)
+        results = []
+        previous = None
+        for k in ks:
+            initial_centroids = self.warm_start(previous) if previous is not None else None
+            k_means = KMeans(self.data, k, centroids=initial_centroids, encoded=self.encoded, **self.parameters)
+            labels, centroids = k_means.run_without_saving_steps()
+            silhouette = sampled_silhouette(self.pairwise, labels[self.rows])
+            score = silhouette if k_means.criterion == 'silhouette' else k_means.check_solution(labels, centroids)
+            results.append((k, k_means.initial_centroids, list(centroids), k_means.inertia, silhouette, score,
+                            k_means.step_counter, k_means.get_telemetry()))
+            previous = k_means
+        return results
+
+    def warm_start(self, k_means: KMeans) -> List[Tuple]:
+        """ centroids of a finished run and one row sampled with probability proportional to squared distance """
+        centroids_numeric, centroids_codes = self.encoded.encode_rows(k_means.centroids)
+        min_distances = k_means.assignment.assigned_distances(k_means.labels, centroids_numeric, centroids_codes)
+        row = k_means.seeding.next_row(min_distances, k_means.num_clusters + 1)
+        return list(k_means.centroids) + k_means.rows([row])
+
+
+# sweep of the worker process, created once per process by init_sweep_worker
+worker_sweep: Optional[WarmStartSweep] = None
+
+
+def init_sweep_worker(mapped: MappedEncodedData, parameters: dict, rows: np.ndarray):
+    global worker_sweep
+    encoded = mapped.load()
+    worker_sweep = WarmStartSweep(pd.DataFrame(columns=encoded.columns), encoded, parameters, rows)
+
+
+def run_sweep_block(ks: List[int], seed: int) -> List[SweepResult]:
+    return worker_sweep.run(ks, seed)
@@ -0,0 +1,125 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from algorithms import DistanceEngine
+from algorithms.config import SILHOUETTE_SAMPLES
+
+criterion_types = ['inertia', 'dunn', 'davies-bouldin', 'silhouette']
+
+# direction of each criterion when choosing the best solution
+higher_is_better: Dict[str, bool] = {
+    'inertia': False,
+    'dunn': True,
+    'davies-bouldin': False,
+    'silhouette': True
+}
+
+
+def inertia(min_distances: np.ndarray, weights: Optional[np.ndarray] = None) -> float:
+    """ sum of squared distances of rows to their centroids - a by-product of the assignment, optionally weighted """
+    finite = np.isfinite(min_distances)
+    if weights is not None:
+        return float(np.sum(weights[finite] * min_distances[finite]**2))
+    return float(np.sum(min_distances[finite]**2))
+
+
+def cluster_spread(labels: np.ndarray, min_distances: np.ndarray, num_clusters: int):
+    """ mean and maximum distance of rows to the centroid of each cluster, NaN for empty clusters """
+    finite = np.isfinite(min_distances)
+    counts = np.bincount(labels[finite], minlength=num_clusters)
+    sums = np.bincount(labels[finite], weights=min_distances[finite], minlength=num_clusters)
+    maximums = np.full(num_clusters, -np.inf)
+    np.maximum.at(maximums, labels[finite], min_distances[finite])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    maximums[counts == 0] = np.nan
+    return means, maximums, counts > 0
+
+
+def dunn_index(labels: np.ndarray, min_distances: np.ndarray, centroid_distances: np.ndarray) -> float:
+    """
+        Centroid-based Dunn index: the smallest distance between centroids divided by the largest
+        distance of a row to its centroid. Higher is better.
+    """
+    num_clusters = centroid_distances.shape[0]
+    _, maximums, present = cluster_spread(labels, min_distances, num_clusters)
+    between = centroid_distances[np.ix_(present, present)].astype(float)
+    np.fill_diagonal(between, np.inf)
+    diameter = np.nanmax(maximums[present]) if present.any() else np.nan
+    if between.shape[0] < 2 or not diameter > 0:
+        return 0.0
+    return float(np.nanmin(between) / diameter)
+
+
+def davies_bouldin_index(labels: np.ndarray, min_distances: np.ndarray, centroid_distances: np.ndarray) -> float:
+    """ mean over clusters of the worst ratio (spread_i + spread_j) / distance(c_i, c_j). Lower is better. """
+    num_clusters = centroid_distances.shape[0]
+    means, _, present = cluster_spread(labels, min_distances, num_clusters)
+    means = means[present]
+    between = centroid_distances[np.ix_(present, present)].astype(float)
+    if means.size < 2:
+        return 0.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratios = (means[:, np.newaxis] + means[np.newaxis, :]) / between
+    np.fill_diagonal(ratios, -np.inf)
+    return float(np.mean(np.max(np.where(np.isnan(ratios), -np.inf, ratios), axis=1)))
+
+
+def silhouette_score(distances: DistanceEngine, numeric: np.ndarray, codes: np.ndarray, labels: np.ndarray,
+                     sample_size: int = SILHOUETTE_SAMPLES) -> float:
+    """
+        Mean silhouette estimated on a random sample of rows - distances are computed only
+        between sampled rows (sample_size x sample_size). Higher is better.
+    """
+    rows = silhouette_sample(labels.shape[0], sample_size)
+    return sampled_silhouette(sample_distances(distances, numeric, codes, rows), labels[rows])
+
+
+def silhouette_sample(size: int, sample_size: int = SILHOUETTE_SAMPLES) -> np.ndarray:
+    return np.sort(np.random.choice(size, min(size, sample_size), replace=False))
+
+
+def sample_distances(distances: DistanceEngine, numeric: np.ndarray, codes: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """ distances between sampled rows, the same for every clustering of the data """
+    pairwise = distances.distances(numeric[rows], codes[rows], numeric[rows], codes[rows])
+    return np.nan_to_num(pairwise, nan=np.inf)
+
+
+def sampled_silhouette(pairwise: np.ndarray, sample_labels: np.ndarray) -> float:
+    """ mean silhouette of sampled rows given distances between them and their labels """
+    clusters, sample_labels = np.unique(sample_labels, return_inverse=True)
+    if clusters.size < 2:
+        return 0.0
+    size = sample_labels.size
+    members = np.zeros((size, clusters.size))
+    members[np.arange(size), sample_labels] = 1
+    counts = members.sum(axis=0)
+    # mean distance from each sampled row to each cluster (the row itself excluded from its own cluster)
+    sums = np.where(np.isfinite(pairwise), pairwise, 0) @ members
+    own = counts[sample_labels] - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_distances = sums / counts[np.newaxis, :]
+        inner = sums[np.arange(size), sample_labels] / own
+    mean_distances[np.arange(size), sample_labels] = np.inf
+    outer = mean_distances.min(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = (outer - inner) / np.maximum(inner, outer)
+    # rows alone in their cluster have silhouette 0
+    scores = np.where(own > 0, scores, 0)
+    return float(np.nanmean(scores))
+
+
+def elbow(num_clusters: np.ndarray, inertias: np.ndarray) -> int:
+    """
+        Index of the elbow of the inertia curve - the point farthest below the line joining
+        the first and the last point, both axes scaled to [0, 1].
+    """
+    if len(num_clusters) < 3:
+        return 0
+    x = (num_clusters - num_clusters[0]) / (num_clusters[-1] - num_clusters[0])
+    spread = inertias[0] - inertias[-1]
+    if not spread > 0:
+        return 0
+    y = (inertias - inertias[-1]) / spread
+    return int(np.argmax((1 - x) - y))
@@ -0,0 +1,180 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import PREVIEW_ROWS
+from .k_means import init_types
+from .seeding import KMeansSeeding
+from .metrics import inertia
+from .telemetry import IterationRecord, Telemetry
+
+
+class MiniBatchKMeans:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int, metrics: int = 1,
+                 batch_size: int = 1024, passes: int = 1, init_type: init_types = 'kmeans++ sampling',
+                 precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None):
+        """
+            K-Means updated with small batches of rows, so the data can be streamed chunk by chunk.
+            Each centroid has its own learning rate 1 / (number of rows assigned to it so far),
+            so a numeric centroid is the running mean of its rows and a categorical one the running mode.
+            data is a DataFrame or chunks of the data, which have to be possible to iterate many times
+            (e.g. data_import.ChunkedData) - the last pass assigns labels to all rows.
+            Kinds of columns are taken from schema when given, otherwise from the first chunk.
+            Telemetry has a record per batch, with inertia of the batch and no count of reassigned rows.
+        """
+        if init_type not in init_types:
+            raise TypeError(f"{init_type} is invalid value of init_type parameter")
+        if precision not in precision_types:
+            raise TypeError(f"{precision} is invalid value of precision parameter")
+        if isinstance(data, Iterator):
+            raise TypeError("data can be iterated only once")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.passes = passes
+        self.init_type = init_type
+        self.precision = precision
+        self.schema = schema
+        self.step_counter = 0
+
+        self.encoded = None
+        self.distances = None
+        self.preview = None
+        self.preview_encoded = None
+        self.centroids_numeric = None
+        self.centroids_codes = None
+        self.numeric_counts = None
+        self.histograms = []
+        self.saved_steps = None
+        self.telemetry = Telemetry()
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        if isinstance(self.data, pd.DataFrame):
+            yield self.data
+        else:
+            yield from self.data
+
+    def init_centroids(self, chunk: pd.DataFrame):
+        is_numeric = self.schema.is_numeric_for(chunk.columns) if self.schema is not None else None
+        self.encoded = EncodedData(chunk, is_numeric, self.precision)
+        self.distances = DistanceEngine(self.encoded.is_numeric, self.metrics, dtype=self.encoded.precision)
+        self.preview = chunk.iloc[:PREVIEW_ROWS]
+        self.preview_encoded = (self.encoded.numeric[:PREVIEW_ROWS], self.encoded.codes[:PREVIEW_ROWS])
+
+        seeding = KMeansSeeding(self.encoded, self.distances)
+        rows = seeding.get_method(self.init_type)(self.num_clusters)
+        self.centroids_numeric = self.encoded.numeric[rows].copy()
+        self.centroids_codes = self.encoded.codes[rows].copy()
+        self.numeric_counts = np.zeros_like(self.centroids_numeric)
+        self.histograms = [np.zeros((self.num_clusters, len(categories))) for categories in self.encoded.categories]
+
+    def batches(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for chunk in self.chunks():
+            if self.encoded is None:
+                self.init_centroids(chunk)
+                numeric, codes = self.encoded.numeric, self.encoded.codes
+            else:
+                numeric, codes = self.encoded.encode_frame(chunk)
+            order = np.random.permutation(chunk.shape[0])
+            for start in range(0, chunk.shape[0], self.batch_size):
+                rows = order[start:start + self.batch_size]
+                yield numeric[rows], codes[rows]
+
+    def update(self, numeric: np.ndarray, codes: np.ndarray) -> Tuple[float, float]:
+        """ moves centroids towards the rows of the batch, returns inertia of the batch and the largest shift """
+        labels, min_distances = self.distances.assign(numeric, codes, self.centroids_numeric, self.centroids_codes)
+        previous = (self.centroids_numeric.copy(), self.centroids_codes.copy())
+
+        for j in range(numeric.shape[1]):
+            valid = ~np.isnan(numeric[:, j])
+            counts = np.bincount(labels[valid], minlength=self.num_clusters)
+            sums = np.bincount(labels[valid], weights=numeric[valid, j], minlength=self.num_clusters)
+            self.numeric_counts[:, j] += counts
+            changed = counts > 0
+            # per-centroid learning rate: rows in the batch / all rows assigned to the centroid so far
+            centroids = self.centroids_numeric[changed, j]
+            learning_rate = counts[changed] / self.numeric_counts[changed, j]
+            self.centroids_numeric[changed, j] = centroids + learning_rate * (sums[changed] / counts[changed] - centroids)
+
+        for j in range(codes.shape[1]):
+            categories = len(self.encoded.categories[j])
+            if self.histograms[j].shape[1] < categories:
+                self.histograms[j] = np.pad(self.histograms[j], ((0, 0), (0, categories - self.histograms[j].shape[1])))
+            valid = codes[:, j] >= 0
+            counts = np.bincount(labels[valid] * categories + codes[valid, j], minlength=self.num_clusters * categories)
+            self.histograms[j] += counts.reshape(self.num_clusters, categories)
+            changed = self.histograms[j].sum(axis=1) > 0
+            if changed.any():
+                self.centroids_codes[changed, j] = np.argmax(self.histograms[j][changed], axis=1)
+
+        shifts = self.distances.root(self.distances.paired(*previous, self.centroids_numeric, self.centroids_codes))
+        return inertia(min_distances), float(np.max(np.nan_to_num(shifts, nan=np.inf)))
+
+    def preview_labels(self) -> np.ndarray:
+        labels, _ = self.distances.assign(*self.preview_encoded, self.centroids_numeric, self.centroids_codes)
+        return labels
+
+    def save_step(self):
+        if self.saved_steps is None:
+            self.saved_steps = StepsHistory(self.encoded, self.num_clusters)
+        self.saved_steps.append(self.preview_labels(), (self.centroids_numeric, self.centroids_codes))
+
+    def get_centroids(self) -> pd.DataFrame:
+        return pd.DataFrame(self.encoded.decode_rows(self.centroids_numeric, self.centroids_codes),
+                            columns=self.encoded.columns)
+
+    def mark_labels(self) -> np.ndarray:
+        labels = []
+        for chunk in self.chunks():
+            numeric, codes = self.encoded.encode_frame(chunk)
+            labels.append(self.distances.assign(numeric, codes, self.centroids_numeric, self.centroids_codes)[0])
+        return np.concatenate(labels)
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame]:
+        self.saved_steps = None
+        self.step_counter = 0
+        self.telemetry.start()
+        for _ in range(self.passes):
+            for numeric, codes in self.batches():
+                if with_steps and self.saved_steps is None:
+                    self.save_step()
+                batch_inertia, shift = self.update(numeric, codes)
+                self.telemetry.record(None, batch_inertia, 0, shift)
+                self.step_counter += 1
+                if with_steps:
+                    self.save_step()
+        self.telemetry.stop()
+        return self.mark_labels(), self.get_centroids()
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        return self.telemetry.get_records()
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            Estimated memory (in bytes) of a run, known before it starts: the encoded first chunk
+            (which initial centroids are chosen from; the whole frame when data is a DataFrame),
+            one batch with its largest block of distances, and the centroids with their counts and histograms.
+            Size of chunks is not known in advance, the first chunk is then counted as large as the whole data.
+        """
+        schema = self.schema if self.schema is not None else DatasetSchema(self.data)
+        size = self.data.shape[0] if isinstance(self.data, pd.DataFrame) else schema.size
+        distances = DistanceEngine(schema.is_numeric, self.metrics, dtype=np.dtype(self.precision))
+        batch = min(size, self.batch_size)
+        categories = sum(count for count, numeric in zip(schema.cardinality, schema.is_numeric) if not numeric)
+        centroid_bytes = (len(schema.columns) + categories) * np.dtype(float).itemsize
+        return {
+            'data': EncodedData.estimate_bytes(size, schema.is_numeric, schema.cardinality, self.precision),
+            'batch': EncodedData.estimate_bytes(batch, schema.is_numeric, schema.cardinality, self.precision),
+            'distances': distances.block_bytes(batch, self.num_clusters),
+            'centroids': self.num_clusters * centroid_bytes
+        }
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ first rows of the data, which labels of the saved steps refer to """
+        return self.preview
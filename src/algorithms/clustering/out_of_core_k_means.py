@@ -0,0 +1,253 @@
+import os
+import tempfile
+import weakref
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import PREVIEW_ROWS, SEEDING_SAMPLE_ROWS
+from .k_means import init_types
+from .assignment import algorithm_types
+from .metrics import criterion_types
+from .seeding import KMeansSeeding
+from .centroids import category_counts, means, modes
+from .telemetry import Convergence, IterationRecord, Telemetry
+
+
+def remove_file(path: str):
+    """ removes a temporary file if it still exists, a file which is still open (on Windows) is left """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class OutOfCoreKMeans:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int, metrics: int = 1,
+                 iterations: Optional[int] = None, repeats: int = 1, init_type: init_types = 'random',
+                 algorithm: algorithm_types = 'lloyd', processes: int = 1, criterion: criterion_types = 'inertia',
+                 tolerance: float = 0.0, max_shift: float = 0.0, min_reassigned: float = 0.0,
+                 precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None,
+                 labels_path: Optional[str] = None):
+        """
+            Exact K-Means (the same iterations as KMeans.run_without_saving_steps) for data read by chunks.
+            Every iteration is one pass over the chunks: rows are assigned to the current centroids and
+            per-cluster sums, counts and histograms of categories are accumulated for the next centroids
+            (an empty cluster keeps its centroid, as in KMeans).
+            Labels are kept in a memory-mapped int32 file (labels_path or a temporary file, removed when
+            the labels are garbage collected).
+            Kinds of columns are taken from schema when given, otherwise from the first chunk.
+            Convergence conditions and telemetry are the same as in KMeans (no distances are skipped).
+            Initial centroids are chosen from a uniform sample of rows, repeats are compared by inertia.
+            Rows are always assigned with Lloyd's algorithm and repeats run one after another - the algorithm
+            and processes options are accepted for compatibility with KMeans, as per-row bounds would have
+            to be streamed next to the labels and parallel repeats would compete for reading the same chunks.
+            Likewise criterion is accepted, but only inertia is available without a second pass over the data.
+        """
+        if init_type not in init_types:
+            raise TypeError(f"{init_type} is invalid value of init_type parameter")
+        if algorithm not in algorithm_types:
+            raise TypeError(f"{algorithm} is invalid value of algorithm parameter")
+        if criterion not in criterion_types:
+            raise TypeError(f"{criterion} is invalid value of criterion parameter")
+        if precision not in precision_types:
+            raise TypeError(f"{precision} is invalid value of precision parameter")
+        if isinstance(data, Iterator):
+            raise TypeError("data can be iterated only once")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.metrics = metrics
+        self.max_iterations = iterations
+        self.repeats = repeats
+        self.init_type = init_type
+        self.labels_path = labels_path
+        self.precision = precision
+        self.schema = schema
+        self.convergence = Convergence(tolerance, max_shift, min_reassigned)
+        self.telemetry = Telemetry()
+        self.step_counter = 0
+
+        self.size = 0
+        self.encoded = None
+        self.distances = None
+        self.sample = None
+        self.preview = None
+        self.preview_encoded = None
+        self.centroids = []
+        self.labels = None
+        self.inertia = np.inf
+        self.saved_steps = None
+        self.scan()
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        if isinstance(self.data, pd.DataFrame):
+            yield self.data
+        else:
+            yield from self.data
+
+    def scan(self):
+        """ first pass over the data - encoding of columns, number of rows and a uniform sample of rows """
+        sample = None
+        sample_keys = np.empty(0)
+        for chunk in self.chunks():
+            if self.encoded is None:
+                is_numeric = self.schema.is_numeric_for(chunk.columns) if self.schema is not None else None
+                self.encoded = EncodedData(chunk, is_numeric, self.precision)
+                self.preview = chunk.iloc[:PREVIEW_ROWS]
+            else:
+                self.encoded.encode_frame(chunk)
+            self.size += chunk.shape[0]
+            # reservoir sampling - rows with the smallest random keys are kept
+            keys = np.concatenate([sample_keys, np.random.random(chunk.shape[0])])
+            rows = pd.concat([sample, chunk]) if sample is not None else chunk
+            kept = np.sort(np.argsort(keys, kind='stable')[:SEEDING_SAMPLE_ROWS])
+            sample, sample_keys = rows.iloc[kept], keys[kept]
+        self.sample = sample.reset_index(drop=True)
+        self.preview_encoded = EncodedData(self.preview, self.encoded.is_numeric, self.precision)
+        self.distances = DistanceEngine(self.encoded.is_numeric, self.metrics, dtype=self.encoded.precision)
+
+    def get_centroids(self) -> List[Tuple]:
+        sample = EncodedData(self.sample, self.encoded.is_numeric, self.precision)
+        seeding = KMeansSeeding(sample, self.distances)
+        rows = seeding.get_method(self.init_type)(self.num_clusters)
+        return list(self.sample.iloc[rows].itertuples(index=False))
+
+    def create_labels(self) -> np.memmap:
+        if self.labels_path is not None:
+            return np.lib.format.open_memmap(self.labels_path, mode='w+', dtype=np.int32, shape=(self.size,))
+        file, path = tempfile.mkstemp(suffix='.npy', prefix='k_means_labels_')
+        os.close(file)
+        labels = np.lib.format.open_memmap(path, mode='w+', dtype=np.int32, shape=(self.size,))
+        weakref.finalize(labels, remove_file, path)
+        return labels
+
+    def lloyd_pass(self, labels: np.memmap) -> Tuple[int, List[Tuple], float]:
+        """
+            Assign all rows to self.centroids and compute the next centroids from the new labels.
+            Returns number of changed labels, the next centroids and inertia of the assignment.
+        """
+        centroids_numeric, centroids_codes = self.encoded.encode_rows(self.centroids)
+        k = self.num_clusters
+        sums = np.zeros((k, len(self.encoded.numeric_index)))
+        counts = np.zeros((k, len(self.encoded.numeric_index)), dtype=int)
+        histograms = [np.zeros((k, len(categories)), dtype=int) for categories in self.encoded.categories]
+        last_positions = [np.full((k, len(categories)), -1) for categories in self.encoded.categories]
+        count = 0
+        inertia = 0.0
+        start = 0
+        for chunk in self.chunks():
+            numeric, codes = self.encoded.encode_frame(chunk)
+            stop = start + chunk.shape[0]
+            new_labels, min_distances = self.distances.assign(numeric, codes, centroids_numeric, centroids_codes)
+            count += int(np.count_nonzero(labels[start:stop] != new_labels))
+            labels[start:stop] = new_labels
+            inertia += float(np.sum(min_distances[np.isfinite(min_distances)]**2))
+
+            for j in range(numeric.shape[1]):
+                valid = ~np.isnan(numeric[:, j])
+                # sequential accumulation, the same as over the whole column at once
+                np.add.at(sums[:, j], new_labels[valid], numeric[valid, j])
+                np.add.at(counts[:, j], new_labels[valid], 1)
+            for j in range(codes.shape[1]):
+                histogram, last = category_counts(codes[:, j], new_labels, k, histograms[j].shape[1], start)
+                histograms[j] += histogram
+                np.maximum(last_positions[j], last, out=last_positions[j])
+            start = stop
+
+        new_numeric = means(sums, counts, centroids_numeric)
+        new_codes = np.empty_like(centroids_codes)
+        for j, (histogram, last) in enumerate(zip(histograms, last_positions)):
+            new_codes[:, j] = modes(histogram, last, centroids_codes[:, j])
+        return count, self.encoded.decode_rows(new_numeric, new_codes), inertia
+
+    def shift(self, previous: List[Tuple], centroids: List[Tuple]) -> float:
+        """ the largest distance between the same centroids of two iterations """
+        shifts = self.distances.root(self.distances.paired(*self.encoded.encode_rows(previous),
+                                                           *self.encoded.encode_rows(centroids)))
+        return float(np.max(np.nan_to_num(shifts, nan=np.inf)))
+
+    def run_once(self, with_steps: bool) -> Tuple[np.memmap, List[Tuple], float, List[IterationRecord]]:
+        steps = 0
+        labels = self.create_labels()
+        labels[:] = 0
+        self.telemetry.start()
+        self.centroids = self.get_centroids()
+        if with_steps:
+            self.save_step()
+        count, next_centroids, inertia = self.lloyd_pass(labels)
+        self.telemetry.record(count, inertia)
+        while True:
+            previous, self.centroids = self.centroids, next_centroids
+            previous_inertia = inertia
+            count, next_centroids, inertia = self.lloyd_pass(labels)
+            shift = self.shift(previous, self.centroids)
+            self.telemetry.record(count, inertia, 0, shift)
+            if self.convergence.reached(count, self.size, shift, inertia, previous_inertia):
+                break
+            steps += 1
+            if with_steps:
+                self.save_step()
+            if self.max_iterations is not None and steps > self.max_iterations:
+                break
+        self.telemetry.stop()
+        self.step_counter = steps
+        labels.flush()
+        return labels, self.centroids, inertia, self.telemetry.get_records()
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame]:
+        best = None
+        steps = None
+        for _ in range(self.repeats):
+            max_steps = self.max_iterations + 2 if self.max_iterations is not None else None
+            self.saved_steps = StepsHistory(self.encoded, self.num_clusters, max_steps)
+            labels, centroids, inertia, records = self.run_once(with_steps)
+            if best is None or inertia < best[2]:
+                if best is not None:
+                    self.remove_labels(best[0])
+                best = (labels, centroids, inertia, records)
+                steps = self.saved_steps
+            else:
+                self.remove_labels(labels)
+        self.saved_steps = steps
+        self.labels, self.centroids, self.inertia, self.telemetry.records = best
+        return self.labels, pd.DataFrame(self.centroids, columns=self.encoded.columns)
+
+    def remove_labels(self, labels: np.memmap):
+        path = labels.filename
+        del labels
+        if self.labels_path is None:
+            remove_file(path)
+
+    def save_step(self):
+        preview = self.preview_encoded
+        labels, _ = self.distances.assign(preview.numeric, preview.codes, *preview.encode_rows(self.centroids))
+        self.saved_steps.append(labels, self.centroids)
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        return self.telemetry.get_records()
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            Estimated memory (in bytes) of a run, known after the first pass: the encoded first chunk
+            (kept since the scan), one encoded chunk of a pass with its largest block of distances,
+            the encoded preview and the sample of rows for initial centroids. Labels are memory-mapped.
+        """
+        chunk = self.encoded.size
+        sample = EncodedData.estimate_bytes(self.sample.shape[0], self.encoded.is_numeric,
+                                            self.encoded.cardinality(), self.precision)
+        return {
+            'data': self.encoded.nbytes(),
+            'chunk': self.encoded.nbytes() + chunk * np.dtype(int).itemsize,
+            'distances': self.distances.block_bytes(chunk, self.num_clusters),
+            'preview': self.preview_encoded.nbytes(),
+            'sample': sample
+        }
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ first rows of the data, which labels of the saved steps refer to """
+        return self.preview
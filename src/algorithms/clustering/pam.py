@@ -0,0 +1,331 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData, DistanceEngine, DatasetSchema, StepsHistory, precision_types
+from algorithms.config import MAX_DISSIMILARITY_BYTES
+from .dissimilarity import Dissimilarities
+from .telemetry import IterationRecord, Telemetry
+
+method_types = ['pam', 'clara', 'clarans']
+swap_types = ['fastpam2', 'fastpam1']
+init_types = ['build', 'random']
+
+# relative decrease of the total deviation below which a swap is not an improvement (rounding of distances)
+SWAP_TOLERANCE = 1e-9
+
+
+def nearest_medoids(columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ nearest medoid of every row (columns - distances to the medoids), distance to it and to the second nearest """
+    labels = np.argmin(columns, axis=1)
+    nearest = columns[np.arange(columns.shape[0]), labels]
+    if columns.shape[1] < 2:
+        return labels, nearest, np.full(columns.shape[0], np.inf)
+    return labels, nearest, np.partition(columns, 1, axis=1)[:, 1]
+
+
+def removal_loss(labels: np.ndarray, nearest: np.ndarray, second: np.ndarray, num_medoids: int) -> np.ndarray:
+    """ increase of the total deviation after removing each medoid, when its rows move to their second nearest """
+    return np.bincount(labels, weights=second - nearest, minlength=num_medoids)
+
+
+def swap_deltas(candidates: np.ndarray, labels: np.ndarray, nearest: np.ndarray, second: np.ndarray,
+                loss: np.ndarray) -> np.ndarray:
+    """
+        Change of the total deviation after swapping every medoid with every candidate (FastPAM1),
+        with shape (medoids, candidates), candidates - distances of all rows to the candidates.
+        A row closer to the candidate than to its nearest medoid moves to the candidate whichever medoid
+        is removed (the shared part), otherwise it only matters when its own medoid is removed - then it moves
+        to the candidate or to its second nearest medoid. So all medoids are evaluated in one pass over the rows,
+        using the nearest and second nearest distances instead of distances to all medoids - O(rows) per candidate.
+    """
+    num_medoids = loss.size
+    if num_medoids == 1:
+        return (candidates.sum(axis=0) - nearest.sum())[np.newaxis, :]
+    nearest, second = nearest[:, np.newaxis], second[:, np.newaxis]
+    closer = candidates < nearest
+    shared = np.where(closer, candidates - nearest, 0).sum(axis=0)
+    contributions = np.where(closer, nearest - second, np.where(candidates < second, candidates - second, 0))
+    # contributions summed by medoids over rows grouped by labels, a medoid without rows adds nothing
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.append(True, sorted_labels[1:] != sorted_labels[:-1]))
+    sums = np.zeros((num_medoids, candidates.shape[1]))
+    sums[sorted_labels[starts]] = np.add.reduceat(contributions[order], starts, axis=0)
+    return loss[:, np.newaxis] + sums + shared[np.newaxis, :]
+
+
+class PAM:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], num_clusters: int, metrics: int = 1,
+                 method: method_types = 'pam', swap: swap_types = 'fastpam2', init_type: init_types = 'build',
+                 iterations: Optional[int] = None, samples: int = 5, sample_size: Optional[int] = None,
+                 num_local: int = 2, max_neighbours: int = 250, max_bytes: int = MAX_DISSIMILARITY_BYTES,
+                 precision: precision_types = 'float64', schema: Optional[DatasetSchema] = None):
+        """
+            Partition Around Medoids - clusters are represented by their medoids (rows of the data) and the sum
+            of distances of rows to their nearest medoids (total deviation) is minimized. Distances are the same
+            as in K-Means for mixed numeric and categorical columns.
+            'pam' chooses initial medoids greedily (BUILD) or at random and applies the best swaps of a medoid
+            with a row until no swap improves, for at most iterations passes over all rows. Swaps are evaluated
+            for all medoids at once (FastPAM1), 'fastpam2' also applies the best swaps of other medoids
+            found in the same pass, if they still improve. Distances of all pairs of rows are cached
+            when they fit in max_bytes (see Dissimilarities), otherwise they are computed block by block.
+            'clara' runs it on samples of sample_size rows (80 + 4 * num_clusters by default), each containing
+            the best medoids so far, and keeps the medoids with the lowest total deviation on all rows.
+            'clarans' tries swaps with random rows on all rows, num_local times from random medoids,
+            and stops a search after max_neighbours rows in a row which do not improve it.
+            Rows with missing numeric values are not medoids, they are assigned to the first cluster.
+            Chunked data is encoded chunk by chunk and kept encoded.
+        """
+        if method not in method_types:
+            raise TypeError(f"{method} is invalid value of method parameter")
+        if swap not in swap_types:
+            raise TypeError(f"{swap} is invalid value of swap parameter")
+        if init_type not in init_types:
+            raise TypeError(f"{init_type} is invalid value of init_type parameter")
+        for name, value in [('num_clusters', num_clusters), ('samples', samples), ('num_local', num_local),
+                            ('max_neighbours', max_neighbours)]:
+            if value < 1:
+                raise TypeError(f"{value} is invalid value of {name} parameter")
+        if sample_size is not None and sample_size < num_clusters:
+            raise TypeError(f"{sample_size} is invalid value of sample_size parameter")
+        self.data = data
+        self.num_clusters = num_clusters
+        self.metrics = metrics
+        self.method = method
+        self.swap = swap
+        self.init_type = init_type
+        self.max_iterations = iterations
+        self.samples = samples
+        self.sample_size = sample_size or 80 + 4 * num_clusters
+        self.num_local = num_local
+        self.max_neighbours = max_neighbours
+        self.max_bytes = max_bytes
+        self.schema = schema
+        self.preview = data if isinstance(data, pd.DataFrame) else None
+        if isinstance(data, pd.DataFrame):
+            is_numeric = schema.is_numeric_for(data.columns) if schema is not None else None
+            self.encoded = EncodedData(data, is_numeric, precision)
+        else:
+            self.encoded, self.preview = EncodedData.from_chunks(data, schema, precision)
+        self.distances = DistanceEngine(self.encoded.is_numeric, metrics, dtype=self.encoded.precision)
+        # rows without missing numeric values, the search runs on them
+        self.valid = np.flatnonzero(~np.isnan(self.encoded.numeric).any(axis=1))
+        if num_clusters > self.valid.size:
+            raise TypeError(f"{num_clusters} clusters for {self.valid.size} rows without missing values")
+        self.telemetry = Telemetry()
+        self.saved_steps = None
+        self.labels = np.zeros(self.encoded.size, dtype=int)
+        self.medoids = np.empty(0, dtype=int)
+        self.cost = None
+
+    def run(self, with_steps: bool) -> Tuple[np.ndarray, pd.DataFrame]:
+        """ labels of rows and the medoids (decoded rows) """
+        self.telemetry.start()
+        self.saved_steps = StepsHistory(self.encoded, self.num_clusters) if with_steps else None
+        numeric, codes = self.encoded.numeric[self.valid], self.encoded.codes[self.valid]
+        search = {
+            'pam': self.run_pam,
+            'clara': self.run_clara,
+            'clarans': self.run_clarans
+        }[self.method]
+        self.medoids = self.valid[search(numeric, codes)]
+        self.labels, min_distances = self.distances.assign(self.encoded.numeric, self.encoded.codes,
+                                                           *self.medoid_rows(self.medoids))
+        self.cost = float(np.sum(min_distances[self.valid]))
+        self.telemetry.stop()
+        return self.labels, self.medoids_frame()
+
+    def medoid_rows(self, medoids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ encoded rows of medoids, given as indices of all rows """
+        return self.encoded.numeric[medoids], self.encoded.codes[medoids]
+
+    def medoids_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.encoded.decode_rows(*self.medoid_rows(self.medoids)), columns=self.encoded.columns)
+
+    def run_pam(self, numeric: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        dissimilarities = Dissimilarities(numeric, codes, self.distances, self.max_bytes)
+        return self.swap_medoids(dissimilarities, self.initial_medoids(dissimilarities), True)
+
+    def initial_medoids(self, dissimilarities: Dissimilarities) -> np.ndarray:
+        """
+            BUILD - the row with the lowest sum of distances to other rows, then every next medoid is the row
+            which decreases the total deviation the most
+        """
+        if self.init_type == 'random':
+            return np.random.choice(dissimilarities.size, self.num_clusters, replace=False)
+        medoids = []
+        nearest = None
+        for _ in range(self.num_clusters):
+            best, best_gain = -1, -np.inf
+            for start, stop, block in dissimilarities.column_blocks():
+                if nearest is None:
+                    gains = -block.sum(axis=0)
+                else:
+                    gains = np.maximum(nearest[:, np.newaxis] - block, 0).sum(axis=0)
+                chosen = [medoid - start for medoid in medoids if start <= medoid < stop]
+                gains[chosen] = -np.inf
+                candidate = int(np.argmax(gains))
+                if gains[candidate] > best_gain:
+                    best, best_gain = start + candidate, gains[candidate]
+            medoids.append(best)
+            column = dissimilarities.columns([best])[:, 0]
+            nearest = column if nearest is None else np.minimum(nearest, column)
+        return np.array(medoids)
+
+    def best_swaps(self, dissimilarities: Dissimilarities, medoids: np.ndarray, labels: np.ndarray,
+                   nearest: np.ndarray, second: np.ndarray) -> List[Tuple[float, int, int]]:
+        """
+            (change of the total deviation, medoid, candidate) of the best swap of every medoid (fastpam2)
+            or only of the best swap of all (fastpam1), found in one pass over the columns of distances
+        """
+        loss = removal_loss(labels, nearest, second, medoids.size)
+        best_deltas = np.full(medoids.size, np.inf)
+        best_candidates = np.full(medoids.size, -1)
+        for start, stop, block in dissimilarities.column_blocks():
+            deltas = swap_deltas(block, labels, nearest, second, loss)
+            chosen = medoids[(medoids >= start) & (medoids < stop)] - start
+            deltas[:, chosen] = np.inf
+            candidates = np.argmin(deltas, axis=1)
+            block_deltas = deltas[np.arange(medoids.size), candidates]
+            better = block_deltas < best_deltas
+            best_deltas[better] = block_deltas[better]
+            best_candidates[better] = start + candidates[better]
+        order = np.argsort(best_deltas, kind='stable')
+        if self.swap == 'fastpam1':
+            order = order[:1]
+        return [(best_deltas[i], int(i), int(best_candidates[i])) for i in order if best_candidates[i] >= 0]
+
+    def swap_medoids(self, dissimilarities: Dissimilarities, medoids: np.ndarray, recorded: bool) -> np.ndarray:
+        """ medoids (indices of rows of dissimilarities) after swaps which decrease the total deviation """
+        medoids = np.array(medoids)
+        columns = dissimilarities.columns(medoids)
+        labels, nearest, second = nearest_medoids(columns)
+        if recorded:
+            self.record_step(None, nearest.sum(), medoids)
+        iteration = 0
+        while self.max_iterations is None or iteration < self.max_iterations:
+            iteration += 1
+            applied = 0
+            for delta, medoid, candidate in self.best_swaps(dissimilarities, medoids, labels, nearest, second):
+                if candidate in medoids:
+                    continue
+                column = dissimilarities.columns([candidate])
+                if applied:
+                    # the swaps found in one pass were evaluated before the swaps applied since
+                    loss = removal_loss(labels, nearest, second, medoids.size)
+                    delta = swap_deltas(column, labels, nearest, second, loss)[medoid, 0]
+                if delta >= -SWAP_TOLERANCE * nearest.sum():
+                    continue
+                medoids[medoid] = candidate
+                columns[:, medoid] = column[:, 0]
+                previous = labels
+                labels, nearest, second = nearest_medoids(columns)
+                applied += 1
+                if recorded:
+                    self.record_step(int(np.count_nonzero(labels != previous)), nearest.sum(), medoids)
+            if not applied:
+                break
+        return medoids
+
+    def run_clara(self, numeric: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        size = numeric.shape[0]
+        sample_size = min(size, self.sample_size)
+        best, best_labels, best_cost = None, None, np.inf
+        for _ in range(self.samples):
+            if best is None:
+                rows = np.random.choice(size, sample_size, replace=False)
+            else:
+                others = np.setdiff1d(np.arange(size), best, assume_unique=True)
+                rows = np.concatenate([best, np.random.choice(others, sample_size - best.size, replace=False)])
+            dissimilarities = Dissimilarities(numeric[rows], codes[rows], self.distances, self.max_bytes)
+            medoids = rows[self.swap_medoids(dissimilarities, self.initial_medoids(dissimilarities), False)]
+            labels, min_distances = self.distances.assign(numeric, codes, numeric[medoids], codes[medoids])
+            cost = float(np.sum(min_distances))
+            reassigned = None
+            if cost < best_cost:
+                reassigned = int(np.count_nonzero(labels != best_labels)) if best is not None else None
+                best, best_labels, best_cost = medoids, labels, cost
+                self.save_step(self.valid[best])
+            self.telemetry.record(reassigned or 0, best_cost)
+        return best
+
+    def run_clarans(self, numeric: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        size = numeric.shape[0]
+        best, best_cost = None, np.inf
+        for _ in range(self.num_local):
+            medoids = np.random.choice(size, self.num_clusters, replace=False)
+            columns = self.distances.distances(numeric, codes, numeric[medoids], codes[medoids])
+            labels, nearest, second = nearest_medoids(columns)
+            self.record_step(None, nearest.sum(), medoids)
+            tries = 0
+            while tries < self.max_neighbours and size > self.num_clusters:
+                candidate = np.random.randint(size)
+                if candidate in medoids:
+                    continue
+                # all medoids are evaluated at once for the candidate, the best one is swapped
+                column = self.distances.distances(numeric, codes, numeric[[candidate]], codes[[candidate]])
+                deltas = swap_deltas(column, labels, nearest, second,
+                                     removal_loss(labels, nearest, second, self.num_clusters))[:, 0]
+                medoid = int(np.argmin(deltas))
+                if deltas[medoid] >= -SWAP_TOLERANCE * nearest.sum():
+                    tries += 1
+                    continue
+                tries = 0
+                medoids[medoid] = candidate
+                columns[:, medoid] = column[:, 0]
+                previous = labels
+                labels, nearest, second = nearest_medoids(columns)
+                self.record_step(int(np.count_nonzero(labels != previous)), nearest.sum(), medoids)
+            if nearest.sum() < best_cost:
+                best, best_cost = medoids.copy(), nearest.sum()
+        return best
+
+    def record_step(self, reassigned: Optional[int], deviation: float, medoids: np.ndarray):
+        """ telemetry and a saved step of the search on all valid rows (medoids are indices of valid rows) """
+        self.telemetry.record(reassigned, float(deviation))
+        self.save_step(self.valid[medoids])
+
+    def save_step(self, medoids: np.ndarray):
+        """ labels of the preview rows and the medoids (indices of all rows) as a step """
+        if self.saved_steps is None:
+            return
+        size = self.preview.shape[0]
+        medoids_numeric, medoids_codes = self.medoid_rows(medoids)
+        labels, _ = self.distances.assign(self.encoded.numeric[:size], self.encoded.codes[:size],
+                                          medoids_numeric, medoids_codes)
+        self.saved_steps.append(labels, (medoids_numeric, medoids_codes))
+
+    def get_medoids(self) -> np.ndarray:
+        """ indices of rows which are medoids of the clusters """
+        return self.medoids
+
+    def get_steps(self) -> Optional[StepsHistory]:
+        return self.saved_steps
+
+    def get_telemetry(self) -> List[IterationRecord]:
+        """ every applied swap (pam, clarans) or every sample (clara), inertia is the total deviation """
+        return self.telemetry.get_records()
+
+    def get_preview(self) -> Optional[pd.DataFrame]:
+        """ rows which the saved steps refer to - all rows of a data frame, the first rows of chunked data """
+        return self.preview
+
+    def get_working_set(self) -> Dict[str, int]:
+        """
+            estimated memory of a run: encoded data, distances of rows to the medoids, the cached dissimilarities
+            of the searched rows (all rows or a sample) and the largest block of distances
+        """
+        size = self.valid.size
+        searched = min(size, self.sample_size) if self.method == 'clara' else size
+        cached = Dissimilarities.condensed_bytes(searched)
+        if self.method == 'clarans' or cached > self.max_bytes:
+            cached = 0
+        block_columns = self.num_clusters if self.method == 'clarans' else searched
+        return {
+            'data': self.encoded.nbytes(),
+            'rows': size * (self.num_clusters + 4) * np.dtype(float).itemsize,
+            'dissimilarities': cached,
+            'distances': self.distances.block_bytes(searched, block_columns)
+        }
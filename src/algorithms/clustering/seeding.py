@@ -0,0 +1,103 @@
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from algorithms import EncodedData, DistanceEngine
+
+
+class KMeansSeeding:
+    def __init__(self, encoded: EncodedData, distances: DistanceEngine, weights: Optional[np.ndarray] = None):
+        """
+            Choice of initial centroids working on encoded data.
+            Every method keeps the distance from each row to its nearest chosen centroid
+            and updates it only against the newly added centroid, so each round costs one pass over rows.
+            Methods return indices of the rows chosen as centroids.
+            Rows with weights are sampled proportionally to them (and to weighted squared distances).
+        """
+        self.encoded = encoded
+        self.distances = distances
+        self.weights = weights
+
+    def first_row(self) -> int:
+        if self.weights is None:
+            return np.random.randint(self.encoded.size)
+        return int(np.random.choice(self.encoded.size, p=self.weights / self.weights.sum()))
+
+    def potential(self, min_distances: np.ndarray) -> np.ndarray:
+        """ contributions of rows to the potential (sum of squared distances), along the first axis """
+        if self.weights is None:
+            return min_distances**2
+        return (self.weights * min_distances.T**2).T
+
+    def distances_to(self, indices: List[int]) -> np.ndarray:
+        """ distances of all rows to the rows with given indices, shape (rows, len(indices)) """
+        distances = self.distances.distances(self.encoded.numeric, self.encoded.codes,
+                                             self.encoded.numeric[indices], self.encoded.codes[indices])
+        # rows with undefined distance can not be chosen
+        return np.nan_to_num(distances, nan=0.0)
+
+    def random(self, num_clusters: int) -> List[int]:
+        p = self.weights / self.weights.sum() if self.weights is not None else None
+        return list(np.random.choice(self.encoded.size, num_clusters, replace=False, p=p))
+
+    def farthest_first(self, num_clusters: int) -> List[int]:
+        """ deterministic variant - each next centroid is the row farthest from the chosen ones """
+        chosen = [self.first_row()]
+        min_distances = self.distances_to(chosen)[:, 0]
+        for _ in range(num_clusters - 1):
+            chosen.append(int(np.argmax(min_distances)))
+            np.minimum(min_distances, self.distances_to(chosen[-1:])[:, 0], out=min_distances)
+        return chosen
+
+    def d2_sampling(self, num_clusters: int, candidates: int = 1) -> List[int]:
+        """
+            kmeans++ - each next centroid is sampled with probability proportional to the squared distance
+            to the nearest chosen centroid. With more than one candidate per round (greedy kmeans++)
+            the candidate which reduces the potential (sum of squared distances) the most is chosen.
+        """
+        chosen = [self.first_row()]
+        min_distances = self.distances_to(chosen)[:, 0]
+        for _ in range(num_clusters - 1):
+            weights = self.potential(min_distances)
+            total = weights.sum()
+            if total > 0:
+                rows = np.random.choice(self.encoded.size, size=candidates, p=weights / total)
+            else:
+                # all rows are covered by chosen centroids
+                rows = np.random.choice(self.encoded.size, size=candidates)
+            if candidates == 1:
+                best = 0
+                new_distances = self.distances_to(rows)[:, 0]
+            else:
+                candidates_distances = np.minimum(self.distances_to(rows), min_distances[:, np.newaxis])
+                best = int(np.argmin(np.sum(self.potential(candidates_distances), axis=0)))
+                new_distances = candidates_distances[:, best]
+            chosen.append(int(rows[best]))
+            np.minimum(min_distances, new_distances, out=min_distances)
+        return chosen
+
+    def next_row(self, min_distances: np.ndarray, num_clusters: int) -> int:
+        """
+            one more centroid given distances of rows to the nearest of the existing centroids - from candidates
+            sampled by D² sampling the one which reduces the potential the most (as in greedy kmeans++)
+        """
+        min_distances = np.where(np.isfinite(min_distances), min_distances, 0)
+        weights = self.potential(min_distances)
+        total = weights.sum()
+        candidates = 2 + int(np.log(num_clusters))
+        if not total > 0:
+            return int(np.random.randint(self.encoded.size))
+        rows = np.random.choice(self.encoded.size, size=candidates, p=weights / total)
+        potentials = np.sum(self.potential(np.minimum(self.distances_to(rows), min_distances[:, np.newaxis])), axis=0)
+        return int(rows[np.argmin(potentials)])
+
+    def greedy(self, num_clusters: int) -> List[int]:
+        return self.d2_sampling(num_clusters, candidates=2 + int(np.log(num_clusters)))
+
+    def get_method(self, init_type: str) -> Callable[[int], List[int]]:
+        return {
+            'random': self.random,
+            'kmeans++': self.farthest_first,
+            'kmeans++ sampling': self.d2_sampling,
+            'greedy kmeans++': self.greedy
+        }[init_type]
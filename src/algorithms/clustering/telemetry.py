@@ -0,0 +1,88 @@
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+class IterationRecord:
+    def __init__(self, iteration: int, wall_time: float, reassigned: Optional[int], inertia: float,
+                 skipped_distances: int, peak_memory: int, centroid_shift: float):
+        """
+            Cost and progress of one iteration: wall time in seconds, number of rows which changed the label,
+            inertia after the iteration, distance computations skipped by bounds, peak of memory allocated
+            during the iteration (bytes, as traced by tracemalloc) and the largest move of a centroid.
+        """
+        self.iteration = iteration
+        self.wall_time = wall_time
+        self.reassigned = reassigned
+        self.inertia = inertia
+        self.skipped_distances = skipped_distances
+        self.peak_memory = peak_memory
+        self.centroid_shift = centroid_shift
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class Telemetry:
+    def __init__(self):
+        """ Collects an IterationRecord per iteration, the time and memory of each are measured from the last one """
+        self.records: List[IterationRecord] = []
+        self.last_time = None
+        self.tracing = False
+
+    def start(self):
+        self.records = []
+        self.tracing = not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.last_time = time.perf_counter()
+
+    def record(self, reassigned: Optional[int], inertia: float, skipped_distances: int = 0,
+               centroid_shift: float = float('nan')):
+        now = time.perf_counter()
+        _, peak = tracemalloc.get_traced_memory()
+        self.records.append(IterationRecord(len(self.records), now - self.last_time, reassigned, inertia,
+                                            skipped_distances, peak, centroid_shift))
+        tracemalloc.reset_peak()
+        self.last_time = time.perf_counter()
+
+    def stop(self):
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def get_records(self) -> List[IterationRecord]:
+        return self.records
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([record.to_dict() for record in self.records])
+
+
+class Convergence:
+    def __init__(self, tolerance: float = 0.0, max_shift: float = 0.0, min_reassigned: float = 0.0):
+        """
+            Stop conditions of K-Means besides no label changing. An iteration converges when
+            the relative improvement of inertia is below tolerance, the largest move of a centroid is at most
+            max_shift or the fraction of reassigned rows is below min_reassigned. Zero disables a condition.
+        """
+        for name, value in [('tolerance', tolerance), ('max_shift', max_shift), ('min_reassigned', min_reassigned)]:
+            if value < 0:
+                raise TypeError(f"{value} is invalid value of {name} parameter")
+        self.tolerance = tolerance
+        self.max_shift = max_shift
+        self.min_reassigned = min_reassigned
+
+    def reached(self, reassigned: int, size: int, centroid_shift: float,
+                inertia: float, previous_inertia: float) -> bool:
+        if reassigned == 0:
+            return True
+        if self.min_reassigned and reassigned / size < self.min_reassigned:
+            return True
+        if self.max_shift and centroid_shift <= self.max_shift:
+            return True
+        if self.tolerance and previous_inertia > 0:
+            return (previous_inertia - inertia) / previous_inertia < self.tolerance
+        return False
@@ -0,0 +1,85 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from algorithms import EncodedData
+
+
+class WarmStart:
+    def __init__(self, index: pd.Index, encoded: EncodedData, metrics: int, centroids: List[Tuple],
+                 bounds: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None):
+        """
+            Solution of a finished K-Means run kept to restart it when its dataset changes:
+            rows removed (e.g. rows with nulls), appended or edited, or columns removed.
+            Rows are matched by the index of the data frame. A matched row with the same values keeps
+            its label and its bounds (upper bound of the distance to its centroid, lower bound of the distance
+            to other centroids), so only rows whose assignment could have changed are computed again.
+            New and edited rows, or all rows when columns changed, get no bounds.
+        """
+        self.index = index
+        self.encoded = encoded
+        self.metrics = metrics
+        self.centroids = list(centroids)
+        self.bounds = bounds
+
+    @classmethod
+    def from_model(cls, model) -> 'WarmStart':
+        """ the solution of a KMeans run, with its bounds when they belong to the final labels and centroids """
+        bounds = model.assignment.bounds()
+        if bounds is not None:
+            labels, upper, lower, (centroids_numeric, centroids_codes) = bounds
+            final_numeric, final_codes = model.encoded.encode_rows(model.centroids)
+            same = np.array_equal(labels, model.labels) \
+                and np.array_equal(centroids_numeric, final_numeric, equal_nan=True) \
+                and np.array_equal(centroids_codes, final_codes)
+            bounds = (labels, upper, lower) if same else None
+        return cls(model.data.index.copy(), model.encoded, model.metrics, model.centroids, bounds)
+
+    @property
+    def num_clusters(self) -> int:
+        return len(self.centroids)
+
+    def applies_to(self, columns: List[str], num_clusters: int, metrics: int) -> bool:
+        """ the previous centroids can seed a run on columns which all were clustered before """
+        return num_clusters == self.num_clusters and metrics == self.metrics \
+            and all(column in self.encoded.columns for column in columns)
+
+    def centroids_for(self, columns: List[str]) -> List[Tuple]:
+        """ previous centroids restricted to given columns """
+        positions = [self.encoded.columns.index(column) for column in columns]
+        return [tuple(centroid[i] for i in positions) for centroid in self.centroids]
+
+    def bounds_for(self, index: pd.Index, encoded: EncodedData) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ labels, upper and lower bounds of rows of the changed data (infinite and zero bounds when not known) """
+        size = encoded.size
+        labels = np.zeros(size, dtype=int)
+        upper = np.full(size, np.inf)
+        lower = np.zeros(size)
+        if self.bounds is None or encoded.columns != self.encoded.columns \
+                or encoded.is_numeric != self.encoded.is_numeric or not self.index.is_unique:
+            return labels, upper, lower
+        positions = self.index.get_indexer(index)
+        rows = np.flatnonzero(positions >= 0)
+        rows = rows[self.same_values(encoded, rows, positions[rows])]
+        previous_labels, previous_upper, previous_lower = self.bounds
+        labels[rows] = previous_labels[positions[rows]]
+        upper[rows] = previous_upper[positions[rows]]
+        lower[rows] = previous_lower[positions[rows]]
+        return labels, upper, lower
+
+    def same_values(self, encoded: EncodedData, rows: np.ndarray, previous_rows: np.ndarray) -> np.ndarray:
+        """ mask of rows of encoded equal to the previous rows (the same columns in the same order) """
+        same = np.ones(rows.size, dtype=bool)
+        if encoded.precision != self.encoded.precision:
+            return ~same
+        for j in range(encoded.numeric.shape[1]):
+            values = encoded.numeric[rows, j]
+            previous = self.encoded.numeric[previous_rows, j]
+            same &= (values == previous) | (np.isnan(values) & np.isnan(previous))
+        for j in range(encoded.codes.shape[1]):
+            # codes of the previous encoding translated to the new one
+            mapping = np.array([encoded.encode_value(j, value) for value in self.encoded.categories[j]] + [-1],
+                               dtype=int)
+            same &= mapping[self.encoded.codes[previous_rows, j]] == encoded.codes[rows, j]
+        return same
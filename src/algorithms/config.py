@@ -0,0 +1,38 @@
+# upper bound (in bytes) for a single block of intermediate distance values
+MAX_BLOCK_BYTES = 64 * 1024**2
+
+# number of rows of chunked data kept in memory for visualization of results
+PREVIEW_ROWS = 1000
+
+# number of rows sampled from chunked data to choose initial centroids
+SEEDING_SAMPLE_ROWS = 10000
+
+# number of rows sampled to estimate the silhouette score
+SILHOUETTE_SAMPLES = 1000
+
+# relative inertia tolerance of the runs of a sweep over numbers of clusters (the chosen one is run to the end)
+SWEEP_TOLERANCE = 1e-4
+
+# number of distinct values of a column counted exactly by the dataset schema
+SCHEMA_TRACKED_VALUES = 100000
+
+# number of rows sampled into a coreset which summarizes the data for clustering
+CORESET_SIZE = 10000
+
+# maximum number of rows in a leaf of a spatial index (k-d tree or ball tree)
+LEAF_SIZE = 32
+
+# number of query rows searched at once in a spatial index, bounds memory of the (query, node) pairs
+QUERY_BATCH_ROWS = 4096
+
+# maximum number of numeric columns indexed by a uniform grid (a query visits 3^columns cells)
+GRID_MAX_DIMENSIONS = 3
+
+# maximum memory (in bytes) of a cached matrix of dissimilarities, larger ones are computed block by block
+MAX_DISSIMILARITY_BYTES = 256 * 1024**2
+
+# upper bound (in bytes) for a block of intermediate bitsets (or other arrays) of candidate itemsets
+MAX_ITEMSETS_BLOCK_BYTES = 64 * 1024**2
+
+# number of frequent itemsets (or rules) shown on one page of the results
+ITEMSETS_PAGE_ROWS = 1000
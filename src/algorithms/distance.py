@@ -0,0 +1,168 @@
+from typing import Callable, Generator, List, Tuple
+
+import numpy as np
+
+from algorithms.config import MAX_BLOCK_BYTES
+
+# maximum number of (rows, centroids) arrays alive at once while summing one block
+BLOCK_ARRAYS = 12
+
+# relative difference of sums below which the roots may round to the same distance
+TIE_TOLERANCE = 1e-12
+
+
+def pairwise_sum(term: Callable[[int], np.ndarray], start: int, stop: int, shape: Tuple[int, ...],
+                 dtype: np.dtype = np.dtype(float)) -> np.ndarray:
+    """
+        Element-wise sum of term(start), ..., term(stop - 1) in exactly the same order as numpy
+        sums a one-dimensional array (pairwise summation with 8 accumulators),
+        so that np.sum of a single row and the batched version give identical results.
+    """
+    n = stop - start
+    if n < 8:
+        result = np.zeros(shape, dtype=dtype)
+        for i in range(start, stop):
+            result += term(i)
+        return result
+    if n <= 128:
+        accumulators = [term(start + j) for j in range(8)]
+        i = 8
+        while i < n - n % 8:
+            for j in range(8):
+                accumulators[j] += term(start + i + j)
+            i += 8
+        r = accumulators
+        result = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+        while i < n:
+            result += term(start + i)
+            i += 1
+        return result
+    half = n // 2
+    half -= half % 8
+    return pairwise_sum(term, start, start + half, shape, dtype) + pairwise_sum(term, start + half, stop, shape, dtype)
+
+
+class DistanceEngine:
+    def __init__(self, is_numeric: List[bool], metrics: int = 1, max_block_bytes: int = MAX_BLOCK_BYTES,
+                 dtype: np.dtype = np.dtype(float)):
+        """
+            Batched Minkowski distance between encoded rows and encoded centroids.
+            Numeric columns contribute the absolute difference, categorical columns a 0/1 mismatch.
+            Contributions are laid out in the original order of columns, so the results are
+            the same (bit for bit) as computed row by row.
+            Sums are computed in dtype (the precision of the encoded numeric matrix), centroids are cast to it.
+        """
+        self.is_numeric = list(is_numeric)
+        self.numeric_index = [i for i, numeric in enumerate(self.is_numeric) if numeric]
+        self.categorical_index = [i for i, numeric in enumerate(self.is_numeric) if not numeric]
+        self.metrics = metrics
+        self.max_block_bytes = max_block_bytes
+        self.dtype = np.dtype(dtype)
+
+    def block_rows(self, num_centroids: int) -> int:
+        """ number of rows processed at once, so that the intermediate arrays fit in max_block_bytes """
+        row_bytes = max(1, num_centroids * BLOCK_ARRAYS) * self.dtype.itemsize
+        return max(1, self.max_block_bytes // row_bytes)
+
+    def block_bytes(self, size: int, num_centroids: int) -> int:
+        """ memory of the intermediate arrays of the largest block for size rows """
+        rows = min(size, self.block_rows(num_centroids))
+        return rows * max(1, num_centroids * BLOCK_ARRAYS) * self.dtype.itemsize
+
+    def distances(self, numeric: np.ndarray, codes: np.ndarray,
+                  centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        """ full matrix of distances with shape (rows, centroids), computed block by block """
+        result = np.empty((numeric.shape[0], centroids_numeric.shape[0]), dtype=float)
+        for start, stop, block in self.blocks(numeric, codes, centroids_numeric, centroids_codes):
+            result[start:stop] = self.root(block)
+        return result
+
+    def distances_sums(self, numeric: np.ndarray, codes: np.ndarray,
+                       centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        """ full matrix of sums of powered differences (distances before taking the root) """
+        result = np.empty((numeric.shape[0], centroids_numeric.shape[0]), dtype=float)
+        for start, stop, block in self.blocks(numeric, codes, centroids_numeric, centroids_codes):
+            result[start:stop] = block
+        return result
+
+    def blocks(self, numeric: np.ndarray, codes: np.ndarray, centroids_numeric: np.ndarray,
+               centroids_codes: np.ndarray) -> Generator[Tuple[int, int, np.ndarray], None, None]:
+        """ yields consecutive row ranges with sums of powered differences (distances before taking the root) """
+        size = numeric.shape[0]
+        step = self.block_rows(centroids_numeric.shape[0])
+        for start in range(0, size, step):
+            stop = min(size, start + step)
+            yield start, stop, self.block(numeric[start:stop], codes[start:stop], centroids_numeric, centroids_codes)
+
+    def block(self, numeric: np.ndarray, codes: np.ndarray,
+              centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        position = {i: j for j, i in enumerate(self.numeric_index)}
+        position.update({i: j for j, i in enumerate(self.categorical_index)})
+        centroids_numeric = centroids_numeric.astype(self.dtype, copy=False)
+
+        def term(i: int) -> np.ndarray:
+            j = position[i]
+            if self.is_numeric[i]:
+                diff = np.abs(numeric[:, j, np.newaxis] - centroids_numeric[np.newaxis, :, j])
+            else:
+                diff = ((codes[:, j, np.newaxis] != centroids_codes[np.newaxis, :, j])
+                        | (codes[:, j, np.newaxis] < 0)).astype(self.dtype)
+            return diff**self.metrics
+
+        shape = (numeric.shape[0], centroids_numeric.shape[0])
+        return pairwise_sum(term, 0, len(self.is_numeric), shape, self.dtype)
+
+    def paired(self, numeric: np.ndarray, codes: np.ndarray,
+               centroids_numeric: np.ndarray, centroids_codes: np.ndarray) -> np.ndarray:
+        """ sums of powered differences between i-th row and i-th centroid (the same values as in block) """
+        position = {i: j for j, i in enumerate(self.numeric_index)}
+        position.update({i: j for j, i in enumerate(self.categorical_index)})
+        centroids_numeric = centroids_numeric.astype(self.dtype, copy=False)
+
+        def term(i: int) -> np.ndarray:
+            j = position[i]
+            if self.is_numeric[i]:
+                diff = np.abs(numeric[:, j] - centroids_numeric[:, j])
+            else:
+                diff = ((codes[:, j] != centroids_codes[:, j]) | (codes[:, j] < 0)).astype(self.dtype)
+            return diff**self.metrics
+
+        return pairwise_sum(term, 0, len(self.is_numeric), (numeric.shape[0],), self.dtype)
+
+    def root(self, sums: np.ndarray) -> np.ndarray:
+        return np.power(sums, 1 / self.metrics)
+
+    def assign(self, numeric: np.ndarray, codes: np.ndarray, centroids_numeric: np.ndarray,
+               centroids_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ index of the nearest centroid (first one in case of a tie) and the distance to it for every row """
+        labels = np.empty(numeric.shape[0], dtype=int)
+        min_distances = np.empty(numeric.shape[0], dtype=float)
+        for start, stop, block in self.blocks(numeric, codes, centroids_numeric, centroids_codes):
+            labels[start:stop], min_distances[start:stop] = self.nearest(block)
+        return labels, min_distances
+
+    def nearest(self, sums: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            Nearest centroid for a block of sums of powered differences.
+            The root is monotonic, so the comparison is done on sums. The root of nearly equal sums
+            may round to the same distance, and then the first centroid wins - such rows are resolved
+            with the same scalar root that is used for a single pair of rows.
+        """
+        # NaN distance never wins the comparison, a row with no valid distance stays in the first cluster
+        sums = np.where(np.isnan(sums), np.inf, sums)
+        labels = np.argmin(sums, axis=1)
+        rows = np.arange(sums.shape[0])
+        min_sums = sums[rows, labels]
+        if self.metrics != 1 and sums.shape[1] > 1:
+            close = sums <= min_sums[:, np.newaxis] * (1 + TIE_TOLERANCE)
+            close[rows, labels] = False
+            for i in np.flatnonzero(close.any(axis=1) & np.isfinite(min_sums)):
+                candidates = [np.float64(value)**(1 / self.metrics) for value in sums[i]]
+                labels[i] = int(np.argmin(candidates))
+        return labels, self.root(min_sums)
+
+    def second_nearest(self, sums: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """ distance to the nearest centroid other than the one in labels, infinite if there is none """
+        sums = np.where(np.isnan(sums), np.inf, sums)
+        sums[np.arange(sums.shape[0]), labels] = np.inf
+        return self.root(sums.min(axis=1, initial=np.inf))
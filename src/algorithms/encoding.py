@@ -0,0 +1,217 @@
+import os
+import shutil
+import tempfile
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms.config import PREVIEW_ROWS
+from algorithms.schema import DatasetSchema
+from algorithms.utils import check_numeric
+
+precision_types = ['float64', 'float32']
+
+
+def codes_type(num_categories: int) -> np.dtype:
+    """ the smallest of int16 and int32 which holds codes of all categories and -1 """
+    return np.dtype(np.int16) if num_categories <= np.iinfo(np.int16).max else np.dtype(np.int32)
+
+
+class EncodedData:
+    def __init__(self, data: pd.DataFrame, is_numeric: Optional[List[bool]] = None, precision: precision_types = 'float64'):
+        """
+            Column-wise encoding of a data frame computed once before running an algorithm.
+            Numeric columns become one contiguous float matrix (self.numeric) of the given precision,
+            other columns become integer codes (self.codes, int16 or int32 depending on the number
+            of categories) with values kept in self.categories.
+            Missing categorical values get code -1, which never matches any other code.
+        """
+        if precision not in precision_types:
+            raise TypeError(f"{precision} is invalid value of precision parameter")
+        self.precision = np.dtype(precision)
+        self.columns = list(data.columns)
+        if is_numeric is None:
+            is_numeric = [check_numeric(column) for _, column in data.items()]
+        self.is_numeric = list(is_numeric)
+        self.numeric_index = [i for i, numeric in enumerate(self.is_numeric) if numeric]
+        self.categorical_index = [i for i, numeric in enumerate(self.is_numeric) if not numeric]
+        self.size = data.shape[0]
+
+        self.numeric = np.empty((self.size, len(self.numeric_index)), dtype=self.precision)
+        for j, i in enumerate(self.numeric_index):
+            self.numeric[:, j] = pd.to_numeric(data.iloc[:, i]).to_numpy(dtype=float)
+
+        columns_codes = []
+        self.categories = []
+        self.lookup = []
+        for i in self.categorical_index:
+            codes, categories = self.factorize(data.iloc[:, i])
+            columns_codes.append(codes)
+            self.categories.append(categories)
+            self.lookup.append({value: code for code, value in enumerate(categories)})
+        self.codes = np.empty((self.size, len(self.categorical_index)), dtype=self.codes_type())
+        for j, codes in enumerate(columns_codes):
+            self.codes[:, j] = codes
+
+    def codes_type(self) -> np.dtype:
+        return codes_type(max([len(categories) for categories in self.categories], default=0))
+
+    def cardinality(self) -> List[int]:
+        """ number of categories of every column, 0 for numeric columns """
+        cardinality = [0] * len(self.columns)
+        for j, i in enumerate(self.categorical_index):
+            cardinality[i] = len(self.categories[j])
+        return cardinality
+
+    def nbytes(self) -> int:
+        """ size of the encoded arrays """
+        return self.numeric.nbytes + self.codes.nbytes
+
+    @staticmethod
+    def estimate_bytes(rows: int, is_numeric: List[bool], cardinality: List[int],
+                       precision: precision_types = 'float64') -> int:
+        """ size of the encoded arrays of rows with given kinds of columns, without encoding them """
+        numeric_columns = sum(is_numeric)
+        categorical = [count for count, numeric in zip(cardinality, is_numeric) if not numeric]
+        row_bytes = numeric_columns * np.dtype(precision).itemsize
+        row_bytes += len(categorical) * codes_type(max(categorical, default=0)).itemsize
+        return rows * row_bytes
+
+    @classmethod
+    def from_arrays(cls, columns: List[str], is_numeric: List[bool], numeric: np.ndarray, codes: np.ndarray,
+                    categories: List[List]) -> 'EncodedData':
+        """ EncodedData around already encoded arrays (e.g. memory-mapped ones), without copying them """
+        encoded = cls(pd.DataFrame(columns=columns), is_numeric, numeric.dtype.name)
+        encoded.size = numeric.shape[0]
+        encoded.numeric = numeric
+        encoded.codes = codes
+        encoded.categories = [list(values) for values in categories]
+        encoded.lookup = [{value: code for code, value in enumerate(values)} for values in encoded.categories]
+        return encoded
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], schema: Optional[DatasetSchema] = None,
+                    precision: precision_types = 'float64') -> Tuple['EncodedData', pd.DataFrame]:
+        """
+            All chunks of the data encoded one by one into one EncodedData, without holding the decoded chunks,
+            and the first PREVIEW_ROWS rows of the data.
+        """
+        first, preview, numeric, codes = None, None, [], []
+        for chunk in chunks:
+            if first is None:
+                is_numeric = schema.is_numeric_for(chunk.columns) if schema is not None else None
+                first = cls(chunk, is_numeric, precision)
+                preview = chunk.iloc[:PREVIEW_ROWS]
+                numeric.append(first.numeric)
+                codes.append(first.codes)
+            else:
+                chunk_numeric, chunk_codes = first.encode_frame(chunk)
+                numeric.append(chunk_numeric)
+                codes.append(chunk_codes)
+        # codes of later chunks may need a larger type than the ones of the first chunk
+        codes = np.concatenate(codes).astype(first.codes_type())
+        encoded = cls.from_arrays(first.columns, first.is_numeric, np.concatenate(numeric), codes, first.categories)
+        return encoded, preview
+
+    def to_frame(self) -> pd.DataFrame:
+        """ data frame with decoded values - parsed numbers and original categories """
+        frame = {}
+        for j, i in enumerate(self.numeric_index):
+            frame[self.columns[i]] = self.numeric[:, j]
+        for j, i in enumerate(self.categorical_index):
+            values = np.array(self.categories[j] + [np.nan], dtype=object)
+            frame[self.columns[i]] = values[self.codes[:, j]]
+        return pd.DataFrame(frame, columns=self.columns)
+
+    @staticmethod
+    def factorize(column: pd.Series) -> Tuple[np.ndarray, List]:
+        codes, uniques = pd.factorize(column)
+        categories = list(uniques)
+        # None is equal to None (unlike NaN), so it gets its own code
+        values = column.to_numpy(dtype=object)
+        missing = np.flatnonzero(codes < 0)
+        is_none = np.array([values[i] is None for i in missing], dtype=bool)
+        if is_none.any():
+            codes[missing[is_none]] = len(categories)
+            categories.append(None)
+        return codes, categories
+
+    def encode_frame(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            Encode another frame with the same columns (e.g. next chunk of the data) consistently with this one.
+            Categories not seen before get new codes, numeric values which can not be parsed become NaN.
+        """
+        numeric = np.empty((data.shape[0], len(self.numeric_index)), dtype=self.precision)
+        for j, i in enumerate(self.numeric_index):
+            numeric[:, j] = pd.to_numeric(data.iloc[:, i], errors='coerce').to_numpy(dtype=float)
+        columns_codes = []
+        for j, i in enumerate(self.categorical_index):
+            local_codes, categories = self.factorize(data.iloc[:, i])
+            mapping = np.array([self.add_category(j, value) for value in categories] + [-1], dtype=int)
+            columns_codes.append(mapping[local_codes])
+        codes = np.empty((data.shape[0], len(self.categorical_index)), dtype=self.codes_type())
+        for j, column_codes in enumerate(columns_codes):
+            codes[:, j] = column_codes
+        return numeric, codes
+
+    def add_category(self, categorical_column: int, value: any) -> int:
+        code = self.lookup[categorical_column].get(value)
+        if code is None:
+            code = len(self.categories[categorical_column])
+            self.categories[categorical_column].append(value)
+            self.lookup[categorical_column][value] = code
+        return code
+
+    def encode_rows(self, rows: List[Union[Tuple, List]]) -> Tuple[np.ndarray, np.ndarray]:
+        """ Encode rows given as tuples (e.g. centroids) the same way as the data """
+        numeric = np.empty((len(rows), len(self.numeric_index)), dtype=float)
+        codes = np.empty((len(rows), len(self.categorical_index)), dtype=int)
+        for r, row in enumerate(rows):
+            for j, i in enumerate(self.numeric_index):
+                numeric[r, j] = float(row[i])
+            for j, i in enumerate(self.categorical_index):
+                codes[r, j] = self.encode_value(j, row[i])
+        return numeric, codes
+
+    def encode_value(self, categorical_column: int, value: any) -> int:
+        try:
+            return self.lookup[categorical_column].get(value, -1)
+        except TypeError:
+            # unhashable values can not be equal to any of the categories
+            return -1
+
+    def decode_rows(self, numeric: np.ndarray, codes: np.ndarray) -> List[Tuple]:
+        """ Inverse of encode_rows, returns rows as tuples in the original order of columns """
+        rows = []
+        for r in range(numeric.shape[0]):
+            row = [None] * len(self.columns)
+            for j, i in enumerate(self.numeric_index):
+                row[i] = numeric[r, j]
+            for j, i in enumerate(self.categorical_index):
+                code = codes[r, j]
+                row[i] = self.categories[j][code] if code >= 0 else np.nan
+            rows.append(tuple(row))
+        return rows
+
+
+class MappedEncodedData:
+    def __init__(self, encoded: EncodedData):
+        """
+            Encoded data written to memory-mapped files, so worker processes map the same pages
+            instead of receiving their own copy of the arrays. Pickles as paths and metadata only.
+        """
+        self.directory = tempfile.mkdtemp(prefix='encoded_data_')
+        self.columns = encoded.columns
+        self.is_numeric = encoded.is_numeric
+        self.categories = encoded.categories
+        np.save(os.path.join(self.directory, 'numeric.npy'), encoded.numeric)
+        np.save(os.path.join(self.directory, 'codes.npy'), encoded.codes)
+
+    def load(self) -> EncodedData:
+        numeric = np.load(os.path.join(self.directory, 'numeric.npy'), mmap_mode='r')
+        codes = np.load(os.path.join(self.directory, 'codes.npy'), mmap_mode='r')
+        return EncodedData.from_arrays(self.columns, self.is_numeric, numeric, codes, self.categories)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,107 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms.config import SCHEMA_TRACKED_VALUES
+from algorithms.utils import check_numeric
+
+
+class DatasetSchema:
+    def __init__(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]):
+        """
+            Description of the columns of a dataset computed once, when the data is imported:
+            dtype, kind (numeric when all values can be parsed as numbers, categorical otherwise),
+            cardinality (number of distinct non-null values), number of nulls and min/max of numeric columns.
+            Data read by chunks is described in one pass over the chunks, cardinality of a column is counted
+            exactly up to SCHEMA_TRACKED_VALUES distinct values (cardinality_exact tells if it was).
+        """
+        self.columns: List[str] = []
+        self.size = 0
+        self.dtypes = []
+        self.is_numeric: List[bool] = []
+        self.nulls: List[int] = []
+        self.minimum: List[Optional[float]] = []
+        self.maximum: List[Optional[float]] = []
+        self.cardinality: List[int] = []
+        self.cardinality_exact: List[bool] = []
+
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        values = []
+        for chunk in chunks:
+            if not self.columns:
+                self.columns = list(chunk.columns)
+                self.dtypes = list(chunk.dtypes)
+                self.is_numeric = [True] * len(self.columns)
+                self.nulls = [0] * len(self.columns)
+                self.minimum = [None] * len(self.columns)
+                self.maximum = [None] * len(self.columns)
+                self.cardinality_exact = [True] * len(self.columns)
+                values = [set() for _ in self.columns]
+            self.size += chunk.shape[0]
+            for i, (_, column) in enumerate(chunk.items()):
+                self.describe(i, column, values[i])
+        self.cardinality = [len(column_values) for column_values in values]
+        for i, numeric in enumerate(self.is_numeric):
+            if not numeric:
+                self.minimum[i] = self.maximum[i] = None
+
+    def describe(self, i: int, column: pd.Series, values: set):
+        self.nulls[i] += int(column.isnull().sum())
+        if self.cardinality_exact[i]:
+            values.update(column.dropna().unique())
+            if len(values) > SCHEMA_TRACKED_VALUES:
+                self.cardinality_exact[i] = False
+        if self.is_numeric[i] and check_numeric(column):
+            parsed = pd.to_numeric(column)
+            if parsed.notnull().any():
+                minimum, maximum = float(parsed.min()), float(parsed.max())
+                self.minimum[i] = minimum if self.minimum[i] is None else min(self.minimum[i], minimum)
+                self.maximum[i] = maximum if self.maximum[i] is None else max(self.maximum[i], maximum)
+        else:
+            self.is_numeric[i] = False
+
+    def index(self, column: str) -> int:
+        return self.columns.index(column)
+
+    def bounds(self, column: str) -> Tuple[float, float]:
+        """ minimum and maximum of a numeric column, NaN when the column has no values """
+        i = self.index(column)
+        if self.minimum[i] is None:
+            return np.nan, np.nan
+        return self.minimum[i], self.maximum[i]
+
+    def numeric_columns(self) -> List[str]:
+        return [column for column, numeric in zip(self.columns, self.is_numeric) if numeric]
+
+    def is_numeric_for(self, columns: Iterable[str]) -> List[bool]:
+        """ kinds of given columns, e.g. of the columns passed to an algorithm """
+        return [self.is_numeric[self.index(column)] for column in columns]
+
+    def select(self, columns: Iterable[str]) -> 'DatasetSchema':
+        """ schema of a subset of columns, without reading the data again """
+        indices = [self.index(column) for column in columns]
+        schema = DatasetSchema(pd.DataFrame())
+        schema.size = self.size
+        for name in ['columns', 'dtypes', 'is_numeric', 'nulls', 'minimum', 'maximum', 'cardinality',
+                     'cardinality_exact']:
+            setattr(schema, name, [getattr(self, name)[i] for i in indices])
+        return schema
+
+    def to_frame(self) -> pd.DataFrame:
+        """ the schema as a table with one row per column """
+        return pd.DataFrame({
+            'dtype': [str(dtype) for dtype in self.dtypes],
+            'kind': ['numeric' if numeric else 'categorical' for numeric in self.is_numeric],
+            'cardinality': self.cardinality,
+            'nulls': self.nulls,
+            'min': self.minimum,
+            'max': self.maximum
+        }, index=self.columns)
+
+
+def numeric_column(column: pd.Series) -> pd.Series:
+    """ values of a numeric column as numbers, without copying columns which already are numeric """
+    if pd.api.types.is_numeric_dtype(column):
+        return column
+    return pd.to_numeric(column, errors='coerce')
@@ -0,0 +1,5 @@
+from .index import SpatialIndex
+from .tree import SpatialTree
+from .kd_tree import KDTree
+from .ball_tree import BallTree
+from .grid import UniformGrid
@@ -0,0 +1,41 @@
+from typing import List
+
+import numpy as np
+
+from .tree import SpatialTree
+
+
+class BallTree(SpatialTree):
+    """
+        Ball tree: every node keeps a center (means of numeric columns and the most frequent category
+        of categorical columns) and the largest distance from the center to its rows. By the triangle inequality
+        no row of a node is closer to a query than the distance to the center minus the radius.
+        Unlike the boxes of a k-d tree, balls stay tight for many columns.
+    """
+
+    def allocate(self, capacity: int):
+        self.center_numeric = np.zeros((capacity, self.numeric.shape[1]), dtype=self.numeric.dtype)
+        self.center_codes = np.zeros((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+        self.radius = np.zeros(capacity)
+
+    def node_arrays(self) -> List[str]:
+        return ['center_numeric', 'center_codes', 'radius']
+
+    def set_bounds(self, node: int, rows: np.ndarray):
+        numeric, codes = self.numeric[rows], self.codes[rows]
+        self.center_numeric[node] = numeric.mean(axis=0)
+        for j in range(codes.shape[1]):
+            valid = codes[:, j] >= 0
+            self.center_codes[node, j] = np.argmax(np.bincount(codes[valid, j])) if valid.any() else -1
+        center_numeric = np.repeat(self.center_numeric[node:node + 1], rows.size, axis=0)
+        center_codes = np.repeat(self.center_codes[node:node + 1], rows.size, axis=0)
+        sums = self.distances.paired(numeric, codes, center_numeric, center_codes)
+        self.radius[node] = self.distances.root(sums).max()
+
+    def closeness(self, numeric: np.ndarray, codes: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        # a query is often inside both balls (both lower bounds are 0), the nearer center is the better first guess
+        return self.distances.paired(numeric, codes, self.center_numeric[nodes], self.center_codes[nodes])
+
+    def lower_bounds(self, numeric: np.ndarray, codes: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        sums = self.distances.paired(numeric, codes, self.center_numeric[nodes], self.center_codes[nodes])
+        return np.maximum(self.distances.root(sums) * self.slack - self.radius[nodes] / self.slack, 0)
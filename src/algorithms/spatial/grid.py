@@ -0,0 +1,107 @@
+import itertools
+from typing import Callable, Generator, Tuple
+
+import numpy as np
+
+from .index import SpatialIndex
+
+# largest key of a cell of the grid, keys of all cells (with margins) must fit in int64
+MAX_CELL_KEY = 2**62
+
+# relative tolerance of the reach of neighbouring cells, a cell at the limit of radius is always included
+REACH_TOLERANCE = 1e-9
+
+
+class UniformGrid(SpatialIndex):
+    def __init__(self, numeric: np.ndarray, radius: float, metrics: int = 2):
+        """
+            Uniform grid of cubic cells over numeric rows, for radius queries (at most radius) in a few dimensions.
+            The side of a cell is radius / columns^(1 / metrics), so all rows of one cell are within radius
+            of each other, and neighbours of a query lie in the cells around its cell which are not farther
+            than radius (self.neighbour_keys, e.g. 21 cells in two dimensions and metrics 2).
+            Cells are identified by integer keys (coordinates of cells in mixed radix), rows are sorted by keys
+            and only non-empty cells are kept, so memory does not depend on the extent of the data.
+        """
+        if radius <= 0:
+            raise TypeError(f"{radius} is invalid value of radius parameter")
+        super().__init__(numeric, None, metrics)
+        columns = self.numeric.shape[1]
+        self.radius = radius
+        self.side = self.cell_side(columns, radius, metrics)
+        self.reach = int(np.ceil(radius / self.side - REACH_TOLERANCE))
+        self.origin = self.numeric.min(axis=0) if self.size else np.zeros(columns)
+        cells = np.floor((self.numeric - self.origin) / self.side)
+        # a margin of reach empty cells on both sides, so that keys of neighbouring cells never wrap around
+        self.extent = (cells.max(axis=0) if self.size else np.zeros(columns)) + 2 * self.reach + 1
+        if np.prod(self.extent) >= MAX_CELL_KEY:
+            raise TypeError(f"{radius} is too small radius of a grid of the data, a tree index is needed")
+        self.extent = self.extent.astype(np.int64)
+        self.strides = np.concatenate([[1], np.cumprod(self.extent[:-1])]).astype(np.int64)
+        keys = (cells.astype(np.int64) + self.reach) @ self.strides
+        self.order = np.argsort(keys, kind='stable')
+        self.cells, self.cell_start, self.row_cells = np.unique(keys[self.order], return_index=True,
+                                                                return_inverse=True)
+        self.cell_size = np.diff(np.append(self.cell_start, self.size))
+        # cell of every row in the original order
+        self.row_cells[self.order] = self.row_cells.copy()
+        self.neighbour_keys = self.neighbour_offsets(columns) @ self.strides
+
+    @staticmethod
+    def cell_side(columns: int, radius: float, metrics: int) -> float:
+        return radius / max(columns, 1)**(1 / metrics)
+
+    @classmethod
+    def fits(cls, numeric: np.ndarray, radius: float, metrics: int = 2) -> bool:
+        """ whether the keys of cells of a grid of the rows fit in int64 """
+        if not numeric.size or radius <= 0:
+            return radius > 0
+        side = cls.cell_side(numeric.shape[1], radius, metrics)
+        reach = np.ceil(radius / side - REACH_TOLERANCE)
+        extent = np.floor((numeric.max(axis=0) - numeric.min(axis=0)) / side) + 2 * reach + 1
+        return bool(np.prod(extent) < MAX_CELL_KEY)
+
+    def neighbour_offsets(self, columns: int) -> np.ndarray:
+        """ offsets of cells which may contain rows within radius of a row of the central cell """
+        offsets = np.array(list(itertools.product(range(-self.reach, self.reach + 1), repeat=columns)),
+                           dtype=np.int64).reshape(-1, columns)
+        gaps = np.maximum(np.abs(offsets) - 1, 0) * self.side
+        near = (gaps**self.metrics).sum(axis=1) <= self.radius**self.metrics * (1 + REACH_TOLERANCE)
+        return offsets[near]
+
+    def nbytes(self) -> int:
+        """ memory of the grid without the indexed rows """
+        return self.order.nbytes + self.row_cells.nbytes + self.cells.nbytes + self.cell_start.nbytes \
+            + self.cell_size.nbytes
+
+    def cell_keys(self, numeric: np.ndarray) -> np.ndarray:
+        # queries outside of the grid are moved to the margin, whose neighbours are a superset of theirs
+        cells = np.floor((numeric - self.origin) / self.side) + self.reach
+        return np.clip(cells, 0, self.extent - 1).astype(np.int64) @ self.strides
+
+    def find_cells(self, keys: np.ndarray) -> np.ndarray:
+        """ index of the cell of every key, -1 for empty cells """
+        if not self.cells.size:
+            return np.full(keys.shape, -1)
+        position = np.minimum(np.searchsorted(self.cells, keys), self.cells.size - 1)
+        return np.where(self.cells[position] == keys, position, -1)
+
+    def cell_pairs(self, numeric: np.ndarray, codes: np.ndarray, queries: np.ndarray,
+                   cells: np.ndarray) -> Generator[Tuple[np.ndarray, np.ndarray, np.ndarray], None, None]:
+        """ rows of cells[i] paired with queries[i], in chunks of about max_pairs rows (a larger cell is one chunk) """
+        sizes = self.cell_size[cells]
+        ends = np.cumsum(sizes)
+        bounds = np.unique(np.searchsorted(ends, np.arange(self.max_pairs, ends[-1] if ends.size else 0,
+                                                           self.max_pairs), side='right'))
+        for first, last in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [queries.size]])):
+            if last > first:
+                yield self.range_pairs(numeric, codes, queries[first:last], self.cell_start[cells[first:last]],
+                                       sizes[first:last])
+
+    def pairs(self, numeric: np.ndarray, codes: np.ndarray, limits: Callable[[np.ndarray], np.ndarray],
+              closer_first: bool = False) -> Generator[Tuple[np.ndarray, np.ndarray, np.ndarray], None, None]:
+        """ all rows of the cells around every query, the limits (at most radius) are not used """
+        keys = self.cell_keys(numeric)
+        for neighbour_key in self.neighbour_keys:
+            cells = self.find_cells(keys + neighbour_key)
+            queries = np.flatnonzero(cells >= 0)
+            yield from self.cell_pairs(numeric, codes, queries, cells[queries])
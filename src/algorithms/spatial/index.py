@@ -0,0 +1,95 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Generator, List, Optional, Tuple
+
+import numpy as np
+
+from algorithms import DistanceEngine
+from algorithms.distance import BLOCK_ARRAYS
+from algorithms.config import MAX_BLOCK_BYTES, QUERY_BATCH_ROWS
+
+
+class SpatialIndex(ABC):
+    def __init__(self, numeric: np.ndarray, codes: Optional[np.ndarray] = None, metrics: int = 2,
+                 is_numeric: Optional[List[bool]] = None):
+        """
+            Index of encoded rows (a numeric matrix and category codes) answering radius queries
+            with the same Minkowski distance as DistanceEngine (a categorical column adds a 0/1 mismatch).
+            Subclasses keep the indexed rows permuted by self.order and give candidate (query, row, distance)
+            pairs of a batch of queries, chunk by chunk.
+            Rows with missing numeric values can not be indexed.
+        """
+        numeric = numeric if np.issubdtype(numeric.dtype, np.floating) else numeric.astype(float)
+        codes = np.empty((numeric.shape[0], 0), dtype=int) if codes is None else codes
+        if np.isnan(numeric).any():
+            raise TypeError("spatial index can not contain missing numeric values")
+        if is_numeric is None:
+            is_numeric = [True] * numeric.shape[1] + [False] * codes.shape[1]
+        self.numeric = numeric
+        self.codes = codes
+        self.metrics = metrics
+        self.distances = DistanceEngine(is_numeric, metrics, dtype=numeric.dtype)
+        self.size = numeric.shape[0]
+        # (query, row) pairs compared at once, so that their intermediate arrays fit in MAX_BLOCK_BYTES
+        pair_bytes = BLOCK_ARRAYS * (numeric.shape[1] + codes.shape[1] + 1) * np.dtype(float).itemsize
+        self.max_pairs = max(1, MAX_BLOCK_BYTES // pair_bytes)
+
+    def query_rows(self, numeric: np.ndarray, codes: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        codes = np.empty((numeric.shape[0], 0), dtype=int) if codes is None else codes
+        if np.isnan(numeric).any():
+            raise TypeError("queries of a spatial index can not contain missing numeric values")
+        return numeric, codes
+
+    def range_pairs(self, numeric: np.ndarray, codes: np.ndarray, queries: np.ndarray, starts: np.ndarray,
+                    sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ rows self.order[starts[i]:starts[i] + sizes[i]] paired with queries[i]: query, row and their distance """
+        pair_queries = np.repeat(queries, sizes)
+        offsets = np.arange(pair_queries.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        rows = self.order[np.repeat(starts, sizes) + offsets]
+        sums = self.distances.paired(numeric[pair_queries], codes[pair_queries], self.numeric[rows], self.codes[rows])
+        return pair_queries, rows, self.distances.root(sums)
+
+    @abstractmethod
+    def pairs(self, numeric: np.ndarray, codes: np.ndarray, limits: Callable[[np.ndarray], np.ndarray],
+              closer_first: bool = False) -> Generator[Tuple[np.ndarray, np.ndarray, np.ndarray], None, None]:
+        """
+            (query, row, distance) of rows which may be within limits(queries) of a batch of queries, in chunks
+            of at most about max_pairs pairs. limits are read again for every chunk, so they may shrink
+            with the yielded rows. Rows farther than the limits may be yielded too.
+        """
+
+    def query_radius(self, numeric: np.ndarray, codes: Optional[np.ndarray] = None,
+                     radius: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            Rows within radius of every query row, as compressed lists: neighbours of query i are
+            indices[offsets[i]:offsets[i + 1]] (sorted by index) with their distances.
+        """
+        numeric, codes = self.query_rows(numeric, codes)
+        counts = np.zeros(numeric.shape[0], dtype=int)
+        indices, distances = [], []
+        for start in range(0, numeric.shape[0], QUERY_BATCH_ROWS):
+            stop = min(numeric.shape[0], start + QUERY_BATCH_ROWS)
+            found = [(queries[within], rows[within], pair_distances[within])
+                     for queries, rows, pair_distances in self.pairs(numeric[start:stop], codes[start:stop],
+                                                                     lambda queries: radius)
+                     for within in [pair_distances <= radius]]
+            if not found:
+                continue
+            queries, rows, batch_distances = (np.concatenate(parts) for parts in zip(*found))
+            order = np.lexsort((rows, queries))
+            counts[start:stop] = np.bincount(queries, minlength=stop - start)
+            indices.append(rows[order])
+            distances.append(batch_distances[order])
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return offsets, np.concatenate(indices or [np.empty(0, dtype=int)]), np.concatenate(distances or [np.empty(0)])
+
+    def count_radius(self, numeric: np.ndarray, codes: Optional[np.ndarray] = None,
+                     radius: float = 1.0) -> np.ndarray:
+        """ number of rows within radius of every query row, without keeping the neighbours """
+        numeric, codes = self.query_rows(numeric, codes)
+        counts = np.zeros(numeric.shape[0], dtype=int)
+        for start in range(0, numeric.shape[0], QUERY_BATCH_ROWS):
+            stop = min(numeric.shape[0], start + QUERY_BATCH_ROWS)
+            for queries, _, pair_distances in self.pairs(numeric[start:stop], codes[start:stop],
+                                                         lambda queries: radius):
+                counts[start:stop] += np.bincount(queries[pair_distances <= radius], minlength=stop - start)
+        return counts
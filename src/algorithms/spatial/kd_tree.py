@@ -0,0 +1,36 @@
+from typing import List
+
+import numpy as np
+
+from .tree import SpatialTree
+
+
+class KDTree(SpatialTree):
+    """
+        k-d tree: every node keeps the smallest and the largest value of every column of its rows
+        (a bounding box). The lower bound of a distance to a node sums differences to the box
+        of numeric columns and a mismatch of categorical columns whose code is outside the range of the node.
+    """
+
+    def allocate(self, capacity: int):
+        self.low_numeric = np.zeros((capacity, self.numeric.shape[1]))
+        self.high_numeric = np.zeros((capacity, self.numeric.shape[1]))
+        self.low_codes = np.zeros((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+        self.high_codes = np.zeros((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+
+    def node_arrays(self) -> List[str]:
+        return ['low_numeric', 'high_numeric', 'low_codes', 'high_codes']
+
+    def set_bounds(self, node: int, rows: np.ndarray):
+        numeric, codes = self.numeric[rows], self.codes[rows]
+        self.low_numeric[node], self.high_numeric[node] = numeric.min(axis=0), numeric.max(axis=0)
+        self.low_codes[node], self.high_codes[node] = codes.min(axis=0), codes.max(axis=0)
+
+    def lower_bounds(self, numeric: np.ndarray, codes: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        below = self.low_numeric[nodes] - numeric
+        above = numeric - self.high_numeric[nodes]
+        sums = (np.maximum(np.maximum(below, above), 0)**self.metrics).sum(axis=1)
+        # a missing category mismatches every row
+        outside = (codes < 0) | (codes < self.low_codes[nodes]) | (codes > self.high_codes[nodes])
+        sums += outside.sum(axis=1)
+        return self.distances.root(sums) * self.slack
@@ -0,0 +1,175 @@
+from abc import abstractmethod
+from typing import Callable, Generator, List, Optional, Tuple
+
+import numpy as np
+
+from algorithms import EncodedData
+from algorithms.config import LEAF_SIZE, QUERY_BATCH_ROWS
+from .index import SpatialIndex
+
+# number of machine epsilons of the precision of rows by which lower bounds of nodes are shrunk
+BOUND_SLACK_EPSILONS = 64
+
+
+class SpatialTree(SpatialIndex):
+    def __init__(self, numeric: np.ndarray, codes: Optional[np.ndarray] = None, metrics: int = 2,
+                 leaf_size: int = LEAF_SIZE, is_numeric: Optional[List[bool]] = None):
+        """
+            Array-backed binary space-partitioning tree over encoded rows (a numeric matrix and category codes),
+            with the same Minkowski distance as DistanceEngine (a categorical column adds a 0/1 mismatch).
+            Node i covers rows self.order[self.start[i]:self.end[i]], its children are self.left[i]
+            and self.right[i] (-1 for leaves). Nodes are split at the median of the column with the widest
+            range, subclasses keep bounds of nodes and give lower bounds of distances from queries to nodes.
+            Queries are answered in batches: chunks of (query, node) pairs are tested at once and walked depth first,
+            the closer child first, pairs which can not contain a result are pruned and pairs of leaves
+            are compared row by row. Chunks are split so that the compared pairs fit in MAX_BLOCK_BYTES.
+        """
+        if leaf_size < 1:
+            raise TypeError(f"{leaf_size} is invalid value of leaf_size parameter")
+        super().__init__(numeric, codes, metrics, is_numeric)
+        self.leaf_size = leaf_size
+        self.max_pairs = max(leaf_size, self.max_pairs)
+        # bounds are shrunk by a few units of rounding, so that rows at exactly the bound are never pruned
+        self.slack = 1 - BOUND_SLACK_EPSILONS * np.finfo(self.numeric.dtype).eps
+
+        # a split node has more than leaf_size rows, so every leaf has at least half of that
+        capacity = 2 * (self.size // max(1, (leaf_size + 1) // 2)) + 1
+        self.order = np.arange(self.size)
+        self.start = np.zeros(capacity, dtype=int)
+        self.end = np.zeros(capacity, dtype=int)
+        self.left = np.full(capacity, -1)
+        self.right = np.full(capacity, -1)
+        self.nodes = 0
+        self.allocate(capacity)
+        self.build()
+
+    @classmethod
+    def from_encoded(cls, encoded: EncodedData, metrics: int = 2, leaf_size: int = LEAF_SIZE) -> 'SpatialTree':
+        return cls(encoded.numeric, encoded.codes, metrics, leaf_size, encoded.is_numeric)
+
+    def add_node(self, start: int, end: int) -> int:
+        node = self.nodes
+        self.start[node], self.end[node] = start, end
+        self.nodes += 1
+        return node
+
+    def build(self):
+        # rows as one float matrix of numeric columns followed by codes, used only to split nodes
+        all_points = np.hstack([self.numeric, self.codes]).astype(float)
+        stack = [self.add_node(0, self.size)]
+        while stack:
+            node = stack.pop()
+            start, end = self.start[node], self.end[node]
+            rows = self.order[start:end]
+            self.set_bounds(node, rows)
+            if end - start <= self.leaf_size:
+                continue
+            points = all_points[rows]
+            column = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            if points[:, column].max() == points[:, column].min():
+                # all rows are equal
+                continue
+            middle = (end - start) // 2
+            self.order[start:end] = rows[np.argpartition(points[:, column], middle, kind='introselect')]
+            self.left[node] = self.add_node(start, start + middle)
+            self.right[node] = self.add_node(start + middle, end)
+            stack.extend([self.right[node], self.left[node]])
+        self.trim()
+
+    def trim(self):
+        for name in ['start', 'end', 'left', 'right'] + self.node_arrays():
+            setattr(self, name, getattr(self, name)[:self.nodes].copy())
+
+    @abstractmethod
+    def allocate(self, capacity: int):
+        """ creates arrays of bounds of nodes """
+
+    @abstractmethod
+    def node_arrays(self) -> List[str]:
+        """ names of arrays of bounds of nodes """
+
+    def nbytes(self) -> int:
+        """ memory of the tree without the indexed rows """
+        return sum(getattr(self, name).nbytes for name in ['order', 'start', 'end', 'left', 'right'] + self.node_arrays())
+
+    @abstractmethod
+    def set_bounds(self, node: int, rows: np.ndarray):
+        """ saves bounds of the rows of a new node """
+
+    @abstractmethod
+    def lower_bounds(self, numeric: np.ndarray, codes: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """ lower bounds of distances between query rows and rows of nodes (pairs of equal length) """
+
+    def closeness(self, numeric: np.ndarray, codes: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """ how close query rows are to nodes (smaller is closer), used to choose the child searched first """
+        return self.lower_bounds(numeric, codes, nodes)
+
+    def leaf_pairs(self, numeric: np.ndarray, codes: np.ndarray, queries: np.ndarray,
+                   leaves: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ every row of every leaf paired with its query: query, row and their distance """
+        return self.range_pairs(numeric, codes, queries, self.start[leaves], self.end[leaves] - self.start[leaves])
+
+    def pairs(self, numeric: np.ndarray, codes: np.ndarray, limits: Callable[[np.ndarray], np.ndarray],
+              closer_first: bool = False) -> Generator[Tuple[np.ndarray, np.ndarray, np.ndarray], None, None]:
+        """
+            Walks the tree for a batch of queries and yields (query, row, distance) of rows of leaves
+            which were not pruned. A node is pruned for a query if its lower bound is above limits(queries),
+            limits are read again for every chunk, so they may shrink with the yielded rows.
+        """
+        stack = [(np.arange(numeric.shape[0]), np.zeros(numeric.shape[0], dtype=int))]
+        max_nodes = max(1, self.max_pairs // self.leaf_size)
+        while stack:
+            queries, nodes = stack.pop()
+            if queries.size > max_nodes:
+                half = queries.size // 2
+                stack.extend([(queries[half:], nodes[half:]), (queries[:half], nodes[:half])])
+                continue
+            kept = self.lower_bounds(numeric[queries], codes[queries], nodes) <= limits(queries)
+            queries, nodes = queries[kept], nodes[kept]
+            leaf = self.left[nodes] < 0
+            if leaf.any():
+                yield self.leaf_pairs(numeric, codes, queries[leaf], nodes[leaf])
+            queries, nodes = queries[~leaf], nodes[~leaf]
+            if not queries.size:
+                continue
+            left, right = self.left[nodes], self.right[nodes]
+            if not closer_first:
+                stack.append((np.concatenate([queries, queries]), np.concatenate([left, right])))
+                continue
+            to_left = self.closeness(numeric[queries], codes[queries], left) \
+                <= self.closeness(numeric[queries], codes[queries], right)
+            stack.extend([(queries, np.where(to_left, right, left)), (queries, np.where(to_left, left, right))])
+
+    def query(self, numeric: np.ndarray, codes: Optional[np.ndarray] = None,
+              k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            k nearest rows of every query row: distances and indices with shape (queries, k), sorted by distance
+            (equal distances by index). Missing neighbours (k larger than the size) have infinite distance and -1.
+        """
+        numeric, codes = self.query_rows(numeric, codes)
+        distances = np.full((numeric.shape[0], k), np.inf)
+        indices = np.full((numeric.shape[0], k), -1)
+        for start in range(0, numeric.shape[0], QUERY_BATCH_ROWS):
+            stop = min(numeric.shape[0], start + QUERY_BATCH_ROWS)
+            best, best_rows = distances[start:stop], indices[start:stop]
+            for queries, rows, pair_distances in self.pairs(numeric[start:stop], codes[start:stop],
+                                                            lambda queries: best[queries, -1], True):
+                self.merge(best, best_rows, queries, rows, pair_distances)
+        return distances, indices
+
+    @staticmethod
+    def merge(best: np.ndarray, best_rows: np.ndarray, queries: np.ndarray, rows: np.ndarray, distances: np.ndarray):
+        """ keeps (in place) the k nearest of the current ones and of new (query, row, distance) candidates """
+        k = best.shape[1]
+        merged, inverse = np.unique(queries, return_inverse=True)
+        distances = np.nan_to_num(distances, nan=np.inf)
+        all_queries = np.concatenate([np.repeat(np.arange(merged.size), k), inverse])
+        all_rows = np.concatenate([best_rows[merged].ravel(), rows])
+        all_distances = np.concatenate([best[merged].ravel(), distances])
+        # missing neighbours (-1) go after all rows with the same distance
+        order = np.lexsort((np.where(all_rows < 0, np.iinfo(int).max, all_rows), all_distances, all_queries))
+        all_queries, all_rows, all_distances = all_queries[order], all_rows[order], all_distances[order]
+        rank = np.arange(all_queries.size) - np.searchsorted(all_queries, np.arange(merged.size))[all_queries]
+        chosen = rank < k
+        best[merged[all_queries[chosen]], rank[chosen]] = all_distances[chosen]
+        best_rows[merged[all_queries[chosen]], rank[chosen]] = all_rows[chosen]
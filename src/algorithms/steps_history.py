@@ -0,0 +1,100 @@
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from algorithms.encoding import EncodedData
+
+# number of steps allocated at once when the number of steps is not known in advance
+STEPS_CAPACITY = 16
+
+
+class StepsHistory:
+    def __init__(self, encoded: EncodedData, num_clusters: int, max_steps: Optional[int] = None):
+        """
+            Compact record of the steps of a clustering algorithm.
+            Labels of the first step are kept once in the smallest integer type which fits the labels,
+            every next step keeps only the rows which changed the label and their new labels.
+            Centroids of all steps are kept encoded in preallocated (steps x clusters x columns) arrays
+            of numeric values and of category codes, grown by doubling when max_steps is not given.
+            Steps are reconstructed lazily - history[i] returns labels and centroids (a DataFrame) of step i.
+        """
+        self.encoded = encoded
+        self.num_clusters = num_clusters
+        self.label_type = np.min_scalar_type(max(num_clusters - 1, 0))
+        self.row_type = None
+        capacity = max_steps or STEPS_CAPACITY
+        self.numeric = np.empty((capacity, num_clusters, len(encoded.numeric_index)), dtype=float)
+        self.codes = np.empty((capacity, num_clusters, len(encoded.categorical_index)), dtype=int)
+        self.size = 0
+        self.initial_labels = None
+        self.changes: List[Tuple[np.ndarray, np.ndarray]] = []
+        # labels of one step, the last reconstructed (or appended) one
+        self.current_step = -1
+        self.current_labels = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, step: int) -> Tuple[np.ndarray, pd.DataFrame]:
+        return self.labels(step), self.centroids(step)
+
+    def append(self, labels: np.ndarray, centroids: Union[List[Tuple], Tuple[np.ndarray, np.ndarray]]):
+        """ save the next step, centroids are rows (tuples) or already encoded (numeric, codes) arrays """
+        if isinstance(centroids, list):
+            centroids = self.encoded.encode_rows(centroids)
+        if self.size == self.numeric.shape[0]:
+            self.numeric = np.concatenate([self.numeric, np.empty_like(self.numeric)])
+            self.codes = np.concatenate([self.codes, np.empty_like(self.codes)])
+        self.numeric[self.size], self.codes[self.size] = centroids
+
+        if self.size == 0:
+            self.row_type = np.min_scalar_type(max(labels.shape[0] - 1, 0))
+            self.initial_labels = labels.astype(self.label_type)
+            self.current_labels = self.initial_labels.copy()
+        else:
+            previous = self.labels_view(self.size - 1)
+            rows = np.flatnonzero(previous != labels)
+            new_labels = labels[rows].astype(self.label_type)
+            self.changes.append((rows.astype(self.row_type), new_labels))
+            previous[rows] = new_labels
+        self.current_step = self.size
+        self.size += 1
+
+    def labels_view(self, step: int) -> np.ndarray:
+        """ labels of the step in the shared buffer, valid until another step is reconstructed """
+        if step < 0:
+            step += self.size
+        if not 0 <= step < self.size:
+            raise IndexError(f"step {step} out of range")
+        if step < self.current_step:
+            self.current_labels[:] = self.initial_labels
+            self.current_step = 0
+        for rows, new_labels in self.changes[self.current_step:step]:
+            self.current_labels[rows] = new_labels
+        self.current_step = step
+        return self.current_labels
+
+    def labels(self, step: int) -> np.ndarray:
+        return self.labels_view(step).copy()
+
+    def changed_rows(self, step: int) -> np.ndarray:
+        """ rows which changed the label in the given step """
+        if step == 0:
+            return np.empty(0, dtype=int)
+        return self.changes[step - 1][0]
+
+    def centroids(self, step: int) -> pd.DataFrame:
+        if step < 0:
+            step += self.size
+        if not 0 <= step < self.size:
+            raise IndexError(f"step {step} out of range")
+        rows = self.encoded.decode_rows(self.numeric[step], self.codes[step])
+        return pd.DataFrame(rows, columns=self.encoded.columns)
+
+    def nbytes(self) -> int:
+        """ memory used by the saved steps """
+        size = self.numeric[:self.size].nbytes + self.codes[:self.size].nbytes
+        if self.initial_labels is not None:
+            size += self.initial_labels.nbytes + self.current_labels.nbytes
+        return size + sum(rows.nbytes + labels.nbytes for rows, labels in self.changes)
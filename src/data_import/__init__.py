@@ -1,4 +1,5 @@
 from .config import AVAILABLE_RAM_MEMORY, SIZE_OF_VALUE
+from .chunked_data import ChunkedData
 from .file_reader import FileReader
 from .csv_reader import CSVReader
 from .json_reader import JSONReader
@@ -0,0 +1,15 @@
+from typing import Callable, Iterator, List
+import pandas as pd
+
+
+class ChunkedData:
+    def __init__(self, read_chunks: Callable[[], Iterator[pd.DataFrame]], columns: List[str]):
+        """
+            Data too big to be read at once. Every iteration starts a new read of the source,
+            so algorithms can make as many passes over the chunks as they need.
+        """
+        self.read_chunks = read_chunks
+        self.columns = columns
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        return iter(self.read_chunks())
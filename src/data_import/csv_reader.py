@@ -1,5 +1,6 @@
+from functools import partial
 from typing import List, Optional
-from data_import import FileReader
+from data_import import FileReader, ChunkedData
 import pandas as pd
 
 
@@ -14,7 +15,7 @@ class CSVReader(FileReader):
             self.error = 'There is some problem with file. Please try again.'
         self.reader = None
 
-    # return DataFrame or TextFileReader (can use as generator of DataFrame)
+    # return DataFrame or ChunkedData (can be iterated many times as generator of DataFrame)
     def read(self, columns: Optional[List[str]]):
         if self.need_chunks:
             self._read_by_chunks(columns)
@@ -24,7 +25,8 @@ class CSVReader(FileReader):
 
     def _read_by_chunks(self, columns: Optional[List[str]]):
         chunksize = self.get_chunksize()
-        self.reader = pd.read_csv(self.filepath, usecols=columns, engine='c', low_memory=True, chunksize=chunksize)
+        self.reader = ChunkedData(partial(pd.read_csv, self.filepath, usecols=columns, engine='c', low_memory=True,
+                                          chunksize=chunksize), columns or self.columns_name)
 
     def _read_all(self, columns: List[str]):
         self.reader = pd.read_csv(self.filepath, usecols=columns, engine='c')
@@ -1,6 +1,7 @@
 from database import Reader
 from typing import List, Optional, Generator, Union
-from data_import import AVAILABLE_RAM_MEMORY, SIZE_OF_VALUE
+from functools import partial
+from data_import import AVAILABLE_RAM_MEMORY, SIZE_OF_VALUE, ChunkedData
 import pandas as pd
 
 
@@ -8,7 +9,7 @@ class DatabaseReader:
     def __init__(self, db_name: str, coll_name: str):
         """
             Class to read data from database.
-            self.reader is DataFrame or Generator of DataFrame.
+            self.reader is DataFrame or ChunkedData (generator of DataFrame which can be iterated many times).
             We may implement some special class to have data and behave as DataFrame.
         """
         self.error = ''
@@ -36,16 +37,16 @@ class DatabaseReader:
     def is_file_big(self) -> bool:
         return self.need_chunks
 
-    def read(self, columns: Optional[List[str]]) -> Union[pd.DataFrame, Generator[pd.DataFrame, None, None]]:
+    def read(self, columns: Optional[List[str]]) -> Union[pd.DataFrame, ChunkedData]:
         if columns is None:
             columns = self.columns_name
         if self.need_chunks:
-            self.reader = self._read_by_chunks(columns)
+            self.reader = ChunkedData(partial(self._read_by_chunks, columns), columns)
         else:
             self._read_all(columns)
         return self.reader
 
-    def _read_by_chunks(self, columns: [List[str]]):
+    def _read_by_chunks(self, columns: [List[str]]) -> Generator[pd.DataFrame, None, None]:
         chunksize = self.get_chunksize()
         chunk_num = 0
         chunks = self.database.get_rows_number()//chunksize
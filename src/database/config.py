@@ -6,4 +6,13 @@ import dns.resolver
 dns.resolver.default_resolver = dns.resolver.Resolver(configure=False)
 dns.resolver.default_resolver.nameservers = ['8.8.8.8']
 
-client = MongoClient('mongodb+srv://admin:{}@dataminingtooldb.trcgm.mongodb.net/'.format(os.environ.get("MONGO_PASS")))
+# created on the first use, so importing the package (e.g. for data_import) needs no connection
+client = None
+
+
+def get_client() -> MongoClient:
+    global client
+    if client is None:
+        client = MongoClient('mongodb+srv://admin:{}@dataminingtooldb.trcgm.mongodb.net/'.format(
+            os.environ.get("MONGO_PASS")))
+    return client
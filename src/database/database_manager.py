@@ -1,9 +1,9 @@
-from .config import client
+from .config import get_client
 
 
 class DatabaseObjectManager:
     def __init__(self):
-        self.db_client = client
+        self.db_client = get_client()
 
     def get_database(self, db_name):
         """ Get database by provided name or create new one if it not exists """
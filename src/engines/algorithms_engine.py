@@ -1,26 +1,35 @@
+import pandas as pd
+
 from state import State
-from algorithms.clustering import KMeans
-from visualization.clustering import KMeansStepsVisualization
-from widgets.results_widgets import KMeansResultsWidget
+from algorithms.clustering import KMeans, MiniBatchKMeans, OutOfCoreKMeans, KMeansSweep, WarmStart, CoresetKMeans, \
+    DBSCAN, PAM, GaussianMixture, AgglomerativeClustering, BisectingKMeans
+from algorithms.associations import Apriori, AprioriTID, FPGrowth
+from visualization.clustering import KMeansStepsVisualization, DBSCANStepsVisualization
+from widgets.results_widgets import KMeansResultsWidget, DBSCANResultsWidget, AgglomerativeResultsWidget, \
+    AssociationsResultsWidget
 
 
 class AlgorithmsEngine:
     def __init__(self, state: State):
         self.state = state
+        self.working_set = None
 
         self.algorithms_options = {
             'clustering': {
                 'K-Means': (KMeans, KMeansStepsVisualization, KMeansResultsWidget),
-                'DBSCAN': None,
-                'Partition Around Medoids': None,
-                'Gaussian Mixture Models': None,
-                'Agglomerative clustering': None,
-                'Divisive clustering': None
+                'Mini-batch K-Means': (MiniBatchKMeans, KMeansStepsVisualization, KMeansResultsWidget),
+                'Coreset K-Means': (CoresetKMeans, KMeansStepsVisualization, KMeansResultsWidget),
+                'DBSCAN': (DBSCAN, DBSCANStepsVisualization, DBSCANResultsWidget),
+                'Partition Around Medoids': (PAM, KMeansStepsVisualization, KMeansResultsWidget),
+                'Gaussian Mixture Models': (GaussianMixture, KMeansStepsVisualization, KMeansResultsWidget),
+                'Agglomerative clustering': (AgglomerativeClustering, KMeansStepsVisualization,
+                                             AgglomerativeResultsWidget),
+                'Divisive clustering': (BisectingKMeans, KMeansStepsVisualization, KMeansResultsWidget)
             },
             'associations': {
-                'A-priori': None,
-                'A-prioriTID': None,
-                'FP-Growth': None
+                'A-priori': (Apriori, None, AssociationsResultsWidget),
+                'A-prioriTID': (AprioriTID, None, AssociationsResultsWidget),
+                'FP-Growth': (FPGrowth, None, AssociationsResultsWidget)
             },
             'classification': {
                 'KNN': None,
@@ -29,17 +38,73 @@ class AlgorithmsEngine:
             }
         }
 
-    def run(self, technique, algorithm, will_be_visualized, is_animation, **kwargs):
+        # algorithms used instead of the in-memory ones when data is read by chunks
+        self.chunked_variants = {
+            KMeans: OutOfCoreKMeans
+        }
+
+        # algorithms used in the "auto k" mode, which sweep a range of numbers of clusters
+        self.auto_k_variants = {
+            KMeans: KMeansSweep
+        }
+
+        # algorithms which can start from their previous solution on the same dataset lineage
+        self.warm_started = {KMeans}
+        # the last solution of such algorithms, by (lineage, technique, algorithm)
+        self.warm_starts = {}
+
+    def run(self, technique, algorithm, will_be_visualized, is_animation, report=None, **kwargs):
+        """
+            runs the algorithm and creates its widgets, returns the result and telemetry of the iterations.
+            The estimated working set of the algorithm (bytes by part) is kept in self.working_set
+            and passed to report before the run starts.
+            With warm_start the algorithm starts from its previous solution on an earlier version
+            of the same data (e.g. before removing nulls or columns), when there is one for the same options.
+        """
         chosen_alg = self.algorithms_options[technique][algorithm]
         if chosen_alg is None:
-            return
-        alg = chosen_alg[0](self.state.imported_data, **kwargs)
+            return None
+        algorithm_class = chosen_alg[0]
+        parameters = dict(kwargs)
+        # num_clusters is the upper bound of the range in the auto k mode
+        auto_k = parameters.pop('auto_k', False)
+        min_clusters = parameters.pop('min_clusters', None)
+        warm_start = parameters.pop('warm_start', False)
+        key = (self.state.lineage, technique, algorithm)
+        if not isinstance(self.state.imported_data, pd.DataFrame):
+            # the sweep needs the data in memory, chunked data is clustered with the given number of clusters
+            algorithm_class = self.chunked_variants.get(algorithm_class, algorithm_class)
+        elif auto_k and algorithm_class in self.auto_k_variants:
+            algorithm_class = self.auto_k_variants[algorithm_class]
+            parameters['min_clusters'] = min_clusters
+        elif warm_start and algorithm_class in self.warm_started and key in self.warm_starts:
+            previous = self.warm_starts[key]
+            columns = list(self.state.imported_data.columns)
+            if previous.applies_to(columns, parameters['num_clusters'], parameters.get('metrics', 1)):
+                parameters['warm_start'] = previous
+        alg = algorithm_class(self.state.imported_data, schema=self.state.schema, **parameters)
 
+        self.working_set = alg.get_working_set()
+        if report is not None:
+            report(self.working_set)
         result = alg.run(will_be_visualized)
+        if algorithm_class in self.warm_started:
+            # only the solutions of the current lineage are kept
+            self.warm_starts = {other: solution for other, solution in self.warm_starts.items()
+                                if other[0] == self.state.lineage}
+            self.warm_starts[key] = WarmStart.from_model(alg)
+
+        # chunked data is presented by its first rows, which labels of the steps refer to
+        data = self.state.imported_data
+        if not isinstance(data, pd.DataFrame):
+            data = alg.get_preview()
 
-        if will_be_visualized:
+        # algorithms without steps (e.g. of associations) have no steps visualization
+        if will_be_visualized and chosen_alg[1] is not None:
             steps = alg.get_steps()
-            self.state.steps_visualization = chosen_alg[1](self.state.imported_data, steps, is_animation)
+            # algorithms which stream the data record steps of its first rows, also for a data frame
+            steps_data = alg.get_preview() if hasattr(alg, 'get_preview') else data
+            self.state.steps_visualization = chosen_alg[1](steps_data, self.state.schema, steps, is_animation)
         else:
             self.state.steps_visualization = None
 
@@ -48,9 +113,9 @@ class AlgorithmsEngine:
             self.state.algorithm_results_widgets[technique] = {}
         if not self.state.algorithm_results_widgets[technique].get(algorithm):
             self.state.algorithm_results_widgets[technique][algorithm] = []
-        self.state.algorithm_results_widgets[technique][algorithm].append(chosen_alg[2](self.state.imported_data, *result, options=kwargs))
+        results_widget = chosen_alg[2](data, self.state.schema, *result, options=kwargs)
+        self.state.algorithm_results_widgets[technique][algorithm].append(results_widget)
+        return result, alg.get_telemetry()
 
     def get_maximum_clusters(self) -> int:
-        if self.state.imported_data is None:
-            return 100
-        return self.state.imported_data.shape[0]
+        return self.state.schema.size
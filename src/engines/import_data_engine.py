@@ -1,6 +1,7 @@
 from typing import List, Optional
 import pandas as pd
 
+from algorithms import DatasetSchema
 from data_import import CSVReader, JSONReader, DatabaseReader
 from database import DatabaseObjectManager, Writer
 from state import State
@@ -13,6 +14,7 @@ class ImportDataEngine:
         self.reader_data = None
         self.imported_data = None
         self.from_file = False
+        self.source = None
         self.database_manager = DatabaseObjectManager()
 
     def load_data_from_file(self, filepath: str) -> str:
@@ -29,6 +31,7 @@ class ImportDataEngine:
             self.reader_data = None
             return error
         self.from_file = True
+        self.source = filepath
         return ''
 
     def load_data_from_database(self, document_name: str) -> str:
@@ -37,6 +40,7 @@ class ImportDataEngine:
             self.reader_data = None
             return error
         self.from_file = False
+        self.source = document_name
         return ''
 
     def get_table_names_from_database(self) -> List[str]:
@@ -51,12 +55,18 @@ class ImportDataEngine:
     def clear_import(self):
         self.reader_data = None
         self.state.imported_data = None
+        self.state.schema = None
+        self.state.lineage = None
         self.state.steps_visualization = None
         self.state.algorithm_results_widgets = {}
 
     def read_data(self, columns: Optional[List[str]] = None):
         self.imported_data = self.reader_data.read(columns)
         self.state.imported_data = self.imported_data
+        # types of columns are found once here, algorithms and widgets read them from the schema
+        self.state.schema = DatasetSchema(self.imported_data)
+        # reading the same source again (e.g. with appended rows) continues its lineage
+        self.state.lineage = self.source
         self.state.steps_visualization = None
         self.state.algorithm_results_widgets = {}
 
@@ -1,4 +1,5 @@
 import numpy as np
+from algorithms import DatasetSchema
 from state import State
 from widgets.plots import HistogramPlot, PiePlot, FallbackPlot, NullFrequencyPlot
 from preprocess import DataCleaner
@@ -16,6 +17,7 @@ class PreprocessingEngine:
 
     def set_state(self, columns):
         self.state.imported_data = self.state.imported_data[columns]
+        self.state.schema = self.state.schema.select(columns)
 
     def create_plot(self, column_name, plot_type):
         plotter = None
@@ -38,6 +40,7 @@ class PreprocessingEngine:
                 self.cleaner.cast_nulls(np.NaN)
             case "remove":
                 self.cleaner.remove_nulls()
+        self.state.schema = DatasetSchema(self.state.imported_data)
 
     def has_rows_with_nulls(self, columns):
         return self.state.imported_data[columns].isnull().values.any()
@@ -6,5 +6,8 @@ class State:
 
     def __init__(self):
         self.imported_data = None
+        self.schema = None
+        # source of the data (a file or a collection), versions of the data after preprocessing share it
+        self.lineage = None
         self.steps_visualization = None
         self.algorithm_results_widgets = {}
@@ -1 +1,3 @@
 from .k_means_vis import KMeansStepsVisualization, KMeansCanvas
+from .dbscan_vis import DBSCANStepsVisualization, DBSCANCanvas
+from .agglomerative_vis import DendrogramCanvas
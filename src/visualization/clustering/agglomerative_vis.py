@@ -0,0 +1,26 @@
+from typing import List, Optional, Tuple
+
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+
+
+class DendrogramCanvas(FigureCanvasQTAgg):
+    def __init__(self, fig, axes):
+        self.axes = axes
+        super().__init__(fig)
+
+    def dendrogram_plot(self, lines: List[Tuple[List[float], List[float]]], leaf_sizes: List[int],
+                        cut_height: Optional[float] = None, drawing=True):
+        """ brackets of merges over leaf clusters labeled by their sizes, the cut as a dashed line """
+        self.axes.cla()
+        for xs, ys in lines:
+            self.axes.plot(xs, ys, color='tab:blue', linewidth=1)
+        self.axes.set_xticks(range(len(leaf_sizes)))
+        self.axes.set_xticklabels([f'({size})' if size > 1 else '1' for size in leaf_sizes], rotation=90,
+                                  fontsize=8)
+        self.axes.set_xlim(-0.5, len(leaf_sizes) - 0.5)
+        self.axes.set_xlabel('clusters (number of rows)')
+        self.axes.set_ylabel('height of merge')
+        if cut_height is not None:
+            self.axes.axhline(cut_height, color='tab:red', linestyle='--', linewidth=1)
+        if drawing:
+            self.draw()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from algorithms import DatasetSchema, StepsHistory, numeric_column
+from algorithms.clustering.dbscan import CORE_STEP_LABEL, CLUSTER_STEP_LABEL
+from .k_means_vis import KMeansCanvas, KMeansStepsVisualization
+
+
+class DBSCANCanvas(KMeansCanvas):
+    def clusters_plot(self, vector_x, vector_y, labels, core, max_label, name_x, name_y,
+                      min_x, max_x, min_y, max_y, drawing=True):
+        """ rows colored by clusters (label -1 - noise), core rows are larger than border rows """
+        self.axes.cla()
+        vector_x, vector_y = np.asarray(vector_x), np.asarray(vector_y)
+        labels, core = np.asarray(labels), np.asarray(core, dtype=bool)
+        self.axes.set_xlabel(name_x)
+        self.axes.set_ylabel(name_y)
+        self.axes.set_xlim(min_x, max_x)
+        self.axes.set_ylim(min_y, max_y)
+        noise = (labels < 0) & ~core
+        self.axes.scatter(vector_x[noise], vector_y[noise], c='lightgray', marker='x')
+        # core rows which are not in a cluster yet
+        waiting = (labels < 0) & core
+        self.axes.scatter(vector_x[waiting], vector_y[waiting], c='black')
+        for rows, size in [((labels >= 0) & core, None), ((labels >= 0) & ~core, 12)]:
+            self.axes.scatter(vector_x[rows], vector_y[rows], c=labels[rows], s=size, cmap='gist_rainbow',
+                              vmin=0, vmax=max(max_label, 1), edgecolor='black', linewidths=0.5)
+        if drawing:
+            self.draw()
+        if self.animation:
+            return self.axes.collections
+
+
+class DBSCANStepsVisualization(KMeansStepsVisualization):
+    canvas_type = DBSCANCanvas
+
+    def __init__(self, data: pd.DataFrame, schema: DatasetSchema, algorithms_steps: StepsHistory, is_animation: bool):
+        super().__init__(data, schema, algorithms_steps, is_animation)
+        self.setObjectName("dbscan_steps_visualization")
+        self.max_step = len(algorithms_steps) - 1
+        description = "DBSCAN algorithm - steps visualization.\n\nEach color represents one cluster.\n\n" \
+                      "Gray crosses are noise. Black circles are core rows (with enough neighbours) " \
+                      "which are not joined into a cluster yet.\n\nEvery step joins the core rows of one more " \
+                      "cluster, the last one adds border rows (smaller circles) to the clusters " \
+                      "of their nearest core rows."
+        self.description_label.setText(description)
+
+    def update_plot(self, step: int = -1):
+        if step == self.max_step:
+            self.run_button.setText("Start animation")
+            self.change_enabled_buttons(True)
+            self.run_button.setEnabled(False)
+            self.restart_button.setEnabled(True)
+            self.is_running = False
+        if step == -1:
+            step = self.current_step
+        else:
+            self.current_step = step
+            self.step_label.setText("STEP: {}".format(self.current_step))
+
+        samples_data = self.data.iloc[self.samples]
+        x = numeric_column(samples_data[self.ox])
+        y = numeric_column(samples_data[self.oy])
+        min_x, max_x = self.schema.bounds(self.ox)
+        min_y, max_y = self.schema.bounds(self.oy)
+        sep_x = 0.1 * (max_x - min_x)
+        sep_y = 0.1 * (max_y - min_y)
+
+        step_labels = self.algorithms_steps.labels_view(step)[self.samples].astype(int)
+        # border rows get their clusters in the last step, the rows labeled before are core rows
+        last = len(self.algorithms_steps) - 1
+        border = np.isin(self.samples, self.algorithms_steps.changed_rows(last)) if step == last \
+            else np.zeros(len(self.samples), dtype=bool)
+        core = (step_labels >= CORE_STEP_LABEL) & ~border
+        labels = np.where(step_labels >= CLUSTER_STEP_LABEL, step_labels - CLUSTER_STEP_LABEL, -1)
+        return self.canvas.clusters_plot(x, y, labels, core, self.num_cluster - CLUSTER_STEP_LABEL,
+                                         self.ox, self.oy, min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y,
+                                         not self.is_running)
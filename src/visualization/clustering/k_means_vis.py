@@ -5,12 +5,11 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QFormLayout, QWidget, QGroupBox, \
     QSpinBox, QPushButton, QComboBox, QLabel, QScrollArea, QSizePolicy
 import pandas as pd
-from typing import List, Tuple
 
 from matplotlib.animation import FuncAnimation
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 import matplotlib.pyplot as plt
-from algorithms import get_samples, check_numeric
+from algorithms import DatasetSchema, StepsHistory, get_samples, numeric_column
 
 
 class KMeansCanvas(FigureCanvasQTAgg):
@@ -84,7 +83,10 @@ class KMeansCanvas(FigureCanvasQTAgg):
 
 
 class KMeansStepsVisualization(QWidget):
-    def __init__(self, data: pd.DataFrame, algorithms_steps: List[Tuple[np.ndarray, pd.DataFrame]], is_animation: bool):
+    # canvas of the plot, subclasses showing other algorithms draw their own kinds of plots
+    canvas_type = KMeansCanvas
+
+    def __init__(self, data: pd.DataFrame, schema: DatasetSchema, algorithms_steps: StepsHistory, is_animation: bool):
         super().__init__()
 
         self.is_animation = is_animation
@@ -94,12 +96,11 @@ class KMeansStepsVisualization(QWidget):
         self.layout = QHBoxLayout(self)
 
         self.algorithms_steps = algorithms_steps
-        self.num_cluster = algorithms_steps[0][1].shape[0]
+        self.num_cluster = algorithms_steps.num_clusters
 
         self.data = data
-        columns = [col for col in self.data.columns if check_numeric(self.data[col])]
-        for column in columns:
-            self.data[column] = pd.to_numeric(self.data[column])
+        self.schema = schema
+        columns = schema.numeric_columns()
 
         self.max_step = (len(algorithms_steps) - 1) * (2 + self.num_cluster) + 2
         self.current_step = 0
@@ -177,7 +178,7 @@ class KMeansStepsVisualization(QWidget):
 
         # plot
         self.fig, axes = plt.subplots()
-        self.canvas = KMeansCanvas(self.fig, axes, self.is_animation)
+        self.canvas = self.canvas_type(self.fig, axes, self.is_animation)
         self.visualization_box_layout.addWidget(self.canvas, 1)
         self.update_plot()
 
@@ -309,12 +310,10 @@ class KMeansStepsVisualization(QWidget):
             self.step_label.setText("STEP: {}".format(self.current_step))
 
         samples_data = self.data.iloc[self.samples]
-        x = samples_data[self.ox]
-        y = samples_data[self.oy]
-        min_x = self.data[self.ox].min()
-        max_x = self.data[self.ox].max()
-        min_y = self.data[self.oy].min()
-        max_y = self.data[self.oy].max()
+        x = numeric_column(samples_data[self.ox])
+        y = numeric_column(samples_data[self.oy])
+        min_x, max_x = self.schema.bounds(self.ox)
+        min_y, max_y = self.schema.bounds(self.oy)
         sep_x = 0.1 * (max_x - min_x)
         sep_y = 0.1 * (max_y - min_y)
 
@@ -323,8 +322,7 @@ class KMeansStepsVisualization(QWidget):
                                          min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y,
                                          not self.is_running)
 
-        step_labels, step_centroids = self.algorithms_steps[0]
-        labels = [step_labels[sample] for sample in self.samples]
+        step_centroids = self.algorithms_steps.centroids(0)
         x_centroids = step_centroids[self.ox]
         y_centroids = step_centroids[self.oy]
 
@@ -334,24 +332,26 @@ class KMeansStepsVisualization(QWidget):
                                                   not self.is_running)
 
         if step == 2:
+            labels = self.algorithms_steps.labels_view(0)[self.samples]
             return self.canvas.all_plot(x, y, x_centroids, y_centroids, labels, self.ox, self.oy,
                                         min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y, not self.is_running)
 
         index = (step - 3) // (self.num_cluster + 2) + 1
         mode = (step - 3) % (self.num_cluster + 2)
 
-        step_labels, step_centroids = self.algorithms_steps[index]
-        labels = [step_labels[sample] for sample in self.samples]
+        # steps are reconstructed lazily, labels only when they are drawn
+        step_centroids = self.algorithms_steps.centroids(index)
         x_centroids = step_centroids[self.ox]
         y_centroids = step_centroids[self.oy]
 
-        old_step_labels, old_step_centroids = self.algorithms_steps[index - 1]
+        old_step_centroids = self.algorithms_steps.centroids(index - 1)
         old_x_centroids = old_step_centroids[self.ox]
         old_y_centroids = old_step_centroids[self.oy]
 
         if mode < self.num_cluster:
-            vector_x = self.data.loc[old_step_labels == mode][self.ox]
-            vector_y = self.data.loc[old_step_labels == mode][self.oy]
+            old_step_labels = self.algorithms_steps.labels_view(index - 1)
+            vector_x = numeric_column(self.data.loc[old_step_labels == mode, self.ox])
+            vector_y = numeric_column(self.data.loc[old_step_labels == mode, self.oy])
             return self.canvas.chosen_centroid_plot(vector_x, vector_y, old_x_centroids.iloc[mode],
                                                     old_y_centroids.iloc[mode], x_centroids.iloc[mode],
                                                     y_centroids.iloc[mode],
@@ -364,5 +364,6 @@ class KMeansStepsVisualization(QWidget):
                                                   min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y,
                                                   not self.is_running)
         else:
+            labels = self.algorithms_steps.labels_view(index)[self.samples]
             return self.canvas.all_plot(x, y, x_centroids, y_centroids, labels, self.ox, self.oy,
                                         min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y, not self.is_running)
@@ -9,6 +9,10 @@ class LoadingWidget:
         self.callback = callback
         self.args = args
 
+    def show_message(self, message: str):
+        self.screen.showMessage(f"<h1>Loading...</h1><p>{message}</p>", Qt.AlignCenter)
+        QApplication.processEvents()
+
     def execute(self):
         self.screen.showMessage("<h1>Loading...</h1>", Qt.AlignCenter)
         self.screen.setGeometry(QRect(self.size.width()//2-125, self.size.height()//2-50, 250, 100))
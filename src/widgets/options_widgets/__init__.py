@@ -1,2 +1,11 @@
 from .k_means_options import KMeansOptions
+from .mini_batch_k_means_options import MiniBatchKMeansOptions
+from .coreset_k_means_options import CoresetKMeansOptions
+from .dbscan_options import DBSCANOptions
 from .algorithm_options import Algorithm
+from .pam_options import PAMOptions
+from .gmm_options import GaussianMixtureOptions
+from .agglomerative_options import AgglomerativeOptions
+from .bisecting_k_means_options import BisectingKMeansOptions
+from .apriori_options import AprioriOptions
+from .fp_growth_options import FPGrowthOptions
@@ -0,0 +1,38 @@
+from PyQt5.QtWidgets import QSpinBox, QLabel, QComboBox
+
+from .options import Options
+
+
+class AgglomerativeOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.num_clusters_spinbox = QSpinBox()
+        self.num_clusters_spinbox.setMinimum(1)
+        self.num_clusters_spinbox.setValue(3)
+        self.layout.addRow(QLabel("Number of clusters:"), self.num_clusters_spinbox)
+
+        self.linkage_box = QComboBox()
+        self.linkage_box.addItems(['ward', 'complete', 'average', 'single'])
+        self.layout.addRow(QLabel('Linkage (single for large data):'), self.linkage_box)
+
+        self.metrics_spinbox = QSpinBox()
+        self.metrics_spinbox.setMinimum(1)
+        self.metrics_spinbox.setValue(2)
+        self.metrics_spinbox.setMaximum(6)
+        self.layout.addRow(QLabel("Exponent in metrics:"), self.metrics_spinbox)
+
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of computations:'), self.precision_box)
+
+    def get_data(self) -> dict:
+        return {
+            'num_clusters': self.num_clusters_spinbox.value(),
+            'linkage': self.linkage_box.currentText(),
+            'metrics': self.metrics_spinbox.value(),
+            'precision': self.precision_box.currentText()
+        }
+
+    def set_max_clusters(self, clusters_num):
+        self.num_clusters_spinbox.setMaximum(clusters_num)
@@ -0,0 +1,34 @@
+from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox, QLabel, QComboBox
+
+from .options import Options
+
+
+class AprioriOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.min_support_spinbox = QDoubleSpinBox()
+        self.min_support_spinbox.setDecimals(4)
+        self.min_support_spinbox.setMinimum(0.0001)
+        self.min_support_spinbox.setMaximum(1)
+        self.min_support_spinbox.setSingleStep(0.01)
+        self.min_support_spinbox.setValue(0.1)
+        self.layout.addRow(QLabel("Minimum support:"), self.min_support_spinbox)
+
+        self.max_length_spinbox = QSpinBox()
+        self.max_length_spinbox.setMinimum(0)
+        self.max_length_spinbox.setMaximum(100)
+        self.max_length_spinbox.setSpecialValueText('no limit')
+        self.max_length_spinbox.setValue(0)
+        self.layout.addRow(QLabel("Maximum length of itemsets:"), self.max_length_spinbox)
+
+        self.item_type_box = QComboBox()
+        self.item_type_box.addItems(['pairs', 'values', 'columns'])
+        self.layout.addRow(QLabel('Items (column=value, values or columns):'), self.item_type_box)
+
+    def get_data(self) -> dict:
+        return {
+            'min_support': self.min_support_spinbox.value(),
+            'max_length': self.max_length_spinbox.value() or None,
+            'item_type': self.item_type_box.currentText()
+        }
@@ -0,0 +1,72 @@
+from PyQt5.QtWidgets import QSpinBox, QLabel, QComboBox, QCheckBox
+
+from .options import Options
+
+
+class CoresetKMeansOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.num_clusters_spinbox = QSpinBox()
+        self.num_clusters_spinbox.setMinimum(2)
+        self.num_clusters_spinbox.setValue(3)
+        self.layout.addRow(QLabel("Number of clusters:"), self.num_clusters_spinbox)
+
+        self.coreset_size_spinbox = QSpinBox()
+        self.coreset_size_spinbox.setMinimum(100)
+        self.coreset_size_spinbox.setMaximum(1000000)
+        self.coreset_size_spinbox.setSingleStep(1000)
+        self.coreset_size_spinbox.setValue(10000)
+        self.layout.addRow(QLabel("Size of coreset:"), self.coreset_size_spinbox)
+
+        self.label_all_checkbox = QCheckBox()
+        self.label_all_checkbox.setChecked(True)
+        self.layout.addRow(QLabel("Assign all rows to clusters:"), self.label_all_checkbox)
+
+        self.start_type_box = QComboBox()
+        self.start_type_box.addItems(['random', 'kmeans++', 'kmeans++ sampling', 'greedy kmeans++'])
+        self.start_type_box.setCurrentText('kmeans++ sampling')
+        self.layout.addRow(QLabel('Type of initial solution:'), self.start_type_box)
+
+        self.algorithm_box = QComboBox()
+        self.algorithm_box.addItems(['lloyd', 'hamerly', 'elkan'])
+        self.layout.addRow(QLabel('Assignment algorithm:'), self.algorithm_box)
+
+        self.metrics_spinbox = QSpinBox()
+        self.metrics_spinbox.setMinimum(1)
+        self.metrics_spinbox.setValue(2)
+        self.metrics_spinbox.setMaximum(6)
+        self.layout.addRow(QLabel("Exponent in metrics:"), self.metrics_spinbox)
+
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of computations:'), self.precision_box)
+
+        self.num_steps_spinbox = QSpinBox()
+        self.num_steps_spinbox.setMinimum(0)
+        self.num_steps_spinbox.setMaximum(1000)
+        self.num_steps_spinbox.setSpecialValueText('no limit')
+        self.num_steps_spinbox.setValue(0)
+        self.layout.addRow(QLabel("Maximum number of iterations:"), self.num_steps_spinbox)
+
+        self.num_repeat_spinbox = QSpinBox()
+        self.num_repeat_spinbox.setMinimum(1)
+        self.num_repeat_spinbox.setMaximum(100)
+        self.num_repeat_spinbox.setValue(1)
+        self.layout.addRow(QLabel("Number of repetitions:"), self.num_repeat_spinbox)
+
+    def get_data(self) -> dict:
+        return {
+            'num_clusters': self.num_clusters_spinbox.value(),
+            'coreset_size': self.coreset_size_spinbox.value(),
+            'label_all': self.label_all_checkbox.isChecked(),
+            'metrics': self.metrics_spinbox.value(),
+            'repeats': self.num_repeat_spinbox.value(),
+            'iterations': self.num_steps_spinbox.value() or None,
+            'init_type': self.start_type_box.currentText(),
+            'algorithm': self.algorithm_box.currentText(),
+            'precision': self.precision_box.currentText()
+        }
+
+    def set_max_clusters(self, clusters_num):
+        self.num_clusters_spinbox.setMaximum(clusters_num)
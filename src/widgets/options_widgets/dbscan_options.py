@@ -0,0 +1,45 @@
+from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox, QLabel, QComboBox
+
+from .options import Options
+
+
+class DBSCANOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.eps_spinbox = QDoubleSpinBox()
+        self.eps_spinbox.setDecimals(4)
+        self.eps_spinbox.setMinimum(0.0001)
+        self.eps_spinbox.setMaximum(1000000)
+        self.eps_spinbox.setSingleStep(0.1)
+        self.eps_spinbox.setValue(0.5)
+        self.layout.addRow(QLabel("Radius of neighbourhood:"), self.eps_spinbox)
+
+        self.min_samples_spinbox = QSpinBox()
+        self.min_samples_spinbox.setMinimum(1)
+        self.min_samples_spinbox.setMaximum(10000)
+        self.min_samples_spinbox.setValue(5)
+        self.layout.addRow(QLabel("Minimum neighbours of core row:"), self.min_samples_spinbox)
+
+        self.index_box = QComboBox()
+        self.index_box.addItems(['auto', 'grid', 'kd tree', 'ball tree'])
+        self.layout.addRow(QLabel('Neighbour index:'), self.index_box)
+
+        self.metrics_spinbox = QSpinBox()
+        self.metrics_spinbox.setMinimum(1)
+        self.metrics_spinbox.setValue(2)
+        self.metrics_spinbox.setMaximum(6)
+        self.layout.addRow(QLabel("Exponent in metrics:"), self.metrics_spinbox)
+
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of computations:'), self.precision_box)
+
+    def get_data(self) -> dict:
+        return {
+            'eps': self.eps_spinbox.value(),
+            'min_samples': self.min_samples_spinbox.value(),
+            'index_type': self.index_box.currentText(),
+            'metrics': self.metrics_spinbox.value(),
+            'precision': self.precision_box.currentText()
+        }
@@ -0,0 +1,21 @@
+import os
+
+from PyQt5.QtWidgets import QSpinBox, QLabel
+
+from .apriori_options import AprioriOptions
+
+
+class FPGrowthOptions(AprioriOptions):
+    def __init__(self):
+        super().__init__()
+
+        self.processes_spinbox = QSpinBox()
+        self.processes_spinbox.setMinimum(1)
+        self.processes_spinbox.setMaximum(os.cpu_count() or 1)
+        self.processes_spinbox.setValue(1)
+        self.layout.addRow(QLabel("Number of processes for items of the tree:"), self.processes_spinbox)
+
+    def get_data(self) -> dict:
+        data = super().get_data()
+        data['processes'] = self.processes_spinbox.value()
+        return data
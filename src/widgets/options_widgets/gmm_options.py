@@ -0,0 +1,72 @@
+from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox, QLabel, QComboBox
+
+from .options import Options
+
+
+class GaussianMixtureOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.num_clusters_spinbox = QSpinBox()
+        self.num_clusters_spinbox.setMinimum(2)
+        self.num_clusters_spinbox.setValue(3)
+        self.layout.addRow(QLabel("Number of components:"), self.num_clusters_spinbox)
+
+        self.covariance_box = QComboBox()
+        self.covariance_box.addItems(['full', 'diag', 'spherical'])
+        self.layout.addRow(QLabel('Type of covariance:'), self.covariance_box)
+
+        self.start_type_box = QComboBox()
+        self.start_type_box.addItems(['kmeans', 'random'])
+        self.layout.addRow(QLabel('Type of initial solution:'), self.start_type_box)
+
+        self.mode_box = QComboBox()
+        self.mode_box.addItems(['batch', 'online'])
+        self.mode_box.currentTextChanged.connect(self.mode_changed)
+        self.layout.addRow(QLabel('EM mode (online for large data):'), self.mode_box)
+
+        self.num_steps_spinbox = QSpinBox()
+        self.num_steps_spinbox.setMinimum(0)
+        self.num_steps_spinbox.setMaximum(1000)
+        self.num_steps_spinbox.setSpecialValueText('no limit')
+        self.num_steps_spinbox.setValue(100)
+        self.layout.addRow(QLabel("Maximum number of iterations (passes over data):"), self.num_steps_spinbox)
+
+        self.tolerance_spinbox = QDoubleSpinBox()
+        self.tolerance_spinbox.setDecimals(6)
+        self.tolerance_spinbox.setMaximum(1)
+        self.tolerance_spinbox.setSingleStep(0.0001)
+        self.tolerance_spinbox.setValue(0.001)
+        self.layout.addRow(QLabel("Log-likelihood tolerance:"), self.tolerance_spinbox)
+
+        self.batch_size_spinbox = QSpinBox()
+        self.batch_size_spinbox.setMinimum(1)
+        self.batch_size_spinbox.setMaximum(1000000)
+        self.batch_size_spinbox.setValue(1024)
+        self.layout.addRow(QLabel("Batch size (online):"), self.batch_size_spinbox)
+
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of stored data:'), self.precision_box)
+
+        self.mode_changed(self.mode_box.currentText())
+
+    def mode_changed(self, mode: str):
+        self.batch_size_spinbox.setEnabled(mode == 'online')
+
+    def get_data(self) -> dict:
+        data = {
+            'num_clusters': self.num_clusters_spinbox.value(),
+            'covariance_type': self.covariance_box.currentText(),
+            'init_type': self.start_type_box.currentText(),
+            'mode': self.mode_box.currentText(),
+            'iterations': self.num_steps_spinbox.value() or None,
+            'tolerance': self.tolerance_spinbox.value(),
+            'precision': self.precision_box.currentText()
+        }
+        if data['mode'] == 'online':
+            data['batch_size'] = self.batch_size_spinbox.value()
+        return data
+
+    def set_max_clusters(self, clusters_num):
+        self.num_clusters_spinbox.setMaximum(clusters_num)
@@ -1,4 +1,6 @@
-from PyQt5.QtWidgets import QSpinBox, QLabel, QComboBox
+import os
+
+from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox, QLabel, QComboBox, QCheckBox
 
 from .options import Options
 
@@ -12,16 +14,37 @@ class KMeansOptions(Options):
         self.num_clusters_spinbox.setValue(3)
         self.layout.addRow(QLabel("Number of clusters:"), self.num_clusters_spinbox)
 
+        self.auto_k_checkbox = QCheckBox()
+        self.auto_k_checkbox.toggled.connect(self.auto_k_toggled)
+        self.layout.addRow(QLabel("Choose number of clusters (up to the above):"), self.auto_k_checkbox)
+
+        self.min_clusters_spinbox = QSpinBox()
+        self.min_clusters_spinbox.setMinimum(2)
+        self.min_clusters_spinbox.setValue(2)
+        self.min_clusters_spinbox.setEnabled(False)
+        self.layout.addRow(QLabel("Minimum number of clusters:"), self.min_clusters_spinbox)
+
+        self.warm_start_checkbox = QCheckBox()
+        self.layout.addRow(QLabel("Start from the previous result on this dataset:"), self.warm_start_checkbox)
+
         self.start_type_box = QComboBox()
-        self.start_type_box.addItems(['random', 'kmeans++'])
+        self.start_type_box.addItems(['random', 'kmeans++', 'kmeans++ sampling', 'greedy kmeans++'])
         self.layout.addRow(QLabel('Type of initial solution:'), self.start_type_box)
 
+        self.algorithm_box = QComboBox()
+        self.algorithm_box.addItems(['lloyd', 'hamerly', 'elkan'])
+        self.layout.addRow(QLabel('Assignment algorithm:'), self.algorithm_box)
+
         self.metrics_spinbox = QSpinBox()
         self.metrics_spinbox.setMinimum(1)
         self.metrics_spinbox.setValue(2)
         self.metrics_spinbox.setMaximum(6)
         self.layout.addRow(QLabel("Exponent in metrics:"), self.metrics_spinbox)
 
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of computations:'), self.precision_box)
+
         self.num_steps_spinbox = QSpinBox()
         self.num_steps_spinbox.setMinimum(0)
         self.num_steps_spinbox.setMaximum(1000)
@@ -29,20 +52,67 @@ class KMeansOptions(Options):
         self.num_steps_spinbox.setValue(0)
         self.layout.addRow(QLabel("Maximum number of iterations:"), self.num_steps_spinbox)
 
+        self.tolerance_spinbox = QDoubleSpinBox()
+        self.tolerance_spinbox.setDecimals(6)
+        self.tolerance_spinbox.setMaximum(1)
+        self.tolerance_spinbox.setSingleStep(0.0001)
+        self.tolerance_spinbox.setSpecialValueText('off')
+        self.layout.addRow(QLabel("Relative inertia tolerance:"), self.tolerance_spinbox)
+
+        self.max_shift_spinbox = QDoubleSpinBox()
+        self.max_shift_spinbox.setDecimals(6)
+        self.max_shift_spinbox.setMaximum(1e9)
+        self.max_shift_spinbox.setSpecialValueText('off')
+        self.layout.addRow(QLabel("Maximum centroid shift:"), self.max_shift_spinbox)
+
+        self.min_reassigned_spinbox = QDoubleSpinBox()
+        self.min_reassigned_spinbox.setDecimals(4)
+        self.min_reassigned_spinbox.setMaximum(1)
+        self.min_reassigned_spinbox.setSingleStep(0.001)
+        self.min_reassigned_spinbox.setSpecialValueText('off')
+        self.layout.addRow(QLabel("Minimum fraction of reassigned rows:"), self.min_reassigned_spinbox)
+
         self.num_repeat_spinbox = QSpinBox()
         self.num_repeat_spinbox.setMinimum(1)
         self.num_repeat_spinbox.setMaximum(100)
         self.num_repeat_spinbox.setValue(1)
         self.layout.addRow(QLabel("Number of repetitions:"), self.num_repeat_spinbox)
 
+        self.criterion_box = QComboBox()
+        self.criterion_box.addItems(['inertia', 'dunn', 'davies-bouldin', 'silhouette'])
+        self.layout.addRow(QLabel('Criterion of the best solution:'), self.criterion_box)
+
+        self.processes_spinbox = QSpinBox()
+        self.processes_spinbox.setMinimum(1)
+        self.processes_spinbox.setMaximum(os.cpu_count() or 1)
+        self.processes_spinbox.setValue(1)
+        self.layout.addRow(QLabel("Number of processes for repetitions or clusters:"), self.processes_spinbox)
+
     def get_data(self) -> dict:
-        return {
+        data = {
             'num_clusters': self.num_clusters_spinbox.value(),
             'metrics': self.metrics_spinbox.value(),
             'repeats': self.num_repeat_spinbox.value(),
             'iterations': self.num_steps_spinbox.value() or None,
-            'init_type': self.start_type_box.currentText()
+            'init_type': self.start_type_box.currentText(),
+            'algorithm': self.algorithm_box.currentText(),
+            'processes': self.processes_spinbox.value(),
+            'criterion': self.criterion_box.currentText(),
+            'tolerance': self.tolerance_spinbox.value(),
+            'max_shift': self.max_shift_spinbox.value(),
+            'min_reassigned': self.min_reassigned_spinbox.value(),
+            'precision': self.precision_box.currentText()
         }
+        if self.auto_k_checkbox.isChecked():
+            data['auto_k'] = True
+            data['min_clusters'] = min(self.min_clusters_spinbox.value(), data['num_clusters'])
+        if self.warm_start_checkbox.isChecked():
+            data['warm_start'] = True
+        return data
+
+    def auto_k_toggled(self, checked: bool):
+        self.min_clusters_spinbox.setEnabled(checked)
 
     def set_max_clusters(self, clusters_num):
         self.num_clusters_spinbox.setMaximum(clusters_num)
+        self.min_clusters_spinbox.setMaximum(clusters_num)
@@ -0,0 +1,53 @@
+from PyQt5.QtWidgets import QSpinBox, QLabel, QComboBox
+
+from .options import Options
+
+
+class MiniBatchKMeansOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.num_clusters_spinbox = QSpinBox()
+        self.num_clusters_spinbox.setMinimum(2)
+        self.num_clusters_spinbox.setValue(3)
+        self.layout.addRow(QLabel("Number of clusters:"), self.num_clusters_spinbox)
+
+        self.start_type_box = QComboBox()
+        self.start_type_box.addItems(['random', 'kmeans++', 'kmeans++ sampling', 'greedy kmeans++'])
+        self.start_type_box.setCurrentText('kmeans++ sampling')
+        self.layout.addRow(QLabel('Type of initial solution:'), self.start_type_box)
+
+        self.metrics_spinbox = QSpinBox()
+        self.metrics_spinbox.setMinimum(1)
+        self.metrics_spinbox.setValue(2)
+        self.metrics_spinbox.setMaximum(6)
+        self.layout.addRow(QLabel("Exponent in metrics:"), self.metrics_spinbox)
+
+        self.batch_size_spinbox = QSpinBox()
+        self.batch_size_spinbox.setMinimum(16)
+        self.batch_size_spinbox.setMaximum(100000)
+        self.batch_size_spinbox.setValue(1024)
+        self.layout.addRow(QLabel("Batch size:"), self.batch_size_spinbox)
+
+        self.passes_spinbox = QSpinBox()
+        self.passes_spinbox.setMinimum(1)
+        self.passes_spinbox.setMaximum(100)
+        self.passes_spinbox.setValue(1)
+        self.layout.addRow(QLabel("Number of passes over data:"), self.passes_spinbox)
+
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of computations:'), self.precision_box)
+
+    def get_data(self) -> dict:
+        return {
+            'num_clusters': self.num_clusters_spinbox.value(),
+            'metrics': self.metrics_spinbox.value(),
+            'batch_size': self.batch_size_spinbox.value(),
+            'passes': self.passes_spinbox.value(),
+            'init_type': self.start_type_box.currentText(),
+            'precision': self.precision_box.currentText()
+        }
+
+    def set_max_clusters(self, clusters_num):
+        self.num_clusters_spinbox.setMaximum(clusters_num)
@@ -0,0 +1,101 @@
+from PyQt5.QtWidgets import QSpinBox, QLabel, QComboBox
+
+from .options import Options
+
+
+class PAMOptions(Options):
+    def __init__(self):
+        super().__init__()
+
+        self.num_clusters_spinbox = QSpinBox()
+        self.num_clusters_spinbox.setMinimum(2)
+        self.num_clusters_spinbox.setValue(3)
+        self.layout.addRow(QLabel("Number of clusters:"), self.num_clusters_spinbox)
+
+        self.method_box = QComboBox()
+        self.method_box.addItems(['pam', 'clara', 'clarans'])
+        self.method_box.currentTextChanged.connect(self.method_changed)
+        self.layout.addRow(QLabel('Method (clara and clarans for large data):'), self.method_box)
+
+        self.swap_box = QComboBox()
+        self.swap_box.addItems(['fastpam2', 'fastpam1'])
+        self.layout.addRow(QLabel('Swap evaluation:'), self.swap_box)
+
+        self.start_type_box = QComboBox()
+        self.start_type_box.addItems(['build', 'random'])
+        self.layout.addRow(QLabel('Type of initial solution:'), self.start_type_box)
+
+        self.metrics_spinbox = QSpinBox()
+        self.metrics_spinbox.setMinimum(1)
+        self.metrics_spinbox.setValue(1)
+        self.metrics_spinbox.setMaximum(6)
+        self.layout.addRow(QLabel("Exponent in metrics:"), self.metrics_spinbox)
+
+        self.precision_box = QComboBox()
+        self.precision_box.addItems(['float64', 'float32'])
+        self.layout.addRow(QLabel('Precision of computations:'), self.precision_box)
+
+        self.num_steps_spinbox = QSpinBox()
+        self.num_steps_spinbox.setMinimum(0)
+        self.num_steps_spinbox.setMaximum(1000)
+        self.num_steps_spinbox.setSpecialValueText('no limit')
+        self.num_steps_spinbox.setValue(0)
+        self.layout.addRow(QLabel("Maximum number of iterations:"), self.num_steps_spinbox)
+
+        self.samples_spinbox = QSpinBox()
+        self.samples_spinbox.setMinimum(1)
+        self.samples_spinbox.setMaximum(100)
+        self.samples_spinbox.setValue(5)
+        self.layout.addRow(QLabel("Number of samples (clara):"), self.samples_spinbox)
+
+        self.sample_size_spinbox = QSpinBox()
+        self.sample_size_spinbox.setMinimum(0)
+        self.sample_size_spinbox.setMaximum(100000)
+        self.sample_size_spinbox.setSpecialValueText('auto')
+        self.sample_size_spinbox.setValue(0)
+        self.layout.addRow(QLabel("Sample size (clara):"), self.sample_size_spinbox)
+
+        self.num_local_spinbox = QSpinBox()
+        self.num_local_spinbox.setMinimum(1)
+        self.num_local_spinbox.setMaximum(100)
+        self.num_local_spinbox.setValue(2)
+        self.layout.addRow(QLabel("Number of local searches (clarans):"), self.num_local_spinbox)
+
+        self.max_neighbours_spinbox = QSpinBox()
+        self.max_neighbours_spinbox.setMinimum(1)
+        self.max_neighbours_spinbox.setMaximum(100000)
+        self.max_neighbours_spinbox.setValue(250)
+        self.layout.addRow(QLabel("Maximum neighbours without improvement (clarans):"), self.max_neighbours_spinbox)
+
+        self.method_changed(self.method_box.currentText())
+
+    def method_changed(self, method: str):
+        self.swap_box.setEnabled(method != 'clarans')
+        self.start_type_box.setEnabled(method != 'clarans')
+        self.num_steps_spinbox.setEnabled(method != 'clarans')
+        self.samples_spinbox.setEnabled(method == 'clara')
+        self.sample_size_spinbox.setEnabled(method == 'clara')
+        self.num_local_spinbox.setEnabled(method == 'clarans')
+        self.max_neighbours_spinbox.setEnabled(method == 'clarans')
+
+    def get_data(self) -> dict:
+        data = {
+            'num_clusters': self.num_clusters_spinbox.value(),
+            'method': self.method_box.currentText(),
+            'metrics': self.metrics_spinbox.value(),
+            'precision': self.precision_box.currentText()
+        }
+        if data['method'] != 'clarans':
+            data['swap'] = self.swap_box.currentText()
+            data['init_type'] = self.start_type_box.currentText()
+            data['iterations'] = self.num_steps_spinbox.value() or None
+        if data['method'] == 'clara':
+            data['samples'] = self.samples_spinbox.value()
+            data['sample_size'] = self.sample_size_spinbox.value() or None
+        if data['method'] == 'clarans':
+            data['num_local'] = self.num_local_spinbox.value()
+            data['max_neighbours'] = self.max_neighbours_spinbox.value()
+        return data
+
+    def set_max_clusters(self, clusters_num):
+        self.num_clusters_spinbox.setMaximum(clusters_num)
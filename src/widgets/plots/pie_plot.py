@@ -8,7 +8,7 @@ class PiePlot(Plot):
 
     def plot(self):
         try:
-            self.data.dropna(inplace=True)
+            self.data = self.data.dropna()
             ax = self.canvas.figure.subplots()
             counts = self.data.value_counts().to_dict()
             first_key = next(iter(counts.keys()))
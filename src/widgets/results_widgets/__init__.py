@@ -1 +1,4 @@
-from .k_means_results import KMeansResultsWidget
\ No newline at end of file
+from .k_means_results import KMeansResultsWidget
+from .dbscan_results import DBSCANResultsWidget
+from .agglomerative_results import AgglomerativeResultsWidget
+from .associations_results import AssociationsResultsWidget
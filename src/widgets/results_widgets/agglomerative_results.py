@@ -0,0 +1,164 @@
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QGroupBox, QFormLayout, QLabel, QVBoxLayout, QSpinBox, QPushButton, \
+    QComboBox
+from matplotlib import pyplot as plt
+
+from algorithms import DatasetSchema, get_samples, numeric_column
+from algorithms.clustering import Dendrogram
+from visualization.clustering import DBSCANCanvas, DendrogramCanvas
+
+# number of leaves of the dendrogram shown at first
+DENDROGRAM_LEAVES = 30
+
+
+class AgglomerativeResultsWidget(QWidget):
+    def __init__(self, data: pd.DataFrame, schema: DatasetSchema, labels: np.ndarray, dendrogram: Dendrogram,
+                 rows: np.ndarray, options: Optional[dict] = None):
+        super().__init__()
+        self.data = data
+        self.schema = schema
+        self.labels = labels
+        self.dendrogram = dendrogram
+        self.rows = rows
+        self.num_clusters = int(labels[rows].max()) + 1 if rows.size else 1
+
+        columns = schema.numeric_columns()
+
+        self.layout = QHBoxLayout(self)
+
+        self.num_samples = min(200, self.data.shape[0])
+        self.samples = get_samples(self.data, self.num_samples)
+
+        self.ox = columns[0]
+        self.oy = columns[0] if len(columns) < 2 else columns[1]
+
+        # algorithm parameters
+        self.params_group = QGroupBox()
+        self.params_group.setTitle("Parameters")
+        self.params_layout = QFormLayout(self.params_group)
+
+        for option, value in (options or {}).items():
+            self.params_layout.addRow(QLabel(f'{option}:'), QLabel(f'{value}'))
+        self.params_layout.addRow(QLabel('clustered rows:'), QLabel(f'{self.rows.size}'))
+
+        self.layout.addWidget(self.params_group)
+
+        # clustering result group
+        self.clustering_result_group = QGroupBox()
+        self.clustering_group_layout = QVBoxLayout(self.clustering_result_group)
+        self.clustering_result_group.setTitle("Clustering result")
+
+        # samples
+        self.settings_group_box = QGroupBox()
+        self.settings_box_layout = QFormLayout(self.settings_group_box)
+        self.settings_box_layout.addRow(QLabel("Set samples:"))
+        self.sample_box = QSpinBox()
+        self.sample_box.setMinimum(1)
+        self.sample_box.setMaximum(min(self.data.shape[0], 2000))
+        self.sample_box.setProperty("value", self.num_samples)
+        self.sample_button = QPushButton("Refresh samples")
+        self.sample_button.clicked.connect(partial(self.click_listener, 'new_samples'))
+        self.settings_box_layout.addRow(self.sample_box, self.sample_button)
+
+        # axis
+        self.settings_box_layout.addRow(QLabel("Set axis:"))
+        self.ox_box = QComboBox()
+        self.ox_box.addItems(columns)
+        self.oy_box = QComboBox()
+        self.oy_box.addItems(columns)
+        if len(columns) > 1:
+            self.oy_box.setCurrentIndex(1)
+        self.ox_box.currentTextChanged.connect(partial(self.click_listener, 'set_axis'))
+        self.oy_box.currentTextChanged.connect(partial(self.click_listener, 'set_axis'))
+        self.settings_box_layout.addRow(QLabel("OX:"), self.ox_box)
+        self.settings_box_layout.addRow(QLabel("OY:"), self.oy_box)
+
+        # the dendrogram is cut again without running the algorithm
+        self.clusters_box = QSpinBox()
+        self.clusters_box.setMinimum(1)
+        self.clusters_box.setMaximum(max(1, min(self.dendrogram.size, 1000)))
+        self.clusters_box.setValue(self.num_clusters)
+        self.clusters_box.valueChanged.connect(partial(self.click_listener, 'cut'))
+        self.settings_box_layout.addRow(QLabel("Number of clusters:"), self.clusters_box)
+
+        self.settings_box_layout.setSpacing(10)
+        self.clustering_group_layout.addWidget(self.settings_group_box)
+
+        # plot
+        self.fig, axes = plt.subplots(1, 1)
+        self.clusters_canvas = DBSCANCanvas(self.fig, axes, False)
+        self.clustering_group_layout.addWidget(self.clusters_canvas, 1)
+
+        self.layout.addWidget(self.clustering_result_group, 1)
+
+        # dendrogram - the last merges
+        self.dendrogram_group = QGroupBox()
+        self.dendrogram_group_layout = QVBoxLayout(self.dendrogram_group)
+        self.dendrogram_group.setTitle("Dendrogram")
+
+        self.leaves_layout = QFormLayout()
+        self.leaves_box = QSpinBox()
+        self.leaves_box.setMinimum(1)
+        self.leaves_box.setMaximum(max(1, min(self.dendrogram.size, 200)))
+        self.leaves_box.setValue(min(DENDROGRAM_LEAVES, self.dendrogram.size))
+        self.leaves_box.valueChanged.connect(partial(self.click_listener, 'leaves'))
+        self.leaves_layout.addRow(QLabel("Number of leaves:"), self.leaves_box)
+        self.dendrogram_group_layout.addLayout(self.leaves_layout)
+
+        self.dendrogram_fig, dendrogram_axes = plt.subplots(1, 1)
+        self.dendrogram_canvas = DendrogramCanvas(self.dendrogram_fig, dendrogram_axes)
+        self.dendrogram_group_layout.addWidget(self.dendrogram_canvas, 1)
+
+        self.layout.addWidget(self.dendrogram_group, 1)
+        self.update_plot()
+        self.update_dendrogram()
+
+    def click_listener(self, button_type: str, *args):
+        match button_type:
+            case 'new_samples':
+                num = self.sample_box.value()
+                self.num_samples = num
+                self.samples = get_samples(self.data, self.num_samples)
+                self.update_plot()
+            case 'set_axis':
+                self.ox = self.ox_box.currentText()
+                self.oy = self.oy_box.currentText()
+                self.update_plot()
+            case 'cut':
+                self.num_clusters = self.clusters_box.value()
+                self.labels = self.labels.copy()
+                self.labels[self.rows] = self.dendrogram.cut(self.num_clusters)
+                self.update_plot()
+                self.update_dendrogram()
+            case 'leaves':
+                self.update_dendrogram()
+
+    def cut_height(self) -> Optional[float]:
+        """ height between the last merge of the cut clusters and the next one """
+        heights = self.dendrogram.heights
+        joined = self.dendrogram.size - self.num_clusters
+        if not heights.size or joined >= heights.size:
+            return None
+        below = heights[joined - 1] if joined > 0 else 0.0
+        return (below + heights[joined]) / 2
+
+    def update_plot(self):
+        samples_data = self.data.iloc[self.samples]
+        x = numeric_column(samples_data[self.ox])
+        y = numeric_column(samples_data[self.oy])
+        min_x, max_x = self.schema.bounds(self.ox)
+        min_y, max_y = self.schema.bounds(self.oy)
+        sep_x = 0.1 * (max_x - min_x)
+        sep_y = 0.1 * (max_y - min_y)
+
+        labels = self.labels[self.samples]
+        self.clusters_canvas.clusters_plot(x, y, labels, np.ones(labels.size, dtype=bool), self.num_clusters - 1,
+                                           self.ox, self.oy, min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y)
+
+    def update_dendrogram(self):
+        lines, leaf_sizes = self.dendrogram.truncated(self.leaves_box.value())
+        self.dendrogram_canvas.dendrogram_plot(lines, leaf_sizes, self.cut_height())
@@ -0,0 +1,101 @@
+from typing import Optional
+
+import pandas as pd
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QGroupBox, QFormLayout, QLabel, QVBoxLayout, QTableView, QSpinBox, \
+    QDoubleSpinBox, QComboBox, QPushButton
+
+from algorithms import DatasetSchema
+from algorithms.associations import FrequentItemsets, AssociationRules
+from algorithms.config import ITEMSETS_PAGE_ROWS
+from widgets import QtTable
+
+
+class AssociationsResultsWidget(QWidget):
+    def __init__(self, data: pd.DataFrame, schema: DatasetSchema, itemsets: FrequentItemsets,
+                 levels: pd.DataFrame, options: Optional[dict] = None):
+        super().__init__()
+        self.data = data
+        self.schema = schema
+        self.itemsets = itemsets
+        self.levels = levels
+
+        self.layout = QHBoxLayout(self)
+
+        # algorithm parameters and telemetry of the levels
+        self.params_group = QGroupBox()
+        self.params_group.setTitle("Parameters")
+        self.params_layout = QFormLayout(self.params_group)
+
+        for option, value in (options or {}).items():
+            self.params_layout.addRow(QLabel(f'{option}:'), QLabel(f'{value}'))
+        self.params_layout.addRow(QLabel('transactions:'), QLabel(f'{self.itemsets.transactions}'))
+        self.params_layout.addRow(QLabel('frequent itemsets:'), QLabel(f'{len(self.itemsets)}'))
+
+        self.levels_table = QTableView()
+        self.levels_table.setModel(QtTable(self.levels.round(4)))
+        self.params_layout.addRow(self.levels_table)
+
+        self.layout.addWidget(self.params_group)
+
+        # frequent itemsets
+        self.itemsets_group = QGroupBox()
+        self.itemsets_group.setTitle("Frequent itemsets")
+        self.itemsets_layout = QVBoxLayout(self.itemsets_group)
+
+        # the table shows one page of itemsets at a time
+        self.pages = max(1, -(-len(self.itemsets) // ITEMSETS_PAGE_ROWS))
+        self.page_layout = QFormLayout()
+        self.page_spinbox = QSpinBox()
+        self.page_spinbox.setMinimum(1)
+        self.page_spinbox.setMaximum(self.pages)
+        self.page_spinbox.valueChanged.connect(self.show_page)
+        self.page_layout.addRow(QLabel(f'Page (of {self.pages}):'), self.page_spinbox)
+        self.itemsets_layout.addLayout(self.page_layout)
+
+        self.itemsets_table = QTableView()
+        self.itemsets_layout.addWidget(self.itemsets_table)
+        self.show_page(1)
+
+        self.layout.addWidget(self.itemsets_group, 1)
+
+        # association rules are generated from the itemsets without running the algorithm again
+        self.rules_group = QGroupBox()
+        self.rules_group.setTitle("Association rules")
+        self.rules_layout = QVBoxLayout(self.rules_group)
+
+        self.rules_settings_layout = QFormLayout()
+        self.min_confidence_spinbox = QDoubleSpinBox()
+        self.min_confidence_spinbox.setDecimals(4)
+        self.min_confidence_spinbox.setMaximum(1)
+        self.min_confidence_spinbox.setSingleStep(0.05)
+        self.min_confidence_spinbox.setValue(0.5)
+        self.rules_settings_layout.addRow(QLabel("Minimum confidence:"), self.min_confidence_spinbox)
+
+        self.metric_box = QComboBox()
+        self.metric_box.addItems(['confidence', 'lift', 'leverage', 'conviction'])
+        self.rules_settings_layout.addRow(QLabel("Order of rules:"), self.metric_box)
+
+        self.num_rules_spinbox = QSpinBox()
+        self.num_rules_spinbox.setMinimum(1)
+        self.num_rules_spinbox.setMaximum(100 * ITEMSETS_PAGE_ROWS)
+        self.num_rules_spinbox.setValue(ITEMSETS_PAGE_ROWS)
+        self.rules_settings_layout.addRow(QLabel("Number of best rules:"), self.num_rules_spinbox)
+
+        self.rules_button = QPushButton("Generate rules")
+        self.rules_button.clicked.connect(self.generate_rules)
+        self.rules_settings_layout.addRow(self.rules_button)
+        self.rules_layout.addLayout(self.rules_settings_layout)
+
+        self.rules_table = QTableView()
+        self.rules_layout.addWidget(self.rules_table)
+
+        self.layout.addWidget(self.rules_group, 1)
+
+    def generate_rules(self):
+        rules = AssociationRules(self.itemsets, self.min_confidence_spinbox.value())
+        top = rules.top(self.num_rules_spinbox.value(), self.metric_box.currentText())
+        self.rules_table.setModel(QtTable(top.round(4)))
+
+    def show_page(self, page: int):
+        start = (page - 1) * ITEMSETS_PAGE_ROWS
+        self.itemsets_table.setModel(QtTable(self.itemsets.to_frame(start, start + ITEMSETS_PAGE_ROWS).round(4)))
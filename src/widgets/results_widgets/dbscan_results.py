@@ -0,0 +1,126 @@
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QGroupBox, QFormLayout, QLabel, QVBoxLayout, QSpinBox, QPushButton, \
+    QComboBox, QTableView
+from matplotlib import pyplot as plt
+
+from algorithms import DatasetSchema, get_samples, numeric_column
+from visualization.clustering import DBSCANCanvas
+from widgets import QtTable
+
+
+class DBSCANResultsWidget(QWidget):
+    def __init__(self, data: pd.DataFrame, schema: DatasetSchema, labels: np.ndarray, core: np.ndarray,
+                 clusters: pd.DataFrame, options: Optional[dict] = None):
+        super().__init__()
+        self.data = data
+        self.schema = schema
+        self.labels = labels
+        self.core = core
+        self.clusters = clusters
+
+        columns = schema.numeric_columns()
+
+        self.layout = QHBoxLayout(self)
+
+        self.num_samples = min(200, self.data.shape[0])
+        self.samples = get_samples(self.data, self.num_samples)
+
+        self.ox = columns[0]
+        self.oy = columns[0] if len(columns) < 2 else columns[1]
+
+        # algorithm parameters
+        self.params_group = QGroupBox()
+        self.params_group.setTitle("Parameters")
+        self.params_layout = QFormLayout(self.params_group)
+
+        for option, value in (options or {}).items():
+            self.params_layout.addRow(QLabel(f'{option}:'), QLabel(f'{value}'))
+        self.params_layout.addRow(QLabel('number of clusters:'), QLabel(f'{self.clusters.shape[0]}'))
+        self.params_layout.addRow(QLabel('noise rows:'), QLabel(f'{int(np.count_nonzero(self.labels < 0))}'))
+
+        self.layout.addWidget(self.params_group)
+
+        # clustering result group
+        self.clustering_result_group = QGroupBox()
+        self.clustering_group_layout = QVBoxLayout(self.clustering_result_group)
+        self.clustering_result_group.setTitle("Clustering result")
+
+        # samples
+        self.settings_group_box = QGroupBox()
+        self.settings_box_layout = QFormLayout(self.settings_group_box)
+        self.settings_box_layout.addRow(QLabel("Set samples:"))
+        self.sample_box = QSpinBox()
+        self.sample_box.setMinimum(1)
+        self.sample_box.setMaximum(min(self.data.shape[0], 2000))
+        self.sample_box.setProperty("value", self.num_samples)
+        self.sample_button = QPushButton("Refresh samples")
+        self.sample_button.clicked.connect(partial(self.click_listener, 'new_samples'))
+        self.settings_box_layout.addRow(self.sample_box, self.sample_button)
+
+        # axis
+        self.settings_box_layout.addRow(QLabel("Set axis:"))
+        self.ox_box = QComboBox()
+        self.ox_box.addItems(columns)
+        self.oy_box = QComboBox()
+        self.oy_box.addItems(columns)
+        if len(columns) > 1:
+            self.oy_box.setCurrentIndex(1)
+        self.ox_box.currentTextChanged.connect(partial(self.click_listener, 'set_axis'))
+        self.oy_box.currentTextChanged.connect(partial(self.click_listener, 'set_axis'))
+        self.settings_box_layout.addRow(QLabel("OX:"), self.ox_box)
+        self.settings_box_layout.addRow(QLabel("OY:"), self.oy_box)
+
+        self.settings_box_layout.setSpacing(10)
+        self.clustering_group_layout.addWidget(self.settings_group_box)
+
+        # plot
+        self.fig, axes = plt.subplots(1, 1)
+        self.clusters_canvas = DBSCANCanvas(self.fig, axes, False)
+        self.clustering_group_layout.addWidget(self.clusters_canvas, 1)
+
+        self.layout.addWidget(self.clustering_result_group, 1)
+
+        # clusters - sizes and centers
+        self.clusters_group = QGroupBox()
+        self.clusters_group_layout = QVBoxLayout(self.clusters_group)
+        self.clusters_group.setTitle("Clusters")
+
+        self.clusters_table = QTableView()
+        self.clusters_table.setModel(QtTable(self.clusters.round(3)))
+
+        for i in range(self.clusters.shape[1]):
+            self.clusters_table.setColumnWidth(i, 120)
+
+        self.clusters_group_layout.addWidget(self.clusters_table, 1)
+
+        self.layout.addWidget(self.clusters_group, 1)
+        self.update_plot()
+
+    def click_listener(self, button_type: str):
+        match button_type:
+            case 'new_samples':
+                num = self.sample_box.value()
+                self.num_samples = num
+                self.samples = get_samples(self.data, self.num_samples)
+                self.update_plot()
+            case 'set_axis':
+                self.ox = self.ox_box.currentText()
+                self.oy = self.oy_box.currentText()
+                self.update_plot()
+
+    def update_plot(self):
+        samples_data = self.data.iloc[self.samples]
+        x = numeric_column(samples_data[self.ox])
+        y = numeric_column(samples_data[self.oy])
+        min_x, max_x = self.schema.bounds(self.ox)
+        min_y, max_y = self.schema.bounds(self.oy)
+        sep_x = 0.1 * (max_x - min_x)
+        sep_y = 0.1 * (max_y - min_y)
+
+        self.clusters_canvas.clusters_plot(x, y, self.labels[self.samples], self.core[self.samples],
+                                           self.clusters.shape[0], self.ox, self.oy,
+                                           min_x - sep_x, max_x + sep_x, min_y - sep_y, max_y + sep_y)
@@ -1,25 +1,26 @@
 from functools import partial
+from typing import Optional
 
 import pandas as pd
 from PyQt5.QtWidgets import QWidget, QHBoxLayout, QGroupBox, QFormLayout, QLabel, QVBoxLayout, QSpinBox, QPushButton, \
     QComboBox, QTableView
 from matplotlib import pyplot as plt
 
-from algorithms import check_numeric, get_samples
+from algorithms import DatasetSchema, get_samples, numeric_column
 from visualization.clustering import KMeansCanvas
 from widgets import QtTable
 
 
 class KMeansResultsWidget(QWidget):
-    def __init__(self, data, labels, centroids, options):
+    def __init__(self, data: pd.DataFrame, schema: DatasetSchema, labels, centroids,
+                 curve: Optional[pd.DataFrame] = None, options: Optional[dict] = None):
         super().__init__()
         self.data = data
+        self.schema = schema
         self.labels = labels
         self.centroids = centroids
 
-        columns = [col for col in self.data.columns if check_numeric(self.data[col])]
-        for column in columns:
-            self.data[column] = pd.to_numeric(self.data[column])
+        columns = schema.numeric_columns()
 
         self.layout = QHBoxLayout(self)
 
@@ -34,9 +35,16 @@ class KMeansResultsWidget(QWidget):
         self.params_group.setTitle("Parameters")
         self.params_layout = QFormLayout(self.params_group)
 
-        for option, value in options.items():
+        for option, value in (options or {}).items():
             self.params_layout.addRow(QLabel(f'{option}:'), QLabel(f'{value}'))
 
+        # scores of all numbers of clusters of the auto k mode
+        if curve is not None:
+            self.params_layout.addRow(QLabel(f'chosen number of clusters: {self.centroids.shape[0]}'))
+            self.curve_table = QTableView()
+            self.curve_table.setModel(QtTable(curve.round(4)))
+            self.params_layout.addRow(self.curve_table)
+
         self.layout.addWidget(self.params_group)
 
         # clustering result group
@@ -113,12 +121,10 @@ class KMeansResultsWidget(QWidget):
 
     def update_plot(self):
         samples_data = self.data.iloc[self.samples]
-        x = samples_data[self.ox]
-        y = samples_data[self.oy]
-        min_x = self.data[self.ox].min()
-        max_x = self.data[self.ox].max()
-        min_y = self.data[self.oy].min()
-        max_y = self.data[self.oy].max()
+        x = numeric_column(samples_data[self.ox])
+        y = numeric_column(samples_data[self.oy])
+        min_x, max_x = self.schema.bounds(self.ox)
+        min_y, max_y = self.schema.bounds(self.oy)
         sep_x = 0.1 * (max_x - min_x)
         sep_y = 0.1 * (max_y - min_y)
 
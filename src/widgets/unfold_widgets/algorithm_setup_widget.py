@@ -6,7 +6,9 @@ from PyQt5.QtWidgets import QGroupBox, QLabel, QComboBox, QPushButton, QVBoxLayo
 
 from widgets import UnfoldWidget, LoadingWidget
 
-from widgets.options_widgets import KMeansOptions, Algorithm
+from widgets.options_widgets import KMeansOptions, MiniBatchKMeansOptions, CoresetKMeansOptions, DBSCANOptions, \
+    PAMOptions, GaussianMixtureOptions, AgglomerativeOptions, BisectingKMeansOptions, AprioriOptions, FPGrowthOptions, \
+    Algorithm
 
 
 class AlgorithmSetupWidget(UnfoldWidget):
@@ -19,16 +21,18 @@ class AlgorithmSetupWidget(UnfoldWidget):
         self.algorithms_options = {
             'clustering': {
                 'K-Means': KMeansOptions(),
-                'DBSCAN': Algorithm(engine),
-                'Partition Around Medoids': Algorithm(engine),
-                'Gaussian Mixture Models': Algorithm(engine),
-                'Agglomerative clustering': Algorithm(engine),
-                'Divisive clustering': Algorithm(engine)
+                'Mini-batch K-Means': MiniBatchKMeansOptions(),
+                'Coreset K-Means': CoresetKMeansOptions(),
+                'DBSCAN': DBSCANOptions(),
+                'Partition Around Medoids': PAMOptions(),
+                'Gaussian Mixture Models': GaussianMixtureOptions(),
+                'Agglomerative clustering': AgglomerativeOptions(),
+                'Divisive clustering': BisectingKMeansOptions()
             },
             'associations': {
-                'A-priori': Algorithm(engine),
-                'A-prioriTID': Algorithm(engine),
-                'FP-Growth': Algorithm(engine)
+                'A-priori': AprioriOptions(),
+                'A-prioriTID': AprioriOptions(),
+                'FP-Growth': FPGrowthOptions()
             },
             'classification': {
                 'KNN': Algorithm(engine),
@@ -112,6 +116,7 @@ class AlgorithmSetupWidget(UnfoldWidget):
         self.run_button.setText("Submit and run")
         self.run_button.setFixedWidth(300)
         self.run_button.clicked.connect(partial(self.click_listener, 'run'))
+        self.loading = None
         self.enable_button()
 
         self.layout.addStretch()
@@ -132,7 +137,9 @@ class AlgorithmSetupWidget(UnfoldWidget):
         self.parent().unfold(self)
 
     def enable_button(self):
-        done = ['K-Means']
+        done = ['K-Means', 'Mini-batch K-Means', 'Coreset K-Means', 'DBSCAN', 'Partition Around Medoids',
+                'Gaussian Mixture Models', 'Agglomerative clustering', 'Divisive clustering', 'A-priori',
+                'A-prioriTID', 'FP-Growth']
         if self.algorithm_box.currentText() in done:
             self.run_button.setEnabled(True)
         else:
@@ -152,12 +159,24 @@ class AlgorithmSetupWidget(UnfoldWidget):
                     self.options_group_layout.addWidget(self.algorithms_options[technique][algorithm])
                     self.enable_button()
             case 'run':
-                loading = LoadingWidget(self.run_handle)
-                loading.execute()
+                self.loading = LoadingWidget(self.run_handle)
+                self.loading.execute()
+                self.loading = None
 
     def update_clusters_bound(self):
         clusters = min(self.engine.get_maximum_clusters(), 100)
         self.algorithms_options["clustering"]["K-Means"].set_max_clusters(clusters)
+        self.algorithms_options["clustering"]["Mini-batch K-Means"].set_max_clusters(clusters)
+        self.algorithms_options["clustering"]["Coreset K-Means"].set_max_clusters(clusters)
+        self.algorithms_options["clustering"]["Partition Around Medoids"].set_max_clusters(clusters)
+        self.algorithms_options["clustering"]["Gaussian Mixture Models"].set_max_clusters(clusters)
+        self.algorithms_options["clustering"]["Agglomerative clustering"].set_max_clusters(clusters)
+        self.algorithms_options["clustering"]["Divisive clustering"].set_max_clusters(clusters)
+
+    def show_working_set(self, working_set: dict):
+        """ estimated memory of the run, by parts in bytes """
+        if self.loading is not None:
+            self.loading.show_message(f"Working set: {sum(working_set.values()) / 1024**2:.1f} MiB")
 
     def run_handle(self):
         technique = self.technique_box.currentText()
@@ -166,8 +185,8 @@ class AlgorithmSetupWidget(UnfoldWidget):
         type_visualization = self.animation_type.currentText()
         will_be_visualized = type_visualization != 'No visualization'
         is_animation = type_visualization == 'Animation'
-        self.engine.run(technique, algorithm, will_be_visualized, is_animation, **data)
-        if will_be_visualized:
+        self.engine.run(technique, algorithm, will_be_visualized, is_animation, report=self.show_working_set, **data)
+        if will_be_visualized and self.engine.state.steps_visualization is not None:
             self.parent().unfold_by_id('algorithm_run_widget')
         else:
             self.parent().unfold_by_id('results_widget')
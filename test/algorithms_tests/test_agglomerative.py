@@ -0,0 +1,97 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.clustering import AgglomerativeClustering, Dendrogram
+from algorithms.clustering.agglomerative import linkage_update
+from algorithms.clustering.dissimilarity import Dissimilarities
+
+
+class TestAgglomerativeClustering(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 90
+        self.data = pd.DataFrame({
+            'x': rng.normal(size=size) + np.repeat([0, 5, 10], size // 3),
+            'y': rng.normal(size=size),
+            'category': rng.choice(['a', 'b'], size=size).astype(object)
+        })
+
+    @staticmethod
+    def expected(distances: np.ndarray, linkage: str) -> np.ndarray:
+        """ heights of merges of the closest pair of clusters, searched in the whole matrix every time """
+        distances = distances.astype(float)
+        np.fill_diagonal(distances, np.inf)
+        active = list(range(distances.shape[0]))
+        sizes = np.ones(distances.shape[0])
+        heights = []
+        while len(active) > 1:
+            block = distances[np.ix_(active, active)]
+            i, j = np.unravel_index(np.argmin(block), block.shape)
+            low, high = sorted((active[i], active[j]))
+            heights.append(distances[low, high])
+            others = np.array([k for k in active if k not in (low, high)], dtype=int)
+            merged = linkage_update(linkage, distances[low, others], distances[high, others], heights[-1],
+                                    sizes[low], sizes[high], sizes[others])
+            distances[high, others] = distances[others, high] = merged
+            sizes[high] += sizes[low]
+            active.remove(low)
+        return np.sort(heights)
+
+    def test_linkages(self):
+        for linkage in ['ward', 'complete', 'average', 'single']:
+            model = AgglomerativeClustering(self.data, 3, linkage=linkage)
+            labels, dendrogram, rows = model.run(True)
+            distances = Dissimilarities(model.encoded.numeric, model.encoded.codes,
+                                        model.distances).columns(np.arange(self.data.shape[0]))
+            np.testing.assert_allclose(dendrogram.heights, self.expected(distances, linkage), atol=1e-5)
+            self.assertEqual(len(set(labels)), 3)
+            self.assertEqual(rows.size, self.data.shape[0])
+            self.assertEqual(len(model.get_steps()), 11)
+
+    def test_single_without_cache(self):
+        cached = AgglomerativeClustering(self.data, 3, linkage='single')
+        computed = AgglomerativeClustering(self.data, 3, linkage='single', max_bytes=0)
+        labels, dendrogram, _ = cached.run(False)
+        computed_labels, computed_dendrogram, _ = computed.run(False)
+        np.testing.assert_array_equal(labels, computed_labels)
+        np.testing.assert_array_equal(dendrogram.heights, computed_dendrogram.heights)
+        with self.assertRaises(TypeError):
+            AgglomerativeClustering(self.data, 3, linkage='ward', max_bytes=0)
+
+    def test_dendrogram(self):
+        # rows 0, 1 and 2, 3 are joined first, then both pairs, then row 4
+        dendrogram = Dendrogram(np.array([3, 0, 1, 4]), np.array([2, 1, 3, 0]), np.array([2.0, 1.0, 3.0, 5.0]))
+        np.testing.assert_array_equal(dendrogram.merges[:, :2], [[0, 1], [2, 3], [5, 6], [4, 7]])
+        np.testing.assert_array_equal(dendrogram.merges[:, 3], [2, 2, 4, 5])
+        np.testing.assert_array_equal(dendrogram.cut(3), [0, 0, 1, 1, 2])
+        np.testing.assert_array_equal(dendrogram.cut_height(3.5), [0, 0, 0, 0, 1])
+        np.testing.assert_array_equal(dendrogram.cut(5), np.arange(5))
+        lines, leaf_sizes = dendrogram.truncated(3)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(sum(leaf_sizes), 5)
+        with self.assertRaises(TypeError):
+            dendrogram.cut(6)
+
+    def test_recut(self):
+        model = AgglomerativeClustering(self.data, 3, linkage='average')
+        _, dendrogram, rows = model.run(False)
+        for num_clusters in [1, 2, 5, 20]:
+            self.assertEqual(len(set(dendrogram.cut(num_clusters))), num_clusters)
+            lines, leaf_sizes = dendrogram.truncated(num_clusters)
+            self.assertEqual(len(lines), num_clusters - 1)
+            self.assertEqual(sum(leaf_sizes), rows.size)
+
+    def test_missing_values_and_chunks(self):
+        data = self.data.copy()
+        data.loc[4, 'x'] = np.nan
+        model = AgglomerativeClustering(data, 3)
+        labels, _, rows = model.run(False)
+        self.assertEqual(labels[4], 0)
+        self.assertNotIn(4, rows)
+        chunked = AgglomerativeClustering([data.iloc[:40], data.iloc[40:]], 3)
+        chunked_labels, _, _ = chunked.run(True)
+        np.testing.assert_array_equal(chunked_labels, labels)
+        self.assertEqual(chunked.get_steps().labels(-1).shape[0], 40)
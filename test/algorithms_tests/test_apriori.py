@@ -0,0 +1,86 @@
+from unittest import TestCase
+from itertools import combinations
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.associations import Apriori, TransactionEncoder, ItemBitsets
+from algorithms.associations.apriori import join, prune
+from algorithms.associations.bitsets import BYTE_COUNTS, popcount
+
+
+class TestApriori(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 500
+        columns = [f'item{j}' for j in range(10)]
+        self.data = pd.DataFrame(rng.random((size, len(columns))) < rng.uniform(0.1, 0.6, len(columns)),
+                                 columns=columns)
+        self.data['item1'] |= self.data['item0'] & (rng.random(size) < 0.8)
+
+    @staticmethod
+    def expected(data: pd.DataFrame, min_support: float) -> dict:
+        """ counts of all frequent itemsets, checked one by one """
+        present = data.to_numpy(dtype=bool)
+        min_count = int(np.ceil(min_support * data.shape[0]))
+        counts = {}
+        for length in range(1, data.shape[1] + 1):
+            for itemset in combinations(range(data.shape[1]), length):
+                count = int(present[:, itemset].all(axis=1).sum())
+                if count >= min_count:
+                    counts[', '.join(data.columns[list(itemset)])] = count
+        return counts
+
+    def test_itemsets(self):
+        for min_support in [0.02, 0.1, 0.3]:
+            model = Apriori(self.data, min_support, item_type='columns')
+            itemsets, levels = model.run(False)
+            frame = itemsets.to_frame()
+            self.assertEqual(dict(zip(frame['itemset'], frame['count'])), self.expected(self.data, min_support))
+            self.assertEqual(levels.shape[0], len(model.get_telemetry()))
+            self.assertTrue(np.allclose(frame['support'], frame['count'] / self.data.shape[0]))
+
+    def test_chunks(self):
+        itemsets, _ = Apriori(self.data, 0.05, item_type='columns', max_bytes=1000).run(False)
+        chunked = Apriori([self.data.iloc[:130], self.data.iloc[130:]], 0.05, item_type='columns')
+        chunked_itemsets, _ = chunked.run(False)
+        np.testing.assert_array_equal(chunked_itemsets.offsets, itemsets.offsets)
+        np.testing.assert_array_equal(chunked_itemsets.items, itemsets.items)
+        np.testing.assert_array_equal(chunked_itemsets.counts, itemsets.counts)
+        self.assertEqual(chunked.get_preview().shape[0], 130)
+
+    def test_max_length(self):
+        itemsets, _ = Apriori(self.data, 0.02, max_length=2, item_type='columns').run(False)
+        self.assertEqual(itemsets.lengths().max(), 2)
+
+    def test_items(self):
+        data = pd.DataFrame({'first': ['bread', 'milk', 'bread', None], 'second': ['milk', 'milk', None, 'eggs']})
+        encoder = TransactionEncoder('values')
+        offsets, values = encoder.encode(data)
+        np.testing.assert_array_equal(offsets, [0, 2, 3, 4, 5])
+        self.assertEqual([sorted(encoder.names[item] for item in values[offsets[i]:offsets[i + 1]])
+                          for i in range(4)], [['bread', 'milk'], ['milk'], ['bread'], ['eggs']])
+        encoder = TransactionEncoder('pairs')
+        offsets, values = encoder.encode(data)
+        self.assertEqual(len(values), 6)
+        self.assertIn('second=milk', encoder.names)
+        itemsets, _ = Apriori(data, 0.5, item_type='values').run(False)
+        self.assertEqual(list(itemsets.to_frame()['itemset']), ['bread', 'milk'])
+
+    def test_candidates(self):
+        frequent = np.array([[0, 1, 2], [0, 1, 3], [0, 1, 4], [0, 2, 3], [1, 2, 3], [1, 2, 4]])
+        candidates = join(frequent)[0]
+        np.testing.assert_array_equal(candidates, [[0, 1, 2, 3], [0, 1, 2, 4], [0, 1, 3, 4], [1, 2, 3, 4]])
+        # {0, 2, 4}, {1, 3, 4}, ... are not frequent
+        np.testing.assert_array_equal(prune(candidates, frequent), [[0, 1, 2, 3]])
+
+    def test_bitsets(self):
+        words = np.random.default_rng(1).integers(0, 2**63, size=(3, 5)).astype(np.uint64)
+        expected = BYTE_COUNTS[words.view(np.uint8)].sum(axis=-1)
+        np.testing.assert_array_equal(popcount(words), expected)
+        offsets = np.array([0, 2, 3, 3, 5])
+        values = np.array([0, 2, 2, 1, 2])
+        bitsets = ItemBitsets(offsets, values, np.array([0, 1, 2]), 3)
+        np.testing.assert_array_equal(bitsets.bits[:, 0], [0b0001, 0b1000, 0b1011])
+        np.testing.assert_array_equal(bitsets.supports(np.array([[0, 2], [1, 2], [2, 2]])), [1, 1, 3])
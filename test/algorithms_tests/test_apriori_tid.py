@@ -0,0 +1,51 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.associations import Apriori, AprioriTID
+
+
+class TestAprioriTID(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(2)
+        size = 600
+        columns = [f'item{j}' for j in range(12)]
+        self.data = pd.DataFrame(rng.random((size, len(columns))) < rng.uniform(0.05, 0.5, len(columns)),
+                                 columns=columns)
+        self.data['item1'] |= self.data['item0'] & (rng.random(size) < 0.9)
+        self.data['item2'] |= self.data['item1'] & (rng.random(size) < 0.7)
+
+    def assertSameItemsets(self, first, second):
+        np.testing.assert_array_equal(first.offsets, second.offsets)
+        np.testing.assert_array_equal(first.items, second.items)
+        np.testing.assert_array_equal(first.counts, second.counts)
+
+    def test_itemsets(self):
+        for min_support in [0.01, 0.05, 0.2]:
+            expected, _ = Apriori(self.data, min_support, item_type='columns').run(False)
+            itemsets, _ = AprioriTID(self.data, min_support, item_type='columns').run(False)
+            self.assertSameItemsets(itemsets, expected)
+
+    def test_values(self):
+        rng = np.random.default_rng(3)
+        data = pd.DataFrame(rng.choice(['a', 'b', 'c', 'd', None], size=(300, 4), p=[0.4, 0.3, 0.1, 0.1, 0.1]))
+        expected, _ = Apriori(data, 0.02, item_type='values').run(False)
+        itemsets, _ = AprioriTID(data, 0.02, item_type='values', max_bytes=500).run(False)
+        self.assertSameItemsets(itemsets, expected)
+
+    def test_chunks(self):
+        expected, _ = AprioriTID(self.data, 0.03, item_type='columns').run(False)
+        chunks = [self.data.iloc[:250], self.data.iloc[250:]]
+        itemsets, _ = AprioriTID(chunks, 0.03, item_type='columns').run(False)
+        self.assertSameItemsets(itemsets, expected)
+
+    def test_levels(self):
+        model = AprioriTID(self.data, 0.05, item_type='columns')
+        _, levels = model.run(False)
+        self.assertEqual(levels['transactions'].iloc[0], self.data.shape[0])
+        # transactions with fewer than two itemsets are dropped from the lists
+        self.assertTrue(np.all(np.diff(levels['transactions']) <= 0))
+        self.assertLess(levels['transactions'].iloc[-1], self.data.shape[0])
+        self.assertTrue(np.all(levels['nbytes'] > 0))
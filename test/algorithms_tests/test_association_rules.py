@@ -0,0 +1,62 @@
+from unittest import TestCase
+from itertools import combinations
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.associations import FPGrowth, AssociationRules, ItemsetIndex
+from algorithms.associations.rules import join_consequents
+
+
+class TestAssociationRules(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(6)
+        size = 500
+        columns = [f'item{j}' for j in range(10)]
+        self.data = pd.DataFrame(rng.random((size, len(columns))) < rng.uniform(0.2, 0.6, len(columns)),
+                                 columns=columns)
+        self.data['item1'] |= self.data['item0'] & (rng.random(size) < 0.9)
+        self.itemsets, _ = FPGrowth(self.data, 0.03, item_type='columns').run(False)
+
+    def test_rules(self):
+        rules = AssociationRules(self.itemsets, 0.6)
+        counts = rules.index.counts
+        expected = set()
+        for itemset, count in counts.items():
+            for length in range(1, len(itemset)):
+                for consequent in combinations(itemset, length):
+                    antecedent = tuple(item for item in itemset if item not in consequent)
+                    if count / counts[antecedent] >= 0.6:
+                        expected.add((antecedent, consequent))
+        found = [(antecedent, consequent) for antecedent, consequent, *_ in rules.rules()]
+        self.assertEqual(len(found), len(set(found)))
+        self.assertEqual(set(found), expected)
+
+    def test_top(self):
+        rules = AssociationRules(self.itemsets, 0.4)
+        every = rules.to_frame(list(rules.rules()))
+        for metric in ['confidence', 'lift', 'leverage', 'conviction']:
+            top = rules.top(30, metric)
+            expected = every.sort_values(metric, ascending=False, kind='stable').head(30)
+            np.testing.assert_allclose(top[metric], expected[metric])
+            self.assertEqual(list(top.columns), list(every.columns))
+        self.assertEqual(rules.threshold, 0.4)
+
+    def test_metrics(self):
+        data = pd.DataFrame({'bread': [1, 1, 1, 0], 'milk': [1, 1, 0, 1]})
+        itemsets, _ = FPGrowth(data, 0.25, item_type='columns').run(False)
+        rules = AssociationRules(itemsets, 0.1).top(10)
+        rule = rules[rules['antecedent'] == 'bread'].iloc[0]
+        self.assertEqual(rule['consequent'], 'milk')
+        self.assertAlmostEqual(rule['support'], 0.5)
+        self.assertAlmostEqual(rule['confidence'], 2 / 3)
+        self.assertAlmostEqual(rule['lift'], (2 / 3) / 0.75)
+        self.assertAlmostEqual(rule['leverage'], 0.5 - 0.75 * 0.75)
+        self.assertAlmostEqual(rule['conviction'], 0.25 / (1 / 3))
+
+    def test_index(self):
+        index = ItemsetIndex(self.itemsets)
+        self.assertEqual(len(index), len(self.itemsets))
+        self.assertEqual(index.count(self.itemsets.itemset(len(self.itemsets) - 1)), self.itemsets.counts[-1])
+        self.assertEqual(join_consequents([(0, 1), (0, 2), (1, 2), (1, 3)]), [(0, 1, 2)])
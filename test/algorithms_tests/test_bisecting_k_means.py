@@ -0,0 +1,82 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.clustering import BisectingKMeans
+
+
+class TestBisectingKMeans(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 600
+        self.data = pd.DataFrame({
+            'x': rng.normal(size=size) + np.repeat([0, 6, 12], size // 3),
+            'y': rng.normal(size=size) + np.tile([0, 8], size // 2),
+            'category': rng.choice(['a', 'b'], size=size).astype(object)
+        })
+
+    def test_splits(self):
+        np.random.seed(0)
+        # a split is never revised, so the blobs are far apart
+        rng = np.random.default_rng(1)
+        data = pd.DataFrame({
+            'x': rng.normal(size=600) + np.repeat([0, 20, 40], 200),
+            'y': rng.normal(size=600) + np.tile([0, 20], 300)
+        })
+        model = BisectingKMeans(data, 6, metrics=2)
+        labels, centroids = model.run(True)
+        self.assertEqual(centroids.shape, (6, 2))
+        blobs = np.repeat(np.arange(3), 200) * 2 + np.tile([0, 1], 300)
+        for blob in range(6):
+            self.assertEqual(len(set(labels[blobs == blob])), 1)
+        # SSE of the split clusters never increases, the total SSE decreases with every split
+        self.assertTrue(np.all(np.diff(model.split_sse) <= 0))
+        inertia = [record.inertia for record in model.get_telemetry()]
+        self.assertTrue(np.all(np.diff(inertia) < 0))
+        self.assertEqual(len(model.get_steps()), 6)
+
+    def test_cut(self):
+        np.random.seed(0)
+        model = BisectingKMeans(self.data, 5, metrics=2, repeats=2)
+        labels, centroids = model.run(False)
+        cut_labels, cut_centroids = model.cut(5)
+        np.testing.assert_array_equal(cut_labels, labels)
+        previous = None
+        for num_clusters in range(1, 6):
+            cut_labels, cut_centroids = model.cut(num_clusters)
+            self.assertEqual(len(set(cut_labels)), num_clusters)
+            self.assertEqual(cut_centroids.shape[0], num_clusters)
+            if previous is not None:
+                # clusters are nested - every cluster is within a cluster of the previous cut
+                for label in range(num_clusters):
+                    self.assertEqual(len(set(previous[cut_labels == label])), 1)
+            previous = cut_labels
+        dendrogram = model.get_dendrogram()
+        for num_clusters in range(1, 6):
+            same = np.equal.outer(dendrogram.cut(num_clusters)[labels], dendrogram.cut(num_clusters)[labels])
+            np.testing.assert_array_equal(same, np.equal.outer(model.cut(num_clusters)[0], model.cut(num_clusters)[0]))
+        with self.assertRaises(TypeError):
+            model.cut(6)
+
+    def test_threads_and_chunks(self):
+        np.random.seed(0)
+        labels, _ = BisectingKMeans(self.data, 6, threads=1).run(False)
+        np.random.seed(0)
+        chunked = BisectingKMeans([self.data.iloc[:250], self.data.iloc[250:]], 6, threads=1)
+        np.testing.assert_array_equal(chunked.run(True)[0], labels)
+        self.assertEqual(chunked.get_steps().labels(-1).shape[0], 250)
+        np.random.seed(1)
+        first, _ = BisectingKMeans(self.data, 6, threads=3).run(False)
+        np.random.seed(1)
+        second, _ = BisectingKMeans(self.data, 6, threads=3).run(False)
+        np.testing.assert_array_equal(first, second)
+
+    def test_equal_rows(self):
+        data = pd.DataFrame({'x': [1.0] * 10 + [5.0] * 10})
+        model = BisectingKMeans(data, 4)
+        labels, centroids = model.run(False)
+        # clusters of equal rows are not split
+        self.assertEqual(len(set(labels)), 2)
+        self.assertEqual(centroids.shape[0], 2)
@@ -0,0 +1,69 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms import EncodedData, DistanceEngine
+from algorithms.clustering import DBSCAN
+
+
+class TestDBSCAN(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 400
+        self.data = pd.DataFrame({
+            'x': np.concatenate([rng.normal(0, 0.3, size // 2), rng.normal(3, 0.5, size // 2)]),
+            'y': rng.normal(size=size),
+            'category': rng.choice(['a', 'b', None], size=size).astype(object)
+        })
+        self.data.loc[5, 'x'] = np.nan
+
+    @staticmethod
+    def expected(data: pd.DataFrame, eps: float, min_samples: int, metrics: int):
+        """ DBSCAN on the full matrix of distances, clusters expanded row by row """
+        encoded = EncodedData(data)
+        distances = DistanceEngine(encoded.is_numeric, metrics).distances(encoded.numeric, encoded.codes,
+                                                                          encoded.numeric, encoded.codes)
+        distances[np.isnan(distances)] = np.inf
+        neighbours = distances <= eps
+        core = neighbours.sum(axis=1) >= min_samples
+        labels = np.full(data.shape[0], -1)
+        cluster = 0
+        for row in np.flatnonzero(core):
+            if labels[row] >= 0:
+                continue
+            labels[row] = cluster
+            stack = [row]
+            while stack:
+                for other in np.flatnonzero(neighbours[stack.pop()] & core & (labels < 0)):
+                    labels[other] = cluster
+                    stack.append(other)
+            cluster += 1
+        for row in np.flatnonzero(~core):
+            candidates = np.flatnonzero(neighbours[row] & core)
+            if candidates.size:
+                labels[row] = labels[candidates[np.lexsort((candidates, distances[row, candidates]))[0]]]
+        return labels, core
+
+    def test_all_indexes_match_expanded_clusters(self):
+        for columns, index_types in [(['x', 'y'], ['grid', 'kd tree', 'ball tree']),
+                                     (['x', 'y', 'category'], ['auto', 'ball tree'])]:
+            data = self.data[columns]
+            for metrics in range(1, 4):
+                for eps in [0.15, 0.4]:
+                    labels, core = self.expected(data, eps, 6, metrics)
+                    for index_type in index_types:
+                        dbscan = DBSCAN(data, eps, 6, metrics, index_type)
+                        result_labels, result_core, clusters = dbscan.run(False)
+                        np.testing.assert_array_equal(result_labels, labels)
+                        np.testing.assert_array_equal(result_core, core)
+                        np.testing.assert_array_equal(clusters['rows'], np.bincount(labels[labels >= 0]))
+
+    def test_steps_end_with_all_labels(self):
+        dbscan = DBSCAN(self.data[['x', 'y']], 0.3, 6)
+        labels, core, clusters = dbscan.run(True)
+        steps = dbscan.get_steps()
+        self.assertEqual(len(steps), clusters.shape[0] + 3)
+        self.assertTrue(np.all(steps.labels(0) == 0))
+        np.testing.assert_array_equal(steps.labels(-1), np.where(labels >= 0, labels + 2, 0))
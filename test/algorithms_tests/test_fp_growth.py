@@ -0,0 +1,63 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.associations import Apriori, FPGrowth, FPTree
+
+
+class TestFPGrowth(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(4)
+        size = 800
+        self.data = pd.DataFrame(rng.choice(['a', 'b', 'c', 'd', 'e', None], size=(size, 5),
+                                            p=[0.3, 0.25, 0.2, 0.1, 0.1, 0.05]))
+
+    def assertSameItemsets(self, first, second):
+        np.testing.assert_array_equal(first.offsets, second.offsets)
+        np.testing.assert_array_equal(first.items, second.items)
+        np.testing.assert_array_equal(first.counts, second.counts)
+
+    def test_itemsets(self):
+        for min_support in [0.005, 0.02, 0.1]:
+            expected, _ = Apriori(self.data, min_support).run(False)
+            itemsets, levels = FPGrowth(self.data, min_support, max_bytes=500).run(False)
+            self.assertSameItemsets(itemsets, expected)
+            self.assertEqual(levels['frequent'].sum(), len(itemsets))
+
+    def test_max_length(self):
+        for max_length in [1, 2]:
+            expected, _ = Apriori(self.data, 0.01, max_length=max_length).run(False)
+            itemsets, _ = FPGrowth(self.data, 0.01, max_length=max_length).run(False)
+            self.assertSameItemsets(itemsets, expected)
+
+    def test_chunks_and_processes(self):
+        expected, _ = FPGrowth(self.data, 0.01, item_type='values').run(False)
+        chunked, _ = FPGrowth([self.data.iloc[:300], self.data.iloc[300:]], 0.01, item_type='values').run(False)
+        self.assertSameItemsets(chunked, expected)
+        parallel, _ = FPGrowth(self.data, 0.01, item_type='values', processes=2).run(False)
+        self.assertSameItemsets(parallel, expected)
+
+    def test_tree(self):
+        # transactions {0, 1, 2}, {0, 1}, {0, 3}, {1} (twice)
+        rows = np.array([[0, 1, 2], [0, 1, 4], [0, 3, 4], [1, 4, 4]], dtype=np.int32)
+        tree = FPTree.from_rows(rows, np.array([1, 1, 1, 2]), 4)
+        np.testing.assert_array_equal(tree.item, [0, 1, 2, 3, 1])
+        np.testing.assert_array_equal(tree.count, [3, 2, 1, 1, 2])
+        np.testing.assert_array_equal(tree.parent, [-1, 0, 1, 0, -1])
+        np.testing.assert_array_equal(tree.supports(), [3, 4, 1, 1])
+        self.assertFalse(tree.is_single_path())
+        paths, weights = tree.prefix_paths(1)
+        np.testing.assert_array_equal(paths, [[0]])
+        np.testing.assert_array_equal(weights, [2])
+        single = FPTree.from_rows(np.array([[0, 1], [0, 2]], dtype=np.int32), np.array([2, 1]), 2)
+        self.assertTrue(single.is_single_path())
+
+    def test_single_path(self):
+        data = pd.DataFrame({'x': [True] * 10, 'y': [True] * 10, 'z': [True] * 9 + [False]})
+        itemsets, _ = FPGrowth(data, 0.5, item_type='columns').run(False)
+        frame = itemsets.to_frame()
+        self.assertEqual(dict(zip(frame['itemset'], frame['count'])),
+                         {'x': 10, 'y': 10, 'z': 9, 'x, y': 10, 'x, z': 9, 'y, z': 9, 'x, y, z': 9})
+        self.assertEqual(list(itemsets.to_frame(5, 100).index), [5, 6])
@@ -0,0 +1,97 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.clustering import GaussianMixture
+from algorithms.clustering.gmm import Gaussians, Statistics
+
+
+class TestGaussianMixture(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 3000
+        centers = np.repeat([[0, 0], [6, 1], [2, 7]], size // 3, axis=0)
+        self.truth = np.repeat([0, 1, 2], size // 3)
+        order = rng.permutation(size)
+        self.truth = self.truth[order]
+        self.data = pd.DataFrame(rng.normal(size=(size, 2)) + centers[order] + 100, columns=['x', 'y'])
+        self.data['category'] = rng.choice(['a', 'b'], size=size)
+        self.data.loc[3, 'x'] = np.nan
+
+    def agreement(self, labels: np.ndarray) -> float:
+        """ fraction of rows in the most common component of their true cluster """
+        return pd.crosstab(labels, self.truth).max(axis=0).sum() / labels.size
+
+    def test_log_densities(self):
+        rng = np.random.default_rng(1)
+        rows = rng.normal(size=(50, 3))
+        means = rng.normal(size=(2, 3))
+        factors = rng.normal(size=(2, 3, 3))
+        covariances = factors @ factors.transpose(0, 2, 1) + np.eye(3)
+        weights = np.array([0.3, 0.7])
+        expected = np.empty((50, 2))
+        for j in range(2):
+            diff = rows - means[j]
+            distances = np.einsum('ij,jk,ik->i', diff, np.linalg.inv(covariances[j]), diff)
+            expected[:, j] = np.log(weights[j]) - 0.5 * (3 * np.log(2 * np.pi) + np.log(np.linalg.det(covariances[j]))
+                                                         + distances)
+        np.testing.assert_allclose(Gaussians(weights, means, covariances, 'full').log_densities(rows), expected)
+        diagonal = np.diagonal(covariances, axis1=1, axis2=2)
+        np.testing.assert_allclose(Gaussians(weights, means, diagonal, 'diag').log_densities(rows),
+                                   Gaussians(weights, means, np.stack([np.diag(d) for d in diagonal]),
+                                             'full').log_densities(rows))
+        responsibilities, likelihood = Gaussians(weights, means, covariances, 'full').expectation(rows)
+        np.testing.assert_allclose(responsibilities.sum(axis=1), 1)
+        np.testing.assert_allclose(likelihood, np.log(np.exp(expected).sum(axis=1)))
+
+    def test_statistics(self):
+        rng = np.random.default_rng(2)
+        rows = rng.normal(size=(40, 2))
+        responsibilities = rng.dirichlet([1, 1, 1], size=40)
+        statistics = Statistics.of(rows[:25], responsibilities[:25], 'full')
+        statistics.add(Statistics.of(rows[25:], responsibilities[25:], 'full'))
+        gaussians = Gaussians.from_statistics(statistics, 'full', 0)
+        for j in range(3):
+            weights = responsibilities[:, j]
+            np.testing.assert_allclose(gaussians.means[j], np.average(rows, axis=0, weights=weights))
+            np.testing.assert_allclose(gaussians.covariances[j], np.cov(rows.T, aweights=weights, bias=True))
+
+    def test_fit(self):
+        for covariance_type in ['full', 'diag', 'spherical']:
+            for mode in ['batch', 'online']:
+                np.random.seed(0)
+                model = GaussianMixture(self.data, 3, covariance_type=covariance_type, mode=mode,
+                                        iterations=None if mode == 'batch' else 5)
+                labels, means = model.run(True)
+                self.assertGreater(self.agreement(labels), 0.97)
+                np.testing.assert_allclose(np.sort(model.get_weights()), 1 / 3, atol=0.03)
+                self.assertEqual(labels[3], 0)
+                self.assertEqual(list(means.columns), ['x', 'y', 'category'])
+                self.assertEqual(len(model.get_steps()), len(model.get_telemetry()) + 1)
+
+    def test_chunks(self):
+        np.random.seed(0)
+        model = GaussianMixture(self.data, 3)
+        model.run(False)
+        chunks = [self.data.iloc[start:start + 700] for start in range(0, self.data.shape[0], 700)]
+        for mode in ['batch', 'online']:
+            np.random.seed(0)
+            chunked = GaussianMixture(chunks, 3, mode=mode, iterations=None if mode == 'batch' else 5)
+            labels, _ = chunked.run(True)
+            self.assertEqual(labels.size, self.data.shape[0])
+            self.assertAlmostEqual(chunked.log_likelihood, model.log_likelihood, places=2)
+            self.assertEqual(chunked.get_preview().shape[0], 700)
+        with self.assertRaises(TypeError):
+            GaussianMixture(iter(chunks), 3)
+
+    def test_constant_column(self):
+        data = self.data[['x', 'y']].copy()
+        data['constant'] = 1.0
+        for covariance_type in ['full', 'diag', 'spherical']:
+            np.random.seed(0)
+            labels, _ = GaussianMixture(data, 3, covariance_type=covariance_type).run(False)
+            self.assertGreater(self.agreement(labels), 0.95)
+        with self.assertRaises(TypeError):
+            GaussianMixture(data, 3, reg_covariance=0)
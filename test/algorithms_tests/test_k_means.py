@@ -0,0 +1,343 @@
+from unittest import TestCase
+import sys
+import os
+import gc
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms.clustering import KMeans, KMeansSweep, OutOfCoreKMeans, WarmStart, CoresetBuilder, CoresetKMeans, \
+    MiniBatchKMeans
+from algorithms.clustering.k_means import init_types
+from algorithms.clustering.k_sweep import WarmStartSweep
+from data_import import ChunkedData
+
+
+class TestKMeans(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 150
+        self.data = pd.DataFrame({
+            'x': rng.normal(size=size),
+            'y': rng.normal(size=size) * 100,
+            'category': rng.choice(['a', 'b', 'c', None], size=size).astype(object),
+            'z': rng.integers(0, 3, size=size)
+        })
+        self.centroids = list(self.data.iloc[[0, 1, 2, 3]].itertuples(index=False))
+
+    def test_mark_labels_matches_row_distance(self):
+        for metrics in range(1, 5):
+            k_means = KMeans(self.data, 4, metrics=metrics)
+            k_means.centroids = self.centroids
+            k_means.mark_labels()
+            expected = [int(np.argmin([k_means.distance(row, centroid) for centroid in self.centroids]))
+                        for row in self.data.itertuples(index=False)]
+            self.assertListEqual(list(k_means.labels), expected)
+
+    def test_accelerated_algorithms_match_lloyd(self):
+        data = self.data[['x', 'y', 'category']]
+        centroids = list(data.iloc[[0, 1, 2, 3]].itertuples(index=False))
+        results = []
+        for algorithm in ['lloyd', 'hamerly', 'elkan']:
+            k_means = KMeans(data, 4, metrics=2, algorithm=algorithm)
+            k_means.get_centroids = lambda: list(centroids)
+            labels, _ = k_means.run_without_saving_steps()
+            results.append((list(labels), k_means.step_counter))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_parallel_repeats_match_sequential(self):
+        results = []
+        for processes in [1, 2]:
+            np.random.seed(0)
+            labels, centroids = KMeans(self.data, 3, metrics=2, repeats=3, processes=processes).run(False)
+            results.append((list(labels), centroids.values.tolist()))
+        self.assertEqual(results[0], results[1])
+
+    def test_repeats_from_given_centroids_match_one_run(self):
+        expected = KMeans(self.data, 4, metrics=2, centroids=self.centroids, iterations=0).run(False)[1]
+        for processes in [1, 2]:
+            k_means = KMeans(self.data, 4, metrics=2, centroids=self.centroids, repeats=4, iterations=0,
+                             processes=processes)
+            _, centroids = k_means.run(False)
+            self.assertEqual(centroids.values.tolist(), expected.values.tolist())
+
+    def test_encoded_rows_without_data_frame(self):
+        # a worker process gets the encoded rows and only the columns of the data
+        full = KMeans(self.data, 3, metrics=2)
+        header = KMeans(pd.DataFrame(columns=self.data.columns), 3, metrics=2, encoded=full.encoded)
+        for init in ['random_centroids', 'kmeanspp_centroids']:
+            np.random.seed(1)
+            expected = full.encoded.encode_rows(getattr(full, init)())
+            np.random.seed(1)
+            centroids = full.encoded.encode_rows(getattr(header, init)())
+            for part, expected_part in zip(centroids, expected):
+                np.testing.assert_array_equal(part, expected_part)
+
+    def test_criteria_choose_best_repeat(self):
+        data = self.data[['x', 'y']]
+        for criterion in ['inertia', 'dunn', 'davies-bouldin', 'silhouette']:
+            k_means = KMeans(data, 3, metrics=2, repeats=4, criterion=criterion)
+            k_means.run(False)
+            self.assertTrue(np.isfinite(k_means.score))
+        k_means = KMeans(data, 3, metrics=2)
+        labels, centroids = k_means.run(False)
+        expected = sum(min(k_means.distance(row, centroid) for centroid in centroids.itertuples(index=False))**2
+                       for row in data.itertuples(index=False))
+        self.assertAlmostEqual(k_means.check_solution(labels, list(centroids.itertuples(index=False))), expected)
+
+    def test_steps_history_reconstructs_steps(self):
+        k_means = KMeans(self.data, 4, metrics=2)
+        recorded = []
+        mark_labels = k_means.mark_labels
+
+        def record_labels():
+            count = mark_labels()
+            recorded.append(k_means.labels.copy())
+            return count
+        k_means.mark_labels = record_labels
+        labels, centroids = k_means.run_with_saving_steps()
+        steps = k_means.get_steps()
+        self.assertEqual(len(steps), len(recorded))
+        for step in [3, 0, len(recorded) - 1, 1]:
+            self.assertListEqual(list(steps.labels(step)), list(recorded[step]))
+        self.assertListEqual(list(steps[-1][0]), list(labels))
+        self.assertEqual(steps.centroids(-1).shape, (4, self.data.shape[1]))
+
+    def test_update_centroids_means_and_modes(self):
+        k_means = KMeans(self.data, 5, metrics=2)
+        k_means.centroids = self.centroids + [tuple(self.data.iloc[4])]
+        k_means.labels = np.arange(self.data.shape[0]) % 4
+        k_means.update_centroids()
+        for i in range(4):
+            group = self.data[k_means.labels == i]
+            counts = {}
+            mode = None
+            for value in group['category']:
+                counts[value] = counts.get(value, 0) + 1
+                if mode is None or counts[value] > counts[mode]:
+                    mode = value
+            self.assertAlmostEqual(k_means.centroids[i][0], group['x'].mean())
+            self.assertAlmostEqual(k_means.centroids[i][1], group['y'].mean())
+            self.assertEqual(k_means.centroids[i][2], mode)
+        # the empty cluster keeps its centroid
+        self.assertEqual(k_means.centroids[4][2], self.data.iloc[4]['category'])
+        self.assertEqual(k_means.centroids[4][0], self.data.iloc[4]['x'])
+
+    def test_tolerance_stops_early_and_telemetry_is_recorded(self):
+        data = self.data[['x', 'y']]
+        k_means = KMeans(data, 4, metrics=2)
+        k_means.get_centroids = lambda: list(data.iloc[[0, 1, 2, 3]].itertuples(index=False))
+        k_means.run_without_saving_steps()
+        records = k_means.get_telemetry()
+        self.assertEqual(len(records), k_means.step_counter + 2)
+        self.assertEqual(records[-1].reassigned, 0)
+        self.assertTrue(all(later.inertia <= earlier.inertia for earlier, later in zip(records, records[1:])))
+
+        stopped = KMeans(data, 4, metrics=2, min_reassigned=0.05)
+        stopped.get_centroids = k_means.get_centroids
+        stopped.run_without_saving_steps()
+        self.assertLess(stopped.step_counter, k_means.step_counter)
+        self.assertTrue(all(record.reassigned >= 0.05 * data.shape[0] for record in stopped.get_telemetry()[1:-1]))
+
+    def test_sweep_chooses_number_of_blobs(self):
+        rng = np.random.default_rng(1)
+        blobs = np.concatenate([center + rng.normal(size=(100, 2)) for center in [(0, 0), (20, 0), (0, 20)]])
+        data = pd.DataFrame(blobs, columns=['x', 'y'])
+        for criterion, processes in [('silhouette', 1), ('inertia', 1), ('silhouette', 2)]:
+            np.random.seed(0)
+            sweep = KMeansSweep(data, 6, min_clusters=2, metrics=2, init_type='kmeans++', criterion=criterion,
+                                processes=processes)
+            labels, centroids, curve = sweep.run(False)
+            self.assertListEqual(list(curve['clusters']), [2, 3, 4, 5, 6])
+            self.assertEqual(centroids.shape[0], 3)
+            self.assertEqual(len(np.unique(labels)), 3)
+
+    def test_sweep_worker_without_data_frame(self):
+        data = self.data[['x', 'y', 'category']]
+        sweep = KMeansSweep(data, 5, min_clusters=2, metrics=2, init_type='kmeans++')
+        rows = np.arange(50)
+        results = [WarmStartSweep(frame, sweep.encoded, sweep.sweep_parameters, rows).run([2, 3, 4], 7)
+                   for frame in [data, pd.DataFrame(columns=data.columns)]]
+        self.assertEqual([result[3] for result in results[0]], [result[3] for result in results[1]])
+
+    def test_float32_precision_and_working_set(self):
+        single = KMeans(self.data, 4, metrics=2, precision='float32', algorithm='hamerly')
+        double = KMeans(self.data, 4, metrics=2)
+        self.assertEqual(single.encoded.numeric.dtype, np.float32)
+        self.assertEqual(single.encoded.codes.dtype, np.int16)
+        self.assertLess(single.get_working_set()['data'], double.get_working_set()['data'])
+        for k_means in [single, double]:
+            k_means.get_centroids = lambda: list(self.centroids)
+        np.testing.assert_array_equal(single.run_without_saving_steps()[0], double.run_without_saving_steps()[0])
+        with self.assertRaises(TypeError):
+            KMeans(self.data, 4, precision='float16')
+
+    def test_warm_start_reuses_bounds_of_unchanged_rows(self):
+        data = self.data[['x', 'y', 'category']]
+        k_means = KMeans(data, 4, metrics=2)
+        centroids = list(data.iloc[[0, 1, 2, 3]].itertuples(index=False))
+        k_means.get_centroids = lambda: list(centroids)
+        k_means.run_without_saving_steps()
+        warm_start = WarmStart.from_model(k_means)
+        changed = pd.concat([data.drop(index=[5, 6, 7]), data.iloc[:10].set_index(data.index[:10] + 1000)])
+        changed.loc[20, 'x'] = 10.0
+        warm = KMeans(changed, 4, metrics=2, warm_start=warm_start)
+        cold = KMeans(changed, 4, metrics=2, algorithm='hamerly', centroids=list(k_means.centroids))
+        warm_labels, _ = warm.run_without_saving_steps()
+        cold_labels, _ = cold.run_without_saving_steps()
+        np.testing.assert_array_equal(warm_labels, cold_labels)
+        self.assertGreater(warm.get_skipped_distances()[0], 0)
+        self.assertEqual(cold.get_skipped_distances()[0], 0)
+        narrowed = KMeans(changed[['x', 'category']], 4, metrics=2, warm_start=warm_start)
+        self.assertEqual(narrowed.initial_centroids[0], (k_means.centroids[0][0], k_means.centroids[0][2]))
+
+    def test_warm_start_skipped_distances_count_every_computed_distance(self):
+        # uniform rows and many clusters - most rows are close to the boundaries of their clusters
+        data = pd.DataFrame(np.random.default_rng(3).uniform(size=(400, 2)), columns=['x', 'y'])
+        k_means = KMeans(data, 8, metrics=2)
+        k_means.get_centroids = lambda: list(data.iloc[:8].itertuples(index=False))
+        k_means.run_without_saving_steps()
+        warm_start = WarmStart.from_model(k_means)
+        # rows of the new index have no known bounds
+        changed = pd.concat([data.iloc[:20], data.set_index(data.index + 1000)])
+        warm = KMeans(changed, 8, metrics=2, warm_start=warm_start)
+        assignment = warm.assignment
+        computed = []
+        exact, recompute = assignment.exact, assignment.recompute
+
+        def counted_exact(rows, *args):
+            computed[-1] += rows.size
+            return exact(rows, *args)
+
+        def counted_recompute(rows, *args):
+            computed[-1] += rows.size * 8
+            return recompute(rows, *args)
+
+        def counted_assign(*args):
+            computed.append(0)
+            return assign(*args)
+
+        assign = assignment.assign
+        assignment.exact, assignment.recompute, assignment.assign = counted_exact, counted_recompute, counted_assign
+        warm.run_without_saving_steps()
+        expected = [changed.shape[0] * 8 - count for count in computed]
+        self.assertEqual(warm.get_skipped_distances(), expected)
+        self.assertEqual([record.skipped_distances for record in warm.get_telemetry()], expected)
+
+    def test_weights_count_rows_as_repeated(self):
+        data = self.data[['x', 'category']]
+        counts = np.arange(data.shape[0]) % 3 + 1
+        repeated = data.loc[data.index.repeat(counts)].reset_index(drop=True)
+        centroids = list(data.iloc[[0, 1, 2]].itertuples(index=False))
+        weighted = KMeans(data, 3, metrics=2, centroids=centroids, weights=counts)
+        plain = KMeans(repeated, 3, metrics=2, centroids=centroids)
+        weighted.run_without_saving_steps()
+        plain.run_without_saving_steps()
+        np.testing.assert_allclose(weighted.inertia, plain.inertia)
+        self.assertListEqual([centroid[1] for centroid in weighted.centroids],
+                             [centroid[1] for centroid in plain.centroids])
+
+    def test_coreset_from_chunks_estimates_cost(self):
+        rng = np.random.default_rng(1)
+        data = pd.DataFrame({'x': rng.normal(size=4000), 'y': rng.normal(size=4000) * 5,
+                             'category': rng.choice(['a', 'b'], size=4000)})
+        chunks = [data.iloc[start:start + 700] for start in range(0, data.shape[0], 700)]
+        rows, weights, positions = CoresetBuilder(chunks, 400, metrics=2).build()
+        pd.testing.assert_frame_equal(rows, data.iloc[positions].reset_index(drop=True))
+        self.assertAlmostEqual(weights.sum() / data.shape[0], 1, delta=0.2)
+        k_means = CoresetKMeans(chunks, 3, metrics=2, coreset_size=400)
+        labels, centroids = k_means.run(False)
+        self.assertEqual(labels.shape[0], data.shape[0])
+        self.assertEqual(centroids.shape, (3, 3))
+
+    def test_coreset_keeps_kinds_of_columns_of_the_data(self):
+        # codes look numeric on most rows, a single row makes the column categorical
+        rng = np.random.default_rng(2)
+        data = pd.DataFrame({'x': rng.normal(size=1000), 'code': rng.choice(['1', '2', '3'], size=1000).astype(object)})
+        data.loc[0, 'code'] = 'unknown'
+        k_means = CoresetKMeans(data, 3, metrics=2, coreset_size=20)
+        labels, centroids = k_means.run(False)
+        self.assertEqual(k_means.model.encoded.is_numeric, k_means.builder.encoded.is_numeric)
+        self.assertTrue(all(code in ['1', '2', '3', 'unknown'] for code in centroids['code']))
+        encoded = k_means.builder.encoded
+        expected, _ = k_means.builder.distances.assign(encoded.numeric, encoded.codes,
+                                                       *encoded.encode_rows(list(centroids.itertuples(index=False))))
+        np.testing.assert_array_equal(labels, expected)
+
+    def test_run_returns_labels_and_centroids(self):
+        labels, centroids = KMeans(self.data, 3, metrics=2).run(False)
+        self.assertEqual(labels.shape, (self.data.shape[0],))
+        self.assertEqual(centroids.shape, (3, self.data.shape[1]))
+        self.assertListEqual(list(centroids.columns), list(self.data.columns))
+
+    def test_init_types_choose_distinct_rows(self):
+        for init_type in init_types:
+            k_means = KMeans(self.data[['x', 'y']], 5, metrics=2, init_type=init_type)
+            centroids = k_means.get_centroids()
+            self.assertEqual(len(set(centroids)), 5, init_type)
+
+    def chunked(self, size: int):
+        """ the data as ChunkedData, read again in chunks of given size on every pass """
+        return ChunkedData(lambda: (self.data.iloc[start:start + size] for start in range(0, self.data.shape[0], size)),
+                           list(self.data.columns))
+
+    def test_chunked_data_can_be_iterated_again(self):
+        chunked = self.chunked(40)
+        first, second = list(chunked), list(chunked)
+        self.assertEqual(len(first), 4)
+        for chunk, again in zip(first, second):
+            pd.testing.assert_frame_equal(chunk, again)
+        pd.testing.assert_frame_equal(pd.concat(first), self.data)
+
+    def test_mini_batch_from_chunks_matches_in_memory(self):
+        results = []
+        for data in [self.data, self.chunked(self.data.shape[0])]:
+            np.random.seed(0)
+            labels, centroids = MiniBatchKMeans(data, 3, metrics=2, batch_size=32, passes=2).run(False)
+            results.append((list(labels), centroids.values.tolist()))
+        self.assertEqual(results[0], results[1])
+
+    def test_mini_batch_labels_cover_every_chunk(self):
+        chunks = [self.data.iloc[start:start + 40] for start in range(0, self.data.shape[0], 40)]
+        mini_batch = MiniBatchKMeans(chunks, 3, metrics=2, batch_size=16)
+        labels, centroids = mini_batch.run(False)
+        self.assertEqual(labels.shape[0], self.data.shape[0])
+        # the last pass labels every row with its nearest final centroid
+        k_means = KMeans(self.data, 3, metrics=2)
+        k_means.centroids = list(centroids.itertuples(index=False))
+        k_means.mark_labels()
+        np.testing.assert_array_equal(labels, k_means.labels)
+
+    def test_mini_batch_centroid_is_running_mean(self):
+        # well separated groups never change their centroids, so each centroid is the mean of all its rows
+        rng = np.random.default_rng(2)
+        data = pd.DataFrame({'x': np.concatenate([rng.normal(size=100), rng.normal(size=60) + 50])})
+        mini_batch = MiniBatchKMeans(data, 2, metrics=2, batch_size=7, init_type='kmeans++')
+        mini_batch.run(False)
+        centroids = np.sort(mini_batch.centroids_numeric[:, 0])
+        np.testing.assert_allclose(centroids, [data['x'][:100].mean(), data['x'][100:].mean()])
+        np.testing.assert_array_equal(np.sort(mini_batch.numeric_counts[:, 0]), [60, 100])
+
+    def test_out_of_core_matches_in_memory(self):
+        chunks = [self.data.iloc[start:start + 40] for start in range(0, self.data.shape[0], 40)]
+        for metrics in range(1, 4):
+            k_means = KMeans(self.data, 4, metrics=metrics)
+            k_means.get_centroids = lambda: list(self.centroids)
+            labels, centroids = k_means.run_without_saving_steps()
+            out_of_core = OutOfCoreKMeans(chunks, 4, metrics=metrics)
+            out_of_core.get_centroids = lambda: list(self.centroids)
+            out_of_core_labels, out_of_core_centroids = out_of_core.run(False)
+            self.assertListEqual(list(labels), list(out_of_core_labels))
+            self.assertEqual(pd.DataFrame(centroids).values.tolist(), out_of_core_centroids.values.tolist())
+            self.assertEqual(k_means.step_counter, out_of_core.step_counter)
+            out_of_core.remove_labels(out_of_core_labels)
+
+    def test_out_of_core_removes_temporary_labels(self):
+        chunks = [self.data.iloc[start:start + 40] for start in range(0, self.data.shape[0], 40)]
+        out_of_core = OutOfCoreKMeans(chunks, 4, metrics=2, repeats=3)
+        labels, _ = out_of_core.run(False)
+        path = labels.filename
+        self.assertTrue(os.path.exists(path))
+        del out_of_core, labels
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
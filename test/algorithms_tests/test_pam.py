@@ -0,0 +1,112 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms import EncodedData, DistanceEngine
+from algorithms.clustering import PAM
+from algorithms.clustering.dissimilarity import Dissimilarities
+from algorithms.clustering.pam import nearest_medoids, removal_loss, swap_deltas
+
+
+class TestPAM(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 150
+        self.data = pd.DataFrame({
+            'x': rng.normal(size=size) + np.repeat([0, 4, 8], size // 3),
+            'y': rng.normal(size=size),
+            'category': rng.choice(['a', 'b', 'c'], size=size).astype(object)
+        })
+        self.data.loc[7, 'x'] = np.nan
+
+    @staticmethod
+    def expected(model: PAM, medoids: list) -> float:
+        """ total deviation after the best swaps (one at a time), with the matrix of distances of all pairs """
+        valid = model.valid
+        encoded = model.encoded
+        distances = Dissimilarities(encoded.numeric[valid], encoded.codes[valid],
+                                    model.distances).columns(np.arange(valid.size))
+        medoids = list(medoids)
+        while True:
+            cost = distances[:, medoids].min(axis=1).sum()
+            best, swap = 0, None
+            for i in range(len(medoids)):
+                for candidate in set(range(valid.size)) - set(medoids):
+                    changed = medoids.copy()
+                    changed[i] = candidate
+                    delta = distances[:, changed].min(axis=1).sum() - cost
+                    if delta < best - 1e-9:
+                        best, swap = delta, (i, candidate)
+            if swap is None:
+                return cost
+            medoids[swap[0]] = swap[1]
+
+    def test_dissimilarities(self):
+        encoded = EncodedData(self.data.dropna())
+        distances = DistanceEngine(encoded.is_numeric, 2, max_block_bytes=10000)
+        cached = Dissimilarities(encoded.numeric, encoded.codes, distances)
+        computed = Dissimilarities(encoded.numeric, encoded.codes, distances, max_bytes=0)
+        self.assertIsNotNone(cached.condensed)
+        self.assertIsNone(computed.condensed)
+        expected = distances.distances(encoded.numeric, encoded.codes, encoded.numeric, encoded.codes)
+        for (start, stop, first), (_, _, second) in zip(cached.column_blocks(), computed.column_blocks()):
+            np.testing.assert_array_equal(first, second)
+            np.testing.assert_allclose(first, expected[:, start:stop], rtol=1e-6)
+        indices = np.array([3, 0, encoded.size - 1])
+        np.testing.assert_array_equal(cached.columns(indices), computed.columns(indices))
+
+    def test_swaps(self):
+        for num_clusters in [1, 3, 5]:
+            for swap in ['fastpam1', 'fastpam2']:
+                for max_bytes in [2**20, 0]:
+                    np.random.seed(0)
+                    model = PAM(self.data, num_clusters, metrics=2, swap=swap, max_bytes=max_bytes)
+                    labels, medoids = model.run(True)
+                    # initial medoids (indices of rows without missing values) do not depend on the swaps
+                    initial = model.initial_medoids(Dissimilarities(model.encoded.numeric[model.valid],
+                                                                    model.encoded.codes[model.valid], model.distances))
+                    self.assertAlmostEqual(model.get_telemetry()[-1].inertia, self.expected(model, initial), places=3)
+                    self.assertEqual(medoids.shape, (num_clusters, 3))
+                    self.assertEqual(labels[7], 0)
+                    self.assertNotIn(7, model.get_medoids())
+                    self.assertEqual(len(model.get_steps()), len(model.get_telemetry()))
+
+    def test_swap_deltas_match_swapped_deviations(self):
+        rng = np.random.default_rng(2)
+        distances = np.abs(rng.normal(size=(40, 40)))
+        # the last medoid is a copy of the first one, so it has no rows
+        columns = distances[:, [0, 5, 9, 0]]
+        labels, nearest, second = nearest_medoids(columns)
+        loss = removal_loss(labels, nearest, second, columns.shape[1])
+        candidates = distances[:, 10:]
+        deltas = swap_deltas(candidates, labels, nearest, second, loss)
+        for i in range(columns.shape[1]):
+            for j in range(candidates.shape[1]):
+                swapped = columns.copy()
+                swapped[:, i] = candidates[:, j]
+                self.assertAlmostEqual(deltas[i, j], swapped.min(axis=1).sum() - nearest.sum())
+
+    def test_sampling(self):
+        np.random.seed(0)
+        best = PAM(self.data, 3)
+        best.run(False)
+        for method in ['clara', 'clarans']:
+            np.random.seed(0)
+            model = PAM(self.data, 3, method=method, sample_size=40)
+            labels, _ = model.run(False)
+            self.assertEqual(len(set(labels)), 3)
+            self.assertLess(model.cost, 1.2 * best.cost)
+
+    def test_chunks(self):
+        np.random.seed(0)
+        model = PAM(self.data, 3)
+        model.run(False)
+        np.random.seed(0)
+        chunked = PAM([self.data.iloc[:60], self.data.iloc[60:]], 3)
+        labels, _ = chunked.run(True)
+        np.testing.assert_array_equal(labels, model.labels)
+        # steps refer to the first rows of the first chunk
+        self.assertEqual(chunked.get_preview().shape[0], 60)
+        self.assertEqual(chunked.get_steps().labels(-1).shape[0], 60)
@@ -0,0 +1,37 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms import DatasetSchema
+
+
+class TestDatasetSchema(TestCase):
+    def setUp(self) -> None:
+        self.data = pd.DataFrame({
+            'number': [1.5, None, -2.0, 4.0],
+            'text': ['a', 'b', 'a', None],
+            'parsed': ['1', '2', '3', '10']
+        })
+
+    def test_describes_columns(self):
+        schema = DatasetSchema(self.data)
+        self.assertEqual(schema.size, 4)
+        self.assertListEqual(schema.is_numeric, [True, False, True])
+        self.assertListEqual(schema.nulls, [1, 1, 0])
+        self.assertListEqual(schema.cardinality, [3, 2, 4])
+        self.assertEqual(schema.bounds('parsed'), (1.0, 10.0))
+        self.assertTrue(np.isnan(schema.bounds('text')[0]))
+        self.assertListEqual(schema.numeric_columns(), ['number', 'parsed'])
+
+    def test_chunks_give_the_same_schema(self):
+        chunks = [self.data.iloc[:2], self.data.iloc[2:]]
+        whole = DatasetSchema(self.data).to_frame()
+        chunked = DatasetSchema(chunks).to_frame()
+        pd.testing.assert_frame_equal(whole.drop(columns='dtype'), chunked.drop(columns='dtype'))
+
+    def test_select_keeps_chosen_columns(self):
+        schema = DatasetSchema(self.data).select(['parsed', 'text'])
+        self.assertListEqual(schema.columns, ['parsed', 'text'])
+        self.assertListEqual(schema.is_numeric_for(['text', 'parsed']), [False, True])
@@ -0,0 +1,68 @@
+from unittest import TestCase
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from algorithms import EncodedData
+from algorithms.spatial import KDTree, BallTree, UniformGrid, SpatialTree
+
+
+class TestSpatial(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 500
+        data = pd.DataFrame({
+            'x': rng.normal(size=size),
+            'y': rng.integers(0, 5, size=size).astype(float),
+            'category': rng.choice(['a', 'b', 'c', None], size=size).astype(object)
+        })
+        self.encoded = EncodedData(data)
+        queries = EncodedData(data.iloc[:60])
+        self.queries = queries.numeric + rng.normal(size=queries.numeric.shape) * 0.1, queries.codes
+
+    def test_queries_match_brute_force(self):
+        for tree_type in [KDTree, BallTree]:
+            for metrics in range(1, 4):
+                tree = tree_type.from_encoded(self.encoded, metrics, leaf_size=8)
+                expected = tree.distances.distances(*self.queries, self.encoded.numeric, self.encoded.codes)
+                distances, indices = tree.query(*self.queries, k=5)
+                order = np.lexsort((np.tile(np.arange(expected.shape[1]), (expected.shape[0], 1)), expected), axis=1)
+                np.testing.assert_array_equal(indices, order[:, :5])
+                np.testing.assert_array_equal(distances, np.take_along_axis(expected, order[:, :5], axis=1))
+
+                radius = np.median(expected)
+                offsets, neighbours, _ = tree.query_radius(*self.queries, radius=radius)
+                for i in range(expected.shape[0]):
+                    np.testing.assert_array_equal(neighbours[offsets[i]:offsets[i + 1]],
+                                                  np.flatnonzero(expected[i] <= radius))
+                np.testing.assert_array_equal(tree.count_radius(*self.queries, radius=radius),
+                                              (expected <= radius).sum(axis=1))
+
+    def test_more_neighbours_than_rows(self):
+        tree = KDTree.from_encoded(self.encoded)
+        distances, indices = tree.query(self.encoded.numeric[:2], self.encoded.codes[:2], k=self.encoded.size + 2)
+        self.assertTrue(np.all(indices[:, -2:] == -1))
+        self.assertTrue(np.all(np.isinf(distances[:, -2:])))
+
+    def test_grid_radius_matches_brute_force(self):
+        numeric = self.encoded.numeric
+        queries = self.queries[0]
+        for metrics in range(1, 4):
+            grid = UniformGrid(numeric, 0.3, metrics)
+            expected = grid.distances.distances(queries, np.empty((queries.shape[0], 0), dtype=int),
+                                                numeric, np.empty((numeric.shape[0], 0), dtype=int))
+            offsets, neighbours, _ = grid.query_radius(queries, radius=0.3)
+            for i in range(expected.shape[0]):
+                np.testing.assert_array_equal(neighbours[offsets[i]:offsets[i + 1]], np.flatnonzero(expected[i] <= 0.3))
+
+    def test_tree_without_hooks_can_not_be_created(self):
+        class BoundlessTree(SpatialTree):
+            def allocate(self, capacity: int):
+                pass
+
+            def node_arrays(self):
+                return []
+
+        with self.assertRaises(TypeError):
+            BoundlessTree(self.encoded.numeric, self.encoded.codes)